@@ -13,6 +13,7 @@ from datetime import datetime, timezone
 from core.utils.config import config, EnvMode
 import asyncio
 from core.utils.logger import logger, structlog
+from core.utils.dataloader import dataloader_scope
 import time
 from collections import OrderedDict
 
@@ -74,8 +75,13 @@ async def lifespan(app: FastAPI):
         template_api.initialize(db)
         composio_api.initialize(db)
         
+        from core.sandbox.pool import sandbox_pool
+        sandbox_pool.start()
+        
         yield
         
+        await sandbox_pool.stop()
+        
         logger.debug("Cleaning up agent resources")
         await core_api.cleanup()
         
@@ -117,7 +123,8 @@ async def log_requests_middleware(request: Request, call_next):
     logger.debug(f"Request started: {method} {path} from {client_ip} | Query: {query_params}")
     
     try:
-        response = await call_next(request)
+        with dataloader_scope(db):
+            response = await call_next(request)
         process_time = time.time() - start_time
         logger.debug(f"Request completed: {method} {path} | Status: {response.status_code} | Time: {process_time:.2f}s")
         return response
@@ -514,6 +514,21 @@ async def admin_install_suna_for_user(
             detail=f"Failed to install Suna agent for user {account_id}"
         )
 
+@router.get("/db-pool/metrics")
+async def get_db_pool_metrics(_: bool = Depends(verify_admin_api_key)) -> Dict[str, Any]:
+    """PostgREST client pool metrics: in-flight requests, queue wait and per-table latency."""
+    return DBConnection().pool_metrics()
+
+@router.get("/sandbox-pool/stats")
+async def get_sandbox_pool_stats(_: bool = Depends(verify_admin_api_key)) -> Dict[str, Any]:
+    """Warm sandbox pool occupancy and claim latency, and sandbox time-to-ready."""
+    from core.sandbox.pool import sandbox_pool
+    from core.sandbox.sandbox import get_readiness_stats
+    return {
+        **await sandbox_pool.stats(),
+        'readiness': get_readiness_stats(),
+    }
+
 @router.get("/env-vars")
 def get_env_vars() -> Dict[str, str]:
     """Get environment variables (local mode only)."""
@@ -368,48 +368,17 @@ class AgentLoader:
             from core.versioning.version_service import get_version_service
             version_service = await get_version_service()
             
-            version = await version_service.get_version(
+            # Access was already checked against the agent row in load_agent,
+            # so read straight through the version cache.
+            version_row = await version_service.get_authorized_version_row(
                 agent_id=agent.agent_id,
-                version_id=agent.current_version_id,
-                user_id=user_id
+                version_id=agent.current_version_id
             )
             
-            version_dict = version.to_dict()
+            if not version_row:
+                raise ValueError(f"Version {agent.current_version_id} not found")
             
-            # Extract from new config format
-            if 'config' in version_dict and version_dict['config']:
-                config = version_dict['config']
-                tools = config.get('tools', {})
-                
-                agent.system_prompt = config.get('system_prompt', '')
-                agent.model = config.get('model')
-                agent.configured_mcps = tools.get('mcp', [])
-                agent.custom_mcps = tools.get('custom_mcp', [])
-                
-                from core.config_helper import _extract_agentpress_tools_for_run
-                agent.agentpress_tools = _extract_agentpress_tools_for_run(tools.get('agentpress', {}))
-                
-                agent.triggers = config.get('triggers', [])
-            else:
-                # Old format compatibility
-                agent.system_prompt = version_dict.get('system_prompt', '')
-                agent.model = version_dict.get('model')
-                agent.configured_mcps = version_dict.get('configured_mcps', [])
-                agent.custom_mcps = version_dict.get('custom_mcps', [])
-                
-                from core.config_helper import _extract_agentpress_tools_for_run
-                agent.agentpress_tools = _extract_agentpress_tools_for_run(
-                    version_dict.get('agentpress_tools', {})
-                )
-                
-                agent.triggers = []
-            
-            agent.version_name = version_dict.get('version_name', 'v1')
-            agent.version_number = version_dict.get('version_number')
-            agent.version_created_at = version_dict.get('created_at')
-            agent.version_updated_at = version_dict.get('updated_at')
-            agent.version_created_by = version_dict.get('created_by')
-            agent.restrictions = {}
+            self._apply_version_config(agent, version_row)
             
         except Exception as e:
             logger.warning(f"Failed to load version for agent {agent.agent_id}: {e}")
@@ -443,25 +412,28 @@ class AgentLoader:
             return
         
         try:
-            # Use versioning service instead of direct config access
             from core.versioning.version_service import get_version_service
             version_service = await get_version_service()
             
-            # Create version map using versioning service
-            version_map = {}
+            # Group by owning account so authorization runs once per account,
+            # then fetch every requested version row in a single query.
+            refs_by_account: Dict[str, Dict[str, str]] = {}
             for agent in agents:
                 if agent.current_version_id and not agent.is_suna_default:
-                    try:
-                        version = await version_service.get_version(
-                            agent_id=agent.agent_id,
-                            version_id=agent.current_version_id,
-                            user_id=agent.account_id
-                        )
-                        if version:
-                            version_map[agent.agent_id] = version.to_dict()
-                    except Exception as e:
-                        logger.warning(f"Failed to load version {agent.current_version_id} for agent {agent.agent_id}: {e}")
-                        continue
+                    refs_by_account.setdefault(agent.account_id, {})[agent.current_version_id] = agent.agent_id
+            
+            version_rows: Dict[str, Dict[str, Any]] = {}
+            for account_id, version_refs in refs_by_account.items():
+                try:
+                    version_rows.update(await version_service.get_version_rows(version_refs, user_id=account_id))
+                except Exception as e:
+                    logger.warning(f"Failed to batch load versions for account {account_id}: {e}")
+            
+            version_map = {
+                agent.agent_id: version_rows[agent.current_version_id]
+                for agent in agents
+                if not agent.is_suna_default and agent.current_version_id in version_rows
+            }
             
             # Apply configs
             for agent in agents:
@@ -496,6 +468,9 @@ class AgentLoader:
         agent.triggers = config.get('triggers', [])
         agent.version_name = version_row.get('version_name', 'v1')
         agent.version_number = version_row.get('version_number')
+        agent.version_created_at = version_row.get('created_at')
+        agent.version_updated_at = version_row.get('updated_at')
+        agent.version_created_by = version_row.get('created_by')
         agent.restrictions = {}
 
 
@@ -14,6 +14,8 @@ from core.utils.config import config, EnvMode
 from core.services import redis
 from core.sandbox.sandbox import create_sandbox, delete_sandbox
 from core.utils.sandbox_utils import generate_unique_filename, get_uploads_directory
+from core.utils.preflight import PreflightExecutor
+from core.utils.dataloader import detached_context, load_row
 from run_agent_background import run_agent_background
 
 from core.ai_models import model_manager
@@ -68,9 +70,6 @@ async def start_agent(
     model_name = body.model_name
     logger.debug(f"Original model_name from request: {model_name}")
 
-    # Log the model name after alias resolution using new model manager
-    from core.ai_models import model_manager
-    
     # Handle None model_name - resolve only if provided
     if model_name:
         resolved_model = model_manager.resolve_model_id(model_name)
@@ -83,79 +82,64 @@ async def start_agent(
     logger.debug(f"Starting new agent for thread: {thread_id} with config: model={model_name} (Instance: {utils.instance_id})")
     client = await utils.db.client
 
-
-    thread_result = await client.table('threads').select('project_id', 'account_id', 'metadata').eq('thread_id', thread_id).execute()
-
-    if not thread_result.data:
-        raise HTTPException(status_code=404, detail="Thread not found")
-    thread_data = thread_result.data[0]
-    project_id = thread_data.get('project_id')
-    account_id = thread_data.get('account_id')
-    thread_metadata = thread_data.get('metadata', {})
-
-    if account_id != user_id:
-        await verify_and_authorize_thread_access(client, thread_id, user_id)
-
-    structlog.contextvars.bind_contextvars(
-        project_id=project_id,
-        account_id=account_id,
-        thread_metadata=thread_metadata,
-    )
-    
-    # Load agent configuration using unified loader
     from .agent_loader import get_agent_loader
     loader = await get_agent_loader()
-    
-    agent_data = None
-    effective_agent_id = body.agent_id
-    
-    logger.debug(f"[AGENT LOAD] Loading agent: {effective_agent_id or 'default'}")
-    
-    # Try to load specified agent
-    if effective_agent_id:
-        try:
-            agent_data = await loader.load_agent(effective_agent_id, user_id, load_config=True)
-            logger.debug(f"Using agent {agent_data.name} ({effective_agent_id}) version {agent_data.version_name}")
-        except HTTPException as e:
-            if body.agent_id:
-                raise  # Explicit agent not found - fail
-            logger.warning(f"Stored agent_id {effective_agent_id} not found, falling back to default")
-    
-    # Fall back to default agent
-    if not agent_data:
+
+    # Pre-flight checks run as a dependency graph: independent steps (thread
+    # lookup and explicit agent load, then billing/limits/model resolution)
+    # execute concurrently and the first failure short-circuits the rest.
+    async def fetch_thread(_):
+        thread_data = await load_row(client, 'threads', 'thread_id', thread_id)
+        if not thread_data:
+            raise HTTPException(status_code=404, detail="Thread not found")
+        return thread_data
+
+    async def check_access(deps):
+        account_id = deps['thread'].get('account_id')
+        if account_id != user_id:
+            await verify_and_authorize_thread_access(client, thread_id, user_id)
+        return account_id
+
+    async def load_requested_agent(_):
+        logger.debug(f"[AGENT LOAD] Loading agent: {body.agent_id}")
+        # Explicit agent not found - fail
+        agent_data = await loader.load_agent(body.agent_id, user_id, load_config=True)
+        logger.debug(f"Using agent {agent_data.name} ({body.agent_id}) version {agent_data.version_name}")
+        return agent_data
+
+    async def load_default_agent(deps):
+        account_id = deps['access']
         logger.debug(f"[AGENT LOAD] Loading default agent")
         default_agent = await client.table('agents').select('agent_id').eq('account_id', account_id).eq('is_default', True).maybe_single().execute()
-        
+
         if default_agent.data:
             agent_data = await loader.load_agent(default_agent.data['agent_id'], user_id, load_config=True)
             logger.debug(f"Using default agent: {agent_data.name} ({agent_data.agent_id}) version {agent_data.version_name}")
-        else:
-            logger.warning(f"[AGENT LOAD] No default agent found for account {account_id}")
-    
-    # Convert to dict for backward compatibility with rest of function
-    agent_config = agent_data.to_dict() if agent_data else None
-    
-    if agent_config:
-        logger.debug(f"Using agent {agent_config['agent_id']} for this agent run (thread remains agent-agnostic)")
+            return agent_data
 
-    # Unified billing and model access check
-    can_proceed, error_message, context = await billing_integration.check_model_and_billing_access(
-        account_id, model_name, client
-    )
-    
-    if not can_proceed:
-        if context.get("error_type") == "model_access_denied":
-            raise HTTPException(status_code=403, detail={
-                "message": error_message, 
-                "allowed_models": context.get("allowed_models", [])
-            })
-        elif context.get("error_type") == "insufficient_credits":
-            raise HTTPException(status_code=402, detail={"message": error_message})
-        else:
-            raise HTTPException(status_code=500, detail={"message": error_message})
-    
-    # Check agent run limits (only if not in local mode)
-    if config.ENV_MODE != EnvMode.LOCAL:
+        logger.warning(f"[AGENT LOAD] No default agent found for account {account_id}")
+        return None
+
+    async def check_billing(deps):
+        account_id = deps['access']
+        # Unified billing and model access check
+        can_proceed, error_message, context = await billing_integration.check_model_and_billing_access(
+            account_id, model_name, client
+        )
+
+        if not can_proceed:
+            if context.get("error_type") == "model_access_denied":
+                raise HTTPException(status_code=403, detail={
+                    "message": error_message, 
+                    "allowed_models": context.get("allowed_models", [])
+                })
+            elif context.get("error_type") == "insufficient_credits":
+                raise HTTPException(status_code=402, detail={"message": error_message})
+            else:
+                raise HTTPException(status_code=500, detail={"message": error_message})
+
+    async def check_run_limit(deps):
+        account_id = deps['access']
         limit_check = await check_agent_run_limit(client, account_id)
         if not limit_check['can_start']:
             error_detail = {
@@ -167,17 +151,55 @@ async def start_agent(
             logger.warning(f"Agent run limit exceeded for account {account_id}: {limit_check['running_count']} running agents")
             raise HTTPException(status_code=429, detail=error_detail)
 
-    effective_model = model_name
-    if not model_name and agent_config and agent_config.get('model'):
-        effective_model = agent_config['model']
-        logger.debug(f"No model specified by user, using agent's configured model: {effective_model}")
-    elif not model_name:
+    async def resolve_model(deps):
+        agent_data = deps['agent']
+        agent_model = agent_data.model if agent_data else None
+        if model_name:
+            logger.debug(f"Using user-selected model: {model_name}")
+            return model_name
+        if agent_model:
+            logger.debug(f"No model specified by user, using agent's configured model: {agent_model}")
+            return agent_model
         # No model from user or agent, use default for user's tier
-        from core.ai_models import model_manager
-        effective_model = await model_manager.get_default_model_for_user(client, account_id)
+        effective_model = await model_manager.get_default_model_for_user(client, deps['access'])
         logger.debug(f"Using default model for user: {effective_model}")
+        return effective_model
+
+    preflight = PreflightExecutor("start_agent")
+    preflight.add("thread", fetch_thread)
+    preflight.add("access", check_access, depends_on=["thread"])
+    if body.agent_id:
+        # Only load agents for callers that passed the thread access check
+        preflight.add("agent", load_requested_agent, depends_on=["access"])
     else:
-        logger.debug(f"Using user-selected model: {effective_model}")
+        preflight.add("agent", load_default_agent, depends_on=["access"])
+    preflight.add("billing", check_billing, depends_on=["access"])
+    # Check agent run limits (only if not in local mode)
+    if config.ENV_MODE != EnvMode.LOCAL:
+        preflight.add("run_limit", check_run_limit, depends_on=["access"])
+    preflight.add("model", resolve_model, depends_on=["agent", "access"])
+
+    preflight_results = await preflight.run()
+
+    thread_data = preflight_results['thread']
+    project_id = thread_data.get('project_id')
+    account_id = thread_data.get('account_id')
+    thread_metadata = thread_data.get('metadata', {})
+
+    structlog.contextvars.bind_contextvars(
+        project_id=project_id,
+        account_id=account_id,
+        thread_metadata=thread_metadata,
+    )
+
+    agent_data = preflight_results['agent']
+    effective_model = preflight_results['model']
+
+    # Convert to dict for backward compatibility with rest of function
+    agent_config = agent_data.to_dict() if agent_data else None
+    
+    if agent_config:
+        logger.debug(f"Using agent {agent_config['agent_id']} for this agent run (thread remains agent-agnostic)")
     
     agent_run = await client.table('agent_runs').insert({
         "thread_id": thread_id,
@@ -621,8 +643,6 @@ async def initiate_agent_with_files(
     client = await utils.db.client
     account_id = user_id # In Basejump, personal account_id is the same as user_id
 
-    from core.ai_models import model_manager
-    
     if model_name is None:
         # Use tier-based default model from registry
         model_name = await model_manager.get_default_model_for_user(client, account_id)
@@ -807,7 +827,10 @@ async def initiate_agent_with_files(
         logger.debug(f"Created new thread: {thread_id}")
 
         # Trigger Background Naming Task
-        asyncio.create_task(generate_and_update_project_name(project_id=project_id, prompt=prompt))
+        asyncio.create_task(
+            generate_and_update_project_name(project_id=project_id, prompt=prompt),
+            context=detached_context(),
+        )
 
         # 4. Upload Files to Sandbox (if any)
         message_content = prompt
@@ -12,6 +12,7 @@ from core.agentpress.context_manager import ContextManager
 from core.agentpress.response_processor import ResponseProcessor, ProcessorConfig
 from core.agentpress.error_processor import ErrorProcessor
 from core.services.supabase import DBConnection
+from core.utils.dataloader import DataLoader
 from core.utils.logger import logger
 from langfuse.client import StatefulGenerationClient, StatefulTraceClient
 from core.services.langfuse import langfuse
@@ -26,6 +27,8 @@ class ThreadManager:
 
     def __init__(self, trace: Optional[StatefulTraceClient] = None, agent_config: Optional[dict] = None):
         self.db = DBConnection()
+        # Run-scoped query coalescing shared with every tool of this run
+        self.loader = DataLoader(self.db)
         self.tool_registry = ToolRegistry()
         
         self.trace = trace
@@ -140,9 +143,8 @@ class ThreadManager:
             usage_type = "FALLBACK ESTIMATE" if is_fallback else ("ESTIMATED" if is_estimated else "EXACT")
             logger.info(f"💰 Usage type: {usage_type} - prompt={prompt_tokens}, completion={completion_tokens}, cache_read={cache_read_tokens}, cache_creation={cache_creation_tokens}")
             
-            client = await self.db.client
-            thread_row = await client.table('threads').select('account_id').eq('thread_id', thread_id).limit(1).execute()
-            user_id = thread_row.data[0]['account_id'] if thread_row.data and len(thread_row.data) > 0 else None
+            thread_row = await self.loader.load('threads', 'thread_id', thread_id)
+            user_id = thread_row['account_id'] if thread_row else None
             
             if user_id and (prompt_tokens > 0 or completion_tokens > 0):
 
@@ -482,6 +484,7 @@ class ThreadManager:
                             # Clear the flag
                             metadata['cache_needs_rebuild'] = False
                             await client.table('threads').update({'metadata': metadata}).eq('thread_id', thread_id).execute()
+                            self.loader.invalidate('threads', 'thread_id', thread_id)
                 except Exception as e:
                     logger.debug(f"Failed to check cache_needs_rebuild flag: {e}")
             
@@ -1,4 +1,3 @@
-import httpx
 import tempfile
 from pathlib import Path
 from typing import Optional
@@ -11,6 +10,7 @@ from core.utils.logger import logger
 from core.services.supabase import DBConnection
 from .google_docs_service import GoogleDocsService
 from .google_slides_service import OAuthTokenService
+from .sandbox_conversion import convert_in_sandbox
 
 class ConvertToDocsRequest(BaseModel):
     doc_path: str = Field(..., description="Path to the document file in sandbox")
@@ -68,39 +68,12 @@ async def convert_and_upload_to_google_docs(
             )
             return response
 
-        convert_url = f"{request.sandbox_url}/document/convert-to-docx"
-        convert_payload = {
-            "doc_path": request.doc_path,
-            "download": True, 
-        }
-        logger.info(f"Calling sandbox conversion endpoint: POST {convert_url}")
-        logger.debug(f"Conversion payload: {convert_payload}")
-        
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            convert_response = await client.post(
-                convert_url,
-                json=convert_payload
-            )
-            
-            logger.debug(f"Sandbox response status: {convert_response.status_code}")
-            
-            if not convert_response.is_success:
-                try:
-                    error_detail = convert_response.json().get("detail", "Unknown error")
-                except:
-                    error_detail = convert_response.text
-                logger.error(f"Sandbox conversion failed: {error_detail}")
-                raise HTTPException(
-                    status_code=convert_response.status_code,
-                    detail=f"DOCX conversion failed: {error_detail}"
-                )
-            
-            docx_content = convert_response.content
-            
-            filename = "document.docx" 
-            content_disposition = convert_response.headers.get("Content-Disposition", "")
-            if "filename=" in content_disposition:
-                filename = content_disposition.split('filename="')[1].split('"')[0]
+        logger.info(f"Converting document in sandbox: {request.doc_path}")
+        docx_content, filename = await convert_in_sandbox(
+            request.sandbox_url,
+            "docx",
+            {"doc_path": request.doc_path},
+        )
         
         logger.info(f"DOCX conversion successful: {filename}")
         
@@ -10,7 +10,6 @@ Endpoints:
 """
 
 import os
-import httpx
 import tempfile
 from pathlib import Path
 from typing import Optional
@@ -23,6 +22,7 @@ from core.utils.auth_utils import verify_and_get_user_id_from_jwt
 from core.utils.logger import logger
 from core.services.supabase import DBConnection
 from .google_slides_service import GoogleSlidesService, OAuthTokenService
+from .sandbox_conversion import convert_in_sandbox
 
 
 # ================== PYDANTIC MODELS ==================
@@ -224,34 +224,11 @@ async def convert_and_upload_to_google_slides(
         # Step 2: Call sandbox to convert HTML to PPTX
         logger.debug(f"Converting presentation at {request.presentation_path}")
         
-        async with httpx.AsyncClient(timeout=120.0) as client:
-            convert_response = await client.post(
-                f"{request.sandbox_url}/presentation/convert-to-pptx",
-                json={
-                    "presentation_path": request.presentation_path,
-                    "download": True,  # Get PPTX content directly, don't store locally
-                    "upload_to_google_slides": False,  # We'll handle Google upload from main backend
-                }
-            )
-            
-            if not convert_response.is_success:
-                try:
-                    error_detail = convert_response.json().get("detail", "Unknown error")
-                except:
-                    error_detail = convert_response.text
-                raise HTTPException(
-                    status_code=convert_response.status_code,
-                    detail=f"PPTX conversion failed: {error_detail}"
-                )
-            
-            # When download=True, we get the PPTX file content directly
-            pptx_content = convert_response.content
-            
-            # Extract filename from Content-Disposition header
-            filename = "presentation.pptx"  # default
-            content_disposition = convert_response.headers.get("Content-Disposition", "")
-            if "filename=" in content_disposition:
-                filename = content_disposition.split('filename="')[1].split('"')[0]
+        pptx_content, filename = await convert_in_sandbox(
+            request.sandbox_url,
+            "pptx",
+            {"presentation_path": request.presentation_path},
+        )
         
         logger.debug(f"PPTX conversion successful: {filename}")
         
@@ -0,0 +1,82 @@
+"""
+Run document conversions through the sandbox's background job API.
+
+The synchronous /presentation/convert-to-* and /document/convert-to-docx
+endpoints hold the connection for the whole conversion, so a large deck ran
+into the 120s client timeout. Instead, the job is submitted to
+/jobs/convert-to-{kind}, polled until it finishes, and the result downloaded.
+"""
+
+import asyncio
+import time
+from typing import Dict, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from core.utils.logger import logger
+
+REQUEST_TIMEOUT_SECONDS = 30.0
+POLL_INTERVAL_SECONDS = 1.0
+MAX_POLL_INTERVAL_SECONDS = 5.0
+CONVERSION_TIMEOUT_SECONDS = 900.0
+
+
+def _error_detail(response: httpx.Response) -> str:
+    try:
+        return response.json().get("detail", "Unknown error")
+    except Exception:
+        return response.text
+
+
+async def convert_in_sandbox(sandbox_url: str, kind: str, payload: Dict) -> Tuple[bytes, str]:
+    """Convert via the sandbox job API and return (file content, filename)."""
+    label = kind.upper()
+    async with httpx.AsyncClient(timeout=REQUEST_TIMEOUT_SECONDS) as client:
+        submit_response = await client.post(f"{sandbox_url}/jobs/convert-to-{kind}", json=payload)
+        if not submit_response.is_success:
+            raise HTTPException(
+                status_code=submit_response.status_code,
+                detail=f"{label} conversion failed: {_error_detail(submit_response)}"
+            )
+        job = submit_response.json()
+        job_url = f"{sandbox_url}/jobs/{job['job_id']}"
+        logger.debug(f"Submitted {label} conversion job {job['job_id']}")
+
+        deadline = time.monotonic() + CONVERSION_TIMEOUT_SECONDS
+        interval = POLL_INTERVAL_SECONDS
+        while job["status"] not in ("completed", "failed", "cancelled"):
+            if time.monotonic() > deadline:
+                try:
+                    await client.delete(job_url)
+                except httpx.HTTPError:
+                    pass
+                raise HTTPException(
+                    status_code=504,
+                    detail=f"{label} conversion did not finish within {CONVERSION_TIMEOUT_SECONDS:.0f}s"
+                )
+            await asyncio.sleep(interval)
+            interval = min(interval * 1.5, MAX_POLL_INTERVAL_SECONDS)
+            status_response = await client.get(job_url)
+            if not status_response.is_success:
+                raise HTTPException(
+                    status_code=status_response.status_code,
+                    detail=f"{label} conversion failed: {_error_detail(status_response)}"
+                )
+            job = status_response.json()
+            progress = job.get("progress") or {}
+            logger.debug(f"{label} conversion job {job['job_id']}: {job['status']} ({progress.get('completed')}/{progress.get('total')})")
+
+        if job["status"] != "completed":
+            raise HTTPException(
+                status_code=500,
+                detail=f"{label} conversion {job['status']}: {job.get('error') or 'Unknown error'}"
+            )
+
+        result_response = await client.get(f"{job_url}/result")
+        if not result_response.is_success:
+            raise HTTPException(
+                status_code=result_response.status_code,
+                detail=f"{label} conversion failed: {_error_detail(result_response)}"
+            )
+        return result_response.content, job["result"]["filename"]
@@ -83,6 +83,7 @@ class EntryResponse(BaseModel):
     summary: str
     file_size: int
     created_at: str
+    summary_status: str = 'completed'
 
 class UpdateEntryRequest(BaseModel):
     summary: str = Field(..., min_length=1, max_length=1000)
@@ -376,7 +377,7 @@ async def get_folder_entries(
             raise HTTPException(status_code=404, detail="Folder not found")
         
         result = await client.table('knowledge_base_entries').select(
-            'entry_id, filename, summary, file_size, created_at'
+            'entry_id, filename, summary, summary_status, file_size, created_at'
         ).eq('folder_id', folder_id).eq('is_active', True).order('created_at', desc=True).execute()
         
         return [
@@ -385,7 +386,8 @@ async def get_folder_entries(
                 filename=entry['filename'],
                 summary=entry['summary'],
                 file_size=entry['file_size'],
-                created_at=entry['created_at']
+                created_at=entry['created_at'],
+                summary_status=entry.get('summary_status') or 'completed'
             )
             for entry in result.data
         ]
@@ -452,9 +454,10 @@ async def update_entry(
         if not entry_result.data:
             raise HTTPException(status_code=404, detail="Entry not found")
         
-        # Update the summary
+        # Update the summary (a manual summary also ends a pending background summary)
         update_result = await client.table('knowledge_base_entries').update({
-            'summary': request.summary
+            'summary': request.summary,
+            'summary_status': 'completed'
         }).eq('entry_id', entry_id).execute()
         
         if not update_result.data:
@@ -467,7 +470,8 @@ async def update_entry(
             filename=updated_entry['filename'],
             summary=updated_entry['summary'],
             file_size=updated_entry['file_size'],
-            created_at=updated_entry['created_at']
+            created_at=updated_entry['created_at'],
+            summary_status=updated_entry.get('summary_status') or 'completed'
         )
         
     except HTTPException:
@@ -0,0 +1,188 @@
+"""
+Text extraction for knowledge base uploads.
+
+PDF page extraction, python-docx parsing and encoding detection are CPU-bound
+and, for a 50MB upload, take seconds. They run in a bounded process pool so
+the API worker's event loop keeps serving other requests:
+
+- at most EXTRACTION_WORKERS files are extracted at once; further uploads
+  wait for a free worker without occupying the pool's queue
+- PDFs are extracted page by page and DOCX paragraph by paragraph, stopping
+  at MAX_EXTRACTED_CHARS or when the per-file time budget runs out, and
+  returning what was extracted so far
+- a worker that overruns EXTRACTION_TIMEOUT (e.g. stuck inside a single
+  malformed page) is killed and the pool restarted
+- encoding detection only looks at the first CHARDET_SAMPLE_BYTES
+- workers are started with the forkserver method, so they do not inherit a
+  fork of the API worker's event loop, connections and thread-held locks
+"""
+
+import asyncio
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Optional
+
+import chardet
+
+from core.utils.logger import logger
+
+EXTRACTION_WORKERS = int(os.getenv("KB_EXTRACTION_WORKERS", "2"))
+EXTRACTION_TIMEOUT = float(os.getenv("KB_EXTRACTION_TIMEOUT", "60"))
+# Time the worker keeps for returning partial text before the hard timeout kills it
+EXTRACTION_GRACE = 5.0
+CHARDET_SAMPLE_BYTES = 64 * 1024
+# Summaries read at most ~1M tokens, so anything past this is never used
+MAX_EXTRACTED_CHARS = 4_000_000
+
+TEXT_EXTENSIONS = ['.txt', '.json', '.xml', '.csv', '.yml', '.yaml', '.md', '.log', '.ini', '.cfg', '.conf']
+TEXT_MIME_TYPES = ['application/json', 'application/xml', 'text/xml']
+
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+
+
+def detect_encoding(file_content: bytes) -> str:
+    detected = chardet.detect(file_content[:CHARDET_SAMPLE_BYTES])
+    return detected.get('encoding') or 'utf-8'
+
+
+def _truncation_note(filename: str, reason: str) -> str:
+    return f"\n\n[Content of {filename} truncated: {reason}]"
+
+
+def _extract_pdf(file_content: bytes, filename: str, deadline: float) -> str:
+    import PyPDF2
+
+    reader = PyPDF2.PdfReader(io.BytesIO(file_content))
+    parts = []
+    length = 0
+    total_pages = len(reader.pages)
+    for index, page in enumerate(reader.pages):
+        text = page.extract_text() or ''
+        parts.append(text)
+        length += len(text) + 2
+        if length >= MAX_EXTRACTED_CHARS:
+            parts.append(_truncation_note(filename, f"stopped after page {index + 1} of {total_pages}, size limit reached"))
+            break
+        if time.monotonic() > deadline and index + 1 < total_pages:
+            parts.append(_truncation_note(filename, f"stopped after page {index + 1} of {total_pages}, time limit reached"))
+            break
+    return '\n\n'.join(parts)
+
+
+def _extract_docx(file_content: bytes, filename: str, deadline: float) -> str:
+    import docx
+
+    doc = docx.Document(io.BytesIO(file_content))
+    parts = []
+    length = 0
+    for paragraph in doc.paragraphs:
+        text = paragraph.text
+        parts.append(text)
+        length += len(text) + 1
+        if length >= MAX_EXTRACTED_CHARS:
+            parts.append(_truncation_note(filename, "size limit reached"))
+            break
+        if time.monotonic() > deadline:
+            parts.append(_truncation_note(filename, "time limit reached"))
+            break
+    return '\n'.join(parts)
+
+
+def _extract_text(file_content: bytes, filename: str, mime_type: str, time_budget: float) -> str:
+    """Extract text content from file bytes. Runs in a worker process."""
+    deadline = time.monotonic() + time_budget
+    file_extension = Path(filename).suffix.lower()
+
+    try:
+        # Handle text-based files (including JSON, XML, CSV, etc.)
+        if (file_extension in TEXT_EXTENSIONS
+            or mime_type.startswith('text/')
+            or mime_type in TEXT_MIME_TYPES):
+
+            encoding = detect_encoding(file_content)
+            try:
+                return file_content.decode(encoding)[:MAX_EXTRACTED_CHARS]
+            except (UnicodeDecodeError, LookupError):
+                return file_content.decode('utf-8', errors='replace')[:MAX_EXTRACTED_CHARS]
+
+        elif file_extension == '.pdf':
+            return _extract_pdf(file_content, filename, deadline)
+
+        elif file_extension == '.docx':
+            return _extract_docx(file_content, filename, deadline)
+
+        # For any other file type, try to decode as text (fallback)
+        else:
+            try:
+                content = file_content.decode(detect_encoding(file_content))
+                # Only return if it seems to be mostly text content
+                if len([c for c in content[:1000] if c.isprintable() or c.isspace()]) > 800:
+                    return content[:MAX_EXTRACTED_CHARS]
+            except:
+                pass
+
+            # If we can't extract text content, return a placeholder
+            return f"[Binary file: {filename}] - Content cannot be extracted as text, but file is stored and available for download."
+
+    except Exception as e:
+        return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}"
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=EXTRACTION_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _executor
+
+
+def _reset_executor():
+    """Kill the pool's workers (a stuck extraction cannot be cancelled otherwise) and start over lazily."""
+    global _executor
+    executor, _executor = _executor, None
+    if executor is None:
+        return
+    for process in list((getattr(executor, '_processes', None) or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def extract_text(file_content: bytes, filename: str, mime_type: str) -> str:
+    """Extract text in the process pool, bounded by EXTRACTION_WORKERS and EXTRACTION_TIMEOUT."""
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(EXTRACTION_WORKERS)
+
+    loop = asyncio.get_running_loop()
+    time_budget = max(EXTRACTION_TIMEOUT - EXTRACTION_GRACE, 1.0)
+
+    async with _slots:
+        for attempt in range(2):
+            executor = _get_executor()
+            started = time.monotonic()
+            try:
+                content = await asyncio.wait_for(
+                    loop.run_in_executor(executor, _extract_text, file_content, filename, mime_type, time_budget),
+                    timeout=EXTRACTION_TIMEOUT,
+                )
+                logger.debug(f"Extracted {len(content)} chars from {filename} in {time.monotonic() - started:.2f}s")
+                return content
+            except asyncio.TimeoutError:
+                logger.error(f"Content extraction for {filename} exceeded {EXTRACTION_TIMEOUT:.0f}s, restarting extraction workers")
+                if _executor is executor:
+                    _reset_executor()
+                return f"[Content extraction timed out for {filename}] - File is stored but its content could not be extracted in time."
+            except BrokenProcessPool:
+                # Another file's worker was killed or crashed; retry once on a fresh pool
+                if _executor is executor:
+                    _reset_executor()
+                if attempt:
+                    raise
@@ -1,18 +1,36 @@
 import os
-import io
 import uuid
 import re
-from typing import Dict, Any
+import asyncio
+import hashlib
+from typing import Dict, Any, List, Optional
 from pathlib import Path
 import mimetypes
 import chardet
 
-import PyPDF2
-import docx
-
 from core.utils.logger import logger
+from core.utils.cache import Cache
 from core.services.supabase import DBConnection
 from core.services.llm import make_llm_api_call
+from core.knowledge_base.extraction import extract_text
+from run_agent_background import summarize_knowledge_base_entry
+
+# Model priority: Google Gemini → OpenRouter → GPT-5 Mini
+SUMMARY_MODELS = [
+    "google/gemini-2.5-flash-lite",
+    "openrouter/google/gemini-2.5-flash-lite",
+    "gpt-5-mini",
+]
+# ~50k tokens per map call, well inside every model's context
+SUMMARY_CHUNK_CHARS = 200_000
+# LLM calls in flight for summaries across all uploads in this worker
+SUMMARY_CONCURRENCY = int(os.getenv("KB_SUMMARY_CONCURRENCY", "4"))
+SUMMARY_CACHE_TTL = 30 * 24 * 60 * 60
+# Bump when the prompts change so cached summaries are not reused
+SUMMARY_PROMPT_VERSION = 1
+PENDING_SUMMARY = "Summary is being generated for this file."
+
+_summary_slots: Optional[asyncio.Semaphore] = None
 
 class FileProcessor:
     SUPPORTED_EXTENSIONS = {'.txt', '.pdf', '.docx'}
@@ -97,16 +115,7 @@ class FileProcessor:
                 s3_path, file_content, {"content-type": mime_type}
             )
             
-            # Extract content for summary
-            content = self._extract_content(file_content, filename, mime_type)
-            if not content:
-                # If no content could be extracted, create a basic file info summary
-                content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
-            
-            # Generate LLM summary
-            summary = await self._generate_summary(content, filename)
-            
-            # Save to database
+            # Save to database; the summary is filled in by the background job
             entry_data = {
                 'entry_id': entry_id,
                 'folder_id': folder_id,
@@ -115,52 +124,180 @@ class FileProcessor:
                 'file_path': s3_path,
                 'file_size': len(file_content),
                 'mime_type': mime_type,
-                'summary': summary,
+                'summary': PENDING_SUMMARY,
+                'summary_status': 'pending',
                 'is_active': True
             }
             
-            result = await client.table('knowledge_base_entries').insert(entry_data).execute()
+            await client.table('knowledge_base_entries').insert(entry_data).execute()
+            
+            try:
+                # Summarized by a dramatiq worker from the stored file, so a restart
+                # of this process cannot leave the entry pending
+                summarize_knowledge_base_entry.send(entry_id)
+            except Exception as e:
+                logger.error(f"Error queuing summary for knowledge base entry {entry_id}: {str(e)}")
+                await self._store_summary(entry_id, self._failed_summary(filename, len(file_content), mime_type), 'failed')
             
             return {
                 'success': True,
                 'entry_id': entry_id,
                 'filename': filename,
-                'summary_length': len(summary)
+                'summary_status': 'pending'
             }
             
         except Exception as e:
             logger.error(f"Error processing file {filename}: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    async def summarize_entry(self, entry_id: str):
+        """Summarize a pending entry from its stored file. Runs on the dramatiq workers."""
+        client = await self.db.client
+        result = await client.table('knowledge_base_entries').select(
+            'file_path, filename, file_size, mime_type, summary_status'
+        ).eq('entry_id', entry_id).execute()
+        if not result.data or result.data[0].get('summary_status') != 'pending':
+            # Deleted, edited by the user, or already summarized by an earlier delivery
+            return
+        
+        entry = result.data[0]
+        try:
+            file_content = await client.storage.from_('file-uploads').download(entry['file_path'])
+        except Exception as e:
+            logger.error(f"Error downloading knowledge base entry {entry_id} for summary: {str(e)}")
+            await self._store_summary(
+                entry_id, self._failed_summary(entry['filename'], entry['file_size'], entry['mime_type']), 'failed'
+            )
+            return
+        
+        await self._summarize_entry(entry_id, file_content, entry['filename'], entry['mime_type'])
+    
+    async def _summarize_entry(self, entry_id: str, file_content: bytes, filename: str, mime_type: str):
+        """Extract the file, summarize it and store the summary on the entry."""
+        status = 'completed'
+        try:
+            content = await self._extract_content(file_content, filename, mime_type)
+            if not content:
+                # If no content could be extracted, create a basic file info summary
+                content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
+            summary = await self._generate_summary(content, filename)
+        except Exception as e:
+            logger.error(f"Error summarizing knowledge base entry {entry_id}: {str(e)}")
+            summary = self._failed_summary(filename, len(file_content), mime_type)
+            status = 'failed'
+        
+        await self._store_summary(entry_id, summary, status)
+    
+    def _failed_summary(self, filename: str, file_size: int, mime_type: str) -> str:
+        return f"File: {filename} ({file_size} bytes, {mime_type}). Summary generation failed."
+    
+    async def _store_summary(self, entry_id: str, summary: str, status: str):
+        try:
+            client = await self.db.client
+            # Only replace the placeholder: a summary edited by the user in the meantime wins
+            await client.table('knowledge_base_entries').update({
+                'summary': summary,
+                'summary_status': status
+            }).eq('entry_id', entry_id).eq('summary_status', 'pending').execute()
+            logger.info(f"Summary for knowledge base entry {entry_id} {status}")
+        except Exception as e:
+            logger.error(f"Error saving summary for knowledge base entry {entry_id}: {str(e)}")
+    
+    async def _complete(self, prompt: str, max_tokens: int) -> Optional[str]:
+        """Run one prompt through the summary models in priority order."""
+        global _summary_slots
+        if _summary_slots is None:
+            _summary_slots = asyncio.Semaphore(SUMMARY_CONCURRENCY)
+        
+        for model_name in SUMMARY_MODELS:
+            try:
+                async with _summary_slots:
+                    response = await make_llm_api_call(
+                        messages=[{"role": "user", "content": prompt}],
+                        model_name=model_name,
+                        temperature=0.1,
+                        max_tokens=max_tokens,
+                        stream=False
+                    )
+                text = response.choices[0].message.content.strip()
+                if text:
+                    return text
+            except Exception as e:
+                logger.warning(f"Model {model_name} failed: {str(e)}")
+                continue
+        return None
+    
+    async def _cached_complete(self, cache_key: str, prompt: str, max_tokens: int) -> Optional[str]:
+        """_complete, reusing the result for an identical prompt input (content hash)."""
+        key = f"kb_summary:v{SUMMARY_PROMPT_VERSION}:{cache_key}"
+        try:
+            cached = await Cache.get(key)
+            if cached:
+                return cached
+        except Exception as e:
+            logger.warning(f"Summary cache lookup failed: {str(e)}")
+        
+        text = await self._complete(prompt, max_tokens)
+        if text:
+            try:
+                await Cache.set(key, text, ttl=SUMMARY_CACHE_TTL)
+            except Exception as e:
+                logger.warning(f"Summary cache store failed: {str(e)}")
+        return text
+    
+    def _split_into_chunks(self, content: str, max_chars: int) -> List[str]:
+        """Split content into chunks of at most max_chars, preferring paragraph boundaries."""
+        if len(content) <= max_chars:
+            return [content]
+        
+        chunks = []
+        current = []
+        current_length = 0
+        for paragraph in content.split('\n\n'):
+            # Hard-split paragraphs that are too long on their own
+            pieces = [paragraph[i:i + max_chars] for i in range(0, len(paragraph), max_chars)] or ['']
+            for piece in pieces:
+                if current and current_length + len(piece) + 2 > max_chars:
+                    chunks.append('\n\n'.join(current))
+                    current = []
+                    current_length = 0
+                current.append(piece)
+                current_length += len(piece) + 2
+        if current:
+            chunks.append('\n\n'.join(current))
+        return chunks
+    
+    async def _summarize_chunk(self, chunk: str) -> Optional[str]:
+        # No filename or position in the prompt, so identical content is cached across uploads
+        prompt = f"""Summarize this section of a document for an AI agent's knowledge base.
+
+Content: {chunk}
+
+List the key facts, entities, figures and topics it covers in under 250 words. Do not add commentary."""
+        return await self._cached_complete(hashlib.sha256(chunk.encode()).hexdigest(), prompt, 500)
+    
     async def _generate_summary(self, content: str, filename: str) -> str:
-        """Generate LLM summary of file content with smart chunking and fallbacks."""
+        """Summarize content map-reduce style: chunks are summarized in parallel, then combined."""
         try:
-            # Model priority: Google Gemini → OpenRouter → GPT-5 Mini
-            models = [
-                ("google/gemini-2.5-flash-lite", 1_000_000),  # 1M context
-                ("openrouter/google/gemini-2.5-flash-lite", 1_000_000),  # Fallback
-                ("gpt-5-mini", 400_000)  # Final fallback
-            ]
+            chunks = self._split_into_chunks(content, SUMMARY_CHUNK_CHARS)
             
-            # Estimate tokens (rough: 1 token ≈ 4 chars)
-            estimated_tokens = len(content) // 4
+            # Map: summarize chunks until the notes fit into a single final call
+            rounds = 0
+            while len(chunks) > 1 and rounds < 3:
+                partials = await asyncio.gather(*(self._summarize_chunk(chunk) for chunk in chunks))
+                notes = [partial for partial in partials if partial]
+                if not notes:
+                    break
+                rounds += 1
+                logger.info(f"Summarized {len(notes)}/{len(chunks)} chunks of {filename} (round {rounds})")
+                chunks = self._split_into_chunks('\n\n'.join(notes), SUMMARY_CHUNK_CHARS)
             
-            for model_name, context_limit in models:
-                try:
-                    # Reserve tokens for prompt and response
-                    usable_context = context_limit - 1000  # Reserve for prompt + response
-                    
-                    if estimated_tokens <= usable_context:
-                        # Content fits, use full content
-                        processed_content = content
-                    else:
-                        # Content too large, intelligent chunking
-                        processed_content = self._smart_chunk_content(content, usable_context * 4)  # Convert back to chars
-                    
-                    prompt = f"""Analyze this file and create a concise, actionable summary for an AI agent's knowledge base.
+            if len(chunks) == 1:
+                label = "Section summaries" if rounds else "Content"
+                prompt = f"""Analyze this file and create a concise, actionable summary for an AI agent's knowledge base.
 
 File: {filename}
-Content: {processed_content}
+{label}: {chunks[0]}
 
 Generate a 2-3 sentence summary that captures:
 1. What this file contains
@@ -168,25 +305,13 @@ Generate a 2-3 sentence summary that captures:
 3. When this knowledge would be useful
 
 Keep it under 200 words and make it actionable for context injection."""
-
-                    messages = [{"role": "user", "content": prompt}]
-                    
-                    response = await make_llm_api_call(
-                        messages=messages,
-                        model_name=model_name,
-                        temperature=0.1,
-                        max_tokens=300
-                    )
-                    
-                    summary = response.choices[0].message.content.strip()
-                    
-                    if summary:
-                        logger.info(f"Summary generated successfully using {model_name}")
-                        return summary
-                        
-                except Exception as e:
-                    logger.warning(f"Model {model_name} failed: {str(e)}")
-                    continue
+                
+                # Reduce
+                cache_key = hashlib.sha256(f"{filename}\0{chunks[0]}".encode()).hexdigest()
+                summary = await self._cached_complete(cache_key, prompt, 300)
+                if summary:
+                    logger.info(f"Summary generated for {filename}")
+                    return summary
             
             # All models failed - high-reliability fallback
             logger.error("All LLM models failed, using intelligent fallback")
@@ -196,60 +321,6 @@ Keep it under 200 words and make it actionable for context injection."""
             logger.error(f"Error generating summary: {str(e)}")
             return self._create_fallback_summary(content, filename)
     
-    def _smart_chunk_content(self, content: str, max_chars: int) -> str:
-        """Intelligently chunk content to fit context limits."""
-        if len(content) <= max_chars:
-            return content
-        
-        # Strategy: Take beginning + end with priority sections
-        quarter = max_chars // 4
-        
-        # Always include beginning (most important)
-        beginning = content[:quarter * 2]
-        
-        # Include end for conclusion/summary
-        ending = content[-quarter:]
-        
-        # Try to find important middle sections (headers, key terms)
-        middle_section = ""
-        remaining_chars = max_chars - len(beginning) - len(ending) - 100  # Buffer
-        
-        if remaining_chars > 0:
-            middle_start = len(beginning)
-            middle_end = len(content) - quarter
-            middle_content = content[middle_start:middle_end]
-            
-            # Look for important sections (lines with caps, numbers, bullets)
-            lines = middle_content.split('\n')
-            important_lines = []
-            current_length = 0
-            
-            for line in lines:
-                line_stripped = line.strip()
-                if not line_stripped:
-                    continue
-                    
-                # Prioritize lines that look important
-                is_important = (
-                    line_stripped.isupper() or  # Headers
-                    line_stripped.startswith(('•', '-', '*', '1.', '2.')) or  # Lists
-                    any(keyword in line_stripped.lower() for keyword in ['summary', 'conclusion', 'important', 'key', 'main']) or
-                    len(line_stripped) < 100  # Short lines often important
-                )
-                
-                if is_important and current_length + len(line) < remaining_chars:
-                    important_lines.append(line)
-                    current_length += len(line)
-            
-            if important_lines:
-                middle_section = '\n'.join(important_lines)
-        
-        # Combine sections
-        if middle_section:
-            return f"{beginning}\n\n[KEY SECTIONS]\n{middle_section}\n\n[ENDING]\n{ending}"
-        else:
-            return f"{beginning}\n\n[...content truncated...]\n\n{ending}"
-    
     def _create_fallback_summary(self, content: str, filename: str) -> str:
         """Create intelligent fallback summary when LLM fails."""
         # Extract first meaningful portion
@@ -275,46 +346,10 @@ Keep it under 200 words and make it actionable for context injection."""
         # Generate intelligent fallback
         return f"This {content_type} '{filename}' contains {len(content):,} characters across {len(non_empty_lines)} lines. Preview: {preview[:200]}{'...' if len(preview) > 200 else ''} This file would be useful for understanding the specific content and context it provides."
     
-    def _extract_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
-        """Extract text content from file bytes."""
-        file_extension = Path(filename).suffix.lower()
-        
+    async def _extract_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
+        """Extract text content from file bytes in the extraction process pool."""
         try:
-            # Handle text-based files (including JSON, XML, CSV, etc.)
-            if (file_extension in ['.txt', '.json', '.xml', '.csv', '.yml', '.yaml', '.md', '.log', '.ini', '.cfg', '.conf'] 
-                or mime_type.startswith('text/') 
-                or mime_type in ['application/json', 'application/xml', 'text/xml']):
-                
-                detected = chardet.detect(file_content)
-                encoding = detected.get('encoding', 'utf-8')
-                try:
-                    return file_content.decode(encoding)
-                except UnicodeDecodeError:
-                    return file_content.decode('utf-8', errors='replace')
-            
-            elif file_extension == '.pdf':
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                return '\n\n'.join(page.extract_text() for page in pdf_reader.pages)
-            
-            elif file_extension == '.docx':
-                doc = docx.Document(io.BytesIO(file_content))
-                return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
-            
-            # For any other file type, try to decode as text (fallback)
-            else:
-                try:
-                    detected = chardet.detect(file_content)
-                    encoding = detected.get('encoding', 'utf-8')
-                    content = file_content.decode(encoding)
-                    # Only return if it seems to be mostly text content
-                    if len([c for c in content[:1000] if c.isprintable() or c.isspace()]) > 800:
-                        return content
-                except:
-                    pass
-                
-                # If we can't extract text content, return a placeholder
-                return f"[Binary file: {filename}] - Content cannot be extracted as text, but file is stored and available for download."
-            
+            return await extract_text(file_content, filename, mime_type)
         except Exception as e:
             logger.error(f"Error extracting content from {filename}: {str(e)}")
-            return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}" 
\ No newline at end of file
+            return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}"
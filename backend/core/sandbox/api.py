@@ -3,10 +3,12 @@ import urllib.parse
 from typing import Optional
 
 from fastapi import FastAPI, UploadFile, File, HTTPException, APIRouter, Form, Depends, Request
-from fastapi.responses import Response
+from fastapi.responses import Response, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from daytona_sdk import AsyncSandbox
 
+from core.sandbox import file_transfer, workspace_index
 from core.sandbox.sandbox import get_or_start_sandbox, delete_sandbox
 from core.utils.logger import logger
 from core.utils.auth_utils import get_optional_user_id, verify_and_get_user_id_from_jwt, verify_sandbox_access, verify_sandbox_access_optional
@@ -17,6 +19,9 @@ from core.utils.sandbox_utils import generate_unique_filename, get_uploads_direc
 router = APIRouter(tags=["sandbox"])
 db = None
 
+# Proxies commonly reject response headers much larger than 8KB
+MAX_DELETED_PATHS_HEADER_BYTES = 6 * 1024
+
 def initialize(_db: DBConnection):
     """Initialize the sandbox API with resources from the main API."""
     global db
@@ -139,11 +144,8 @@ async def create_file(
         # Construct the final path
         final_path = f"{uploads_dir}/{unique_filename}"
         
-        # Read file content directly from the uploaded file
-        content = await file.read()
-        
-        # Create file using raw binary content
-        await sandbox.fs.upload_file(content, final_path)
+        # Stream the upload into the sandbox without holding it in memory
+        await file_transfer.upload_stream(sandbox, file, final_path)
         logger.info(f"File uploaded successfully: {final_path} in sandbox {sandbox_id}")
         
         return {
@@ -233,6 +235,90 @@ async def list_files(
         logger.error(f"Error listing files in sandbox {sandbox_id}: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/sandboxes/{sandbox_id}/manifest")
+async def get_workspace_manifest(
+    sandbox_id: str,
+    request: Request = None,
+    user_id: Optional[str] = Depends(get_optional_user_id)
+):
+    """Snapshot the workspace as {path: size, mtime, sha256} and return it with its manifest id"""
+    client = await db.client
+    
+    # Verify the user has access to this sandbox
+    await verify_sandbox_access_optional(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        manifest_id, manifest = await workspace_index.snapshot(sandbox)
+        return {"manifest_id": manifest_id, "files": manifest}
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error building workspace manifest for sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sandboxes/{sandbox_id}/changes")
+async def get_workspace_changes(
+    sandbox_id: str,
+    since: Optional[str] = None,
+    request: Request = None,
+    user_id: Optional[str] = Depends(get_optional_user_id)
+):
+    """List files added, modified or deleted since manifest `since` (a full listing if it is unknown)"""
+    client = await db.client
+    
+    # Verify the user has access to this sandbox
+    await verify_sandbox_access_optional(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        return await workspace_index.changes_since(sandbox, since)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error diffing workspace for sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/sandboxes/{sandbox_id}/changes/archive")
+async def export_workspace_changes(
+    sandbox_id: str,
+    since: Optional[str] = None,
+    request: Request = None,
+    user_id: Optional[str] = Depends(get_optional_user_id)
+):
+    """
+    Download the files added or modified since manifest `since` as one .tar.gz, for incremental sync.
+
+    The new manifest id and deleted paths are returned in headers; 204 means nothing to transfer.
+    When the deleted paths don't fit in a header, X-Deleted-Paths-Omitted is set and the
+    client should resync from scratch (no `since`).
+    """
+    client = await db.client
+    
+    # Verify the user has access to this sandbox
+    await verify_sandbox_access_optional(client, sandbox_id, user_id)
+    
+    try:
+        sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
+        changes, archive = await workspace_index.export_changes(sandbox, since)
+        deleted = urllib.parse.quote("\n".join(changes['deleted']))
+        headers = {
+            "X-Manifest-Id": changes['manifest_id'],
+            "X-Full-Listing": "true" if changes['full'] else "false",
+        }
+        if len(deleted) <= MAX_DELETED_PATHS_HEADER_BYTES:
+            headers["X-Deleted-Paths"] = deleted
+        else:
+            headers["X-Deleted-Paths-Omitted"] = "true"
+        if archive is None:
+            return Response(status_code=204, headers=headers)
+        return Response(content=archive, media_type="application/gzip", headers=headers)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error exporting workspace changes for sandbox {sandbox_id}: {str(e)}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @router.get("/sandboxes/{sandbox_id}/files/content")
 async def read_file(
     sandbox_id: str, 
@@ -258,30 +344,79 @@ async def read_file(
         # Get sandbox using the safer method
         sandbox = await get_sandbox_by_id_safely(client, sandbox_id)
         
-        # Read file directly - don't check existence first with a separate call
+        filename = os.path.basename(path)
+        
+        # Ensure proper encoding by explicitly using UTF-8 for the filename in Content-Disposition header
+        # This applies RFC 5987 encoding for the filename to support non-ASCII characters
+        encoded_filename = urllib.parse.quote(filename, safe='')
+        headers = {
+            "Content-Disposition": f"attachment; filename*=UTF-8''{encoded_filename}",
+            "Accept-Ranges": "bytes",
+        }
+        
+        range_header = request.headers.get("range") if request else None
+        byte_range = None
+        if range_header:
+            # Only range requests need the size up front
+            try:
+                file_info = await sandbox.fs.get_file_info(path)
+            except Exception as info_err:
+                raise HTTPException(status_code=404, detail=f"Failed to download file: {str(info_err)}")
+            try:
+                byte_range = file_transfer.parse_range(range_header, file_info.size)
+            except file_transfer.RangeNotSatisfiable:
+                raise HTTPException(
+                    status_code=416,
+                    detail="Requested range not satisfiable",
+                    headers={"Content-Range": f"bytes */{file_info.size}"}
+                )
+        
+        if not byte_range and file_transfer.can_stream_downloads(sandbox):
+            # Pass the toolbox response straight through: the first bytes reach the client right away
+            try:
+                content_length, chunks = await file_transfer.open_download_stream(sandbox, path)
+            except Exception as download_err:
+                logger.error(f"Error downloading file {path} from sandbox {sandbox_id}: {str(download_err)}")
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Failed to download file: {str(download_err)}"
+                )
+            if content_length is not None:
+                headers["Content-Length"] = str(content_length)
+            logger.debug(f"Streaming file {filename} from sandbox {sandbox_id}")
+            return StreamingResponse(chunks, media_type="application/octet-stream", headers=headers)
+        
+        # Stream the requested slice (or, on SDK releases without a usable toolbox
+        # request, the whole file) through a temp file, never holding it in memory
+        local_path = file_transfer.temp_path()
         try:
-            content = await sandbox.fs.download_file(path)
+            if byte_range:
+                start, end = byte_range
+                await file_transfer.download_range_to_path(sandbox, path, start, end, local_path)
+            else:
+                await file_transfer.download_to_path(sandbox, path, local_path)
         except Exception as download_err:
+            file_transfer.remove_quietly(local_path)
             logger.error(f"Error downloading file {path} from sandbox {sandbox_id}: {str(download_err)}")
             raise HTTPException(
                 status_code=404, 
                 detail=f"Failed to download file: {str(download_err)}"
             )
         
-        # Return a Response object with the content directly
-        filename = os.path.basename(path)
-        logger.debug(f"Successfully read file {filename} from sandbox {sandbox_id}")
-        
-        # Ensure proper encoding by explicitly using UTF-8 for the filename in Content-Disposition header
-        # This applies RFC 5987 encoding for the filename to support non-ASCII characters
-        import urllib.parse
-        encoded_filename = urllib.parse.quote(filename, safe='')
-        content_disposition = f"attachment; filename*=UTF-8''{encoded_filename}"
+        headers["Content-Length"] = str(os.path.getsize(local_path))
+        status_code = 200
+        if byte_range:
+            status_code = 206
+            headers["Content-Range"] = f"bytes {byte_range[0]}-{byte_range[1]}/{file_info.size}"
         
-        return Response(
-            content=content,
+        logger.debug(f"Streaming file {filename} from sandbox {sandbox_id}")
+        return StreamingResponse(
+            file_transfer.iter_file(local_path, remove=True),
+            status_code=status_code,
             media_type="application/octet-stream",
-            headers={"Content-Disposition": content_disposition}
+            headers=headers,
+            # Covers clients that disconnect before the body is consumed
+            background=BackgroundTask(file_transfer.remove_quietly, local_path)
         )
     except HTTPException:
         # Re-raise HTTP exceptions without wrapping
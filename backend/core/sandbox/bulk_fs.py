@@ -0,0 +1,160 @@
+"""
+Bulk filesystem operations against a sandbox.
+
+The Daytona filesystem API moves one file per call. These helpers batch that:
+- `export_tree` / `import_tree` move a whole directory subtree as a single
+  gzipped tarball (one exec plus one transfer)
+- `get_manifest` returns size, mtime and sha256 for every file under a root in
+  one exec, without transferring contents
+"""
+import io
+import json
+import shlex
+import tarfile
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Union
+
+from daytona_sdk import AsyncSandbox
+
+from core.utils.files_utils import EXCLUDED_DIRS
+from core.utils.logger import logger
+
+
+ARCHIVE_TIMEOUT_SECONDS = 120
+
+# Runs inside the sandbox; prints {rel_path: [size, mtime, sha256]} as JSON.
+# With a cache path, hashes of files whose size and mtime are unchanged are reused.
+_MANIFEST_SCRIPT = r'''
+import hashlib, json, os, sys
+root, excluded = sys.argv[1], set(json.loads(sys.argv[2]))
+cache_path = sys.argv[3] if len(sys.argv) > 3 else None
+cache = {}
+if cache_path:
+    try:
+        with open(cache_path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        pass
+out = {}
+for dirpath, dirnames, filenames in os.walk(root):
+    dirnames[:] = [d for d in dirnames if d not in excluded]
+    for name in filenames:
+        path = os.path.join(dirpath, name)
+        rel = os.path.relpath(path, root)
+        try:
+            st = os.stat(path)
+            cached = cache.get(rel)
+            if cached and cached[0] == st.st_size and cached[1] == st.st_mtime:
+                out[rel] = cached
+                continue
+            h = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+        except OSError:
+            continue
+        out[rel] = [st.st_size, st.st_mtime, h.hexdigest()]
+if cache_path:
+    tmp = cache_path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(out, f)
+    os.replace(tmp, cache_path)
+json.dump(out, sys.stdout)
+'''
+
+
+class BulkTransferError(Exception):
+    pass
+
+
+async def _exec(sandbox: AsyncSandbox, command: str, timeout: int = ARCHIVE_TIMEOUT_SECONDS) -> str:
+    response = await sandbox.process.exec(command, timeout=timeout)
+    if response.exit_code != 0:
+        raise BulkTransferError(f"Command failed ({response.exit_code}): {response.result}")
+    return response.result or ""
+
+
+def _find_members(members: str, excluded_dirs: Iterable[str]) -> str:
+    """
+    A find command listing the regular files to archive.
+
+    tar's --exclude matches any path component, so --exclude=build would also
+    drop a file named build; find prunes only directories with those names.
+    """
+    command = f"find {members}"
+    dirs = sorted(excluded_dirs)
+    if dirs:
+        names = " -o ".join(f"-name {shlex.quote(name)}" for name in dirs)
+        command += f" -type d \\( {names} \\) -prune -o"
+    return command + " -type f -print0"
+
+
+async def export_tree(
+    sandbox: AsyncSandbox,
+    root: str,
+    paths: Optional[List[str]] = None,
+    excluded_dirs: Iterable[str] = EXCLUDED_DIRS,
+) -> bytes:
+    """Pack `root` (or only `paths` relative to it) into a .tar.gz and download it in one transfer."""
+    archive = f"/tmp/export-{uuid.uuid4().hex}.tar.gz"
+    members = " ".join(shlex.quote(p) for p in paths) if paths else "."
+    find = _find_members(members, excluded_dirs)
+    script = f"cd {shlex.quote(root)} && {find} | tar -czf {archive} --null --no-recursion -T -"
+    try:
+        await _exec(sandbox, f"bash -c {shlex.quote(script)}")
+        return await sandbox.fs.download_file(archive)
+    finally:
+        try:
+            await sandbox.process.exec(f"rm -f {archive}", timeout=10)
+        except Exception as e:
+            logger.debug(f"Failed to remove export archive {archive}: {e}")
+
+
+async def import_tree(sandbox: AsyncSandbox, archive: bytes, root: str):
+    """Upload a .tar.gz in one transfer and unpack it under `root`."""
+    remote = f"/tmp/import-{uuid.uuid4().hex}.tar.gz"
+    await sandbox.fs.upload_file(archive, remote)
+    try:
+        await _exec(sandbox, f"mkdir -p {shlex.quote(root)} && tar -xzf {remote} -C {shlex.quote(root)}")
+    finally:
+        try:
+            await sandbox.process.exec(f"rm -f {remote}", timeout=10)
+        except Exception as e:
+            logger.debug(f"Failed to remove import archive {remote}: {e}")
+
+
+def build_archive(files: Dict[str, Union[str, bytes]]) -> bytes:
+    """Pack {rel_path: content} into an in-memory .tar.gz for `import_tree`."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for rel_path, content in files.items():
+            data = content.encode() if isinstance(content, str) else content
+            info = tarfile.TarInfo(rel_path.lstrip("/"))
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(data))
+    return buffer.getvalue()
+
+
+async def get_manifest(
+    sandbox: AsyncSandbox,
+    root: str,
+    excluded_dirs: Iterable[str] = EXCLUDED_DIRS,
+    cache_path: Optional[str] = None,
+) -> Dict[str, Dict]:
+    """
+    Return {rel_path: {size, mtime, sha256}} for every file under `root`, without contents.
+
+    `cache_path` names a file inside the sandbox that remembers previous hashes,
+    so only files whose size or mtime changed are re-read.
+    """
+    command = (
+        f"python3 -c {shlex.quote(_MANIFEST_SCRIPT)} "
+        f"{shlex.quote(root)} {shlex.quote(json.dumps(sorted(excluded_dirs)))}"
+    )
+    if cache_path:
+        command += f" {shlex.quote(cache_path)}"
+    raw = json.loads(await _exec(sandbox, command))
+    return {path: {"size": size, "mtime": mtime, "sha256": digest} for path, (size, mtime, digest) in raw.items()}
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Time the HTML to PPTX converter against the previous implementation and
+check that both produce the same deck.
+
+The previous converter loaded every slide three times and captured each
+visual element with its own clone/screenshot/restore round trip; the current
+one analyzes a slide in a single page load and packs visual elements onto
+shared capture sheets. Both converters run on the same deck with an empty
+render cache (so every slide is rendered), and the resulting PPTX files are
+compared slide by slide: shape kinds, positions and text must match, and
+pictures must match within a small pixel tolerance.
+
+Run inside the sandbox image (it needs Playwright's Chromium), from /app:
+
+    git show b725eda^:backend/core/sandbox/docker/html_to_pptx_router.py > /tmp/html_to_pptx_router_old.py
+    python benchmark_pptx_conversion.py --old-router /tmp/html_to_pptx_router_old.py [--deck DIR] [--slides 8]
+
+Without --deck a sample deck with text, icons, gradients, shadows and images
+is generated. Exits non-zero when the decks differ.
+"""
+
+import argparse
+import asyncio
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from PIL import Image, ImageChops
+from pptx import Presentation
+
+from browser_pool import browser_pool
+from render_cache import RenderCache
+
+# Shapes may land a pixel apart (sub-pixel rounding differs between a clone on
+# a capture sheet and the element in place); 1px is 9525 EMU
+POSITION_TOLERANCE_EMU = 2 * 9525
+# Mean absolute per-channel difference (0-255) allowed between two pictures
+PIXEL_TOLERANCE = 4.0
+
+SAMPLE_STYLE = """
+body { margin: 0; width: 1920px; height: 1080px; font-family: Arial, sans-serif;
+       background: linear-gradient(135deg, #0f172a, #1e3a8a); color: #f8fafc; }
+h1 { position: absolute; left: 120px; top: 90px; font-size: 72px; margin: 0; }
+p { font-size: 32px; line-height: 1.4; margin: 0 0 16px 0; }
+.body { position: absolute; left: 120px; top: 260px; width: 900px; }
+.card { position: absolute; width: 320px; height: 200px; border-radius: 24px;
+        background: linear-gradient(180deg, #38bdf8, #6366f1);
+        box-shadow: 0 12px 32px rgba(0, 0, 0, 0.45); }
+.icon { width: 64px; height: 64px; }
+.photo { position: absolute; right: 120px; bottom: 120px; width: 480px; border-radius: 16px; }
+"""
+
+SAMPLE_ICON = (
+    '<svg class="icon" viewBox="0 0 24 24" xmlns="http://www.w3.org/2000/svg">'
+    '<circle cx="12" cy="12" r="10" fill="#facc15"/><path d="M7 12l3 3 7-7" stroke="#0f172a" '
+    'stroke-width="2.5" fill="none"/></svg>'
+)
+
+
+def build_sample_deck(deck_dir: Path, slides: int) -> Path:
+    deck_dir.mkdir(parents=True, exist_ok=True)
+    (deck_dir / "theme.css").write_text(SAMPLE_STYLE)
+    photo = Image.linear_gradient("L").resize((960, 540)).convert("RGB")
+    photo.save(deck_dir / "photo.png")
+
+    metadata = {"presentation_name": "benchmark_deck", "slides": {}}
+    for number in range(1, slides + 1):
+        cards = "".join(
+            f'<div class="card" style="left: {1080 + column * 360}px; top: {120 + row * 240}px;"></div>'
+            for row in range(2) for column in range(2)
+        )
+        icons = "".join(
+            f'<p>{SAMPLE_ICON} Point {item} of slide {number}</p>' for item in range(1, 4)
+        )
+        html = (
+            '<!DOCTYPE html><html><head><meta charset="utf-8">'
+            '<link rel="stylesheet" href="theme.css"></head><body>'
+            f'<h1>Benchmark slide {number}</h1>'
+            f'<div class="body"><p>Quarterly results for region {number}, with <b>bold</b> '
+            f'and <i>italic</i> runs.</p>{icons}</div>'
+            f'{cards}<img class="photo" src="photo.png">'
+            '</body></html>'
+        )
+        filename = f"slide_{number:02d}.html"
+        (deck_dir / filename).write_text(html)
+        metadata["slides"][str(number)] = {
+            "title": f"Benchmark slide {number}",
+            "filename": filename,
+            "file_path": str((deck_dir / filename).resolve()),
+        }
+    (deck_dir / "metadata.json").write_text(json.dumps(metadata, indent=2))
+    return deck_dir
+
+
+def load_router(path: Path, name: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+async def convert(module, deck_dir: Path, cache_root: Path):
+    converter = module.OptimizedHTMLToPPTXConverter(str(deck_dir))
+    # A fresh cache per run: every slide is rendered, and neither converter
+    # can pick up the other's artifacts
+    converter.render_cache = RenderCache("pptx", root=cache_root)
+    started = time.perf_counter()
+    pptx_bytes, total_slides, _ = await converter.convert_to_pptx(store_locally=False)
+    return pptx_bytes, total_slides, time.perf_counter() - started
+
+
+def describe_shapes(slide):
+    shapes = []
+    for shape in slide.shapes:
+        text = shape.text_frame.text if shape.has_text_frame else None
+        image = shape.image.blob if shape.shape_type == 13 else None  # MSO_SHAPE_TYPE.PICTURE
+        shapes.append({
+            "kind": shape.shape_type,
+            "box": (shape.left, shape.top, shape.width, shape.height),
+            "text": text,
+            "image": image,
+        })
+    return shapes
+
+
+def picture_difference(old_blob: bytes, new_blob: bytes) -> float:
+    old = Image.open(io.BytesIO(old_blob)).convert("RGBA")
+    new = Image.open(io.BytesIO(new_blob)).convert("RGBA")
+    if old.size != new.size:
+        new = new.resize(old.size)
+    histogram = ImageChops.difference(old, new).histogram()
+    total = sum(value * (index % 256) for index, value in enumerate(histogram))
+    return total / (old.size[0] * old.size[1] * 4)
+
+
+def compare_decks(old_bytes: bytes, new_bytes: bytes) -> list:
+    old_deck = Presentation(io.BytesIO(old_bytes))
+    new_deck = Presentation(io.BytesIO(new_bytes))
+    problems = []
+    if len(old_deck.slides) != len(new_deck.slides):
+        return [f"slide count differs: {len(old_deck.slides)} vs {len(new_deck.slides)}"]
+
+    for number, (old_slide, new_slide) in enumerate(zip(old_deck.slides, new_deck.slides), 1):
+        old_shapes = describe_shapes(old_slide)
+        new_shapes = describe_shapes(new_slide)
+        if len(old_shapes) != len(new_shapes):
+            problems.append(f"slide {number}: {len(old_shapes)} shapes vs {len(new_shapes)}")
+            continue
+        # Compare in a stable order; z-order may legitimately differ for shapes that do not overlap
+        order = lambda shape: (shape["kind"], shape["box"][1], shape["box"][0], shape["text"] or "")
+        for old_shape, new_shape in zip(sorted(old_shapes, key=order), sorted(new_shapes, key=order)):
+            label = f"slide {number} {old_shape['kind']} at {old_shape['box'][:2]}"
+            if old_shape["kind"] != new_shape["kind"]:
+                problems.append(f"{label}: kind {old_shape['kind']} vs {new_shape['kind']}")
+                continue
+            offsets = [abs(a - b) for a, b in zip(old_shape["box"], new_shape["box"])]
+            if max(offsets) > POSITION_TOLERANCE_EMU:
+                problems.append(f"{label}: box {old_shape['box']} vs {new_shape['box']}")
+            if old_shape["text"] != new_shape["text"]:
+                problems.append(f"{label}: text {old_shape['text']!r} vs {new_shape['text']!r}")
+            if old_shape["image"] is not None:
+                difference = picture_difference(old_shape["image"], new_shape["image"])
+                if difference > PIXEL_TOLERANCE:
+                    problems.append(f"{label}: pictures differ (mean difference {difference:.1f})")
+    return problems
+
+
+async def run(args):
+    with tempfile.TemporaryDirectory(prefix="pptx-benchmark-") as work:
+        work_dir = Path(work)
+        deck_dir = Path(args.deck) if args.deck else build_sample_deck(work_dir / "deck", args.slides)
+
+        old_router = load_router(Path(args.old_router), "html_to_pptx_router_old")
+        new_router = load_router(Path(__file__).with_name("html_to_pptx_router.py"), "html_to_pptx_router_new")
+
+        await browser_pool.start()
+        try:
+            # Warm Chromium up so launch time is not charged to the first converter
+            await convert(new_router, deck_dir, work_dir / "cache-warmup")
+
+            timings = {"old": [], "new": []}
+            outputs = {}
+            for attempt in range(args.runs):
+                for label, module in (("old", old_router), ("new", new_router)):
+                    pptx_bytes, total_slides, elapsed = await convert(
+                        module, deck_dir, work_dir / f"cache-{label}-{attempt}"
+                    )
+                    timings[label].append(elapsed)
+                    outputs[label] = pptx_bytes
+        finally:
+            await browser_pool.stop()
+
+        print(f"Deck: {deck_dir} ({total_slides} slides), best of {args.runs} run(s), cold render cache")
+        for label in ("old", "new"):
+            best = min(timings[label])
+            print(f"{label:<4} {best:7.2f}s total   {best / total_slides:6.2f}s per slide")
+        print(f"speed-up {min(timings['old']) / min(timings['new']):.1f}x")
+
+        if args.output:
+            output_dir = Path(args.output)
+            output_dir.mkdir(parents=True, exist_ok=True)
+            for label, pptx_bytes in outputs.items():
+                (output_dir / f"{label}.pptx").write_bytes(pptx_bytes)
+
+        problems = compare_decks(outputs["old"], outputs["new"])
+        if problems:
+            print(f"\n❌ Output differs from the previous converter ({len(problems)} difference(s)):")
+            for problem in problems:
+                print(f"  - {problem}")
+            return 1
+        print("\n✅ Output matches the previous converter")
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the HTML to PPTX converter against the previous implementation")
+    parser.add_argument("--old-router", required=True, help="Path to the previous html_to_pptx_router.py")
+    parser.add_argument("--deck", help="Presentation folder with metadata.json (default: a generated sample deck)")
+    parser.add_argument("--slides", type=int, default=8, help="Slides in the generated sample deck")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="Directory to keep old.pptx and new.pptx in for inspection")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Shared Chromium pool for the conversion routers.
+
+One Playwright instance and a small number of long-lived Chromium processes
+are started with the server (see the lifespan in server.py) and shared by the
+PDF and PPTX routers, so a conversion only pays for render time instead of a
+1-3 second browser launch.
+
+- every borrow gets a fresh browser context (isolated cookies/storage) that is
+  closed when the borrow ends, so pages never leak state between requests
+- a browser is recycled after serving MAX_PAGES_PER_BROWSER pages, to keep
+  Chromium's memory growth in check
+- a browser that crashed or disconnected is detected and relaunched on the
+  next borrow
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+try:
+    from playwright.async_api import async_playwright, Browser, BrowserContext, Page
+except ImportError:
+    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+
+
+POOL_SIZE = int(os.environ.get("BROWSER_POOL_SIZE", "2"))
+MAX_PAGES_PER_BROWSER = int(os.environ.get("BROWSER_MAX_PAGES", "200"))
+MAX_CONCURRENT_PAGES = int(os.environ.get("BROWSER_MAX_CONCURRENT_PAGES", "8"))
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',
+    '--disable-dev-shm-usage',
+    '--disable-gpu',
+    '--force-device-scale-factor=1',
+    '--disable-background-timer-throttling',
+    '--disable-backgrounding-occluded-windows',
+    '--disable-renderer-backgrounding',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-extensions',
+    '--disable-plugins',
+    '--disable-web-security',
+    '--disable-features=TranslateUI',
+    '--disable-ipc-flooding-protection'
+]
+
+DEFAULT_VIEWPORT = {'width': 1920, 'height': 1080}
+
+
+class PooledBrowser:
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.pages_served = 0
+        self.active = 0
+        self.crashed = False
+        self.launches = 0
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser is not None and not self.crashed and self.browser.is_connected()
+
+    @property
+    def exhausted(self) -> bool:
+        return self.pages_served >= MAX_PAGES_PER_BROWSER
+
+
+class BrowserPool:
+    def __init__(self, size: int = POOL_SIZE):
+        self._playwright = None
+        self._browsers: List[PooledBrowser] = [PooledBrowser(i) for i in range(size)]
+        self._slots = asyncio.Semaphore(MAX_CONCURRENT_PAGES)
+        self._lock = asyncio.Lock()
+        self._next = 0
+        self.restarts = 0
+
+    async def start(self):
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            for pooled in self._browsers:
+                if not pooled.healthy:
+                    await self._launch(pooled)
+        print(f"🌐 Browser pool started with {len(self._browsers)} Chromium instance(s)")
+
+    async def stop(self):
+        async with self._lock:
+            for pooled in self._browsers:
+                await self._close(pooled)
+            if self._playwright is not None:
+                await self._playwright.stop()
+                self._playwright = None
+
+    async def _launch(self, pooled: PooledBrowser):
+        browser = await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+        pooled.browser = browser
+        pooled.pages_served = 0
+        pooled.crashed = False
+        pooled.launches += 1
+
+        def on_disconnected(_browser=None, pooled=pooled, browser=browser):
+            # Ignore disconnects from a browser we already replaced
+            if pooled.browser is browser:
+                print(f"⚠️ Pooled browser {pooled.index} disconnected; it will be relaunched")
+                pooled.crashed = True
+
+        browser.on("disconnected", on_disconnected)
+
+    async def _close(self, pooled: PooledBrowser):
+        browser, pooled.browser = pooled.browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception as e:
+                print(f"Warning: failed to close pooled browser {pooled.index}: {e}")
+
+    async def _acquire(self) -> PooledBrowser:
+        """Pick the next browser round-robin, (re)launching it if it crashed or is due for recycling."""
+        async with self._lock:
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+
+            pooled = self._browsers[self._next % len(self._browsers)]
+            self._next += 1
+
+            if not pooled.healthy:
+                if pooled.browser is not None:
+                    self.restarts += 1
+                await self._close(pooled)
+                await self._launch(pooled)
+            elif pooled.exhausted and pooled.active == 0:
+                # Recycle only when idle so in-flight renders are not cut off
+                await self._close(pooled)
+                await self._launch(pooled)
+
+            pooled.active += 1
+            pooled.pages_served += 1
+            return pooled
+
+    @asynccontextmanager
+    async def context(self, viewport: Optional[Dict] = None, **context_options):
+        """Borrow a fresh browser context; it is closed (with all its pages) on exit."""
+        async with self._slots:
+            pooled = await self._acquire()
+            context: Optional[BrowserContext] = None
+            try:
+                context = await pooled.browser.new_context(viewport=viewport or DEFAULT_VIEWPORT, **context_options)
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception as e:
+                        # Usually means the browser died mid-render; the next borrow relaunches it
+                        print(f"Warning: failed to close browser context: {e}")
+                pooled.active -= 1
+
+    @asynccontextmanager
+    async def page(self, viewport: Optional[Dict] = None, **context_options):
+        """Borrow a single page in its own context."""
+        async with self.context(viewport=viewport, **context_options) as context:
+            page: Page = await context.new_page()
+            yield page
+
+    def stats(self) -> Dict:
+        return {
+            "browsers": [
+                {
+                    "index": b.index,
+                    "healthy": b.healthy,
+                    "active_pages": b.active,
+                    "pages_served": b.pages_served,
+                    "launches": b.launches,
+                }
+                for b in self._browsers
+            ],
+            "restarts": self.restarts,
+            "max_pages_per_browser": MAX_PAGES_PER_BROWSER,
+            "max_concurrent_pages": MAX_CONCURRENT_PAGES,
+        }
+
+
+browser_pool = BrowserPool()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Background conversion jobs for the sandbox server.
+
+The /presentation/convert-to-* and /document/convert-to-docx endpoints hold
+the HTTP connection for the whole conversion, which large decks turn into
+proxy timeouts. The job API runs the same converters in the background:
+
+    POST   /jobs/convert-to-pdf | /jobs/convert-to-pptx | /jobs/convert-to-docx
+    GET    /jobs/{job_id}          status and per-slide progress
+    GET    /jobs/{job_id}/events   progress as server-sent events until the job ends
+    GET    /jobs/{job_id}/result   the converted file
+    DELETE /jobs/{job_id}          cancel
+
+Jobs run on the shared conversion queue (conversion_queue.py), which the
+synchronous endpoints use as well. Finished jobs are kept for
+JOB_RETENTION_SECONDS.
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import FileResponse, StreamingResponse
+
+from html_to_pdf_router import ConvertRequest as PDFConvertRequest, PresentationToPDFAPI
+from html_to_pptx_router import ConvertRequest as PPTXConvertRequest, OptimizedHTMLToPPTXConverter
+from html_to_docx_router import ConvertRequest as DOCXConvertRequest, HTMLToDocxConverter
+from conversion_queue import ConversionJob, JobQueueFull, job_manager
+
+
+EVENTS_HEARTBEAT_SECONDS = 15
+
+MEDIA_TYPES = {
+    "pdf": "application/pdf",
+    "pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+    "docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+}
+
+
+# Create router
+router = APIRouter(prefix="/jobs", tags=["conversion-jobs"])
+
+
+def _submit(kind: str, run: Callable[[ConversionJob], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+    try:
+        job = job_manager.submit(kind, run)
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {
+        **job.to_dict(),
+        "status_url": f"/jobs/{job.id}",
+        "events_url": f"/jobs/{job.id}/events",
+    }
+
+
+def _job_or_404(job_id: str) -> ConversionJob:
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+
+@router.post("/convert-to-pdf", status_code=202)
+async def submit_pdf_conversion(request: PDFConvertRequest):
+    """Queue an HTML presentation to PDF conversion."""
+    try:
+        # Validate the presentation before queuing
+        converter = PresentationToPDFAPI(request.presentation_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def run(job: ConversionJob) -> Dict[str, Any]:
+        converter.progress_callback = job.report_progress
+        pdf_path, total_slides = await converter.convert_to_pdf(store_locally=True)
+        return {"path": str(pdf_path), "filename": pdf_path.name, "total_slides": total_slides}
+
+    return _submit("pdf", run)
+
+
+@router.post("/convert-to-pptx", status_code=202)
+async def submit_pptx_conversion(request: PPTXConvertRequest):
+    """Queue an HTML presentation to PPTX conversion."""
+    try:
+        converter = OptimizedHTMLToPPTXConverter(request.presentation_path)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+    async def run(job: ConversionJob) -> Dict[str, Any]:
+        converter.progress_callback = job.report_progress
+        pptx_path, total_slides = await converter.convert_to_pptx(store_locally=True)
+        return {"path": str(pptx_path), "filename": pptx_path.name, "total_slides": total_slides}
+
+    return _submit("pptx", run)
+
+
+@router.post("/convert-to-docx", status_code=202)
+async def submit_docx_conversion(request: DOCXConvertRequest):
+    """Queue a TipTap document to DOCX conversion."""
+    if not Path(request.doc_path).exists():
+        raise HTTPException(status_code=404, detail=f"Document not found: {request.doc_path}")
+    converter = HTMLToDocxConverter(request.doc_path)
+
+    async def run(job: ConversionJob) -> Dict[str, Any]:
+        docx_path, doc_name = await converter.convert_to_docx(store_locally=True)
+        return {"path": str(docx_path), "filename": docx_path.name}
+
+    return _submit("docx", run)
+
+
+@router.get("/stats")
+async def get_job_stats():
+    """Worker and queue occupancy."""
+    return job_manager.stats()
+
+
+@router.get("/{job_id}")
+async def get_job(job_id: str):
+    """Job status, per-slide progress and, once completed, where to fetch the result."""
+    return _job_or_404(job_id).to_dict()
+
+
+@router.get("/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Server-sent events with the job state on every change, ending when the job finishes."""
+    job = _job_or_404(job_id)
+
+    async def events():
+        while True:
+            # Changes made while suspended at yield bump the version past `seen`,
+            # so the wait below returns at once instead of missing them
+            seen = job.version
+            yield f"data: {json.dumps(job.to_dict())}\n\n"
+            if job.finished:
+                return
+            await job.wait_for_change(seen, EVENTS_HEARTBEAT_SECONDS)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(job_id: str):
+    """Download the converted file of a completed job."""
+    job = _job_or_404(job_id)
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Job is {job.status}")
+    path = job.result["path"]
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Result file is no longer available")
+    return FileResponse(path, media_type=MEDIA_TYPES[job.kind], filename=job.result["filename"])
+
+
+@router.delete("/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued or running job."""
+    _job_or_404(job_id)
+    return job_manager.cancel(job_id).to_dict()
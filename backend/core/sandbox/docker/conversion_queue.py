@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Bounded queue that every document conversion in the sandbox server runs on.
+
+Jobs wait in a bounded queue and run on a fixed number of workers, so
+concurrent conversions cannot oversubscribe the sandbox CPU or the shared
+browser pool. Both the job API (conversion_jobs.py) and the synchronous
+/presentation/convert-to-* and /document/convert-to-docx endpoints go through
+job_manager; the synchronous endpoints submit a job and await it with
+job_manager.run().
+
+Every state change bumps ConversionJob.version, so a watcher that was busy
+(e.g. an SSE generator suspended at yield) sees changes it was not waiting
+for at the time instead of missing them.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional, Set
+
+
+CONVERSION_WORKERS = int(os.environ.get("CONVERSION_WORKERS", "2"))
+CONVERSION_QUEUE_LIMIT = int(os.environ.get("CONVERSION_QUEUE_LIMIT", "20"))
+JOB_RETENTION_SECONDS = int(os.environ.get("CONVERSION_JOB_RETENTION_SECONDS", "3600"))
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+# Result keys that stay inside the sandbox server: the file on disk and, for
+# synchronous downloads, the converted bytes
+PRIVATE_RESULT_KEYS = ("path", "content")
+
+
+class ConversionJob:
+    def __init__(self, kind: str, run: Callable[["ConversionJob"], Awaitable[Dict[str, Any]]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.status = "queued"
+        self.completed = 0
+        self.total: Optional[int] = None
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        # The converter's exception, re-raised by job_manager.run() so the
+        # synchronous endpoints keep their 404/400/500 mapping
+        self.exception: Optional[BaseException] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.task: Optional[asyncio.Task] = None
+        # Incremented on every change; watchers remember the last version they reported
+        self.version = 0
+        self._run = run
+        self._waiters: Set[asyncio.Future] = set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in TERMINAL_STATUSES
+
+    def _notify(self):
+        self.version += 1
+        for waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+    def report_progress(self, completed: int, total: int):
+        self.completed, self.total = completed, total
+        self._notify()
+
+    def set_status(self, status: str, error: Optional[str] = None):
+        self.status = status
+        self.error = error
+        if self.finished:
+            self.finished_at = time.time()
+        self._notify()
+
+    async def wait_for_change(self, seen_version: int, timeout: Optional[float] = None) -> int:
+        """Wait until the job changes past `seen_version` (or `timeout` passes) and return the current version."""
+        if self.version == seen_version:
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.add(waiter)
+            try:
+                await asyncio.wait_for(waiter, timeout)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                self._waiters.discard(waiter)
+        return self.version
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = None
+        if self.result:
+            result = {k: v for k, v in self.result.items() if k not in PRIVATE_RESULT_KEYS}
+            if "path" in self.result:
+                result["result_url"] = f"/jobs/{self.id}/result"
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": {"completed": self.completed, "total": self.total},
+            "result": result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class ConversionCancelled(Exception):
+    pass
+
+
+class ConversionJobManager:
+    def __init__(self, workers: int = CONVERSION_WORKERS, queue_limit: int = CONVERSION_QUEUE_LIMIT):
+        self._worker_count = workers
+        self._queue_limit = queue_limit
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers = []
+        self._stopping = False
+        self.jobs: Dict[str, ConversionJob] = {}
+
+    def start(self):
+        if self._workers:
+            return
+        self._queue = asyncio.Queue(maxsize=self._queue_limit)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._worker_count)]
+        print(f"🧵 Conversion job queue started with {self._worker_count} worker(s)")
+
+    async def stop(self):
+        self._stopping = True
+        for job in self.jobs.values():
+            if not job.finished:
+                self.cancel(job.id)
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(self, kind: str, run: Callable[[ConversionJob], Awaitable[Dict[str, Any]]]) -> ConversionJob:
+        if self._queue is None:
+            self.start()
+        self._prune()
+        job = ConversionJob(kind, run)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"Too many queued conversions (limit {self._queue_limit}), retry later")
+        self.jobs[job.id] = job
+        return job
+
+    async def run(self, kind: str, run: Callable[[ConversionJob], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        Submit a job and wait for it: the synchronous endpoints' path onto the queue.
+
+        Returns the job result or re-raises the converter's exception. If the
+        caller goes away (the request is cancelled), the job is cancelled too.
+        The caller owns the result, so the job is not kept for the job API.
+        """
+        job = self.submit(kind, run)
+        try:
+            seen = job.version
+            while not job.finished:
+                seen = await job.wait_for_change(seen)
+        except asyncio.CancelledError:
+            self.cancel(job.id)
+            raise
+        finally:
+            if job.finished:
+                self.jobs.pop(job.id, None)
+
+        if job.status == "completed":
+            return job.result
+        if job.exception is not None:
+            raise job.exception
+        raise ConversionCancelled(f"Conversion {job.id} was {job.status}")
+
+    def get(self, job_id: str) -> Optional[ConversionJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[ConversionJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.finished:
+            return job
+        if job.task is not None:
+            # The worker marks the job cancelled once the converter has unwound
+            job.task.cancel()
+        else:
+            # Still queued: the worker skips it
+            job.set_status("cancelled")
+        return job
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != "queued":
+                    continue
+                job.set_status("running")
+                job.task = asyncio.create_task(job._run(job))
+                try:
+                    job.result = await job.task
+                    if job.total is None:
+                        job.report_progress(1, 1)
+                    job.set_status("completed")
+                except asyncio.CancelledError:
+                    job.set_status("cancelled")
+                    if self._stopping:
+                        raise
+                except Exception as e:
+                    print(f"❌ Conversion job {job.id} failed: {e}")
+                    job.exception = e
+                    job.set_status("failed", error=str(e))
+                finally:
+                    job.task = None
+            finally:
+                self._queue.task_done()
+
+    def _prune(self):
+        cutoff = time.time() - JOB_RETENTION_SECONDS
+        for job_id, job in list(self.jobs.items()):
+            if job.finished and job.finished_at < cutoff:
+                del self.jobs[job_id]
+                path = (job.result or {}).get("path")
+                if path:
+                    Path(path).unlink(missing_ok=True)
+
+    def stats(self) -> Dict[str, Any]:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": self._worker_count,
+            "queue_limit": self._queue_limit,
+            "queued": self._queue.qsize() if self._queue else 0,
+            "jobs": counts,
+        }
+
+
+job_manager = ConversionJobManager()
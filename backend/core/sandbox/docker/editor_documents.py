@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Parsed-document cache for the visual HTML editor.
+
+Each HTML file is parsed once (with lxml when it is installed) and kept
+together with an index of its editable text targets and removable divs. The
+entry is validated against the file's mtime and size on every access, so
+edits made outside the editor are picked up on the next request.
+
+The index assigns `editable-N` / `div-N` ids in exactly the order that
+inject_editor_functionality does, but without mutating the document: an
+editable id resolves either to an element whose text is edited as a whole or
+to a raw text node that the editor page shows wrapped in a span. Edits are
+therefore a lookup, a targeted mutation and one serialization.
+"""
+
+import os
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+from bs4 import BeautifulSoup, NavigableString, Comment, Tag
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+MAX_CACHED_DOCUMENTS = 32
+
+# All text elements that should be editable
+TEXT_ELEMENTS = [
+    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',  # Headings
+    'p',  # Paragraphs
+    'span', 'strong', 'em', 'b', 'i', 'u',  # Inline text formatting
+    'small', 'mark', 'del', 'ins', 'sub', 'sup',  # Text modifications
+    'code', 'kbd', 'samp', 'var', 'pre',  # Code and preformatted text
+    'blockquote', 'cite', 'q',  # Quotes and citations
+    'abbr', 'dfn', 'time', 'data',  # Semantic text
+    'address', 'figcaption', 'caption',  # Descriptive text
+    'th', 'td',  # Table cells
+    'dt', 'dd',  # Definition lists
+    'li',  # List items
+    'label', 'legend',  # Form text
+]
+
+EDITOR_CONTROL_CLASSES = ['edit-controls', 'remove-controls', 'save-cancel-controls', 'editor-header']
+
+
+def parse_html(content: str) -> BeautifulSoup:
+    return BeautifulSoup(content, HTML_PARSER)
+
+
+def _only_comments(element: Tag) -> bool:
+    for child in element.children:
+        if isinstance(child, Comment):
+            continue
+        if isinstance(child, NavigableString) and not child.strip():
+            continue
+        return False
+    return True
+
+
+class EditorDocument:
+    def __init__(self, path: str, soup: BeautifulSoup, version: tuple):
+        self.path = path
+        self.soup = soup
+        self.version = version
+        self._editable: Optional[Dict[str, Union[Tag, NavigableString]]] = None
+        self._removable: Optional[Dict[str, Tag]] = None
+        self._elements: Optional[List[Dict[str, Any]]] = None
+        self.editor_html: Optional[str] = None
+
+    def _build_index(self):
+        editable: Dict[str, Union[Tag, NavigableString]] = {}
+        elements: List[Dict[str, Any]] = []
+        counter = 0
+
+        for element in self.soup.find_all(TEXT_ELEMENTS + ['div']):
+            if _only_comments(element):
+                continue
+
+            # Strategy 1: Elements with ONLY text content (no child elements)
+            if element.string and element.string.strip():
+                element_id = f"editable-{counter}"
+                editable[element_id] = element
+                elements.append({
+                    'id': element_id,
+                    'tag': element.name,
+                    'text': element.string.strip(),
+                    'selector': f'[data-editable-id="{element_id}"]',
+                    'innerHTML': element.string.strip()
+                })
+                counter += 1
+
+            # Strategy 2: Elements with mixed content - each raw text node is editable on its own
+            elif element.contents:
+                for child in element.contents:
+                    if isinstance(child, Comment):
+                        continue
+                    if isinstance(child, NavigableString) and child.strip():
+                        element_id = f"editable-{counter}"
+                        editable[element_id] = child
+                        elements.append({
+                            'id': element_id,
+                            'tag': 'text-node',
+                            'text': child.strip(),
+                            'selector': f'[data-editable-id="{element_id}"]',
+                            'innerHTML': child.strip()
+                        })
+                        counter += 1
+
+        removable: Dict[str, Tag] = {}
+        for element in self.soup.find_all('div'):
+            if any(cls in EDITOR_CONTROL_CLASSES for cls in element.get('class', [])):
+                continue
+            removable[f"div-{len(removable)}"] = element
+
+        self._editable, self._removable, self._elements = editable, removable, elements
+
+    def editable_elements(self) -> List[Dict[str, Any]]:
+        if self._elements is None:
+            self._build_index()
+        return self._elements
+
+    def find_editable(self, element_id: str) -> Optional[Union[Tag, NavigableString]]:
+        if self._editable is None:
+            self._build_index()
+        target = self._editable.get(element_id)
+        if target is None:
+            # Files saved with editor ids still in them
+            target = self.soup.find(attrs={'data-editable-id': element_id})
+        return target
+
+    def find_removable(self, element_id: str) -> Optional[Tag]:
+        if self._removable is None:
+            self._build_index()
+        target = self._removable.get(element_id)
+        if target is None:
+            target = self.soup.find(attrs={'data-removable-id': element_id})
+        return target
+
+    def invalidate(self):
+        """Drop everything derived from the tree after it was mutated (ids shift on edits)."""
+        self._editable = self._removable = self._elements = None
+        self.editor_html = None
+
+
+class EditorDocumentCache:
+    def __init__(self, max_documents: int = MAX_CACHED_DOCUMENTS):
+        self._documents: "OrderedDict[str, EditorDocument]" = OrderedDict()
+        self._max_documents = max_documents
+
+    @staticmethod
+    def _version(path: str) -> tuple:
+        stat = os.stat(path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def get(self, path: str) -> EditorDocument:
+        """Parsed document for `path`, re-parsed only if the file changed since it was cached."""
+        version = self._version(path)
+        document = self._documents.get(path)
+        if document is None or document.version != version:
+            with open(path, 'r', encoding='utf-8') as f:
+                document = EditorDocument(path, parse_html(f.read()), version)
+            self._documents[path] = document
+            while len(self._documents) > self._max_documents:
+                self._documents.popitem(last=False)
+        self._documents.move_to_end(path)
+        return document
+
+    def write(self, document: EditorDocument):
+        """Serialize a mutated document to its file and keep it cached as the current version."""
+        with open(document.path, 'w', encoding='utf-8') as f:
+            f.write(str(document.soup))
+        document.invalidate()
+        document.version = self._version(document.path)
+        self._documents[document.path] = document
+
+    def replace(self, path: str, soup: BeautifulSoup):
+        """Write a new tree to `path` and cache it without re-parsing."""
+        self.write(EditorDocument(path, soup, ()))
+
+
+editor_documents = EditorDocumentCache()
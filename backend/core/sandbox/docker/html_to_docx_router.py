@@ -21,6 +21,8 @@ except ImportError as e:
 
 from bs4 import BeautifulSoup
 
+from conversion_queue import JobQueueFull, job_manager
+
 
 router = APIRouter(prefix="/document", tags=["docx-conversion"])
 
@@ -261,19 +263,25 @@ async def convert_document_to_docx(request: ConvertRequest):
         # Create converter
         converter = HTMLToDocxConverter(request.doc_path)
         
-        # If download is requested, return file directly
+        # Runs on the shared conversion queue, like /jobs/convert-to-docx
+        async def run(job) -> Dict:
+            if request.download:
+                # Return the content directly instead of storing it
+                docx_content, doc_name = await converter.convert_to_docx(store_locally=False)
+                return {"content": docx_content, "doc_name": doc_name}
+            docx_path, doc_name = await converter.convert_to_docx(store_locally=True)
+            return {"path": str(docx_path), "doc_name": doc_name}
+        
+        result = await job_manager.run("docx", run)
+        
         if request.download:
-            docx_content, doc_name = await converter.convert_to_docx(store_locally=False)
-            
             return Response(
-                content=docx_content,
+                content=result["content"],
                 media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-                headers={"Content-Disposition": f"attachment; filename=\"{doc_name}.docx\""}
+                headers={"Content-Disposition": f"attachment; filename=\"{result['doc_name']}.docx\""}
             )
         
-        # Otherwise, store locally and return JSON with download URL
-        docx_path, doc_name = await converter.convert_to_docx(store_locally=True)
-        
+        docx_path = Path(result["path"])
         docx_url = f"/downloads/{docx_path.name}"
         
         return ConvertResponse(
@@ -283,6 +291,8 @@ async def convert_document_to_docx(request: ConvertRequest):
             filename=docx_path.name
         )
         
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
@@ -7,28 +7,29 @@ Provides PDF conversion endpoints as a FastAPI router that can be included in ot
 
 import json
 import asyncio
+import os
+import shutil
 from pathlib import Path
 from typing import Dict, List
 import tempfile
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import Response
+from fastapi.responses import FileResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel, Field
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
-
-try:
-    from PyPDF2 import PdfWriter, PdfReader
-except ImportError:
-    raise ImportError("PyPDF2 is not installed. Please install it with: pip install PyPDF2")
+from browser_pool import browser_pool
+from render_cache import RenderCache, slide_key
+from pdf_stream import IncrementalPdfWriter
+from conversion_queue import JobQueueFull, job_manager
 
 
 # Create router
 router = APIRouter(prefix="/presentation", tags=["pdf-conversion"])
 
+# Part of the render cache key: changing any of these invalidates cached slides
+PDF_RENDER_SETTINGS = {"width": 1920, "height": 1080, "device_scale_factor": 1, "media": "screen"}
+
 # Create output directory for generated PDFs
 output_dir = Path("generated_pdfs")
 output_dir.mkdir(exist_ok=True)
@@ -54,6 +55,9 @@ class PresentationToPDFAPI:
         self.metadata_path = self.presentation_dir / "metadata.json"
         self.metadata = None
         self.slides_info = []
+        self.render_cache = RenderCache("pdf")
+        # Called with (completed, total) as slides are added to the output
+        self.progress_callback = None
         
         # Validate inputs
         if not self.presentation_dir.exists():
@@ -106,164 +110,158 @@ class PresentationToPDFAPI:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def render_slide_to_pdf(self, browser, slide_info: Dict, temp_dir: Path) -> Path:
-        """Render a single HTML slide to PDF using Playwright."""
+    async def render_slide_to_pdf(self, slide_info: Dict, temp_dir: Path) -> Path:
+        """Render a single HTML slide to PDF on a page borrowed from the shared browser pool."""
         html_path = slide_info['path']
         slide_num = slide_info['number']
         
-        print(f"Rendering slide {slide_num}: {slide_info['title']}")
+        temp_pdf_path = temp_dir / f"slide_{slide_num:02d}.pdf"
+        
+        # Reuse the previous render when the slide, its assets and the settings are unchanged
+        cache_key = await asyncio.to_thread(slide_key, html_path, "pdf", PDF_RENDER_SETTINGS)
+        cached = self.render_cache.lookup(cache_key)
+        if cached:
+            shutil.copyfile(cached / "slide.pdf", temp_pdf_path)
+            print(f"  ✓ Slide {slide_num} unchanged, reused cached render")
+            return temp_pdf_path
         
-        # Create new page with exact presentation dimensions
-        page = await browser.new_page()
+        print(f"Rendering slide {slide_num}: {slide_info['title']}")
         
         try:
-            # Set exact viewport to 1920x1080
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
+            # Borrow a page with exact presentation dimensions
+            async with browser_pool.page(viewport={"width": 1920, "height": 1080}) as page:
+                await page.emulate_media(media='screen')
             
-            # Override device pixel ratio for exact dimensions
-            await page.evaluate("""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
+                # Override device pixel ratio for exact dimensions
+                await page.evaluate("""
+                    () => {
+                        Object.defineProperty(window, 'devicePixelRatio', {
+                            get: () => 1
+                        });
+                    }
+                """)
             
-            # Navigate to the HTML file
-            file_url = f"file://{html_path.absolute()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=30000)
+                # Navigate to the HTML file
+                file_url = f"file://{html_path.absolute()}"
+                await page.goto(file_url, wait_until="networkidle", timeout=30000)
             
-            # Wait for fonts and dynamic content to load
-            await page.wait_for_timeout(3000)
+                # Wait for fonts and dynamic content to load
+                await page.wait_for_timeout(3000)
             
-            # Ensure exact slide dimensions
-            await page.evaluate("""
-                () => {
-                    const slideContainer = document.querySelector('.slide-container');
-                    if (slideContainer) {
-                        slideContainer.style.width = '1920px';
-                        slideContainer.style.height = '1080px';
-                        slideContainer.style.transform = 'none';
-                        slideContainer.style.maxWidth = 'none';
-                        slideContainer.style.maxHeight = 'none';
-                    }
+                # Ensure exact slide dimensions
+                await page.evaluate("""
+                    () => {
+                        const slideContainer = document.querySelector('.slide-container');
+                        if (slideContainer) {
+                            slideContainer.style.width = '1920px';
+                            slideContainer.style.height = '1080px';
+                            slideContainer.style.transform = 'none';
+                            slideContainer.style.maxWidth = 'none';
+                            slideContainer.style.maxHeight = 'none';
+                        }
                     
-                    document.body.style.margin = '0';
-                    document.body.style.padding = '0';
-                    document.body.style.width = '1920px';
-                    document.body.style.height = '1080px';
-                    document.body.style.overflow = 'hidden';
-                }
-            """)
-            
-            await page.wait_for_timeout(1000)
+                        document.body.style.margin = '0';
+                        document.body.style.padding = '0';
+                        document.body.style.width = '1920px';
+                        document.body.style.height = '1080px';
+                        document.body.style.overflow = 'hidden';
+                    }
+                """)
             
-            # Generate PDF for this slide
-            temp_pdf_path = temp_dir / f"slide_{slide_num:02d}.pdf"
+                await page.wait_for_timeout(1000)
             
-            await page.pdf(
-                path=str(temp_pdf_path),
-                width="1920px",
-                height="1080px",
-                margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
-                print_background=True,
-                prefer_css_page_size=False
-            )
+                # Generate PDF for this slide
+                await page.pdf(
+                    path=str(temp_pdf_path),
+                    width="1920px",
+                    height="1080px",
+                    margin={"top": "0", "right": "0", "bottom": "0", "left": "0"},
+                    print_background=True,
+                    prefer_css_page_size=False
+                )
             
-            print(f"  ✓ Slide {slide_num} rendered")
-            return temp_pdf_path
+                self.render_cache.store(cache_key, {"slide.pdf": temp_pdf_path})
+                print(f"  ✓ Slide {slide_num} rendered")
+                return temp_pdf_path
             
         except Exception as e:
             raise RuntimeError(f"Error rendering slide {slide_num}: {e}")
-        finally:
-            await page.close()
     
-    def combine_pdfs(self, pdf_paths: List[Path], output_path: Path) -> None:
-        """Combine multiple PDF files into a single PDF."""
-        print(f"Combining {len(pdf_paths)} PDFs...")
-        
-        pdf_writer = PdfWriter()
+    def report_progress(self, completed: int, total: int) -> None:
+        if self.progress_callback:
+            self.progress_callback(completed, total)
+    
+    async def assemble_pdf(self, render_tasks: List[asyncio.Task], output_path: Path) -> int:
+        """Append slide PDFs to the output, in slide order, as soon as each one is rendered."""
+        print(f"Assembling {len(render_tasks)} slides into {output_path.name}...")
         
+        writer = IncrementalPdfWriter(output_path)
         try:
-            for pdf_path in pdf_paths:
-                if pdf_path.exists():
-                    with open(pdf_path, 'rb') as pdf_file:
-                        pdf_reader = PdfReader(pdf_file)
-                        for page in pdf_reader.pages:
-                            pdf_writer.add_page(page)
-            
-            # Write the combined PDF
-            with open(output_path, 'wb') as output_file:
-                pdf_writer.write(output_file)
-            
-            print(f"✅ PDF created: {output_path}")
-            
-        except Exception as e:
+            for completed, task in enumerate(render_tasks, 1):
+                slide_pdf_path = await task
+                await asyncio.to_thread(writer.append_pdf, slide_pdf_path)
+                # The slide is in the output now; free the disk space right away
+                slide_pdf_path.unlink(missing_ok=True)
+                self.report_progress(completed, len(render_tasks))
+            await asyncio.to_thread(writer.close)
+        except BaseException as e:
+            # Also reached when a conversion job is cancelled: stop the remaining renders
+            for task in render_tasks:
+                task.cancel()
+            await asyncio.gather(*render_tasks, return_exceptions=True)
+            writer.abort()
+            if isinstance(e, RuntimeError) or not isinstance(e, Exception):
+                raise
             raise RuntimeError(f"Error combining PDFs: {e}")
+        
+        print(f"✅ PDF created: {output_path}")
+        return writer.page_count
     
     async def convert_to_pdf(self, store_locally: bool = True) -> tuple:
-        """Main conversion method with concurrent processing."""
+        """Main conversion method with concurrent rendering and incremental assembly."""
         print("🚀 Starting concurrent HTML to PDF conversion...")
         
         # Load metadata
         self.load_metadata()
+        presentation_name = self.metadata.get('presentation_name', 'presentation')
+        
+        if store_locally:
+            # Write straight into the static files directory for URL serving
+            timestamp = int(asyncio.get_event_loop().time())
+            output_path = output_dir / f"{presentation_name}_{timestamp}.pdf"
+        else:
+            # Streamed to the client by the endpoint, which removes it afterwards
+            fd, temp_output = tempfile.mkstemp(prefix="presentation-", suffix=".pdf")
+            os.close(fd)
+            output_path = Path(temp_output)
         
         # Create temporary directory for intermediate files
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # Launch browser
-            async with async_playwright() as p:
-                print("🌐 Launching browser...")
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling'
-                    ]
-                )
-                
-                try:
-                    # Process all slides concurrently using asyncio.gather
-                    print(f"📄 Processing {len(self.slides_info)} slides concurrently...")
-                    
-                    tasks = [
-                        self.render_slide_to_pdf(browser, slide_info, temp_path)
-                        for slide_info in self.slides_info
-                    ]
-                    
-                    # Wait for all slides to be processed concurrently
-                    pdf_paths = await asyncio.gather(*tasks)
-                    
-                finally:
-                    await browser.close()
+            # Render all slides concurrently on pages from the shared browser pool;
+            # slides are appended to the output in order while later ones are still rendering
+            print(f"📄 Processing {len(self.slides_info)} slides concurrently...")
             
-            # Create output path
-            presentation_name = self.metadata.get('presentation_name', 'presentation')
-            temp_output_path = temp_path / f"{presentation_name}.pdf"
+            slides = sorted(self.slides_info, key=lambda slide: slide['number'])
+            render_tasks = [
+                asyncio.create_task(self.render_slide_to_pdf(slide_info, temp_path))
+                for slide_info in slides
+            ]
             
-            # Combine all PDFs (sort by slide number to maintain order)
-            sorted_pdf_paths = sorted(pdf_paths, key=lambda p: int(p.stem.split('_')[1]))
-            self.combine_pdfs(sorted_pdf_paths, temp_output_path)
+            try:
+                await self.assemble_pdf(render_tasks, output_path)
+            except Exception:
+                output_path.unlink(missing_ok=True)
+                raise
             
-            if store_locally:
-                # Store in the static files directory for URL serving
-                timestamp = int(asyncio.get_event_loop().time())
-                filename = f"{presentation_name}_{timestamp}.pdf"
-                final_output = output_dir / filename
-                import shutil
-                shutil.copy2(temp_output_path, final_output)
-                return final_output, len(self.slides_info)
-            else:
-                # For direct download, read file content into memory (no local storage)
-                with open(temp_output_path, 'rb') as f:
-                    pdf_content = f.read()
-                return pdf_content, len(self.slides_info), presentation_name
+            stats = self.render_cache.stats()
+            print(f"🗂️ Rendered {stats['rendered']} slide(s), reused {stats['cached']} from cache")
+            self.render_cache.prune()
+        
+        if store_locally:
+            return output_path, len(self.slides_info)
+        return output_path, len(self.slides_info), presentation_name
 
 
 @router.post("/convert-to-pdf")
@@ -281,21 +279,32 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
         # Create converter
         converter = PresentationToPDFAPI(request.presentation_path)
         
-        # If download is requested, don't store locally and return file directly
+        # Runs on the shared conversion queue, like /jobs/convert-to-pdf
+        async def run(job) -> Dict:
+            converter.progress_callback = job.report_progress
+            if request.download:
+                # Don't store locally; the file is returned directly
+                pdf_path, total_slides, presentation_name = await converter.convert_to_pdf(store_locally=False)
+                return {"path": str(pdf_path), "total_slides": total_slides, "presentation_name": presentation_name}
+            pdf_path, total_slides = await converter.convert_to_pdf(store_locally=True)
+            return {"path": str(pdf_path), "total_slides": total_slides}
+        
+        result = await job_manager.run("pdf", run)
+        pdf_path = Path(result["path"])
+        total_slides = result["total_slides"]
+        
         if request.download:
-            pdf_content, total_slides, presentation_name = await converter.convert_to_pdf(store_locally=False)
-            
+            presentation_name = result["presentation_name"]
             print(f"✨ Direct download conversion completed for: {presentation_name}")
             
-            return Response(
-                content=pdf_content,
+            # Streamed from disk in chunks with Content-Length; the file is removed once sent
+            return FileResponse(
+                path=str(pdf_path),
                 media_type="application/pdf",
-                headers={"Content-Disposition": f"attachment; filename=\"{presentation_name}.pdf\""}
+                filename=f"{presentation_name}.pdf",
+                background=BackgroundTask(os.remove, str(pdf_path))
             )
         
-        # Otherwise, store locally and return JSON with download URL
-        pdf_path, total_slides = await converter.convert_to_pdf(store_locally=True)
-        
         print(f"✨ Conversion completed: {pdf_path}")
         
         pdf_url = f"/downloads/{pdf_path.name}"
@@ -308,6 +317,8 @@ async def convert_presentation_to_pdf(request: ConvertRequest):
             total_slides=total_slides
         )
         
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
@@ -6,29 +6,32 @@ Provides PPTX conversion endpoints with improved memory management and batch pro
 Uses smart batching and resource cleanup to handle large presentations efficiently.
 """
 
+import io
 import json
+import math
+import re
 import asyncio
 import os
 from pathlib import Path
 from typing import Dict, List, Optional
 import tempfile
 import shutil
-from dataclasses import dataclass
+from dataclasses import dataclass, asdict
 
 from fastapi import APIRouter, HTTPException
 from fastapi.responses import Response
 from pydantic import BaseModel, Field
 
-try:
-    from playwright.async_api import async_playwright
-except ImportError:
-    raise ImportError("Playwright is not installed. Please install it with: pip install playwright")
+from browser_pool import browser_pool
+from render_cache import RenderCache, slide_key
+from conversion_queue import JobQueueFull, job_manager
 
 try:
     from pptx import Presentation
     from pptx.util import Inches, Pt
     from pptx.enum.text import PP_ALIGN
     from pptx.dml.color import RGBColor
+    from PIL import Image
 except ImportError as e:
     raise ImportError(f"python-pptx is not installed. Please install it with: pip install python-pptx. Error: {e}")
 
@@ -40,6 +43,9 @@ router = APIRouter(prefix="/presentation", tags=["pptx-conversion"])
 output_dir = Path("generated_pptx")
 output_dir.mkdir(exist_ok=True)
 
+# Part of the render cache key: changing any of these invalidates cached slides
+PPTX_RENDER_SETTINGS = {"width": 1920, "height": 1080, "device_scale_factor": 1, "media": "screen"}
+
 
 class ConvertRequest(BaseModel):
     presentation_path: str = Field(..., description="Path to the presentation folder containing metadata.json")
@@ -127,6 +133,472 @@ class CSSParser:
         return weight_str in bold_weights or (weight_str.isdigit() and int(weight_str) >= 700)
 
 
+# Measures icons, visual elements and text runs in one pass over the untouched
+# DOM. Icons and visual elements are tagged with data-capture-id so later steps
+# can find them again without re-measuring.
+SLIDE_EXTRACTION_SCRIPT = r"""
+() => {
+    let captureCounter = 0;
+    function tagForCapture(element) {
+        const captureId = 'capture-' + (captureCounter++);
+        element.setAttribute('data-capture-id', captureId);
+        return captureId;
+    }
+    
+    function round(value) {
+        return Math.round(value * 100) / 100;
+    }
+    
+    function isIcon(element) {
+        // Check for Font Awesome icons
+        if (element.classList.contains('fas') || 
+            element.classList.contains('far') || 
+            element.classList.contains('fab') || 
+            element.classList.contains('fa')) {
+            return true;
+        }
+        
+        // Check for inline SVG icons (small SVG elements that are likely icons)
+        if (element.tagName === 'svg' || element.tagName === 'SVG') {
+            const rect = element.getBoundingClientRect();
+            // Consider SVGs smaller than 200x200 as icons
+            if (rect.width > 0 && rect.height > 0 && rect.width <= 200 && rect.height <= 200) {
+                return true;
+            }
+        }
+        
+        // Check for elements with class "icon" that contain SVG
+        if (element.classList.contains('icon') && element.querySelector('svg')) {
+            return true;
+        }
+        
+        return false;
+    }
+    
+    function extractIconElements(element, depth = 0) {
+        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
+        
+        const computed = window.getComputedStyle(element);
+        const rect = element.getBoundingClientRect();
+        
+        // Skip if no dimensions or hidden
+        if (rect.width === 0 || rect.height === 0) return [];
+        if (computed.display === 'none' || computed.visibility === 'hidden') return [];
+        
+        const results = [];
+        
+        // Check if this element contains an SVG child - if so, capture the SVG directly instead
+        const svgChild = element.querySelector('svg');
+        if (svgChild && isIcon(element)) {
+            // Skip this container, let the SVG be captured directly
+            Array.from(element.children).forEach(child => {
+                results.push(...extractIconElements(child, depth + 1));
+            });
+            return results;
+        }
+        
+        // Check if this element is an icon (SVG or Font Awesome)
+        if (isIcon(element)) {
+            results.push({
+                type: 'icon',
+                captureId: tagForCapture(element),
+                x: round(rect.left),
+                y: round(rect.top),
+                width: round(rect.width),
+                height: round(rect.height),
+                tag: element.tagName.toLowerCase(),
+                depth: depth,
+                isSvg: element.tagName.toLowerCase() === 'svg'
+            });
+            
+            // If this is an SVG, don't process children (they're part of the SVG)
+            if (element.tagName.toLowerCase() === 'svg') {
+                return results;
+            }
+        }
+        
+        // Process children for nested icons
+        Array.from(element.children).forEach(child => {
+            results.push(...extractIconElements(child, depth + 1));
+        });
+        
+        return results;
+    }
+    
+    function hasActualVisualContent(element, computed) {
+        // Always include explicit visual elements
+        if (['IMG', 'SVG', 'CANVAS', 'VIDEO', 'IFRAME'].includes(element.tagName)) {
+            return true;
+        }
+        
+        // Check for actual background images and gradients (not just 'none')
+        if (computed.backgroundImage && computed.backgroundImage !== 'none') {
+            return true;
+        }
+        
+        // Check for meaningful background colors (not just transparent)
+        const bgColor = computed.backgroundColor;
+        if (bgColor && 
+            bgColor !== 'rgba(0, 0, 0, 0)' && 
+            bgColor !== 'transparent' && 
+            bgColor !== 'inherit' &&
+            bgColor !== 'initial' &&
+            bgColor !== 'unset') {
+            return true;
+        }
+        
+        // Check for borders (but ignore default/none)
+        if (computed.borderStyle && 
+            computed.borderStyle !== 'none' && 
+            computed.borderStyle !== 'initial' &&
+            computed.borderWidth && 
+            computed.borderWidth !== '0px') {
+            return true;
+        }
+        
+        // Check for box shadows
+        if (computed.boxShadow && 
+            computed.boxShadow !== 'none' && 
+            computed.boxShadow !== 'initial') {
+            return true;
+        }
+        
+        // Check for gradients in background (comprehensive check)
+        if (computed.background && 
+            (computed.background.includes('gradient') || 
+             computed.background.includes('url('))) {
+            return true;
+        }
+        
+        return false;
+    }
+    
+    function shouldSkipElement(element, computed) {
+        // Skip text-only elements
+        const textOnlyTags = ['H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'P', 'A', 'SPAN', 
+                            'STRONG', 'EM', 'U', 'BUTTON', 'LABEL', 'SMALL', 'CODE'];
+        if (textOnlyTags.includes(element.tagName)) {
+            return true;
+        }
+        
+        // Skip hidden elements
+        if (computed.display === 'none' || computed.visibility === 'hidden') {
+            return true;
+        }
+        
+        return false;
+    }
+    
+    function extractVisualElements(element, depth = 0) {
+        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
+        
+        const computed = window.getComputedStyle(element);
+        const rect = element.getBoundingClientRect();
+        
+        // Skip if no dimensions or filtered out
+        if (rect.width === 0 || rect.height === 0) return [];
+        if (shouldSkipElement(element, computed)) return [];
+        
+        const results = [];
+        
+        // Skip very large elements that are likely backgrounds
+        if (hasActualVisualContent(element, computed) && rect.width <= 1700) {
+            results.push({
+                type: 'visual',
+                captureId: element.getAttribute('data-capture-id') || tagForCapture(element),
+                x: round(rect.left),
+                y: round(rect.top),
+                width: round(rect.width),
+                height: round(rect.height),
+                tag: element.tagName.toLowerCase(),
+                depth: depth,
+                hasBackground: computed.backgroundImage !== 'none' || 
+                              (computed.backgroundColor !== 'rgba(0, 0, 0, 0)' && 
+                               computed.backgroundColor !== 'transparent'),
+                hasBorder: computed.borderStyle !== 'none',
+                hasShadow: computed.boxShadow !== 'none'
+            });
+        }
+        
+        // Process children for nested elements
+        Array.from(element.children).forEach(child => {
+            results.push(...extractVisualElements(child, depth + 1));
+        });
+        
+        return results;
+    }
+    
+    function extractTextFromElement(element) {
+        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
+        
+        const computedStyle = window.getComputedStyle(element);
+        const rect = element.getBoundingClientRect();
+        
+        // Skip hidden elements
+        if (computedStyle.display === 'none' || computedStyle.visibility === 'hidden') return [];
+        if (rect.width === 0 || rect.height === 0) return [];
+        
+        const results = [];
+        
+        // Get direct text content (not from children)
+        let directText = '';
+        for (let node of element.childNodes) {
+            if (node.nodeType === Node.TEXT_NODE) {
+                directText += node.textContent;
+            }
+        }
+        directText = directText.trim();
+        
+        // If this element has direct text content, extract it with styling
+        if (directText && directText.length > 0) {
+            const fontSizeMatch = computedStyle.fontSize.match(/([0-9.]+)px/);
+            const actualFontSize = fontSizeMatch ? parseFloat(fontSizeMatch[1]) : 16;
+            
+            // Get the actual text node position, not the container
+            const textNodes = [];
+            for (let node of element.childNodes) {
+                if (node.nodeType === Node.TEXT_NODE && node.textContent.trim()) {
+                    const range = document.createRange();
+                    range.selectNodeContents(node);
+                    textNodes.push({
+                        text: node.textContent.trim(),
+                        rect: range.getBoundingClientRect()
+                    });
+                }
+            }
+            
+            const textStyle = {
+                fontFamily: computedStyle.fontFamily,
+                fontSize: computedStyle.fontSize,
+                fontWeight: computedStyle.fontWeight,
+                fontStyle: computedStyle.fontStyle,
+                color: computedStyle.color,
+                textAlign: computedStyle.textAlign,
+                lineHeight: computedStyle.lineHeight,
+                letterSpacing: computedStyle.letterSpacing,
+                textShadow: computedStyle.textShadow,
+                webkitTextStroke: computedStyle.webkitTextStroke,
+                webkitTextFillColor: computedStyle.webkitTextFillColor,
+                background: computedStyle.background,
+                backgroundImage: computedStyle.backgroundImage,
+                webkitBackgroundClip: computedStyle.webkitBackgroundClip,
+                textDecoration: computedStyle.textDecoration,
+                textTransform: computedStyle.textTransform
+            };
+            
+            // Use text node position if available, otherwise fall back to container
+            const positions = textNodes.length > 0
+                ? textNodes
+                : [{ text: directText, rect: rect }];
+            positions.forEach(textNode => {
+                results.push({
+                    text: textNode.text,
+                    x: round(textNode.rect.left),
+                    y: round(textNode.rect.top),
+                    width: round(textNode.rect.width),
+                    height: round(textNode.rect.height),
+                    actualFontSizePx: actualFontSize,
+                    tag: element.tagName.toLowerCase(),
+                    style: textStyle
+                });
+            });
+        }
+        
+        // Process children for nested text
+        Array.from(element.children).forEach(child => {
+            results.push(...extractTextFromElement(child));
+        });
+        
+        return results;
+    }
+    
+    function byPosition(a, b) {
+        if (Math.abs(a.y - b.y) < 5) return a.x - b.x;
+        return a.y - b.y;
+    }
+    
+    const icons = extractIconElements(document.body);
+    
+    // Sort by depth (background elements first) then by position
+    const visuals = extractVisualElements(document.body);
+    visuals.sort((a, b) => a.depth !== b.depth ? a.depth - b.depth : byPosition(a, b));
+    
+    // Sort by position (top to bottom, left to right)
+    const texts = extractTextFromElement(document.body);
+    texts.sort(byPosition);
+    
+    return { icons: icons, visuals: visuals, texts: texts };
+}
+"""
+
+# Hides text and the page itself, then clones each requested element (with its
+# computed styles, descendants made transparent except SVG content) into its
+# own fixed container at the given position on the capture sheet.
+CAPTURE_SHEET_SCRIPT = r"""
+(items) => {
+    document.querySelectorAll('[id^="clone-capture-container-"]').forEach(container => container.remove());
+    
+    if (window.originalHtmlBg === undefined) {
+        // Make all text transparent while preserving visual styling
+        function makeTextTransparent(element) {
+            if (element.nodeType === Node.ELEMENT_NODE) {
+                if (element.textContent && element.textContent.trim()) {
+                    element.style.color = 'transparent';
+                    element.style.textShadow = 'none';
+                    element.style.webkitTextStroke = 'none';
+                    element.style.webkitTextFillColor = 'transparent';
+                }
+                Array.from(element.children).forEach(makeTextTransparent);
+            }
+        }
+        makeTextTransparent(document.body);
+        
+        // Store original backgrounds, then isolate the capture containers
+        window.originalHtmlBg = document.documentElement.style.background || '';
+        window.originalBodyBg = document.body.style.background || '';
+        document.documentElement.style.background = 'transparent';
+        document.body.style.background = 'transparent';
+        document.body.style.visibility = 'hidden';
+    }
+    
+    // Copy all computed styles from original to cloned element and its descendants
+    function copyComputedStyles(original, cloned, isRoot = true, parentIsSvg = false) {
+        const computedStyle = window.getComputedStyle(original);
+        const isSvgElement = original.tagName === 'svg' || original.tagName === 'SVG';
+        const isSvgChild = parentIsSvg || original.namespaceURI === 'http://www.w3.org/2000/svg';
+        
+        let styleStr = '';
+        for (let prop of computedStyle) {
+            styleStr += `${prop}: ${computedStyle.getPropertyValue(prop)}; `;
+        }
+        cloned.style.cssText = styleStr;
+        
+        // For child elements (not root), make the entire element transparent
+        // EXCEPT for SVG elements and their children - preserve them completely
+        if (!isRoot && !isSvgElement && !isSvgChild) {
+            cloned.style.opacity = '0';
+        }
+        
+        for (let i = 0; i < original.children.length && i < cloned.children.length; i++) {
+            copyComputedStyles(original.children[i], cloned.children[i], false, isSvgElement || isSvgChild);
+        }
+    }
+    
+    const placed = [];
+    items.forEach((item, index) => {
+        const targetElement = document.querySelector(`[data-capture-id="${item.captureId}"]`);
+        if (!targetElement) return;
+        try {
+            const clonedElement = targetElement.cloneNode(true);
+            copyComputedStyles(targetElement, clonedElement);
+            clonedElement.removeAttribute('data-capture-id');
+            
+            const cleanContainer = document.createElement('div');
+            cleanContainer.id = 'clone-capture-container-' + index;
+            cleanContainer.style.cssText = `
+                position: fixed;
+                top: ${item.sheetY}px;
+                left: ${item.sheetX}px;
+                width: ${item.width}px;
+                height: ${item.height}px;
+                background: transparent;
+                z-index: 999999;
+                padding: 0;
+                margin: 0;
+                border: none;
+                overflow: hidden;
+                visibility: visible;
+            `;
+            
+            // Position cloned element at (0,0) within container
+            clonedElement.style.position = 'absolute';
+            clonedElement.style.top = '0px';
+            clonedElement.style.left = '0px';
+            clonedElement.style.margin = '0';
+            clonedElement.style.transform = 'none';
+            
+            cleanContainer.appendChild(clonedElement);
+            document.body.appendChild(cleanContainer);
+            placed.push(item.captureId);
+        } catch (error) {
+            console.log('Failed to clone element:', item.captureId, error.message);
+        }
+    });
+    return placed;
+}
+"""
+
+# Undoes CAPTURE_SHEET_SCRIPT's isolation (text stays transparent).
+RESTORE_PAGE_SCRIPT = r"""
+() => {
+    if (window.originalHtmlBg !== undefined) {
+        document.documentElement.style.background = window.originalHtmlBg || '';
+        document.body.style.background = window.originalBodyBg || '';
+    }
+    document.body.style.visibility = 'visible';
+    document.querySelectorAll('[id^="clone-capture-container-"]').forEach(container => container.remove());
+}
+"""
+
+# Makes text completely invisible and hides the captured elements, leaving the clean background.
+PREPARE_BACKGROUND_SCRIPT = r"""
+(capturedIds) => {
+    function makeTextInvisible(element) {
+        if (element.nodeType !== Node.ELEMENT_NODE) return;
+        const computedStyle = window.getComputedStyle(element);
+        if (element.textContent && element.textContent.trim()) {
+            element.style.color = 'transparent';
+            element.style.textShadow = 'none';
+            element.style.webkitTextStroke = 'none';
+            element.style.webkitTextFillColor = 'transparent';
+            
+            // Also hide any background text effects
+            if (computedStyle.webkitBackgroundClip === 'text') {
+                element.style.background = 'transparent';
+                element.style.webkitBackgroundClip = 'initial';
+            }
+        }
+        Array.from(element.children).forEach(makeTextInvisible);
+    }
+    
+    makeTextInvisible(document.body);
+    capturedIds.forEach(captureId => {
+        const element = document.querySelector(`[data-capture-id="${captureId}"]`);
+        if (element) element.style.visibility = 'hidden';
+    });
+}
+"""
+
+CAPTURE_SHEET_GAP = 2
+
+
+def _pack_capture_sheets(items: List[Dict], width: int = 1920, height: int = 1080) -> List[List[Dict]]:
+    """Shelf-pack element clips into viewport-sized sheets; sets sheetX/sheetY on each item."""
+    sheets: List[List[Dict]] = []
+    sheet: List[Dict] = []
+    x = y = shelf_height = 0
+    for item in sorted(items, key=lambda item: item['height'], reverse=True):
+        w, h = math.ceil(item['width']), math.ceil(item['height'])
+        if x + w > width:
+            x, y, shelf_height = 0, y + shelf_height + CAPTURE_SHEET_GAP, 0
+        if y + h > height and sheet:
+            sheets.append(sheet)
+            sheet, x, y, shelf_height = [], 0, 0, 0
+        item['sheetX'], item['sheetY'] = x, y
+        sheet.append(item)
+        x += w + CAPTURE_SHEET_GAP
+        shelf_height = max(shelf_height, h)
+    if sheet:
+        sheets.append(sheet)
+    return sheets
+
+
+def _crop(screenshot: "Image.Image", clip) -> "Image.Image":
+    x, y, width, height = clip
+    left, top = int(round(x)), int(round(y))
+    return screenshot.crop((left, top, left + max(1, int(round(width))), top + max(1, int(round(height)))))
+
+
 class OptimizedHTMLToPPTXConverter:
     def __init__(self, presentation_dir: str):
         """Initialize the optimized converter."""
@@ -134,6 +606,11 @@ class OptimizedHTMLToPPTXConverter:
         self.metadata_path = self.presentation_dir / "metadata.json"
         self.metadata = None
         self.slides_info = []
+        self.render_cache = RenderCache("pptx")
+        # Slides that fell back to partial output; these are not cached
+        self.degraded_slides = set()
+        # Called with (completed, total) as slides are analyzed
+        self.progress_callback = None
         
         # Validate inputs
         if not self.presentation_dir.exists():
@@ -186,940 +663,247 @@ class OptimizedHTMLToPPTXConverter:
         except Exception as e:
             raise ValueError(f"Error loading metadata: {e}")
     
-    async def extract_visual_elements(self, page, html_path: Path, temp_dir: Path) -> List[Dict]:
-        """Extract all visual elements (non-text) as individual images with positioning."""
-        visual_elements = []
-        
-        try:
-            # Set viewport and load HTML
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
-            await page.wait_for_timeout(1000)
-            
-            def handle_console(msg):
-                print(f"BROWSER CONSOLE: {msg.text}")
+    async def analyze_slide(self, page, html_path: Path, temp_dir: Path) -> Dict:
+        """
+        Analyze a slide in a single page load.
 
-            page.on("console", handle_console)
-            
-            # Step 1: First extract icons BEFORE making text transparent
-            icon_data = await page.evaluate(r"""
-                () => {
-                    function isIcon(element) {
-                        // Check for Font Awesome icons
-                        if (element.classList.contains('fas') || 
-                            element.classList.contains('far') || 
-                            element.classList.contains('fab') || 
-                            element.classList.contains('fa')) {
-                            return true;
-                        }
-                        
-                        // Check for inline SVG icons (small SVG elements that are likely icons)
-                        if (element.tagName === 'svg' || element.tagName === 'SVG') {
-                            const rect = element.getBoundingClientRect();
-                            // Consider SVGs smaller than 200x200 as icons
-                            if (rect.width > 0 && rect.height > 0 && rect.width <= 200 && rect.height <= 200) {
-                                return true;
-                            }
-                        }
-                        
-                        // Check for elements with class "icon" that contain SVG
-                        if (element.classList.contains('icon') && element.querySelector('svg')) {
-                            return true;
-                        }
-                        
-                        return false;
-                    }
-                    
-                    function extractIconElements(element, depth = 0) {
-                        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-                        
-                        const computed = window.getComputedStyle(element);
-                        const rect = element.getBoundingClientRect();
-                        
-                        // Skip if no dimensions or hidden
-                        if (rect.width === 0 || rect.height === 0) return [];
-                        if (computed.display === 'none' || computed.visibility === 'hidden') return [];
-                        
-                        const results = [];
-                        
-                        // Check if this element contains an SVG child - if so, capture the SVG directly instead
-                        const svgChild = element.querySelector('svg');
-                        if (svgChild && isIcon(element)) {
-                            // Skip this container, let the SVG be captured directly
-                            Array.from(element.children).forEach(child => {
-                                results.push(...extractIconElements(child, depth + 1));
-                            });
-                            return results;
-                        }
-                        
-                        // Check if this element is an icon (SVG or Font Awesome)
-                        if (isIcon(element)) {
-                            console.log('ICON ELEMENT FOUND:', element.tagName, element.textContent?.trim().substring(0, 30));
-                            
-                            results.push({
-                                type: 'icon',
-                                x: Math.round(rect.left * 100) / 100,
-                                y: Math.round(rect.top * 100) / 100,
-                                width: Math.round(rect.width * 100) / 100,
-                                height: Math.round(rect.height * 100) / 100,
-                                tag: element.tagName.toLowerCase(),
-                                className: element.className,
-                                id: element.id,
-                                depth: depth,
-                                isSvg: element.tagName.toLowerCase() === 'svg',
-                                // Add debug info
-                                debugInfo: {
-                                    textContent: element.textContent?.trim().substring(0, 50) || 'No text'
-                                }
-                            });
-                            
-                            // If this is an SVG, don't process children (they're part of the SVG)
-                            if (element.tagName.toLowerCase() === 'svg') {
-                                return results;
-                            }
-                        }
-                        
-                        // Process children for nested icons
-                        Array.from(element.children).forEach(child => {
-                            results.push(...extractIconElements(child, depth + 1));
-                        });
-                        
-                        return results;
-                    }
-                    
-                    // Execute icon extraction
-                    const allIconElements = extractIconElements(document.body);
-                    
-                    return allIconElements;
-                }
-            """)
-            
-            # Capture icons as visual elements
-            print(f"🔍 Total icon elements found: {len(icon_data) if icon_data else 0}")
-            icon_visual_elements = []
-            
-            for i, data in enumerate(icon_data or []):
-                if data and data['type'] == 'icon':
-                    try:
-                        # Ensure coordinates are within viewport bounds
-                        x = max(0, min(data['x'], 1920))
-                        y = max(0, min(data['y'], 1080))
-                        width = min(data['width'], 1920 - x)
-                        height = min(data['height'], 1080 - y)
-                        
-                        # Skip if area is too small
-                        if width < 5 or height < 5:
-                            continue
-                        
-                        # Capture the icon with transparency support for SVGs
-                        element_path = temp_dir / f"icon_element_{html_path.stem}_{i:03d}.png"
-                        
-                        # For SVG icons, we want to capture them with transparent background
-                        screenshot_options = {
-                            'path': str(element_path),
-                            'full_page': False,
-                            'clip': {"x": x, "y": y, "width": width, "height": height}
-                        }
-                        
-                        # Add transparency support for SVG icons
-                        if data.get('isSvg', False):
-                            screenshot_options['omit_background'] = True
-                        
-                        await page.screenshot(**screenshot_options)
-                        
-                        icon_element = {
-                            'type': 'visual',  # Treat as visual element for consistency
-                            'x': data['x'],
-                            'y': data['y'],
-                            'width': data['width'],
-                            'height': data['height'],
-                            'tag': data['tag'],
-                            'image_path': element_path,
-                            'depth': data['depth'],
-                            'isIcon': True
-                        }
-                        
-                        icon_visual_elements.append(icon_element)
-                        
-                    except Exception as e:
-                        print(f"Failed to capture icon element {i}: {e}")
-            
-            # Step 2: Now make all text transparent while preserving visual styling
-            await page.evaluate(r"""
-                () => {
-                    function makeTextTransparent(element) {
-                        if (element.nodeType === Node.ELEMENT_NODE) {
-                            const computed = window.getComputedStyle(element);
-                            
-                            // If element has text content, make it transparent
-                            if (element.textContent && element.textContent.trim()) {
-                                element.style.color = 'transparent';
-                                element.style.textShadow = 'none';
-                                element.style.webkitTextStroke = 'none';
-                                element.style.webkitTextFillColor = 'transparent';
-                            }
-                            
-                            // Process children
-                            Array.from(element.children).forEach(makeTextTransparent);
-                        }
-                    }
-                    
-                    makeTextTransparent(document.body);
-                }
-            """)
-            
-            await page.wait_for_timeout(500)
-            
-            # Step 3: Extract other visual elements by depth and visual properties
-            visual_data = await page.evaluate(r"""
-    () => {
-        function hasActualVisualContent(element, computed) {
-            
-            // Always include explicit visual elements
-            if (['IMG', 'SVG', 'CANVAS', 'VIDEO', 'IFRAME'].includes(element.tagName)) {
-                return true;
-            }
-            
-            // 2. Check for actual background images and gradients (not just 'none')
-            if (computed.backgroundImage && computed.backgroundImage !== 'none') {
-                return true;
-            }
-            
-            // 3. Check for meaningful background colors (not just transparent)
-            const bgColor = computed.backgroundColor;
-            if (bgColor && 
-                bgColor !== 'rgba(0, 0, 0, 0)' && 
-                bgColor !== 'transparent' && 
-                bgColor !== 'inherit' &&
-                bgColor !== 'initial' &&
-                bgColor !== 'unset') {
-                return true;
-            }
-            
-            // 4. Check for borders (but ignore default/none)
-            if (computed.borderStyle && 
-                computed.borderStyle !== 'none' && 
-                computed.borderStyle !== 'initial' &&
-                computed.borderWidth && 
-                computed.borderWidth !== '0px') {
-                return true;
-            }
-            
-            // 5. Check for box shadows
-            if (computed.boxShadow && 
-                computed.boxShadow !== 'none' && 
-                computed.boxShadow !== 'initial') {
-                return true;
-            }
-            
-            // 6. Check for gradients in background (comprehensive check)
-            if (computed.background && 
-                (computed.background.includes('gradient') || 
-                 computed.background.includes('url('))) {
-                return true;
-            }
-            
-            // Also check backgroundImage for gradients (browsers often store gradients here)
-            if (computed.backgroundImage && 
-                (computed.backgroundImage.includes('gradient') ||
-                 computed.backgroundImage.includes('url('))) {
-                return true;
-            }
-            
-            return false;
-        }
-                          
-        function shouldSkipElement(element, computed) {
-            // Skip text-only elements
-            const textOnlyTags = ['H1', 'H2', 'H3', 'H4', 'H5', 'H6', 'P', 'A', 'SPAN', 
-                                'STRONG', 'EM', 'U', 'BUTTON', 'LABEL', 'SMALL', 'CODE'];
-            if (textOnlyTags.includes(element.tagName)) {
-                return true;
-            }
-            
-            // Skip hidden elements
-            if (computed.display === 'none' || computed.visibility === 'hidden') {
-                return true;
-            }
-            
-            return false;
-        }
-                                    
-        function extractVisualElements(element, depth = 0) {
-            if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-            
-            const computed = window.getComputedStyle(element);
-            const rect = element.getBoundingClientRect();
-            
-            // Skip if no dimensions
-            if (rect.width === 0 || rect.height === 0) {
-                return [];
-            }
-            
-            // Skip if should be filtered out
-            if (shouldSkipElement(element, computed)) {
-                return [];
-            }
-            
-            const results = [];
-            
-            // Check if element has actual visual content
-            if (hasActualVisualContent(element, computed)) {
-                console.log('VISUAL ELEMENT FOUND:', element.tagName, element.textContent?.trim().substring(0, 30));
-                console.log('backgroundImage:', computed.backgroundImage);
-                console.log('backgroundColor:', computed.backgroundColor);
-                console.log('borderStyle:', computed.borderStyle);
-                
-                // Skip very large elements that are likely backgrounds
-                const isLikelyBackground = rect.width > 1700;
-                
-                if (!isLikelyBackground) {
-                    // Assign unique capture ID to element
-                    const captureId = 'visual-capture-' + Date.now() + '-' + Math.random().toString(36).substr(2, 9);
-                    element.setAttribute('data-capture-id', captureId);
-                    
-                    results.push({
-                        type: 'visual',
-                        captureId: captureId,
-                        x: Math.round(rect.left * 100) / 100,
-                        y: Math.round(rect.top * 100) / 100,
-                        width: Math.round(rect.width * 100) / 100,
-                        height: Math.round(rect.height * 100) / 100,
-                        tag: element.tagName.toLowerCase(),
-                        className: element.className,
-                        id: element.id,
-                        depth: depth,
-                        hasBackground: computed.backgroundImage !== 'none' || 
-                                      (computed.backgroundColor !== 'rgba(0, 0, 0, 0)' && 
-                                       computed.backgroundColor !== 'transparent'),
-                        hasBorder: computed.borderStyle !== 'none',
-                        hasShadow: computed.boxShadow !== 'none',
-                        // Add debug info
-                        debugInfo: {
-                            backgroundColor: computed.backgroundColor,
-                            backgroundImage: computed.backgroundImage,
-                            borderStyle: computed.borderStyle,
-                            textContent: element.textContent?.trim().substring(0, 50) || 'No text'
-                        }
-                    });
-                }
-            }
-            
-            // Process children for nested elements
-            Array.from(element.children).forEach(child => {
-                results.push(...extractVisualElements(child, depth + 1));
-            });
-            
-            return results;
-        }
+        One evaluate measures icons, visual elements and text runs on the
+        untouched DOM. Icons are then cropped out of one viewport screenshot,
+        visual elements are cloned side by side onto as few capture sheets as
+        possible (one screenshot per sheet), and a last screenshot of the page
+        with text and captured elements hidden becomes the clean background.
+        """
+        # Use file:// URL instead of set_content to preserve relative paths
+        file_url = f"file://{html_path.resolve()}"
+        await page.goto(file_url, wait_until="networkidle", timeout=25000)
+        await page.wait_for_timeout(1000)
         
-        // Actually execute the extraction and return results
-        const allVisualElements = extractVisualElements(document.body);
+        extraction = await page.evaluate(SLIDE_EXTRACTION_SCRIPT)
+        icon_data = extraction.get('icons') or []
+        visual_data = extraction.get('visuals') or []
+        print(f"🔍 Slide {html_path.stem}: {len(icon_data)} icons, {len(visual_data)} visual elements, {len(extraction.get('texts') or [])} text runs")
         
-        // Sort by depth (background elements first) then by position
-        allVisualElements.sort((a, b) => {
-            if (a.depth !== b.depth) return a.depth - b.depth;
-            if (Math.abs(a.y - b.y) < 5) return a.x - b.x;
-            return a.y - b.y;
-        });
+        text_elements = self.build_text_elements(extraction.get('texts') or [])
         
-        return allVisualElements;
-    }
-""")
-            
-            # Debug: Log what we found in Python console
-            print(f"🔍 Total visual elements found: {len(visual_data) if visual_data else 0}")
-            if visual_data:
-                for i, data in enumerate(visual_data):  # Show first 5
-                    print(f"🔍 Element {i}: {data['tag']} - {data.get('className', 'No class')}")
-                    print(f"   Position: ({data['x']}, {data['y']}) {data['width']}x{data['height']}")
-                    print(f"   Has background: {data.get('hasBackground', False)}")
-                    print(f"   Has border: {data.get('hasBorder', False)}")
-                    print(f"   Has shadow: {data.get('hasShadow', False)}")
-                    print("--- 🔍", data)
-            
-            # Step 3: Capture each visual element as an image
-            for i, data in enumerate(visual_data or []):
-                if data and data['type'] == 'visual':
-                    try:
-                        # Ensure coordinates are within viewport bounds
-                        x = max(0, min(data['x'], 1920))
-                        y = max(0, min(data['y'], 1080))
-                        width = min(data['width'], 1920 - x)
-                        height = min(data['height'], 1920 - y)
-                        
-                        # Skip if area is too small
-                        if width < 5 or height < 5:
-                            continue
-                        
-                        # Clone element and capture in isolation
-                        clone_result = await page.evaluate(r"""
-                            (elementData) => {
-                                // Find the element by its unique capture ID
-                                const targetElement = document.querySelector(`[data-capture-id="${elementData.captureId}"]`);
-                                
-                                if (!targetElement) {
-                                    return { success: false, error: `Visual element not found with ID: ${elementData.captureId}` };
-                                }
-                                
-                                try {
-                                    // Clone the element deeply
-                                    const clonedElement = targetElement.cloneNode(true);
-                                    
-                                    // Copy all computed styles from original to cloned element and its descendants
-                                    function copyComputedStyles(original, cloned, isRoot = true, parentIsSvg = false) {
-                                        const computedStyle = window.getComputedStyle(original);
-                                        const isSvgElement = original.tagName === 'svg' || original.tagName === 'SVG';
-                                        const isSvgChild = parentIsSvg || original.namespaceURI === 'http://www.w3.org/2000/svg';
-                                        
-                                        // Create a clean style string with all computed properties
-                                        let styleStr = '';
-                                        for (let prop of computedStyle) {
-                                            let value = computedStyle.getPropertyValue(prop);
-                                            styleStr += `${prop}: ${value}; `;
-                                        }
-                                        cloned.style.cssText = styleStr;
-                                        
-                                        // For child elements (not root), make the entire element transparent
-                                        // EXCEPT for SVG elements and their children - preserve them completely
-                                        if (!isRoot && !isSvgElement && !isSvgChild) {
-                                            cloned.style.opacity = '0';
-                                        }
-                                        
-                                        // Recursively copy styles for children (mark as non-root)
-                                        // Pass down SVG context to preserve all SVG descendants
-                                        for (let i = 0; i < original.children.length && i < cloned.children.length; i++) {
-                                            copyComputedStyles(original.children[i], cloned.children[i], false, isSvgElement || isSvgChild);
-                                        }
-                                    }
-                                    
-                                    copyComputedStyles(targetElement, clonedElement);
-                                    
-                                    // Create clean container for isolation
-                                    const cleanContainer = document.createElement('div');
-                                    cleanContainer.id = 'clone-capture-container-' + Date.now();
-                                    cleanContainer.style.cssText = `
-                                        position: fixed;
-                                        top: 0;
-                                        left: 0;
-                                        width: ${elementData.width}px;
-                                        height: ${elementData.height}px;
-                                        background: transparent;
-                                        z-index: 999999;
-                                        padding: 0;
-                                        margin: 0;
-                                        border: none;
-                                        overflow: hidden;
-                                    `;
-                                    
-                                    // Position cloned element at (0,0) within container
-                                    clonedElement.style.position = 'absolute';
-                                    clonedElement.style.top = '0px';
-                                    clonedElement.style.left = '0px';
-                                    clonedElement.style.margin = '0';
-                                    clonedElement.style.transform = 'none';
-                                    
-                                    // Add to DOM for capture
-                                    cleanContainer.appendChild(clonedElement);
-                                    document.body.appendChild(cleanContainer);
-                                    
-                                    return { 
-                                        success: true, 
-                                        containerId: cleanContainer.id,
-                                        containerRect: {
-                                            x: 0, 
-                                            y: 0, 
-                                            width: elementData.width, 
-                                            height: elementData.height
-                                        }
-                                    };
-                                    
-                                } catch (error) {
-                                    return { success: false, error: error.message };
-                                }
-                            }
-                        """, data)
-                        
-                        if not clone_result.get('success'):
-                            print(f"Failed to clone element: {clone_result.get('error')}")
-                            continue
-                        
-                        # Wait a moment for styles to apply
-                        await page.wait_for_timeout(100)
-                        
-                        # Hide main content and ensure transparent background for perfect isolation
-                        await page.evaluate(f"""
-                            () => {{
-                                // Store original backgrounds
-                                window.originalHtmlBg = document.documentElement.style.background || '';
-                                window.originalBodyBg = document.body.style.background || '';
-                                
-                                // Set transparent backgrounds
-                                document.documentElement.style.background = 'transparent';
-                                document.body.style.background = 'transparent';
-                                
-                                // Hide all main content
-                                document.body.style.visibility = 'hidden';
-                                
-                                // Make sure our container stays visible
-                                const container = document.getElementById('{clone_result['containerId']}');
-                                if (container) {{
-                                    container.style.visibility = 'visible';
-                                }}
-                            }}
-                        """)
-                        
-                        # Capture the isolated cloned element with transparency
-                        element_path = temp_dir / f"visual_element_{html_path.stem}_{i:03d}.png"
-                        container_rect = clone_result['containerRect']
-                        
-                        await page.screenshot(
-                            path=str(element_path),
-                            full_page=False,
-                            omit_background=True,  # 🚀 Preserves transparency!
-                            clip={
-                                "x": container_rect['x'], 
-                                "y": container_rect['y'], 
-                                "width": container_rect['width'], 
-                                "height": container_rect['height']
-                            }
-                        )
-                        
-                        # Restore backgrounds, visibility and clean up
-                        await page.evaluate(f"""
-                            () => {{
-                                // Restore original backgrounds
-                                document.documentElement.style.background = window.originalHtmlBg || '';
-                                document.body.style.background = window.originalBodyBg || '';
-                                
-                                // Restore main content visibility
-                                document.body.style.visibility = 'visible';
-                                
-                                // Remove the cloned container
-                                const container = document.getElementById('{clone_result['containerId']}');
-                                if (container) {{
-                                    container.remove();
-                                }}
-                            }}
-                        """)
-                        
-                        visual_element = {
-                            'type': 'visual',
-                            'x': data['x'],
-                            'y': data['y'],
-                            'width': data['width'],
-                            'height': data['height'],
-                            'tag': data['tag'],
-                            'image_path': element_path,
-                            'depth': data['depth'],
-                            'hasBackground': data.get('hasBackground', False),
-                            'hasBorder': data.get('hasBorder', False),
-                            'hasShadow': data.get('hasShadow', False)
-                        }
-                        
-                        visual_elements.append(visual_element)
-                        
-                    except Exception as e:
-                        print(f"Failed to capture visual element {i}: {e}")
-                        # Ensure we restore backgrounds and visibility even if capture fails
-                        try:
-                            await page.evaluate("""
-                                () => {
-                                    // Restore original backgrounds
-                                    document.documentElement.style.background = window.originalHtmlBg || '';
-                                    document.body.style.background = window.originalBodyBg || '';
-                                    
-                                    // Always restore main content visibility
-                                    document.body.style.visibility = 'visible';
-                                    
-                                    // Clean up any leftover containers
-                                    const containers = document.querySelectorAll('[id^="clone-capture-container-"]');
-                                    containers.forEach(container => container.remove());
-                                }
-                            """)
-                        except:
-                            pass
-                        continue
-            
-            # Add the previously captured icon elements to our visual elements collection
-            if icon_visual_elements:
-                print(f"Adding {len(icon_visual_elements)} icon elements to visual elements")
-                visual_elements.extend(icon_visual_elements)
-            
-            # Final cleanup - remove capture IDs and ensure everything is restored
-            try:
-                await page.evaluate(r"""
-                    () => {
-                        // Restore original backgrounds (final safety check)
-                        if (window.originalHtmlBg !== undefined) {
-                            document.documentElement.style.background = window.originalHtmlBg || '';
-                        }
-                        if (window.originalBodyBg !== undefined) {
-                            document.body.style.background = window.originalBodyBg || '';
-                        }
-                        
-                        // Ensure visibility is restored
-                        document.body.style.visibility = 'visible';
-                        
-                        // Clean up capture IDs
-                        const elementsWithCaptureId = document.querySelectorAll('[data-capture-id]');
-                        elementsWithCaptureId.forEach(el => {
-                            el.removeAttribute('data-capture-id');
-                        });
-                        
-                        // Clean up any leftover containers
-                        const containers = document.querySelectorAll('[id^="clone-capture-container-"]');
-                        containers.forEach(container => container.remove());
-                    }
-                """)
-                print(f"🧹 Final cleanup completed: backgrounds restored, capture IDs removed")
-            except Exception as e:
-                print(f"Warning: Failed to perform final cleanup: {e}")
-            
-            return visual_elements
+        visual_elements = []
+        icon_elements = []
+        captured_ids = []
+        try:
+            icon_elements = await self.capture_icons(page, html_path, temp_dir, icon_data)
+            captured_ids.extend(element['captureId'] for element in icon_elements)
             
+            visual_elements = await self.capture_visual_elements(page, html_path, temp_dir, visual_data)
+            captured_ids.extend(element['captureId'] for element in visual_elements)
         except Exception as e:
             print(f"Visual element extraction failed: {e}")
-            # Emergency cleanup in case of failure
-            try:
-                await page.evaluate(r"""
-                    () => {
-                        // Restore original backgrounds
-                        if (window.originalHtmlBg !== undefined) {
-                            document.documentElement.style.background = window.originalHtmlBg || '';
-                        }
-                        if (window.originalBodyBg !== undefined) {
-                            document.body.style.background = window.originalBodyBg || '';
-                        }
-                        
-                        // Ensure visibility is restored
-                        document.body.style.visibility = 'visible';
-                        
-                        // Clean up everything
-                        const containers = document.querySelectorAll('[id^="clone-capture-container-"]');
-                        containers.forEach(container => container.remove());
-                        
-                        const elementsWithCaptureId = document.querySelectorAll('[data-capture-id]');
-                        elementsWithCaptureId.forEach(el => el.removeAttribute('data-capture-id'));
-                    }
-                """)
-            except:
-                pass
+            self.degraded_slides.add(html_path)
+        finally:
+            await page.evaluate(RESTORE_PAGE_SCRIPT)
+        
+        background_path = await self.capture_clean_background(page, html_path, temp_dir, captured_ids)
+        
+        for element in visual_elements + icon_elements:
+            element.pop('captureId', None)
+        
+        return {
+            'visual_elements': visual_elements + icon_elements,
+            'background_path': background_path,
+            'text_elements': text_elements
+        }
+    
+    async def capture_icons(self, page, html_path: Path, temp_dir: Path, icon_data: List[Dict]) -> List[Dict]:
+        """Crop every icon out of a single viewport screenshot (taken before text is hidden)."""
+        clips = []
+        for i, data in enumerate(icon_data):
+            # Ensure coordinates are within viewport bounds
+            x = max(0, min(data['x'], 1920))
+            y = max(0, min(data['y'], 1080))
+            width = min(data['width'], 1920 - x)
+            height = min(data['height'], 1080 - y)
+            
+            # Skip if area is too small
+            if width < 5 or height < 5:
+                continue
+            clips.append((i, data, (x, y, width, height)))
+        
+        if not clips:
             return []
+        
+        # Transparent backdrop so SVG icons keep their transparency
+        screenshot = Image.open(io.BytesIO(await page.screenshot(full_page=False, omit_background=True))).convert('RGBA')
+        
+        icon_elements = []
+        for i, data, clip in clips:
+            element_path = temp_dir / f"icon_element_{html_path.stem}_{i:03d}.png"
+            icon = _crop(screenshot, clip)
+            if not data.get('isSvg', False):
+                # Non-SVG icons were always captured on the page's opaque backdrop
+                icon = Image.alpha_composite(Image.new('RGBA', icon.size, 'white'), icon).convert('RGB')
+            icon.save(element_path)
+            
+            icon_elements.append({
+                'type': 'visual',  # Treat as visual element for consistency
+                'x': data['x'],
+                'y': data['y'],
+                'width': data['width'],
+                'height': data['height'],
+                'tag': data['tag'],
+                'image_path': element_path,
+                'depth': data['depth'],
+                'isIcon': True,
+                'captureId': data['captureId']
+            })
+        
+        return icon_elements
+    
+    async def capture_visual_elements(self, page, html_path: Path, temp_dir: Path, visual_data: List[Dict]) -> List[Dict]:
+        """Clone visual elements in isolation onto shared capture sheets and crop them out."""
+        items = []
+        for i, data in enumerate(visual_data):
+            # Ensure coordinates are within viewport bounds
+            x = max(0, min(data['x'], 1920))
+            y = max(0, min(data['y'], 1080))
+            width = min(data['width'], 1920 - x)
+            height = min(data['height'], 1080 - y)
+            
+            # Skip if area is too small
+            if width < 5 or height < 5:
+                continue
+            items.append({
+                'index': i,
+                'data': data,
+                'captureId': data['captureId'],
+                'width': min(data['width'], 1920),
+                'height': min(data['height'], 1080)
+            })
+        
+        visual_elements = []
+        for sheet in _pack_capture_sheets(items):
+            placed = await page.evaluate(CAPTURE_SHEET_SCRIPT, [
+                {key: item[key] for key in ('captureId', 'sheetX', 'sheetY', 'width', 'height')}
+                for item in sheet
+            ])
+            placed = set(placed or [])
+            if not placed:
+                continue
+            
+            # Let cloned styles apply before the capture
+            await page.wait_for_timeout(100)
+            screenshot = Image.open(io.BytesIO(await page.screenshot(full_page=False, omit_background=True))).convert('RGBA')
+            
+            for item in sheet:
+                if item['captureId'] not in placed:
+                    print(f"Failed to clone visual element {item['index']}")
+                    continue
+                data = item['data']
+                element_path = temp_dir / f"visual_element_{html_path.stem}_{item['index']:03d}.png"
+                _crop(screenshot, (item['sheetX'], item['sheetY'], item['width'], item['height'])).save(element_path)
+                
+                visual_elements.append({
+                    'type': 'visual',
+                    'x': data['x'],
+                    'y': data['y'],
+                    'width': data['width'],
+                    'height': data['height'],
+                    'tag': data['tag'],
+                    'image_path': element_path,
+                    'depth': data['depth'],
+                    'hasBackground': data.get('hasBackground', False),
+                    'hasBorder': data.get('hasBorder', False),
+                    'hasShadow': data.get('hasShadow', False),
+                    'captureId': item['captureId']
+                })
+        
+        return visual_elements
 
-    async def capture_clean_background(self, page, html_path: Path, temp_dir: Path, visual_elements: List[Dict]) -> Path:
-        """Capture the clean background with visual elements temporarily hidden."""
+    async def capture_clean_background(self, page, html_path: Path, temp_dir: Path, captured_ids: List[str]) -> Path:
+        """Capture the clean background with text and the captured visual elements hidden."""
+        background_path = temp_dir / f"clean_background_{html_path.stem}.png"
         try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
-            
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
-            
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
+            await page.evaluate(PREPARE_BACKGROUND_SCRIPT, captured_ids)
+            await page.wait_for_timeout(100)
             
-            # Make text completely invisible AND hide visual elements to get clean background
-            await page.evaluate(r"""
-                (visualElementsData) => {
-                    // Function to make text completely invisible
-                    function makeTextInvisible(element) {
-                        if (element.nodeType === Node.TEXT_NODE) return;
-                        if (element.nodeType === Node.ELEMENT_NODE) {
-                            const computedStyle = window.getComputedStyle(element);
-                            const hasText = element.textContent && element.textContent.trim();
-                            if (hasText) {
-                                // Make text completely invisible
-                                element.style.color = 'transparent';
-                                element.style.textShadow = 'none';
-                                element.style.webkitTextStroke = 'none';
-                                element.style.webkitTextFillColor = 'transparent';
-                                
-                                // Also hide any background text effects
-                                if (computedStyle.webkitBackgroundClip === 'text') {
-                                    element.style.background = 'transparent';
-                                    element.style.webkitBackgroundClip = 'initial';
-                                }
-                            }
-                            Array.from(element.children).forEach(makeTextInvisible);
-                        }
-                    }
-                    
-                    // Function to hide visual elements (but preserve main background)
-                    function hideVisualElements() {
-                        visualElementsData.forEach(visualData => {
-                            // Skip very large elements that are likely the main background
-                            if (visualData.width > 1700) {
-                                return;
-                            }
-                            
-                            // Find elements that match the visual element criteria
-                            const elements = document.querySelectorAll('*');
-                            for (let el of elements) {
-                                const rect = el.getBoundingClientRect();
-                                if (Math.abs(rect.left - visualData.x) < 5 && 
-                                    Math.abs(rect.top - visualData.y) < 5 &&
-                                    Math.abs(rect.width - visualData.width) < 5 &&
-                                    Math.abs(rect.height - visualData.height) < 5) {
-                                    
-                                    // Hide this visual element
-                                    el.style.visibility = 'hidden';
-                                    break;
-                                }
-                            }
-                        });
-                    }
-                    
-                    // Apply both transformations
-                    makeTextInvisible(document.body);
-                    hideVisualElements();
-                }
-            """, visual_elements or [])
-            
-            # Reduced wait time
-            await page.wait_for_timeout(500)
-            
-            # Take clean background screenshot
-            background_path = temp_dir / f"clean_background_{html_path.stem}.png"
             await page.screenshot(
                 path=str(background_path),
                 full_page=False,
                 clip={"x": 0, "y": 0, "width": 1920, "height": 1080}
             )
-            
             return background_path
             
         except Exception as e:
             # Create a simple white background as fallback
-            from PIL import Image
-            background_path = temp_dir / f"clean_background_{html_path.stem}.png"
+            print(f"Clean background capture failed: {e}")
+            self.degraded_slides.add(html_path)
             blank_bg = Image.new('RGB', (1920, 1080), color='white')
             blank_bg.save(background_path)
             return background_path
     
-    async def extract_text_elements(self, page, html_path: Path) -> List[TextElement]:
-        """Extract all text elements with precise positioning for editable text boxes."""
+    def build_text_elements(self, text_data: List[Dict]) -> List[TextElement]:
+        """Convert extracted text runs to TextElement objects with enhanced styling."""
         text_elements = []
         
-        try:
-            # Set exact viewport dimensions
-            await page.set_viewport_size({"width": 1920, "height": 1080})
-            await page.emulate_media(media='screen')
-            
-            # Force device pixel ratio to 1 for exact measurements
-            await page.evaluate(r"""
-                () => {
-                    Object.defineProperty(window, 'devicePixelRatio', {
-                        get: () => 1
-                    });
-                }
-            """)
-            
-            # Use file:// URL instead of set_content to preserve relative paths
-            file_url = f"file://{html_path.resolve()}"
-            await page.goto(file_url, wait_until="networkidle", timeout=25000)
-            
-            # Reduced wait time
-            await page.wait_for_timeout(2000)
-            
-            # Extract all text elements with precise positioning and styling
-            # // Enhanced text extraction JavaScript to include in your page.evaluate()
-            text_data = await page.evaluate(r"""
-                () => {
-                    function extractTextFromElement(element) {
-                        if (!element || element.nodeType !== Node.ELEMENT_NODE) return [];
-                        
-                        const computedStyle = window.getComputedStyle(element);
-                        const rect = element.getBoundingClientRect();
-                        
-                        // Skip hidden elements
-                        if (computedStyle.display === 'none' || computedStyle.visibility === 'hidden') return [];
-                        if (rect.width === 0 || rect.height === 0) return [];
-                        
-                        const results = [];
-                        
-                        // Get direct text content (not from children)
-                        let directText = '';
-                        for (let node of element.childNodes) {
-                            if (node.nodeType === Node.TEXT_NODE) {
-                                directText += node.textContent;
-                            }
-                        }
-                        directText = directText.trim();
-                        
-                        // If this element has direct text content, extract it with styling
-                        if (directText && directText.length > 0) {
-                            const fontSizeMatch = computedStyle.fontSize.match(/([0-9.]+)px/);
-                            const actualFontSize = fontSizeMatch ? parseFloat(fontSizeMatch[1]) : 16;
-                            
-                            // Get the actual text node position, not the container
-                            const textNodes = [];
-                            for (let node of element.childNodes) {
-                                if (node.nodeType === Node.TEXT_NODE && node.textContent.trim()) {
-                                    const range = document.createRange();
-                                    range.selectNodeContents(node);
-                                    const textRect = range.getBoundingClientRect();
-                                    textNodes.push({
-                                        text: node.textContent.trim(),
-                                        rect: textRect
-                                    });
-                                }
-                            }
-                            
-                            // Enhanced styling extraction
-                            const textStyle = {
-                                fontFamily: computedStyle.fontFamily,
-                                fontSize: computedStyle.fontSize,
-                                fontWeight: computedStyle.fontWeight,
-                                fontStyle: computedStyle.fontStyle,
-                                color: computedStyle.color,
-                                textAlign: computedStyle.textAlign,
-                                lineHeight: computedStyle.lineHeight,
-                                letterSpacing: computedStyle.letterSpacing,
-                                textShadow: computedStyle.textShadow,
-                                webkitTextStroke: computedStyle.webkitTextStroke,
-                                webkitTextFillColor: computedStyle.webkitTextFillColor,
-                                background: computedStyle.background,
-                                backgroundImage: computedStyle.backgroundImage,
-                                webkitBackgroundClip: computedStyle.webkitBackgroundClip,
-                                textDecoration: computedStyle.textDecoration,
-                                textTransform: computedStyle.textTransform
-                            };
-                            
-                            // Use text node position if available, otherwise fall back to container
-                            if (textNodes.length > 0) {
-                                textNodes.forEach(textNode => {
-                                    results.push({
-                                        text: textNode.text,
-                                        x: Math.round(textNode.rect.left * 100) / 100,
-                                        y: Math.round(textNode.rect.top * 100) / 100,
-                                        width: Math.round(textNode.rect.width * 100) / 100,
-                                        height: Math.round(textNode.rect.height * 100) / 100,
-                                        actualFontSizePx: actualFontSize,
-                                        tag: element.tagName.toLowerCase(),
-                                        style: textStyle
-                                    });
-                                });
-                            } else {
-                                // Fallback to container position
-                                results.push({
-                                    text: directText,
-                                    x: Math.round(rect.left * 100) / 100,
-                                    y: Math.round(rect.top * 100) / 100,
-                                    width: Math.round(rect.width * 100) / 100,
-                                    height: Math.round(rect.height * 100) / 100,
-                                    actualFontSizePx: actualFontSize,
-                                    tag: element.tagName.toLowerCase(),
-                                    style: textStyle
-                                });
-                            }
-                        }
-                        
-                        // Process children for nested text
-                        Array.from(element.children).forEach(child => {
-                            results.push(...extractTextFromElement(child));
-                        });
-                        
-                        return results;
+        for data in text_data:
+            if data and data['text']:
+                style = data.get('style', {})
+                
+                # Parse font family
+                font_family = style.get('fontFamily', 'Arial')
+                if font_family:
+                    font_family = font_family.split(',')[0].strip().strip('"\'')
+                    font_family_map = {
+                        'roboto': 'Roboto', 'arial': 'Arial', 'helvetica': 'Helvetica',
+                        'sans-serif': 'Arial', 'serif': 'Times New Roman', 'monospace': 'Courier New',
+                        'jetbrains mono': 'Courier New', 'courier new': 'Courier New'
                     }
-                    
-                    // Start extraction from body
-                    const allTextElements = extractTextFromElement(document.body);
-                    
-                    // Sort by position (top to bottom, left to right)
-                    allTextElements.sort((a, b) => {
-                        if (Math.abs(a.y - b.y) < 5) {
-                            return a.x - b.x;
-                        }
-                        return a.y - b.y;
-                    });
-                    
-                    return allTextElements;
-                }
-            """)
-            
-            # Convert to TextElement objects with enhanced styling
-            for data in text_data or []:
-                if data and data['text']:
-                    style = data.get('style', {})
-                    
-                    # Parse font family
-                    font_family = style.get('fontFamily', 'Arial')
-                    if font_family:
-                        font_family = font_family.split(',')[0].strip().strip('"\'')
-                        font_family_map = {
-                            'roboto': 'Roboto', 'arial': 'Arial', 'helvetica': 'Helvetica',
-                            'sans-serif': 'Arial', 'serif': 'Times New Roman', 'monospace': 'Courier New',
-                            'jetbrains mono': 'Courier New', 'courier new': 'Courier New'
-                        }
-                        font_family = font_family_map.get(font_family.lower(), font_family)
+                    font_family = font_family_map.get(font_family.lower(), font_family)
+                else:
+                    font_family = 'Arial'
+                
+                # Parse line height (same for both text and icons)
+                line_height = 1.2
+                line_height_str = style.get('lineHeight', 'normal')
+                if line_height_str and line_height_str != 'normal':
+                    if line_height_str.endswith('px'):
+                        px_value = float(line_height_str[:-2])
+                        line_height = px_value / data['actualFontSizePx']
                     else:
-                        font_family = 'Arial'
-                    
-                    # Parse line height (same for both text and icons)
-                    line_height = 1.2
-                    line_height_str = style.get('lineHeight', 'normal')
-                    if line_height_str and line_height_str != 'normal':
-                        if line_height_str.endswith('px'):
-                            px_value = float(line_height_str[:-2])
-                            line_height = px_value / data['actualFontSizePx']
+                        try:
+                            line_height = float(line_height_str)
+                        except:
+                            line_height = 1.2
+                
+                # Parse color - handle complex color scenarios
+                color = style.get('color', '#000000')
+                
+                # Handle gradient text (webkit background clip)
+                if style.get('webkitBackgroundClip') == 'text' and style.get('backgroundImage'):
+                    bg_image = style.get('backgroundImage', '')
+                    if 'linear-gradient' in bg_image:
+                        color_match = re.search(r'#[0-9a-fA-F]{6}', bg_image)
+                        if color_match:
+                            color = color_match.group(0)
                         else:
-                            try:
-                                line_height = float(line_height_str)
-                            except:
-                                line_height = 1.2
-                    
-                    # Parse color - handle complex color scenarios
-                    color = style.get('color', '#000000')
-                    
-                    # Handle gradient text (webkit background clip)
-                    if style.get('webkitBackgroundClip') == 'text' and style.get('backgroundImage'):
-                        bg_image = style.get('backgroundImage', '')
-                        if 'linear-gradient' in bg_image:
-                            import re
-                            color_match = re.search(r'#[0-9a-fA-F]{6}', bg_image)
-                            if color_match:
-                                color = color_match.group(0)
-                            else:
-                                color = '#3B82F6'  # Default blue for gradients
-                    
-                    text_element = TextElement(
-                        text=data['text'],
-                        x=data['x'],
-                        y=data['y'],
-                        width=data['width'],
-                        height=data['height'],
-                        font_family=font_family,
-                        font_size=data['actualFontSizePx'] * 0.75,  # Convert px to points
-                        font_weight=style.get('fontWeight', 'normal'),
-                        color=color,
-                        text_align=style.get('textAlign', 'left'),
-                        line_height=line_height,
-                        tag=data['tag'],
-                        style=style
-                    )
-                    
-                    text_elements.append(text_element)
-            
-            return text_elements
-            
-        except Exception:
-            return []
+                            color = '#3B82F6'  # Default blue for gradients
+                
+                text_element = TextElement(
+                    text=data['text'],
+                    x=data['x'],
+                    y=data['y'],
+                    width=data['width'],
+                    height=data['height'],
+                    font_family=font_family,
+                    font_size=data['actualFontSizePx'] * 0.75,  # Convert px to points
+                    font_weight=style.get('fontWeight', 'normal'),
+                    color=color,
+                    text_align=style.get('textAlign', 'left'),
+                    line_height=line_height,
+                    tag=data['tag'],
+                    style=style
+                )
+                
+                text_elements.append(text_element)
+        
+        return text_elements
     
     def create_text_box(self, slide, text_element: TextElement) -> None:
         """Create an editable text box in PowerPoint with exact positioning and enhanced styling."""
@@ -1247,6 +1031,43 @@ class OptimizedHTMLToPPTXConverter:
             if visual_element['tag'] == 'clean_background':
                 picture.z_order = 0
     
+    def report_progress(self, completed: int, total: int) -> None:
+        if self.progress_callback:
+            self.progress_callback(completed, total)
+    
+    def store_slide_analysis(self, cache_key: str, slide_analysis: Dict) -> None:
+        """Save a slide's background, element images and text elements to the render cache."""
+        files = {}
+        visual_elements = []
+        for i, element in enumerate(slide_analysis['visual_elements']):
+            name = f"element_{i:03d}.png"
+            files[name] = element['image_path']
+            visual_elements.append({**element, 'image_path': name})
+        
+        background_name = None
+        if slide_analysis['background_path']:
+            background_name = "background.png"
+            files[background_name] = slide_analysis['background_path']
+        
+        self.render_cache.store(cache_key, files, {
+            'visual_elements': visual_elements,
+            'background': background_name,
+            'text_elements': [asdict(element) for element in slide_analysis['text_elements']],
+        })
+    
+    def load_slide_analysis(self, slide_info: Dict, entry: Path) -> Dict:
+        """Rebuild a slide analysis from a render cache entry."""
+        manifest = self.render_cache.read_manifest(entry)
+        return {
+            'slide_info': slide_info,
+            'visual_elements': [
+                {**element, 'image_path': entry / element['image_path']}
+                for element in manifest['visual_elements']
+            ],
+            'background_path': entry / manifest['background'] if manifest['background'] else None,
+            'text_elements': [TextElement(**element) for element in manifest['text_elements']],
+        }
+    
     async def build_slide_from_analysis(self, presentation, slide_analysis: Dict, temp_dir: Path) -> None:
         """Build a PowerPoint slide from pre-analyzed data."""
         slide_info = slide_analysis['slide_info']
@@ -1295,131 +1116,101 @@ class OptimizedHTMLToPPTXConverter:
         with tempfile.TemporaryDirectory() as temp_dir:
             temp_path = Path(temp_dir)
             
-            # Launch browser for processing
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(
-                    headless=True,
-                    args=[
-                        '--no-sandbox',
-                        '--disable-setuid-sandbox',
-                        '--disable-dev-shm-usage',
-                        '--disable-gpu',
-                        '--force-device-scale-factor=1',
-                        '--disable-background-timer-throttling',
-                        '--disable-backgrounding-occluded-windows',
-                        '--disable-renderer-backgrounding',
-                        '--disable-features=VizDisplayCompositor',
-                        '--disable-extensions',
-                        '--disable-plugins',
-                        '--disable-web-security',
-                        '--disable-features=TranslateUI',
-                        '--disable-ipc-flooding-protection'
-                    ]
-                )
+            # Process all slides in parallel on pages from the shared browser pool
+            # Create semaphore to limit concurrent operations
+            semaphore = asyncio.Semaphore(5)
+            
+            async def process_single_slide(slide_info: Dict) -> Dict:
+                """Process a single slide with controlled concurrency."""
+                # Reuse the previous render when the slide, its assets and the settings are unchanged
+                cache_key = await asyncio.to_thread(slide_key, slide_info['path'], "pptx", PPTX_RENDER_SETTINGS)
+                cached = self.render_cache.lookup(cache_key)
+                if cached:
+                    try:
+                        return self.load_slide_analysis(slide_info, cached)
+                    except Exception as e:
+                        print(f"Warning: unreadable render cache entry for slide {slide_info['number']}, re-rendering: {e}")
                 
-                try:
-                    # Process all slides in parallel
-                    # Create semaphore to limit concurrent operations
-                    semaphore = asyncio.Semaphore(5)
-                    context = await browser.new_context(
-                        viewport={'width': 1920, 'height': 1080}
-                    )
-                    
-                    context = await browser.new_context(
-                        viewport={'width': 1920, 'height': 1080}
-                    )
-                    
-                    async def process_single_slide(slide_info: Dict) -> Dict:
-                        """Process a single slide with controlled concurrency."""
-                        async with semaphore:
-                            slide_num = slide_info['number']
+                async with semaphore:
+                    try:
+                        # Borrow a page with exact viewport dimensions; it is closed on exit to free memory
+                        async with browser_pool.page(viewport={'width': 1920, 'height': 1080}) as page:
+                            await page.emulate_media(media='screen')
+                            
+                            # Force device pixel ratio to 1 in the slide document
+                            await page.add_init_script(r"""
+                                Object.defineProperty(window, 'devicePixelRatio', {
+                                    get: () => 1
+                                });
+                            """)
                             
                             try:
-                                # Create a new page for this slide
-                                page = await context.new_page()
-                                
-                                # Set exact viewport dimensions
-                                await page.set_viewport_size({"width": 1920, "height": 1080})
-                                await page.emulate_media(media='screen')
+                                # Text, visual elements and clean background from a single page load
+                                slide_analysis = {
+                                    'slide_info': slide_info,
+                                    **await self.analyze_slide(page, slide_info['path'], temp_path)
+                                }
                                 
-                                # Force device pixel ratio to 1
-                                await page.evaluate(r"""
-                                    () => {
-                                        Object.defineProperty(window, 'devicePixelRatio', {
-                                            get: () => 1
-                                        });
-                                    }
-                                """)
+                                if slide_info['path'] not in self.degraded_slides:
+                                    self.store_slide_analysis(cache_key, slide_analysis)
+                                return slide_analysis
                                 
-                                try:
-                                    # Extract visual elements
-                                    visual_elements = await self.extract_visual_elements(page, slide_info['path'], temp_path)
-                                    
-                                    # Capture clean background
-                                    background_path = await self.capture_clean_background(page, slide_info['path'], temp_path, visual_elements)
-                                    
-                                    # Extract text elements
-                                    text_elements = await self.extract_text_elements(page, slide_info['path'])
-                                    
-                                    slide_analysis = {
-                                        'slide_info': slide_info,
-                                        'visual_elements': visual_elements,
-                                        'background_path': background_path,
-                                        'text_elements': text_elements
-                                    }
-                                    
-                                    return slide_analysis
-                                    
-                                except Exception as e:
-                                    return {
-                                        'slide_info': slide_info,
-                                        'visual_elements': [],
-                                        'background_path': None,
-                                        'text_elements': [],
-                                        'error': str(e)
-                                    }
-                                    
-                                finally:
-                                    # Always close the page to free memory
-                                    await page.close()
-                                    
                             except Exception as e:
                                 return {
                                     'slide_info': slide_info,
                                     'visual_elements': [],
                                     'background_path': None,
                                     'text_elements': [],
-                                    'error': f"Page creation failed: {str(e)}"
+                                    'error': str(e)
                                 }
-                    
-                    # Launch ALL slides in parallel
-                    parallel_tasks = [
-                        process_single_slide(slide_info) 
-                        for slide_info in self.slides_info
-                    ]
-                    
-                    # Wait for ALL slides to complete in parallel
-                    slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
-                    
-                    # Handle any top-level exceptions
-                    processed_analyses = []
-                    for i, result in enumerate(slide_analyses):
-                        if isinstance(result, Exception):
-                            error_analysis = {
-                                'slide_info': self.slides_info[i],
-                                'visual_elements': [],
-                                'background_path': None,
-                                'text_elements': [],
-                                'error': str(result)
-                            }
-                            processed_analyses.append(error_analysis)
-                        else:
-                            processed_analyses.append(result)
-                    
-                    all_slide_analyses = processed_analyses
-                    
-                finally:
-                    await browser.close()
+                            
+                    except Exception as e:
+                        return {
+                            'slide_info': slide_info,
+                            'visual_elements': [],
+                            'background_path': None,
+                            'text_elements': [],
+                            'error': f"Page creation failed: {str(e)}"
+                        }
+            
+            completed_slides = 0
+            
+            async def process_and_report(slide_info: Dict) -> Dict:
+                nonlocal completed_slides
+                result = await process_single_slide(slide_info)
+                completed_slides += 1
+                self.report_progress(completed_slides, len(self.slides_info))
+                return result
+            
+            # Launch ALL slides in parallel
+            parallel_tasks = [
+                process_and_report(slide_info) 
+                for slide_info in self.slides_info
+            ]
+            
+            # Wait for ALL slides to complete in parallel
+            slide_analyses = await asyncio.gather(*parallel_tasks, return_exceptions=True)
+            
+            # Handle any top-level exceptions
+            processed_analyses = []
+            for i, result in enumerate(slide_analyses):
+                if isinstance(result, Exception):
+                    error_analysis = {
+                        'slide_info': self.slides_info[i],
+                        'visual_elements': [],
+                        'background_path': None,
+                        'text_elements': [],
+                        'error': str(result)
+                    }
+                    processed_analyses.append(error_analysis)
+                else:
+                    processed_analyses.append(result)
+            
+            all_slide_analyses = processed_analyses
+            
+            stats = self.render_cache.stats()
+            print(f"🗂️ Rendered {stats['rendered']} slide(s), reused {stats['cached']} from cache")
+            self.render_cache.prune()
             
             # Build PPTX presentation
             # Create new PowerPoint presentation
@@ -1519,19 +1310,27 @@ async def convert_presentation_to_pptx(request: ConvertRequest):
         # Create converter
         converter = OptimizedHTMLToPPTXConverter(request.presentation_path)
         
-        # If download is requested, don't store locally and return file directly
+        # Runs on the shared conversion queue, like /jobs/convert-to-pptx
+        async def run(job) -> Dict:
+            converter.progress_callback = job.report_progress
+            if request.download:
+                # Don't store locally; the content is returned directly
+                pptx_content, total_slides, presentation_name = await converter.convert_to_pptx(store_locally=False)
+                return {"content": pptx_content, "total_slides": total_slides, "presentation_name": presentation_name}
+            pptx_path, total_slides = await converter.convert_to_pptx(store_locally=True)
+            return {"path": str(pptx_path), "total_slides": total_slides}
+        
+        result = await job_manager.run("pptx", run)
+        total_slides = result["total_slides"]
+        
         if request.download:
-            pptx_content, total_slides, presentation_name = await converter.convert_to_pptx(store_locally=False)
-            
             return Response(
-                content=pptx_content,
+                content=result["content"],
                 media_type="application/vnd.openxmlformats-officedocument.presentationml.presentation",
-                headers={"Content-Disposition": f"attachment; filename=\"{presentation_name}.pptx\""}
+                headers={"Content-Disposition": f"attachment; filename=\"{result['presentation_name']}.pptx\""}
             )
         
-        # Otherwise, store locally and return JSON with download URL
-        pptx_path, total_slides = await converter.convert_to_pptx(store_locally=True)
-        
+        pptx_path = Path(result["path"])
         pptx_url = f"/downloads/{pptx_path.name}"
         
         return ConvertResponse(
@@ -1542,6 +1341,8 @@ async def convert_presentation_to_pptx(request: ConvertRequest):
             total_slides=total_slides
         )
         
+    except JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
     except FileNotFoundError as e:
         raise HTTPException(status_code=404, detail=str(e))
     except ValueError as e:
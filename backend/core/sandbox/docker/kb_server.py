@@ -0,0 +1,286 @@
+"""
+Knowledge base search front end for the sandbox.
+
+Runs under supervisord and serves kb-fusion searches on 127.0.0.1:8010 so the
+agent's SandboxKbTool does not run `kb search` for queries it has already
+answered:
+- results are cached per (path, queries, k) until files under the path change
+- identical concurrent searches share one kb invocation
+- paths that have been searched are watched and their cached results dropped
+  when files change; kb re-indexes changed files incrementally on the next search
+- /search/batch runs several searches in one request
+
+Watching polls directory mtimes: only directories whose mtime moved (a file
+was added, removed or renamed in them) are re-listed, and file mtimes, for
+in-place edits, are checked every FILE_CHECK_INTERVAL_SECONDS.
+
+This is a result cache, not a resident index: kb-fusion ships only as a
+prebuilt `kb` binary (installed by SandboxKbTool.init_kb) with no library or
+server mode, so its index and embedding model cannot be loaded into this
+process. Every cache miss runs `kb search`, which loads them again.
+"""
+import asyncio
+import os
+import time
+from typing import Dict, List, Optional, Tuple
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from pydantic import BaseModel
+
+
+HOST = "127.0.0.1"
+PORT = int(os.environ.get("KB_SERVER_PORT", "8010"))
+KB_BINARY = os.environ.get("KB_BINARY", "kb")
+SEARCH_TIMEOUT_SECONDS = 300
+WATCH_INTERVAL_SECONDS = 5
+FILE_CHECK_INTERVAL_SECONDS = 60
+MAX_CONCURRENT_SEARCHES = 4
+MAX_CACHED_RESULTS = 512
+
+app = FastAPI()
+
+
+class SearchRequest(BaseModel):
+    path: str
+    queries: List[str]
+    k: int = 18
+
+
+class BatchSearchRequest(BaseModel):
+    searches: List[SearchRequest]
+
+
+class KbService:
+    def __init__(self):
+        self.cache: Dict[Tuple, str] = {}
+        self.in_flight: Dict[Tuple, asyncio.Future] = {}
+        self.watched: Dict[str, TreeWatch] = {}
+        self.generation: Dict[str, int] = {}
+        self.openai_key: Optional[str] = None
+        self.slots = asyncio.Semaphore(MAX_CONCURRENT_SEARCHES)
+        self.stats = {'searches': 0, 'cache_hits': 0, 'kb_invocations': 0, 'invalidations': 0}
+
+    def _env(self) -> Dict[str, str]:
+        env = dict(os.environ)
+        if self.openai_key:
+            env["OPENAI_API_KEY"] = self.openai_key
+        return env
+
+    async def _run_kb(self, args: List[str]) -> str:
+        async with self.slots:
+            self.stats['kb_invocations'] += 1
+            process = await asyncio.create_subprocess_exec(
+                KB_BINARY, *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.STDOUT,
+                env=self._env(),
+            )
+            try:
+                output, _ = await asyncio.wait_for(process.communicate(), SEARCH_TIMEOUT_SECONDS)
+            except asyncio.TimeoutError:
+                process.kill()
+                raise RuntimeError("kb search timed out")
+            except asyncio.CancelledError:
+                process.kill()
+                raise
+            if process.returncode != 0:
+                raise RuntimeError(output.decode(errors="replace"))
+            return output.decode(errors="replace")
+
+    async def search(self, request: SearchRequest) -> str:
+        self.stats['searches'] += 1
+        path = os.path.abspath(request.path)
+        self._watch(path)
+        while True:
+            key = (path, tuple(request.queries), request.k, self.generation.get(path, 0))
+
+            cached = self.cache.get(key)
+            if cached is not None:
+                self.stats['cache_hits'] += 1
+                return cached
+
+            future = self.in_flight.get(key)
+            if future is None:
+                return await self._lead(key, path, request)
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise
+                # The request running kb was cancelled; run the search ourselves
+
+    async def _lead(self, key: Tuple, path: str, request: SearchRequest) -> str:
+        """Run kb for a search and share the outcome with identical searches waiting on it."""
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            result = await self._run_kb(["search", path, *request.queries, "-k", str(request.k), "--json"])
+            if len(self.cache) >= MAX_CACHED_RESULTS:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = result
+            future.set_result(result)
+            return result
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        finally:
+            self.in_flight.pop(key, None)
+            if not future.done():
+                # Cancelled before kb finished: waiting searches retry instead of hanging
+                future.cancel()
+
+    def _watch(self, path: str):
+        if path not in self.watched:
+            self.watched[path] = TreeWatch(path)
+
+    def invalidate(self, path: str):
+        self.stats['invalidations'] += 1
+        self.generation[path] = self.generation.get(path, 0) + 1
+        for key in [k for k in self.cache if k[0] == path]:
+            del self.cache[key]
+
+    async def watch_loop(self):
+        last_file_check = time.monotonic()
+        while True:
+            await asyncio.sleep(WATCH_INTERVAL_SECONDS)
+            check_files = time.monotonic() - last_file_check >= FILE_CHECK_INTERVAL_SECONDS
+            if check_files:
+                last_file_check = time.monotonic()
+            for path, watch in list(self.watched.items()):
+                if await asyncio.to_thread(watch.poll, check_files):
+                    self.invalidate(path)
+
+
+def _skipped_dir(name: str) -> bool:
+    return name.startswith('.') or name == 'node_modules'
+
+
+class TreeWatch:
+    """Directory and file mtimes under a path, re-listing only directories whose mtime changed."""
+
+    def __init__(self, root: str):
+        self.root = root
+        # directory -> its mtime, and directory -> {file name: mtime}
+        self.dirs: Dict[str, float] = {}
+        self.files: Dict[str, Dict[str, float]] = {}
+        self.root_mtime = _mtime(root)
+        if os.path.isdir(root):
+            self._add_tree(root)
+
+    def _add_tree(self, top: str):
+        for dirpath, dirnames, _ in os.walk(top):
+            dirnames[:] = [d for d in dirnames if not _skipped_dir(d)]
+            self._list_dir(dirpath)
+
+    def _drop_tree(self, top: str):
+        prefix = top + os.sep
+        for path in [d for d in self.dirs if d == top or d.startswith(prefix)]:
+            self.dirs.pop(path, None)
+            self.files.pop(path, None)
+
+    def _list_dir(self, path: str) -> List[str]:
+        """Record a directory's mtime and files; returns its subdirectories that are not tracked yet."""
+        self.dirs[path] = _mtime(path)
+        files, new_dirs = {}, []
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _skipped_dir(entry.name) and entry.path not in self.dirs:
+                                new_dirs.append(entry.path)
+                        elif entry.is_file():
+                            files[entry.name] = entry.stat().st_mtime
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+        self.files[path] = files
+        return new_dirs
+
+    def poll(self, check_files: bool) -> bool:
+        """Return True if anything under the root changed since the last poll."""
+        if not self.dirs:
+            # A single file, or a path that didn't exist yet
+            mtime = _mtime(self.root)
+            changed = mtime != self.root_mtime
+            self.root_mtime = mtime
+            if changed and os.path.isdir(self.root):
+                self._add_tree(self.root)
+            return changed
+
+        changed = False
+        for path, recorded in list(self.dirs.items()):
+            if path not in self.dirs:
+                continue  # dropped along with a removed parent
+            mtime = _mtime(path)
+            if mtime is None:
+                self._drop_tree(path)
+                changed = True
+            elif mtime != recorded:
+                # Removed or renamed subdirectories are dropped when their own stat fails
+                for new_dir in self._list_dir(path):
+                    self._add_tree(new_dir)
+                changed = True
+            elif check_files:
+                for name, file_mtime in self.files.get(path, {}).items():
+                    if _mtime(os.path.join(path, name)) != file_mtime:
+                        self._list_dir(path)
+                        changed = True
+                        break
+        return changed
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+service = KbService()
+
+
+def _remember_key(request: Request):
+    key = request.headers.get("x-openai-key")
+    if key:
+        service.openai_key = key
+
+
+@app.on_event("startup")
+async def start_watcher():
+    asyncio.create_task(service.watch_loop())
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok", "watched_paths": len(service.watched), **service.stats}
+
+
+@app.post("/search")
+async def search(body: SearchRequest, request: Request):
+    _remember_key(request)
+    started = time.monotonic()
+    try:
+        output = await service.search(body)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"output": output, "elapsed_ms": round((time.monotonic() - started) * 1000, 1)}
+
+
+@app.post("/search/batch")
+async def search_batch(body: BatchSearchRequest, request: Request):
+    _remember_key(request)
+    results = await asyncio.gather(*(service.search(s) for s in body.searches), return_exceptions=True)
+    return {
+        "results": [
+            {"error": str(r)} if isinstance(r, Exception) else {"output": r}
+            for r in results
+        ]
+    }
+
+
+if __name__ == "__main__":
+    uvicorn.run(app, host=HOST, port=PORT)
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Incremental, on-disk PDF assembly.
+
+PyPDF2's PdfWriter keeps every page of the combined document in memory
+until `write()`. IncrementalPdfWriter instead copies each appended page (and
+the objects it references: content streams, fonts, images) straight into
+the output file under new object numbers, and only writes the page tree,
+catalog and xref table once all pages are in. Memory therefore stays bounded
+by the single-slide PDF being appended, regardless of deck size.
+"""
+
+from pathlib import Path
+from typing import BinaryIO, Dict, List, Tuple
+
+try:
+    from PyPDF2 import PdfReader
+    from PyPDF2.generic import (
+        ArrayObject,
+        DictionaryObject,
+        IndirectObject,
+        NameObject,
+        NumberObject,
+        StreamObject,
+    )
+except ImportError:
+    raise ImportError("PyPDF2 is not installed. Please install it with: pip install PyPDF2")
+
+
+# Object numbers reserved for the document catalog and page tree root
+CATALOG_OBJECT = 1
+PAGES_OBJECT = 2
+
+
+class IncrementalPdfWriter:
+    def __init__(self, output_path: Path):
+        self.output_path = Path(output_path)
+        self._file: BinaryIO = open(self.output_path, "wb")
+        self._offsets: Dict[int, int] = {}
+        self._next_object = PAGES_OBJECT + 1
+        self._pages: List[int] = []
+        self._file.write(b"%PDF-1.7\n%\xe2\xe3\xcf\xd3\n")
+
+    @property
+    def page_count(self) -> int:
+        return len(self._pages)
+
+    def _allocate(self) -> int:
+        number = self._next_object
+        self._next_object += 1
+        return number
+
+    def _write_object(self, number: int, obj) -> None:
+        self._offsets[number] = self._file.tell()
+        self._file.write(f"{number} 0 obj\n".encode())
+        obj.write_to_stream(self._file, None)
+        self._file.write(b"\nendobj\n")
+
+    def append_pdf(self, pdf_path: Path) -> int:
+        """Copy every page of `pdf_path` to the output; returns the number of pages added."""
+        with open(pdf_path, "rb") as f:
+            reader = PdfReader(f)
+            added = 0
+            for page in reader.pages:
+                self._append_page(page)
+                added += 1
+        return added
+
+    def _append_page(self, page: DictionaryObject) -> None:
+        # Source (idnum, generation) -> object number in the output; pending objects to copy
+        numbers: Dict[Tuple[int, int], int] = {}
+        pending: List[Tuple[int, IndirectObject]] = []
+
+        def remap(obj):
+            if isinstance(obj, IndirectObject):
+                source = (obj.idnum, obj.generation)
+                if source not in numbers:
+                    numbers[source] = self._allocate()
+                    pending.append((numbers[source], obj))
+                return IndirectObject(numbers[source], 0, None)
+            if isinstance(obj, StreamObject):
+                copy = obj.__class__()
+                copy._data = obj._data
+                for key, value in dict.items(obj):
+                    copy[NameObject(key)] = remap(value)
+                return copy
+            if isinstance(obj, DictionaryObject):
+                copy = DictionaryObject()
+                for key, value in dict.items(obj):
+                    copy[NameObject(key)] = remap(value)
+                return copy
+            if isinstance(obj, ArrayObject):
+                return ArrayObject(remap(value) for value in list.__iter__(obj))
+            return obj
+
+        page_number = self._allocate()
+        # Annotations point back at their page; keep those references on the copy
+        page_reference = getattr(page, "indirect_ref", None)
+        if page_reference is not None:
+            numbers[(page_reference.idnum, page_reference.generation)] = page_number
+        page_copy = DictionaryObject()
+        for key, value in dict.items(page):
+            if key == "/Parent":
+                continue
+            page_copy[NameObject(key)] = remap(value)
+        page_copy[NameObject("/Parent")] = IndirectObject(PAGES_OBJECT, 0, None)
+        self._write_object(page_number, page_copy)
+        self._pages.append(page_number)
+
+        # Objects are written as soon as they are reached, so nothing from earlier pages stays in memory
+        while pending:
+            number, reference = pending.pop()
+            self._write_object(number, remap(reference.get_object()))
+
+    def close(self) -> None:
+        """Write the page tree, catalog, xref table and trailer, then close the file."""
+        pages = DictionaryObject({
+            NameObject("/Type"): NameObject("/Pages"),
+            NameObject("/Kids"): ArrayObject(IndirectObject(n, 0, None) for n in self._pages),
+            NameObject("/Count"): NumberObject(len(self._pages)),
+        })
+        self._write_object(PAGES_OBJECT, pages)
+        catalog = DictionaryObject({
+            NameObject("/Type"): NameObject("/Catalog"),
+            NameObject("/Pages"): IndirectObject(PAGES_OBJECT, 0, None),
+        })
+        self._write_object(CATALOG_OBJECT, catalog)
+
+        xref_offset = self._file.tell()
+        size = self._next_object
+        self._file.write(f"xref\n0 {size}\n".encode())
+        self._file.write(b"0000000000 65535 f \n")
+        for number in range(1, size):
+            offset = self._offsets.get(number)
+            if offset is None:
+                self._file.write(b"0000000000 00000 f \n")
+            else:
+                self._file.write(f"{offset:010d} 00000 n \n".encode())
+        self._file.write(
+            f"trailer\n<< /Size {size} /Root {CATALOG_OBJECT} 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+        )
+        self._file.close()
+
+    def abort(self) -> None:
+        self._file.close()
+        self.output_path.unlink(missing_ok=True)
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of per-slide render artifacts.
+
+Exporting a deck renders every slide through Chromium, even when only one
+slide changed since the last export. The PDF and PPTX converters store what
+they render for each slide (a one-page PDF, or the PPTX background/element
+PNGs plus extracted text) under a key derived from:
+- the slide HTML
+- every local asset it references (images, stylesheets, scripts, fonts), plus
+  the files that its local stylesheets reference via url() or @import
+  (one level deep)
+- the render settings and RENDER_CACHE_VERSION
+
+so a re-export only renders slides whose inputs changed and assembles the
+rest from disk. Entries are written to a temp directory and renamed into
+place, which keeps concurrent exports of the same deck safe.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import unquote
+
+
+RENDER_CACHE_DIR = Path(os.environ.get("RENDER_CACHE_DIR", "/tmp/.render_cache"))
+RENDER_CACHE_MAX_ENTRIES = int(os.environ.get("RENDER_CACHE_MAX_ENTRIES", "2000"))
+# Bump when the rendering code changes in a way that changes its output
+RENDER_CACHE_VERSION = "1"
+
+MANIFEST_NAME = "manifest.json"
+
+_ASSET_PATTERN = re.compile(
+    r"""(?:src|href|poster)\s*=\s*["']([^"']+)["']|url\(\s*["']?([^"')]+?)["']?\s*\)""",
+    re.IGNORECASE,
+)
+_CSS_ASSET_PATTERN = re.compile(
+    r"""url\(\s*["']?([^"')]+?)["']?\s*\)|@import\s+["']([^"']+)["']""",
+    re.IGNORECASE,
+)
+_REMOTE_PREFIXES = ("http://", "https://", "//", "data:", "blob:", "mailto:", "javascript:", "#")
+
+
+def _local_asset(base_dir: Path, ref: str) -> Optional[Path]:
+    """Resolve a reference to an existing local file, or None for remote/missing ones."""
+    ref = ref.strip()
+    if not ref or ref.lower().startswith(_REMOTE_PREFIXES):
+        return None
+    if ref.startswith("file://"):
+        ref = ref[len("file://"):]
+    ref = unquote(ref.split("#", 1)[0].split("?", 1)[0])
+    candidate = Path(ref) if os.path.isabs(ref) else base_dir / ref
+    return candidate.resolve() if candidate.is_file() else None
+
+
+def _stylesheet_assets(css_path: Path) -> List[Path]:
+    """Files a stylesheet references (fonts, background images, @imports), relative to the stylesheet."""
+    try:
+        css = css_path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return []
+    assets = []
+    for match in _CSS_ASSET_PATTERN.finditer(css):
+        asset = _local_asset(css_path.parent, match.group(1) or match.group(2) or "")
+        if asset is not None:
+            assets.append(asset)
+    return assets
+
+
+def referenced_assets(html_path: Path, html: str) -> List[Path]:
+    """Local files referenced from a slide, resolved against the slide's directory."""
+    assets = set()
+    for match in _ASSET_PATTERN.finditer(html):
+        asset = _local_asset(html_path.parent, match.group(1) or match.group(2) or "")
+        if asset is not None:
+            assets.add(asset)
+    # Linked stylesheets pull in fonts and images of their own; follow them one level
+    for stylesheet in [a for a in assets if a.suffix.lower() == ".css"]:
+        assets.update(_stylesheet_assets(stylesheet))
+    return sorted(assets)
+
+
+def _hash_file(digest, path: Path):
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+
+
+def slide_key(html_path: Path, kind: str, settings: Dict) -> str:
+    """Hash of a slide's HTML, its local assets and the render settings."""
+    html_bytes = html_path.read_bytes()
+    digest = hashlib.sha256()
+    digest.update(f"{RENDER_CACHE_VERSION}\0{kind}\0".encode())
+    digest.update(json.dumps(settings, sort_keys=True).encode())
+    digest.update(b"\0")
+    digest.update(html_bytes)
+    for asset in referenced_assets(html_path, html_bytes.decode("utf-8", errors="replace")):
+        digest.update(f"\0{asset}\0".encode())
+        try:
+            _hash_file(digest, asset)
+        except OSError:
+            digest.update(b"<unreadable>")
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Directory of finished render entries, one per slide key."""
+
+    def __init__(self, kind: str, root: Path = RENDER_CACHE_DIR):
+        self.kind = kind
+        self.root = Path(root) / kind
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key
+
+    def lookup(self, key: str) -> Optional[Path]:
+        """Directory of a complete entry for `key`, or None."""
+        entry = self._entry_dir(key)
+        if (entry / MANIFEST_NAME).exists():
+            self.hits += 1
+            try:
+                # Used entries stay fresh for pruning
+                os.utime(entry)
+            except OSError:
+                pass
+            return entry
+        self.misses += 1
+        return None
+
+    def read_manifest(self, entry: Path) -> Dict:
+        with open(entry / MANIFEST_NAME, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def store(self, key: str, files: Dict[str, Path], manifest: Optional[Dict] = None) -> Optional[Path]:
+        """Copy rendered files into a new entry and publish it atomically. Failures only cost the cache."""
+        entry = self._entry_dir(key)
+        staging = self.root / f".staging-{uuid.uuid4().hex}"
+        try:
+            staging.mkdir(parents=True, exist_ok=True)
+            for name, source in files.items():
+                shutil.copyfile(source, staging / name)
+            with open(staging / MANIFEST_NAME, "w", encoding="utf-8") as f:
+                json.dump(manifest or {}, f)
+            try:
+                os.rename(staging, entry)
+            except OSError:
+                # Another export published the same key first; theirs is equivalent
+                shutil.rmtree(staging, ignore_errors=True)
+            return entry
+        except Exception as e:
+            print(f"Warning: failed to store render cache entry {key[:12]}: {e}")
+            shutil.rmtree(staging, ignore_errors=True)
+            return None
+
+    def prune(self, max_entries: int = RENDER_CACHE_MAX_ENTRIES):
+        """Drop the least recently used entries beyond `max_entries`."""
+        try:
+            entries = [p for p in self.root.iterdir() if p.is_dir()]
+        except FileNotFoundError:
+            return
+        now = time.time()
+        finished = []
+        for entry in entries:
+            if entry.name.startswith(".staging-"):
+                # Left behind by a crashed export
+                if now - entry.stat().st_mtime > 3600:
+                    shutil.rmtree(entry, ignore_errors=True)
+            else:
+                finished.append(entry)
+        if len(finished) <= max_entries:
+            return
+        finished.sort(key=lambda p: p.stat().st_mtime)
+        for entry in finished[:len(finished) - max_entries]:
+            shutil.rmtree(entry, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {"rendered": self.misses, "cached": self.hits}
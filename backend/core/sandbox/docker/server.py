@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
 from starlette.middleware.base import BaseHTTPMiddleware
 import uvicorn
 import os
@@ -10,6 +11,9 @@ from html_to_pdf_router import router as pdf_router
 from visual_html_editor_router import router as editor_router
 from html_to_pptx_router import router as pptx_router
 from html_to_docx_router import router as docx_router
+from browser_pool import browser_pool
+from conversion_jobs import router as jobs_router
+from conversion_queue import job_manager
 
 # Ensure we're serving from the /workspace directory
 workspace_dir = "/workspace"
@@ -22,7 +26,19 @@ class WorkspaceDirMiddleware(BaseHTTPMiddleware):
             os.makedirs(workspace_dir, exist_ok=True)
         return await call_next(request)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Keep Chromium warm for the PDF/PPTX routers instead of launching it per request
+    try:
+        await browser_pool.start()
+    except Exception as e:
+        print(f"⚠️ Browser pool failed to start, browsers will be launched on first use: {e}")
+    job_manager.start()
+    yield
+    await job_manager.stop()
+    await browser_pool.stop()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(WorkspaceDirMiddleware)
 
 # Include routers
@@ -30,6 +46,7 @@ app.include_router(pdf_router)
 app.include_router(editor_router)
 app.include_router(pptx_router)
 app.include_router(docx_router)
+app.include_router(jobs_router)
 
 # Create output directory for generated PDFs (needed by PDF router)
 output_dir = Path("generated_pdfs")
@@ -41,6 +58,11 @@ app.mount("/downloads", StaticFiles(directory=str(output_dir)), name="downloads"
 # Initial directory creation
 os.makedirs(workspace_dir, exist_ok=True)
 
+@app.get("/browser-pool/stats")
+async def browser_pool_stats():
+    """Health of the shared Chromium pool used by the conversion routers"""
+    return browser_pool.stats()
+
 # Add visual HTML editor root endpoint
 @app.get("/editor")
 async def list_html_files():
@@ -16,29 +16,14 @@ from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 from bs4 import BeautifulSoup, NavigableString, Comment
 
+from editor_documents import TEXT_ELEMENTS, editor_documents, parse_html
+
 # Create router
 router = APIRouter(prefix="/api/html", tags=["visual-editor"])
 
 # Use /workspace as the default workspace directory
 workspace_dir = "/workspace"
 
-# All text elements that should be editable
-TEXT_ELEMENTS = [
-    'h1', 'h2', 'h3', 'h4', 'h5', 'h6',  # Headings
-    'p',  # Paragraphs
-    'span', 'strong', 'em', 'b', 'i', 'u',  # Inline text formatting
-    'small', 'mark', 'del', 'ins', 'sub', 'sup',  # Text modifications
-    'code', 'kbd', 'samp', 'var', 'pre',  # Code and preformatted text
-    'blockquote', 'cite', 'q',  # Quotes and citations
-    'abbr', 'dfn', 'time', 'data',  # Semantic text
-    'address', 'figcaption', 'caption',  # Descriptive text
-    'th', 'td',  # Table cells
-    'dt', 'dd',  # Definition lists
-    'li',  # List items
-    'label', 'legend',  # Form text
-]
-
-
 class EditTextRequest(BaseModel):
     file_path: str
     element_selector: str  # CSS selector to identify element
@@ -67,85 +52,7 @@ async def get_editable_elements(file_path: str):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        soup = BeautifulSoup(content, 'html.parser')
-        elements = []
-        
-        editable_counter = 0
-        
-        # Find all elements that could contain text
-        all_elements = soup.find_all(TEXT_ELEMENTS + ['div'])
-        
-        # Filter out elements that only contain comments
-        filtered_elements = []
-        for element in all_elements:
-            # Check if element only contains comments
-            only_comments = True
-            for child in element.children:
-                if isinstance(child, Comment):
-                    continue
-                if isinstance(child, NavigableString) and not child.strip():
-                    continue
-                only_comments = False
-                break
-                
-            if not only_comments:
-                filtered_elements.append(element)
-                
-        all_elements = filtered_elements
-        
-        for element in all_elements:
-            # Strategy 1: Elements with ONLY text content (no child elements)
-            if element.string and element.string.strip():
-                element_id = f"editable-{editable_counter}"
-                element['data-editable-id'] = element_id
-                element['class'] = element.get('class', []) + ['editable-element']
-                
-                elements.append({
-                    'id': element_id,
-                    'tag': element.name,
-                    'text': element.string.strip(),
-                    'selector': f'[data-editable-id="{element_id}"]',
-                    'innerHTML': element.string.strip()
-                })
-                editable_counter += 1
-            
-            # Strategy 2: Elements with mixed content - wrap raw text nodes individually
-            elif element.contents:
-                has_mixed_content = False
-                # Process each child node
-                for child in list(element.contents):  # Use list() to avoid modification during iteration
-                    # Skip comment nodes (Comments are a subclass of NavigableString)
-                    if isinstance(child, Comment):
-                        continue
-                    # Check if it's a NavigableString (raw text) with actual content
-                    if (isinstance(child, NavigableString) and child.strip()):
-                        
-                        # This is a raw text node with content
-                        text_content = child.strip()
-                        if text_content:
-                            # Create a wrapper span for the raw text
-                            wrapper_span = soup.new_tag('span')
-                            wrapper_span['data-editable-id'] = f"editable-{editable_counter}"
-                            wrapper_span['class'] = 'editable-element raw-text-wrapper'
-                            wrapper_span.string = text_content
-                            
-                            # Replace the text node with the wrapped span
-                            child.replace_with(wrapper_span)
-                            
-                            elements.append({
-                                'id': f"editable-{editable_counter}",
-                                'tag': 'text-node',
-                                'text': text_content,
-                                'selector': f'[data-editable-id="editable-{editable_counter}"]',
-                                'innerHTML': text_content
-                            })
-                            editable_counter += 1
-                            has_mixed_content = True
-                
-                # Removed fallback - prevents complex containers from becoming editable text
+        elements = editor_documents.get(full_path).editable_elements()
         
         return {"elements": elements}
         
@@ -162,24 +69,26 @@ async def edit_text(request: EditTextRequest):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        soup = BeautifulSoup(content, 'html.parser')
+        document = editor_documents.get(full_path)
         
         # Extract element ID from selector
         element_id = request.element_selector.replace('[data-editable-id="', '').replace('"]', '')
         
-        # Find the specific editable element by its data-editable-id
-        target_element = soup.find(attrs={'data-editable-id': element_id})
+        # Find the specific editable element in the document's index
+        target_element = document.find_editable(element_id)
         
         if not target_element:
             raise HTTPException(status_code=404, detail=f"Element with ID {element_id} not found")
         
-        print(f"🎯 Found element: {target_element.name} with ID {element_id} - '{target_element.get_text()[:50]}...'")
+        print(f"🎯 Found element with ID {element_id} - '{target_element.get_text()[:50]}...'")
         
-        # Simple replacement - whether it's a regular element or a wrapped text node
-        if target_element.string:
+        # Simple replacement - whether it's a regular element or a raw text node
+        if isinstance(target_element, NavigableString):
+            # Keep the whitespace around the raw text node the editor showed stripped
+            leading = target_element[:len(target_element) - len(target_element.lstrip())]
+            trailing = target_element[len(target_element.rstrip()):]
+            target_element.replace_with(f"{leading}{request.new_text}{trailing}")
+        elif target_element.string:
             target_element.string.replace_with(request.new_text)
         else:
             # Clear content and add new text
@@ -187,8 +96,7 @@ async def edit_text(request: EditTextRequest):
             target_element.string = request.new_text
         
         # Write back to file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
+        editor_documents.write(document)
         
         print(f"✅ Successfully updated text in {request.file_path}: '{request.new_text}'")
         return {"success": True, "message": "Text updated successfully"}
@@ -206,42 +114,34 @@ async def delete_element(request: DeleteElementRequest):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        soup = BeautifulSoup(content, 'html.parser')
+        document = editor_documents.get(full_path)
         
         # Handle both editable elements and removable divs
         if '[data-editable-id="' in request.element_selector:
             # Text element deletion
             element_id = request.element_selector.replace('[data-editable-id="', '').replace('"]', '')
-            
-            # Find the specific editable element by its data-editable-id
-            target_element = soup.find(attrs={'data-editable-id': element_id})
-            
-            if not target_element:
-                raise HTTPException(status_code=404, detail=f"Element with ID {element_id} not found")
+            target_element = document.find_editable(element_id)
                     
         elif '[data-removable-id="' in request.element_selector:
             # Div removal
             element_id = request.element_selector.replace('[data-removable-id="', '').replace('"]', '')
-            
-            # Find the specific removable element by its data-removable-id
-            target_element = soup.find(attrs={'data-removable-id': element_id})
-            
-            if not target_element:
-                raise HTTPException(status_code=404, detail=f"Element with ID {element_id} not found")
+            target_element = document.find_removable(element_id)
         else:
             raise HTTPException(status_code=400, detail="Invalid element selector")
         
+        if not target_element:
+            raise HTTPException(status_code=404, detail=f"Element with ID {element_id} not found")
+        
         print(f"🗑️ Deleting element: {target_element.name} - '{target_element.get_text()[:50]}...'")
         
         # Remove element
-        target_element.decompose()
+        if isinstance(target_element, NavigableString):
+            target_element.extract()
+        else:
+            target_element.decompose()
         
         # Write back to file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
+        editor_documents.write(document)
         
         print(f"🗑️ Successfully deleted element from {request.file_path}")
         return {"success": True, "message": "Element deleted successfully"}
@@ -260,7 +160,7 @@ async def save_content(request: SaveContentRequest):
             raise HTTPException(status_code=404, detail="File not found")
         
         # Clean up the HTML content by removing editor-specific classes and attributes
-        soup = BeautifulSoup(request.html_content, 'html.parser')
+        soup = parse_html(request.html_content)
         
         # Remove editor-specific elements and attributes
         for element in soup.find_all():
@@ -298,9 +198,8 @@ async def save_content(request: SaveContentRequest):
             if 'VisualHtmlEditor' in script.get_text():
                 script.decompose()
         
-        # Write the cleaned HTML back to file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(str(soup))
+        # Write the cleaned HTML back to file; the parsed tree stays cached for the next request
+        editor_documents.replace(full_path, soup)
         
         print(f"💾 Successfully saved content to {request.file_path}")
         return {"success": True, "message": "Content saved successfully"}
@@ -342,13 +241,13 @@ async def get_html_editor(file_path: str):
         if not os.path.exists(full_path):
             raise HTTPException(status_code=404, detail="File not found")
         
-        with open(full_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+        document = editor_documents.get(full_path)
         
-        # Inject editor functionality into the HTML
-        editor_html = inject_editor_functionality(content, file_path)
+        # Inject editor functionality into the HTML (once per file version)
+        if document.editor_html is None:
+            document.editor_html = inject_editor_functionality(str(document.soup), file_path)
         
-        return HTMLResponse(content=editor_html)
+        return HTMLResponse(content=document.editor_html)
         
     except Exception as e:
         print(f"❌ Error serving editor: {e}")
@@ -360,7 +259,7 @@ def inject_editor_functionality(html_content: str, file_path: str) -> str:
     """Inject visual editor functionality into existing HTML"""
     
     # Parse the HTML
-    soup = BeautifulSoup(html_content, 'html.parser')
+    soup = parse_html(html_content)
     
     
     # Apply the same transformation as the API endpoint
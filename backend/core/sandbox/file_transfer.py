@@ -0,0 +1,254 @@
+"""
+Constant-memory file transfer between the backend and a sandbox.
+
+Files are never held in memory as a whole: downloads are streamed from the
+sandbox toolbox API straight to the client (or into a local temporary file
+when a caller needs one, or the SDK release has no usable toolbox request),
+and uploads are spooled to a temporary file and handed to the SDK by path.
+Byte ranges are cut inside the sandbox, so a Range request only transfers
+the requested slice.
+"""
+import asyncio
+import os
+import re
+import shlex
+import tempfile
+import uuid
+from contextlib import asynccontextmanager
+from importlib.metadata import PackageNotFoundError, version
+from typing import AsyncIterator, Optional, Tuple
+
+import httpx
+from daytona_sdk import AsyncSandbox
+
+from core.utils.logger import logger
+
+try:
+    from daytona_sdk._utils.path import prefix_relative_path
+except ImportError:
+    prefix_relative_path = None
+
+
+CHUNK_SIZE = 1024 * 1024
+TRANSFER_TIMEOUT_SECONDS = 30 * 60
+
+_RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+# SDK releases whose streaming download_file passes headers to httpx's
+# stream() positionally, which httpx 0.28 rejects; see download_to_path
+_BROKEN_STREAMING_SDK_SERIES = ((0, 21),)
+
+
+def _sdk_series() -> Optional[Tuple[int, int]]:
+    try:
+        major, minor = version("daytona-sdk").split(".")[:2]
+        return int(major), int(minor)
+    except (PackageNotFoundError, ValueError):
+        return None
+
+
+# The workaround builds the toolbox request from SDK internals, so it is only
+# used on the releases it was written against, and only if those internals exist
+_USE_TOOLBOX_WORKAROUND = _sdk_series() in _BROKEN_STREAMING_SDK_SERIES and prefix_relative_path is not None
+
+
+class RangeNotSatisfiable(Exception):
+    pass
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range `Range: bytes=...` header into an inclusive (start, end).
+
+    Returns None when there is no usable range (serve the whole file) and
+    raises RangeNotSatisfiable when the range lies outside the file.
+    """
+    if not header:
+        return None
+    match = _RANGE_PATTERN.match(header.strip())
+    if not match:
+        # Multi-range and malformed headers fall back to a full response
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or start > end:
+        raise RangeNotSatisfiable()
+    return start, end
+
+
+def temp_path(suffix: str = "") -> str:
+    fd, path = tempfile.mkstemp(prefix="sandbox-transfer-", suffix=suffix)
+    os.close(fd)
+    return path
+
+
+def remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        logger.debug(f"Failed to remove temp file {path}: {e}")
+
+
+def _has_toolbox_internals(fs) -> bool:
+    toolbox_api = getattr(fs, "_toolbox_api", None)
+    return (
+        hasattr(fs, "_get_root_dir")
+        and hasattr(fs, "_sandbox_id")
+        and hasattr(toolbox_api, "_download_file_serialize")
+    )
+
+
+def can_stream_downloads(sandbox: AsyncSandbox) -> bool:
+    """Whether open_download_stream() can be used; otherwise downloads go through the SDK to a local file."""
+    return _USE_TOOLBOX_WORKAROUND and _has_toolbox_internals(sandbox.fs)
+
+
+async def open_download_stream(sandbox: AsyncSandbox, remote_path: str) -> Tuple[Optional[int], AsyncIterator[bytes]]:
+    """
+    Start streaming a sandbox file straight from the toolbox API.
+
+    Returns (Content-Length if the toolbox sent one, chunk iterator). HTTP
+    errors are raised here, before any bytes are handed out, so callers can
+    still answer with an error status. The connection is closed when the
+    iterator finishes or is closed. Only valid when can_stream_downloads().
+    """
+    fs = sandbox.fs
+    path = prefix_relative_path(await fs._get_root_dir(), remote_path)
+    method, url, headers, *_ = fs._toolbox_api._download_file_serialize(
+        fs._sandbox_id,
+        path=path,
+        x_daytona_organization_id=None,
+        _request_auth=None,
+        _content_type=None,
+        _headers=None,
+        _host_index=None,
+    )
+
+    client = httpx.AsyncClient(timeout=TRANSFER_TIMEOUT_SECONDS)
+    try:
+        response = await client.send(client.build_request(method, url, headers=headers), stream=True)
+        if response.is_error:
+            detail = (await response.aread()).decode(errors="replace")[:500]
+            raise RuntimeError(f"Failed to download {remote_path}: HTTP {response.status_code} {detail}")
+    except BaseException:
+        await client.aclose()
+        raise
+
+    async def chunks() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                yield chunk
+        finally:
+            await response.aclose()
+            await client.aclose()
+
+    content_length = response.headers.get("content-length")
+    return (int(content_length) if content_length else None), chunks()
+
+
+async def download_to_path(sandbox: AsyncSandbox, remote_path: str, local_path: str):
+    """
+    Stream a sandbox file to a local path without buffering it in memory.
+
+    The SDK's streaming overload, fs.download_file(remote, local), passes
+    headers to httpx's stream() positionally in the 0.21 releases, which
+    httpx 0.28 rejects. On those releases the same toolbox download request
+    is built by open_download_stream(); any other release (or one without the
+    internals it relies on) uses the public overload.
+    """
+    if not can_stream_downloads(sandbox):
+        await sandbox.fs.download_file(remote_path, local_path, TRANSFER_TIMEOUT_SECONDS)
+        return
+
+    _, chunks = await open_download_stream(sandbox, remote_path)
+    try:
+        with open(local_path, "wb") as f:
+            async for chunk in chunks:
+                await asyncio.to_thread(f.write, chunk)
+    finally:
+        await chunks.aclose()
+
+
+@asynccontextmanager
+async def downloaded(sandbox: AsyncSandbox, remote_path: str) -> AsyncIterator[str]:
+    """Download a sandbox file to a temporary local file, removed on exit."""
+    local_path = temp_path(os.path.splitext(remote_path)[1])
+    try:
+        await download_to_path(sandbox, remote_path, local_path)
+        yield local_path
+    finally:
+        remove_quietly(local_path)
+
+
+async def download_range_to_path(sandbox: AsyncSandbox, remote_path: str, start: int, end: int, local_path: str):
+    """Cut bytes [start, end] out of a sandbox file in the sandbox and download only that slice."""
+    slice_path = f"/tmp/range-{uuid.uuid4().hex}"
+    length = end - start + 1
+    try:
+        response = await sandbox.process.exec(
+            f"tail -c +{start + 1} {shlex.quote(remote_path)} | head -c {length} > {slice_path}",
+            timeout=TRANSFER_TIMEOUT_SECONDS,
+        )
+        if response.exit_code != 0:
+            raise RuntimeError(f"Failed to read byte range of {remote_path}: {response.result}")
+        await download_to_path(sandbox, slice_path, local_path)
+    finally:
+        try:
+            await sandbox.process.exec(f"rm -f {slice_path}", timeout=10)
+        except Exception as e:
+            logger.debug(f"Failed to remove range slice {slice_path}: {e}")
+
+
+async def iter_file(local_path: str, remove: bool = False) -> AsyncIterator[bytes]:
+    """Yield a local file in CHUNK_SIZE pieces without blocking the event loop."""
+    try:
+        with open(local_path, "rb") as f:
+            while True:
+                chunk = await asyncio.to_thread(f.read, CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        if remove:
+            remove_quietly(local_path)
+
+
+async def spool_upload(upload, suffix: str = "") -> str:
+    """Copy a FastAPI UploadFile to a temporary local file chunk by chunk and return its path."""
+    local_path = temp_path(suffix)
+    try:
+        with open(local_path, "wb") as f:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                await asyncio.to_thread(f.write, chunk)
+    except Exception:
+        remove_quietly(local_path)
+        raise
+    return local_path
+
+
+async def upload_from_path(sandbox: AsyncSandbox, local_path: str, remote_path: str):
+    """Stream a local file into the sandbox without buffering it in memory."""
+    await sandbox.fs.upload_file(local_path, remote_path, TRANSFER_TIMEOUT_SECONDS)
+
+
+async def upload_stream(sandbox: AsyncSandbox, upload, remote_path: str):
+    """Spool a FastAPI UploadFile to disk and stream it into the sandbox."""
+    local_path = await spool_upload(upload, os.path.splitext(remote_path)[1])
+    try:
+        await upload_from_path(sandbox, local_path, remote_path)
+    finally:
+        remove_quietly(local_path)
@@ -0,0 +1,198 @@
+"""
+Warm pool of pre-provisioned, idle sandboxes.
+
+Idle sandboxes are kept as JSON entries in a Redis list. Claiming is a single
+LPOP, so two processes can never hand out the same sandbox. A maintenance loop
+(one active refiller at a time, guarded by a Redis lock) tops the pool up to
+SANDBOX_POOL_SIZE at no more than SANDBOX_POOL_REFILL_PER_MINUTE creations per
+minute, and retires entries older than SANDBOX_POOL_MAX_AGE_SECONDS so idle
+sandboxes are rotated before Daytona auto-stops them.
+
+Claimed sandboxes are recorded into `projects.sandbox` by the caller
+(see SandboxToolsBase._resolve_sandbox).
+"""
+import asyncio
+import json
+import time
+import uuid
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Set
+
+from core.sandbox.sandbox import create_sandbox, delete_sandbox, get_sandbox_preview_links, wait_for_sandbox_ready
+from core.services import redis
+from core.utils.config import config
+from core.utils.logger import logger
+
+
+POOL_KEY = "sandbox_pool:idle"
+REFILL_LOCK_KEY = "sandbox_pool:refill_lock"
+REFILL_INTERVAL_SECONDS = 15
+
+
+@dataclass
+class PooledSandbox:
+    sandbox_id: str
+    password: str
+    vnc_preview: Optional[str]
+    sandbox_url: Optional[str]
+    token: Optional[str]
+    created_at: float
+
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    def to_project_sandbox(self) -> Dict[str, Any]:
+        """Shape stored in `projects.sandbox`."""
+        return {
+            'id': self.sandbox_id,
+            'pass': self.password,
+            'vnc_preview': self.vnc_preview,
+            'sandbox_url': self.sandbox_url,
+            'token': self.token,
+        }
+
+
+class SandboxPool:
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+        # Background deletions of expired entries; held so they are not garbage collected mid-flight
+        self._retiring: Set[asyncio.Task] = set()
+        self._holder_id = str(uuid.uuid4())
+        self.claims = 0
+        self.misses = 0
+        self.claim_latency_ms: List[float] = []
+
+    @property
+    def target_size(self) -> int:
+        return max(0, int(config.SANDBOX_POOL_SIZE or 0))
+
+    @property
+    def enabled(self) -> bool:
+        return self.target_size > 0
+
+    # ---- claiming --------------------------------------------------------
+
+    async def claim(self, project_id: str) -> Optional[PooledSandbox]:
+        """Atomically take one idle sandbox, or return None if the pool is empty."""
+        if not self.enabled:
+            return None
+
+        started = time.monotonic()
+        max_age = float(config.SANDBOX_POOL_MAX_AGE_SECONDS)
+        try:
+            while True:
+                raw = await redis.lpop(POOL_KEY)
+                if raw is None:
+                    self.misses += 1
+                    return None
+                entry = PooledSandbox(**json.loads(raw))
+                if entry.age() <= max_age:
+                    break
+                # Too old to trust; retire it and try the next one
+                task = asyncio.create_task(self._retire(entry))
+                self._retiring.add(task)
+                task.add_done_callback(self._retiring.discard)
+        except Exception as e:
+            logger.warning(f"Failed to claim sandbox from warm pool: {e}")
+            self.misses += 1
+            return None
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        self.claims += 1
+        self.claim_latency_ms = (self.claim_latency_ms + [elapsed_ms])[-256:]
+        logger.info(f"Claimed warm sandbox {entry.sandbox_id} for project {project_id} in {elapsed_ms:.0f}ms")
+        return entry
+
+    # ---- maintenance -----------------------------------------------------
+
+    def start(self):
+        """Start the background refill loop (no-op when the pool is disabled)."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.create_task(self._maintain())
+        logger.info(f"Warm sandbox pool started (size {self.target_size})")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _maintain(self):
+        while True:
+            try:
+                if await redis.set(REFILL_LOCK_KEY, self._holder_id, ex=REFILL_INTERVAL_SECONDS * 4, nx=True) \
+                        or await redis.get(REFILL_LOCK_KEY) == self._holder_id:
+                    await redis.expire(REFILL_LOCK_KEY, REFILL_INTERVAL_SECONDS * 4)
+                    await self._evict_expired()
+                    await self._refill()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Warm sandbox pool maintenance failed: {e}")
+            await asyncio.sleep(REFILL_INTERVAL_SECONDS)
+
+    async def _evict_expired(self):
+        max_age = float(config.SANDBOX_POOL_MAX_AGE_SECONDS)
+        for raw in await redis.lrange(POOL_KEY, 0, -1):
+            entry = PooledSandbox(**json.loads(raw))
+            # LREM only succeeds if nobody claimed it in the meantime
+            if entry.age() > max_age and await redis.lrem(POOL_KEY, 1, raw):
+                await self._retire(entry)
+
+    async def _refill(self):
+        deficit = self.target_size - await redis.llen(POOL_KEY)
+        per_interval = max(1, round(int(config.SANDBOX_POOL_REFILL_PER_MINUTE) * REFILL_INTERVAL_SECONDS / 60))
+        to_create = min(deficit, per_interval)
+        if to_create <= 0:
+            return
+        results = await asyncio.gather(*(self._provision() for _ in range(to_create)), return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"Failed to provision warm sandbox: {result}")
+
+    async def _provision(self):
+        password = str(uuid.uuid4())
+        sandbox = await create_sandbox(password)
+        await wait_for_sandbox_ready(sandbox)
+        vnc_url, website_url, token = await get_sandbox_preview_links(sandbox)
+        entry = PooledSandbox(
+            sandbox_id=sandbox.id,
+            password=password,
+            vnc_preview=vnc_url,
+            sandbox_url=website_url,
+            token=token,
+            created_at=time.time(),
+        )
+        await redis.rpush(POOL_KEY, json.dumps(asdict(entry)))
+        logger.debug(f"Added sandbox {sandbox.id} to warm pool")
+
+    async def _retire(self, entry: PooledSandbox):
+        try:
+            await delete_sandbox(entry.sandbox_id)
+        except Exception as e:
+            logger.warning(f"Failed to delete expired warm sandbox {entry.sandbox_id}: {e}")
+
+    # ---- metrics ---------------------------------------------------------
+
+    async def stats(self) -> Dict[str, Any]:
+        try:
+            idle = await redis.llen(POOL_KEY)
+        except Exception:
+            idle = None
+        latencies = sorted(self.claim_latency_ms)
+        return {
+            'enabled': self.enabled,
+            'target_size': self.target_size,
+            'idle': idle,
+            'claims': self.claims,
+            'misses': self.misses,
+            'claim_latency_p50_ms': round(latencies[len(latencies) // 2], 2) if latencies else None,
+            'claim_latency_max_ms': round(latencies[-1], 2) if latencies else None,
+        }
+
+
+sandbox_pool = SandboxPool()
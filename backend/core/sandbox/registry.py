@@ -0,0 +1,138 @@
+"""
+Process-level registry of resolved sandbox handles, keyed by project_id.
+
+Every sandbox tool of every run in this process shares one handle per project,
+so a run that registers a dozen sandbox tools resolves (and, if needed, starts
+or creates) its sandbox once. Concurrent first use is serialized per project
+behind an asyncio lock, handles expire after a TTL, and stale handles are
+re-validated against Daytona (restarting the sandbox if it was stopped).
+Expired handles and idle locks are swept periodically, and delete_sandbox()
+drops the handle of the sandbox it deletes.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from daytona_sdk import AsyncSandbox
+
+from core.sandbox.sandbox import TOOL_READY_TIMEOUT_SECONDS, get_or_start_sandbox
+from core.utils.logger import logger
+
+
+# Re-resolve from the project row after this long
+HANDLE_TTL_SECONDS = 15 * 60
+# Confirm the sandbox is still running after this long without a check
+REVALIDATE_INTERVAL_SECONDS = 60
+# Drop expired handles and idle per-project locks at most this often
+SWEEP_INTERVAL_SECONDS = 60
+
+Resolver = Callable[[], Awaitable[Tuple[AsyncSandbox, str, Optional[str]]]]
+
+
+@dataclass
+class SandboxHandle:
+    project_id: str
+    sandbox_id: str
+    sandbox_pass: Optional[str]
+    sandbox: AsyncSandbox
+    resolved_at: float = field(default_factory=time.monotonic)
+    validated_at: float = field(default_factory=time.monotonic)
+
+    def expired(self, now: float) -> bool:
+        return now - self.resolved_at > HANDLE_TTL_SECONDS
+
+    def needs_validation(self, now: float) -> bool:
+        return now - self.validated_at > REVALIDATE_INTERVAL_SECONDS
+
+
+class SandboxRegistry:
+    def __init__(self):
+        self._handles: Dict[str, SandboxHandle] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._swept_at = time.monotonic()
+        self.resolutions = 0
+        self.hits = 0
+
+    def _lock_for(self, project_id: str) -> asyncio.Lock:
+        lock = self._locks.get(project_id)
+        if lock is None:
+            lock = self._locks[project_id] = asyncio.Lock()
+        return lock
+
+    def _usable(self, handle: Optional[SandboxHandle], now: float) -> bool:
+        return handle is not None and not handle.expired(now) and not handle.needs_validation(now)
+
+    async def get(self, project_id: str, resolver: Resolver) -> SandboxHandle:
+        """
+        Return the shared handle for a project, resolving it at most once.
+
+        `resolver` is only awaited when there is no live handle; it returns
+        (sandbox, sandbox_id, sandbox_pass) and may create the sandbox.
+        """
+        now = time.monotonic()
+        if now - self._swept_at > SWEEP_INTERVAL_SECONDS:
+            self._sweep(now)
+
+        handle = self._handles.get(project_id)
+        if self._usable(handle, now):
+            self.hits += 1
+            return handle
+
+        async with self._lock_for(project_id):
+            now = time.monotonic()
+            handle = self._handles.get(project_id)
+            if self._usable(handle, now):
+                self.hits += 1
+                return handle
+
+            if handle is not None and not handle.expired(now):
+                revalidated = await self._revalidate(handle)
+                if revalidated is not None:
+                    return revalidated
+
+            started = time.monotonic()
+            sandbox, sandbox_id, sandbox_pass = await resolver()
+            handle = SandboxHandle(
+                project_id=project_id,
+                sandbox_id=sandbox_id,
+                sandbox_pass=sandbox_pass,
+                sandbox=sandbox,
+            )
+            self._handles[project_id] = handle
+            self.resolutions += 1
+            logger.debug(f"Resolved sandbox {sandbox_id} for project {project_id} in {(time.monotonic() - started) * 1000:.0f}ms")
+            return handle
+
+    async def _revalidate(self, handle: SandboxHandle) -> Optional[SandboxHandle]:
+        try:
+            # Fetches current state and starts the sandbox if it was stopped/archived
+            handle.sandbox = await get_or_start_sandbox(handle.sandbox_id, ready_timeout=TOOL_READY_TIMEOUT_SECONDS)
+            handle.validated_at = time.monotonic()
+            return handle
+        except Exception as e:
+            logger.warning(f"Sandbox {handle.sandbox_id} for project {handle.project_id} failed re-validation: {e}")
+            self._handles.pop(handle.project_id, None)
+            return None
+
+    def _sweep(self, now: float):
+        self._swept_at = now
+        for project_id in [p for p, h in self._handles.items() if h.expired(now)]:
+            del self._handles[project_id]
+        # A lock that is not held guards nothing once its project has no handle
+        for project_id in [p for p, lock in self._locks.items() if p not in self._handles and not lock.locked()]:
+            del self._locks[project_id]
+
+    def invalidate(self, project_id: str):
+        self._handles.pop(project_id, None)
+
+    def invalidate_sandbox(self, sandbox_id: str):
+        """Drop every handle pointing at a sandbox that was deleted."""
+        for project_id in [p for p, h in self._handles.items() if h.sandbox_id == sandbox_id]:
+            del self._handles[project_id]
+
+    def stats(self) -> Dict[str, int]:
+        return {'handles': len(self._handles), 'locks': len(self._locks), 'hits': self.hits, 'resolutions': self.resolutions}
+
+
+sandbox_registry = SandboxRegistry()
@@ -1,5 +1,8 @@
 from daytona_sdk import AsyncDaytona, DaytonaConfig, CreateSandboxFromSnapshotParams, AsyncSandbox, SessionExecuteRequest, Resources, SandboxState
 from dotenv import load_dotenv
+import asyncio
+import time
+from typing import Dict, Optional, Sequence, Tuple
 from core.utils.logger import logger
 from core.utils.config import config
 from core.utils.config import Configuration
@@ -30,7 +33,18 @@ else:
 
 daytona = AsyncDaytona(daytona_config)
 
-async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
+# Ports that must accept connections before a sandbox counts as ready.
+# 8080 is the workspace HTTP server (previews, document conversion); VNC (6080)
+# comes up later and is not needed by tools, so it isn't waited on.
+READY_PORTS = (8080,)
+READY_TIMEOUT_SECONDS = 30.0
+# A tool call that finds its sandbox stopped waits less: the agent can retry
+# or use a tool that doesn't need the workspace server
+TOOL_READY_TIMEOUT_SECONDS = 10.0
+
+_readiness_stats: Dict[str, float] = {'count': 0, 'timeouts': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0}
+
+async def get_or_start_sandbox(sandbox_id: str, ready_timeout: float = READY_TIMEOUT_SECONDS) -> AsyncSandbox:
     """Retrieve a sandbox by ID, check its state, and start it if needed."""
     
     logger.info(f"Getting or starting sandbox with ID: {sandbox_id}")
@@ -43,13 +57,12 @@ async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
             logger.info(f"Sandbox is in {sandbox.state} state. Starting...")
             try:
                 await daytona.start(sandbox)
-                # Wait a moment for the sandbox to initialize
-                # sleep(5)
                 # Refresh sandbox state after starting
                 sandbox = await daytona.get(sandbox_id)
                 
                 # Start supervisord in a session when restarting
                 await start_supervisord_session(sandbox)
+                await wait_for_sandbox_ready(sandbox, timeout=ready_timeout)
             except Exception as e:
                 logger.error(f"Error starting sandbox: {e}")
                 raise e
@@ -61,6 +74,81 @@ async def get_or_start_sandbox(sandbox_id: str) -> AsyncSandbox:
         logger.error(f"Error retrieving or starting sandbox: {str(e)}")
         raise e
 
+def _port_probe_command(ports: Sequence[int]) -> str:
+    checks = " && ".join(f"(exec 3<>/dev/tcp/127.0.0.1/{port}) 2>/dev/null" for port in ports)
+    return f"bash -c '{checks} && echo ready || echo pending'"
+
+
+async def wait_for_sandbox_ready(
+    sandbox: AsyncSandbox,
+    ports: Sequence[int] = READY_PORTS,
+    timeout: float = READY_TIMEOUT_SECONDS,
+    initial_delay: float = 0.1,
+    max_delay: float = 2.0,
+) -> Optional[float]:
+    """
+    Poll the sandbox until the given service ports accept connections.
+
+    Uses exponential backoff between probes and returns as soon as every port
+    is up. Returns time-to-ready in milliseconds, or None if the timeout was
+    hit (callers proceed anyway; services may still come up later).
+    """
+    started = time.monotonic()
+    delay = initial_delay
+    command = _port_probe_command(ports)
+    probe_timeout = max(1, min(10, int(timeout)))
+    
+    while True:
+        try:
+            response = await sandbox.process.exec(command, timeout=probe_timeout)
+            if response.exit_code == 0 and (response.result or '').strip() == 'ready':
+                elapsed_ms = (time.monotonic() - started) * 1000
+                _record_readiness(elapsed_ms)
+                logger.info(f"Sandbox {sandbox.id} ready in {elapsed_ms:.0f}ms (ports {list(ports)})")
+                return elapsed_ms
+        except Exception as e:
+            logger.debug(f"Readiness probe for sandbox {sandbox.id} failed: {e}")
+        
+        remaining = timeout - (time.monotonic() - started)
+        if remaining <= 0:
+            _readiness_stats['timeouts'] += 1
+            logger.warning(f"Sandbox {sandbox.id} not ready after {timeout:.0f}s (ports {list(ports)}); continuing")
+            return None
+        
+        await asyncio.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_delay)
+
+
+def _record_readiness(elapsed_ms: float):
+    _readiness_stats['count'] += 1
+    _readiness_stats['total_ms'] += elapsed_ms
+    _readiness_stats['last_ms'] = elapsed_ms
+    _readiness_stats['max_ms'] = max(_readiness_stats['max_ms'], elapsed_ms)
+
+
+def get_readiness_stats() -> Dict[str, float]:
+    """Time-to-ready metrics for sandboxes created or started by this process."""
+    count = _readiness_stats['count']
+    return {
+        **_readiness_stats,
+        'avg_ms': round(_readiness_stats['total_ms'] / count, 2) if count else None,
+    }
+
+
+async def get_sandbox_preview_links(sandbox: AsyncSandbox) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """Return (vnc_url, website_url, token), best-effort; fields are None if extraction fails."""
+    try:
+        vnc_link = await sandbox.get_preview_link(6080)
+        website_link = await sandbox.get_preview_link(8080)
+        vnc_url = vnc_link.url if hasattr(vnc_link, 'url') else str(vnc_link).split("url='")[1].split("'")[0]
+        website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
+        token = vnc_link.token if hasattr(vnc_link, 'token') else (str(vnc_link).split("token='")[1].split("'")[0] if "token='" in str(vnc_link) else None)
+        return vnc_url, website_url, token
+    except Exception:
+        logger.warning(f"Failed to extract preview links for sandbox {sandbox.id}", exc_info=True)
+        return None, None, None
+
+
 async def start_supervisord_session(sandbox: AsyncSandbox):
     """Start supervisord in a session."""
     session_id = "supervisord-session"
@@ -135,6 +223,10 @@ async def delete_sandbox(sandbox_id: str) -> bool:
         
         # Delete the sandbox
         await daytona.delete(sandbox)
+
+        # Imported here: the registry imports this module
+        from core.sandbox.registry import sandbox_registry
+        sandbox_registry.invalidate_sandbox(sandbox_id)
         
         logger.info(f"Successfully deleted sandbox {sandbox_id}")
         return True
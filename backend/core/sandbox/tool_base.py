@@ -5,7 +5,9 @@ import asyncio
 from core.agentpress.thread_manager import ThreadManager
 from core.agentpress.tool import Tool
 from daytona_sdk import AsyncSandbox
-from core.sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox
+from core.sandbox.sandbox import get_or_start_sandbox, create_sandbox, delete_sandbox, wait_for_sandbox_ready, get_sandbox_preview_links, TOOL_READY_TIMEOUT_SECONDS
+from core.sandbox.registry import sandbox_registry
+from core.sandbox.pool import sandbox_pool
 from core.utils.logger import logger
 from core.utils.files_utils import clean_path
 from core.utils.config import config
@@ -15,6 +17,8 @@ class SandboxToolsBase(Tool):
     
     # Class variable to track if sandbox URLs have been printed
     _urls_printed = False
+    # Background labeling of claimed pool sandboxes, held so the tasks are not garbage collected
+    _label_tasks: set = set()
     
     def __init__(self, project_id: str, thread_manager: Optional[ThreadManager] = None):
         super().__init__()
@@ -28,82 +32,100 @@ class SandboxToolsBase(Tool):
     async def _ensure_sandbox(self) -> AsyncSandbox:
         """Ensure we have a valid sandbox instance, retrieving it from the project if needed.
 
-        If the project does not yet have a sandbox, create it lazily and persist
-        the metadata to the `projects` table so subsequent calls can reuse it.
+        The resolved handle is shared through the process-level sandbox registry,
+        so all tool instances for a project reuse one sandbox and concurrent first
+        use triggers a single lookup/start/create.
         """
-        if self._sandbox is None:
-            try:
-                # Get database client
-                client = await self.thread_manager.db.client
-
-                # Get project data
-                project = await client.table('projects').select('*').eq('project_id', self.project_id).execute()
-                if not project.data or len(project.data) == 0:
-                    raise ValueError(f"Project {self.project_id} not found")
-
-                project_data = project.data[0]
-                sandbox_info = project_data.get('sandbox') or {}
-
-                # If there is no sandbox recorded for this project, create one lazily
-                if not sandbox_info.get('id'):
-                    logger.debug(f"No sandbox recorded for project {self.project_id}; creating lazily")
-                    sandbox_pass = str(uuid.uuid4())
-                    sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
-                    sandbox_id = sandbox_obj.id
-                    
-                    # Wait 5 seconds for services to start up
-                    logger.info(f"Waiting 5 seconds for sandbox {sandbox_id} services to initialize...")
-                    await asyncio.sleep(5)
-                    
-                    # Gather preview links and token (best-effort parsing)
-                    try:
-                        vnc_link = await sandbox_obj.get_preview_link(6080)
-                        website_link = await sandbox_obj.get_preview_link(8080)
-                        vnc_url = vnc_link.url if hasattr(vnc_link, 'url') else str(vnc_link).split("url='")[1].split("'")[0]
-                        website_url = website_link.url if hasattr(website_link, 'url') else str(website_link).split("url='")[1].split("'")[0]
-                        token = vnc_link.token if hasattr(vnc_link, 'token') else (str(vnc_link).split("token='")[1].split("'")[0] if "token='" in str(vnc_link) else None)
-                    except Exception:
-                        # If preview link extraction fails, still proceed but leave fields None
-                        logger.warning(f"Failed to extract preview links for sandbox {sandbox_id}", exc_info=True)
-                        vnc_url = None
-                        website_url = None
-                        token = None
-
-                    # Persist sandbox metadata to project record
-                    update_result = await client.table('projects').update({
-                        'sandbox': {
-                            'id': sandbox_id,
-                            'pass': sandbox_pass,
-                            'vnc_preview': vnc_url,
-                            'sandbox_url': website_url,
-                            'token': token
-                        }
-                    }).eq('project_id', self.project_id).execute()
-
-                    if not update_result.data:
-                        # Cleanup created sandbox if DB update failed
-                        try:
-                            await delete_sandbox(sandbox_id)
-                        except Exception:
-                            logger.error(f"Failed to delete sandbox {sandbox_id} after DB update failure", exc_info=True)
-                        raise Exception("Database update failed when storing sandbox metadata")
-
-                    # Store local metadata and ensure sandbox is ready
-                    self._sandbox_id = sandbox_id
-                    self._sandbox_pass = sandbox_pass
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
-                else:
-                    # Use existing sandbox metadata
-                    self._sandbox_id = sandbox_info['id']
-                    self._sandbox_pass = sandbox_info.get('pass')
-                    self._sandbox = await get_or_start_sandbox(self._sandbox_id)
-
-            except Exception as e:
-                logger.error(f"Error retrieving/creating sandbox for project {self.project_id}: {str(e)}")
-                raise e
+        try:
+            handle = await sandbox_registry.get(self.project_id, self._resolve_sandbox)
+        except Exception as e:
+            logger.error(f"Error retrieving/creating sandbox for project {self.project_id}: {str(e)}")
+            raise e
 
+        self._sandbox = handle.sandbox
+        self._sandbox_id = handle.sandbox_id
+        self._sandbox_pass = handle.sandbox_pass
         return self._sandbox
 
+    async def _resolve_sandbox(self) -> tuple[AsyncSandbox, str, Optional[str]]:
+        """Look up the project's sandbox, creating it lazily if none is recorded.
+
+        If the project does not yet have a sandbox, claim a warm one from the pool
+        (or create one) and persist the metadata to the `projects` table so
+        subsequent calls can reuse it.
+        """
+        # Get database client
+        client = await self.thread_manager.db.client
+
+        # Get project data (coalesced across all tools of this run)
+        project_data = await self.thread_manager.loader.load('projects', 'project_id', self.project_id)
+        if not project_data:
+            raise ValueError(f"Project {self.project_id} not found")
+
+        sandbox_info = project_data.get('sandbox') or {}
+
+        # Use existing sandbox metadata
+        if sandbox_info.get('id'):
+            sandbox_id = sandbox_info['id']
+            sandbox = await get_or_start_sandbox(sandbox_id, ready_timeout=TOOL_READY_TIMEOUT_SECONDS)
+            return sandbox, sandbox_id, sandbox_info.get('pass')
+
+        # If there is no sandbox recorded for this project, take a warm one from
+        # the pool when available, otherwise create one lazily
+        pooled = await sandbox_pool.claim(self.project_id)
+        if pooled:
+            sandbox_id = pooled.sandbox_id
+            sandbox_pass = pooled.password
+            sandbox_metadata = pooled.to_project_sandbox()
+        else:
+            logger.debug(f"No sandbox recorded for project {self.project_id}; creating lazily")
+            sandbox_pass = str(uuid.uuid4())
+            sandbox_obj = await create_sandbox(sandbox_pass, self.project_id)
+            sandbox_id = sandbox_obj.id
+
+            # Wait until services accept connections instead of sleeping a fixed time
+            await wait_for_sandbox_ready(sandbox_obj)
+
+            # Gather preview links and token (best-effort parsing)
+            vnc_url, website_url, token = await get_sandbox_preview_links(sandbox_obj)
+            sandbox_metadata = {
+                'id': sandbox_id,
+                'pass': sandbox_pass,
+                'vnc_preview': vnc_url,
+                'sandbox_url': website_url,
+                'token': token
+            }
+
+        # Persist sandbox metadata to project record
+        update_result = await client.table('projects').update({
+            'sandbox': sandbox_metadata
+        }).eq('project_id', self.project_id).execute()
+
+        if not update_result.data:
+            # Cleanup created sandbox if DB update failed
+            try:
+                await delete_sandbox(sandbox_id)
+            except Exception:
+                logger.error(f"Failed to delete sandbox {sandbox_id} after DB update failure", exc_info=True)
+            raise Exception("Database update failed when storing sandbox metadata")
+
+        self.thread_manager.loader.prime('projects', 'project_id', self.project_id, update_result.data[0])
+
+        # Ensure the new sandbox is ready
+        sandbox = await get_or_start_sandbox(sandbox_id, ready_timeout=TOOL_READY_TIMEOUT_SECONDS)
+        if pooled:
+            task = asyncio.create_task(self._label_pooled_sandbox(sandbox))
+            self._label_tasks.add(task)
+            task.add_done_callback(self._label_tasks.discard)
+        return sandbox, sandbox_id, sandbox_pass
+
+    async def _label_pooled_sandbox(self, sandbox: AsyncSandbox):
+        """Pooled sandboxes are created unlabeled; tag them with the project like fresh ones."""
+        try:
+            await sandbox.set_labels({'id': self.project_id})
+        except Exception as e:
+            logger.warning(f"Failed to label pooled sandbox {sandbox.id} for project {self.project_id}: {e}")
+
     @property
     def sandbox(self) -> AsyncSandbox:
         """Get the sandbox instance, ensuring it exists."""
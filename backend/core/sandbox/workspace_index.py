@@ -0,0 +1,119 @@
+"""
+Content-hash manifests of a sandbox workspace, with change tracking.
+
+A manifest maps each workspace file to its size, mtime and sha256. Each
+snapshot is stored in Redis under a content-derived id (the same workspace
+state always yields the same id), so any caller holding an id can ask "what
+changed since X":
+- the frontend file browser refreshes only changed entries
+- file sync to storage exports only changed files (`export_changes`)
+- the agent gets a compact summary of what a turn touched
+
+Hashing happens inside the sandbox and reuses hashes of files whose size and
+mtime are unchanged, so re-snapshotting a large, mostly idle workspace is cheap.
+"""
+import hashlib
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+from daytona_sdk import AsyncSandbox
+
+from core.sandbox import bulk_fs
+from core.services import redis
+from core.utils.logger import logger
+
+
+WORKSPACE_ROOT = "/workspace"
+# Remembers per-file hashes between snapshots, inside the sandbox
+HASH_CACHE_PATH = "/tmp/.workspace_manifest_cache.json"
+MANIFEST_TTL_SECONDS = 24 * 3600
+
+Manifest = Dict[str, Dict[str, Any]]
+
+
+def _manifest_key(sandbox_id: str, manifest_id: str) -> str:
+    return f"workspace_manifest:{sandbox_id}:{manifest_id}"
+
+
+def _latest_key(sandbox_id: str) -> str:
+    return f"workspace_manifest:{sandbox_id}:latest"
+
+
+def manifest_id_for(manifest: Manifest) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(manifest):
+        digest.update(f"{path}\0{manifest[path]['sha256']}\n".encode())
+    return digest.hexdigest()[:16]
+
+
+def diff_manifests(old: Manifest, new: Manifest) -> Dict[str, List[str]]:
+    """Paths added, modified (content hash differs) and deleted between two manifests."""
+    return {
+        'added': sorted(p for p in new if p not in old),
+        'modified': sorted(p for p in new if p in old and new[p]['sha256'] != old[p]['sha256']),
+        'deleted': sorted(p for p in old if p not in new),
+    }
+
+
+async def snapshot(sandbox: AsyncSandbox, root: str = WORKSPACE_ROOT) -> Tuple[str, Manifest]:
+    """Take a manifest of the workspace, store it and mark it as the sandbox's latest."""
+    manifest = await bulk_fs.get_manifest(sandbox, root, cache_path=HASH_CACHE_PATH)
+    manifest_id = manifest_id_for(manifest)
+    try:
+        await redis.set(_manifest_key(sandbox.id, manifest_id), json.dumps(manifest), ex=MANIFEST_TTL_SECONDS)
+        await redis.set(_latest_key(sandbox.id), manifest_id, ex=MANIFEST_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Failed to store workspace manifest for sandbox {sandbox.id}: {e}")
+    return manifest_id, manifest
+
+
+async def get_stored_manifest(sandbox_id: str, manifest_id: str) -> Optional[Manifest]:
+    try:
+        raw = await redis.get(_manifest_key(sandbox_id, manifest_id))
+    except Exception as e:
+        logger.warning(f"Failed to load workspace manifest {manifest_id} for sandbox {sandbox_id}: {e}")
+        return None
+    return json.loads(raw) if raw else None
+
+
+async def get_latest_manifest_id(sandbox_id: str) -> Optional[str]:
+    try:
+        return await redis.get(_latest_key(sandbox_id))
+    except Exception:
+        return None
+
+
+async def changes_since(
+    sandbox: AsyncSandbox,
+    since: Optional[str],
+    root: str = WORKSPACE_ROOT,
+) -> Dict[str, Any]:
+    """
+    Snapshot the workspace and diff it against manifest `since`.
+
+    When `since` is unknown or expired every file is reported as added and
+    `full` is set, so callers know to treat the result as a complete listing.
+    """
+    manifest_id, manifest = await snapshot(sandbox, root)
+    previous = await get_stored_manifest(sandbox.id, since) if since else None
+    changes = diff_manifests(previous or {}, manifest)
+    return {
+        'since': since,
+        'manifest_id': manifest_id,
+        'full': previous is None,
+        **changes,
+        'files': {p: manifest[p] for p in changes['added'] + changes['modified']},
+    }
+
+
+async def export_changes(
+    sandbox: AsyncSandbox,
+    since: Optional[str],
+    root: str = WORKSPACE_ROOT,
+) -> Tuple[Dict[str, Any], Optional[bytes]]:
+    """Diff against `since` and pack only the added/modified files into one .tar.gz (None if nothing changed)."""
+    changes = await changes_since(sandbox, since, root)
+    changed = changes['added'] + changes['modified']
+    if not changed:
+        return changes, None
+    return changes, await bulk_fs.export_tree(sandbox, root, paths=changed)
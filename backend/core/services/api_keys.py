@@ -20,6 +20,7 @@ import time
 from pydantic import BaseModel, Field, field_validator
 from fastapi import HTTPException
 from core.utils.logger import logger
+from core.utils.dataloader import detached_context
 from core.services.supabase import DBConnection
 from core.services import redis
 from core.utils.config import config
@@ -443,7 +444,10 @@ class APIKeyService:
 
             # Update last used timestamp with throttling to prevent DB spam
             # (max once per 15 minutes per key, configurable via config.API_KEY_LAST_USED_THROTTLE_SECONDS)
-            asyncio.create_task(self._update_last_used_throttled(key_data["key_id"]))
+            asyncio.create_task(
+                self._update_last_used_throttled(key_data["key_id"]),
+                context=detached_context(),
+            )
 
             return validation_result
 
@@ -0,0 +1,239 @@
+"""
+Instrumented httpx transport for PostgREST traffic.
+
+Wraps a pooled (optionally HTTP/2) httpx transport and adds:
+- a concurrency cap per client, with the time spent waiting for a slot recorded
+  as queue wait
+- per-operation timeouts (reads, writes and RPCs can have different budgets)
+- in-flight counters and per-table latency histograms
+
+PooledPostgrestClient builds every PostgREST session (the default one and the
+ones created by schema()) on a client's shared transport.
+"""
+import asyncio
+import time
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest.constants import DEFAULT_POSTGREST_CLIENT_HEADERS
+
+from core.utils.logger import logger
+
+
+# Upper bounds in milliseconds; the last bucket catches everything above
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+@dataclass
+class OperationTimeouts:
+    read: float = 10.0
+    write: float = 30.0
+    rpc: float = 60.0
+    connect: float = 5.0
+
+    def for_request(self, request: httpx.Request) -> httpx.Timeout:
+        operation = classify_operation(request)
+        budget = {'read': self.read, 'write': self.write, 'rpc': self.rpc}.get(operation, self.write)
+        return httpx.Timeout(budget, connect=self.connect)
+
+
+@dataclass
+class LatencyHistogram:
+    buckets: List[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS_MS) + 1))
+    count: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    errors: int = 0
+
+    def observe(self, elapsed_ms: float, error: bool = False):
+        self.buckets[bisect_left(LATENCY_BUCKETS_MS, elapsed_ms)] += 1
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        if error:
+            self.errors += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Approximate percentile, reported as the upper bound of the bucket it falls in."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return float(LATENCY_BUCKETS_MS[i]) if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict:
+        labels = [f"le_{b}" for b in LATENCY_BUCKETS_MS] + ["le_inf"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total_ms / self.count, 2) if self.count else None,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 2),
+            'buckets': dict(zip(labels, self.buckets)),
+        }
+
+
+class DBPoolMetrics:
+    """Metrics shared by every transport in the pool."""
+
+    def __init__(self):
+        self.in_flight = 0
+        self.queued = 0
+        self.queue_wait = LatencyHistogram()
+        self.tables: Dict[str, LatencyHistogram] = {}
+
+    def observe(self, table: str, elapsed_ms: float, error: bool = False):
+        histogram = self.tables.get(table)
+        if histogram is None:
+            histogram = self.tables[table] = LatencyHistogram()
+        histogram.observe(elapsed_ms, error)
+
+    def snapshot(self) -> Dict:
+        return {
+            'in_flight': self.in_flight,
+            'queued': self.queued,
+            'queue_wait': self.queue_wait.to_dict(),
+            'tables': {name: h.to_dict() for name, h in sorted(self.tables.items())},
+        }
+
+
+def classify_operation(request: httpx.Request) -> str:
+    if '/rpc/' in request.url.path:
+        return 'rpc'
+    if request.method in ('GET', 'HEAD'):
+        return 'read'
+    return 'write'
+
+
+def table_label(request: httpx.Request) -> str:
+    """Derive 'table' (or 'rpc:fn', or the service name) from a Supabase URL path."""
+    parts = [p for p in request.url.path.split('/') if p]
+    if 'rest' in parts:
+        rest = parts[parts.index('rest') + 2:]
+        if len(rest) >= 2 and rest[0] == 'rpc':
+            return f"rpc:{rest[1]}"
+        return rest[0] if rest else 'rest'
+    return parts[0] if parts else 'root'
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        inner: httpx.AsyncBaseTransport,
+        metrics: DBPoolMetrics,
+        timeouts: OperationTimeouts,
+        max_in_flight: int,
+    ):
+        self._inner = inner
+        self._metrics = metrics
+        self._timeouts = timeouts
+        self._slots = asyncio.Semaphore(max_in_flight)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        request.extensions = {**request.extensions, 'timeout': self._timeouts.for_request(request).as_dict()}
+        table = table_label(request)
+
+        self._metrics.queued += 1
+        wait_started = time.monotonic()
+        try:
+            await self._slots.acquire()
+        finally:
+            self._metrics.queued -= 1
+        self._metrics.queue_wait.observe((time.monotonic() - wait_started) * 1000)
+
+        self._metrics.in_flight += 1
+        started = time.monotonic()
+        error = False
+        try:
+            response = await self._inner.handle_async_request(request)
+            error = response.status_code >= 500
+            return response
+        except Exception:
+            error = True
+            raise
+        finally:
+            self._metrics.in_flight -= 1
+            self._slots.release()
+            self._metrics.observe(table, (time.monotonic() - started) * 1000, error)
+
+    async def aclose(self) -> None:
+        # Every PostgREST session of a pool client shares this transport, so a
+        # session being closed must not close the connection pool under the others
+        pass
+
+    async def close(self) -> None:
+        await self._inner.aclose()
+
+
+def create_pooled_transport(
+    metrics: DBPoolMetrics,
+    timeouts: OperationTimeouts,
+    http2: bool,
+    max_connections: int,
+    max_keepalive_connections: int,
+    keepalive_expiry: float,
+    max_in_flight: int,
+) -> Tuple[InstrumentedTransport, bool]:
+    """Build the shared transport; returns it and whether HTTP/2 is actually enabled."""
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("SUPABASE_HTTP2 is set but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+
+    inner = httpx.AsyncHTTPTransport(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        ),
+        retries=1,
+    )
+    return InstrumentedTransport(inner, metrics, timeouts, max_in_flight), http2
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """PostgREST client whose sessions, including those of schema() clients, use a shared transport."""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        transport: InstrumentedTransport,
+        timeouts: OperationTimeouts,
+        schema: str = "public",
+        headers: Dict[str, str] = DEFAULT_POSTGREST_CLIENT_HEADERS,
+    ):
+        # Set before super().__init__, which calls create_session
+        self._transport = transport
+        self._timeouts = timeouts
+        super().__init__(base_url, schema=schema, headers=headers)
+
+    def create_session(self, base_url, headers, timeout, verify=True, proxy=None) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            base_url=base_url,
+            headers=headers,
+            transport=self._transport,
+            timeout=httpx.Timeout(self._timeouts.write, connect=self._timeouts.connect),
+            follow_redirects=True,
+        )
+
+    def schema(self, schema: str) -> "PooledPostgrestClient":
+        return PooledPostgrestClient(
+            self.base_url,
+            transport=self._transport,
+            timeouts=self._timeouts,
+            schema=schema,
+            headers=self.headers,
+        )
@@ -2,15 +2,54 @@
 Centralized database connection management for AgentPress using Supabase.
 """
 
-from typing import Optional
-from supabase import create_async_client, AsyncClient
+from typing import Optional, Dict, Any
+from supabase import AsyncClient
 from core.utils.logger import logger
 from core.utils.config import config
+from core.services.postgrest_transport import (
+    DBPoolMetrics,
+    InstrumentedTransport,
+    OperationTimeouts,
+    PooledPostgrestClient,
+    create_pooled_transport,
+)
 import base64
 import uuid
 from datetime import datetime
 import threading
 
+
+class PooledAsyncClient(AsyncClient):
+    """Supabase client whose PostgREST client is always built on the pool's transport.
+
+    AsyncClient drops its PostgREST client on auth state changes and rebuilds
+    it lazily, so the transport is applied in the `postgrest` property rather
+    than patched onto one instance.
+    """
+
+    _pooled_transport: Optional[InstrumentedTransport] = None
+    _pooled_timeouts: Optional[OperationTimeouts] = None
+
+    def use_transport(self, transport: InstrumentedTransport, timeouts: OperationTimeouts):
+        self._pooled_transport = transport
+        self._pooled_timeouts = timeouts
+        self._postgrest = None
+
+    @property
+    def postgrest(self):
+        if self._pooled_transport is None:
+            return super().postgrest
+        if self._postgrest is None:
+            self._postgrest = PooledPostgrestClient(
+                self.rest_url,
+                transport=self._pooled_transport,
+                timeouts=self._pooled_timeouts,
+                schema=self.options.schema,
+                headers=self.options.headers,
+            )
+        return self._postgrest
+
+
 class DBConnection:
     """Thread-safe singleton database connection manager using Supabase."""
     
@@ -25,6 +64,11 @@ class DBConnection:
                     cls._instance = super().__new__(cls)
                     cls._instance._initialized = False
                     cls._instance._client = None
+                    cls._instance._clients = []
+                    cls._instance._transports = []
+                    cls._instance._http2 = False
+                    cls._instance._next_client = 0
+                    cls._instance._metrics = DBPoolMetrics()
         return cls._instance
 
     def __init__(self):
@@ -47,15 +91,42 @@ class DBConnection:
 
             # logger.debug("Initializing Supabase connection")
             
-            # Create Supabase client with timeout configuration
-            self._client = await create_async_client(
-                supabase_url, 
-                supabase_key,
+            pool_size = max(1, int(config.SUPABASE_POOL_SIZE or 1))
+            timeouts = OperationTimeouts(
+                read=float(config.SUPABASE_READ_TIMEOUT_SECONDS),
+                write=float(config.SUPABASE_WRITE_TIMEOUT_SECONDS),
+                rpc=float(config.SUPABASE_RPC_TIMEOUT_SECONDS),
             )
             
+            clients = []
+            transports = []
+            http2 = False
+            for _ in range(pool_size):
+                client = await PooledAsyncClient.create(
+                    supabase_url, 
+                    supabase_key,
+                )
+                transport, http2 = create_pooled_transport(
+                    metrics=self._metrics,
+                    timeouts=timeouts,
+                    http2=bool(config.SUPABASE_HTTP2),
+                    max_connections=int(config.SUPABASE_MAX_CONNECTIONS),
+                    max_keepalive_connections=int(config.SUPABASE_MAX_KEEPALIVE_CONNECTIONS),
+                    keepalive_expiry=float(config.SUPABASE_KEEPALIVE_EXPIRY_SECONDS),
+                    max_in_flight=int(config.SUPABASE_MAX_IN_FLIGHT),
+                )
+                client.use_transport(transport, timeouts)
+                transports.append(transport)
+                clients.append(client)
+            
+            self._clients = clients
+            self._transports = transports
+            self._http2 = http2
+            self._client = clients[0]
+            
             self._initialized = True
             key_type = "SERVICE_ROLE_KEY" if config.SUPABASE_SERVICE_ROLE_KEY else "ANON_KEY"
-            logger.info(f"Database connection initialized with Supabase using {key_type}")
+            logger.info(f"Database connection initialized with Supabase using {key_type} (pool size {len(self._clients)}, http2={http2})")
             
         except Exception as e:
             logger.error(f"Database initialization error: {e}")
@@ -67,24 +138,41 @@ class DBConnection:
         if cls._instance and cls._instance._client:
             # logger.debug("Disconnecting from Supabase database")
             try:
-                # Close Supabase client
-                if hasattr(cls._instance._client, 'close'):
-                    await cls._instance._client.close()
+                for transport in cls._instance._transports:
+                    await transport.close()
+                
+                # Close Supabase clients
+                for client in cls._instance._clients:
+                    if hasattr(client, 'close'):
+                        await client.close()
                     
             except Exception as e:
                 logger.warning(f"Error during disconnect: {e}")
             finally:
                 cls._instance._initialized = False
                 cls._instance._client = None
+                cls._instance._clients = []
+                cls._instance._transports = []
                 logger.info("Database disconnected successfully")
 
+    def pool_metrics(self) -> Dict[str, Any]:
+        """In-flight requests, queue wait and per-table latency histograms."""
+        return {
+            'pool_size': len(self._clients),
+            'http2': self._http2,
+            **self._metrics.snapshot(),
+        }
+
     @property
     async def client(self) -> AsyncClient:
-        """Get the Supabase client instance."""
+        """Get a Supabase client from the pool (round-robin)."""
         if not self._initialized:
             # logger.debug("Supabase client not initialized, initializing now")
             await self.initialize()
         if not self._client:
             logger.error("Database client is None after initialization")
             raise RuntimeError("Database not initialized")
+        if len(self._clients) > 1:
+            self._next_client = (self._next_client + 1) % len(self._clients)
+            return self._clients[self._next_client]
         return self._client
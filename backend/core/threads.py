@@ -7,6 +7,7 @@ from fastapi import APIRouter, HTTPException, Depends, Form, Query, Body
 
 from core.utils.auth_utils import verify_and_get_user_id_from_jwt, verify_and_authorize_thread_access, require_thread_access, AuthorizedThreadAccess
 from core.utils.logger import logger
+from core.utils.dataloader import invalidate_row
 from core.sandbox.sandbox import create_sandbox, delete_sandbox
 
 from .api_models import CreateThreadResponse, MessageCreateRequest
@@ -472,6 +473,7 @@ async def update_thread(
         
         if not thread_update.data:
             raise HTTPException(status_code=500, detail="Failed to update thread")
+        invalidate_row('threads', 'thread_id', thread_id)
         
         logger.debug(f"Successfully updated thread: {thread_id}")
         
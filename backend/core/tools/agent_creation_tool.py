@@ -1253,6 +1253,9 @@ class AgentCreationTool(Tool):
             
             await client.table('agent_versions').update({'config': config}).eq('version_id', current_version_id).execute()
             
+            from core.versioning.version_cache import invalidate_version
+            await invalidate_version(current_version_id)
+            
             logger.debug(f"Synced {len(triggers)} triggers to version config for agent {agent_id}")
             
         except Exception as e:
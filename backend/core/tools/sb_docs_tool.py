@@ -12,6 +12,14 @@ import re
 from pathlib import Path
 from core.agentpress.tool import ToolResult
 import html
+import hashlib
+
+# Bump when _generate_pdf_html or the render script change, so cached PDFs are regenerated
+PDF_RENDER_VERSION = 1
+# Documents estimated longer than one range are printed as page ranges on parallel browser pages
+PDF_PAGES_PER_RANGE = 8
+PDF_MAX_PARALLEL_PAGES = 4
+PDF_RENDER_TIMEOUT = 120
 
 @tool_metadata(
     display_name="Document Creator",
@@ -29,10 +37,8 @@ class SandboxDocsTool(SandboxToolsBase):
         
     async def _ensure_docs_directory(self):
         await self._ensure_sandbox()
-        try:
-            await self.sandbox.fs.make_dir(self.docs_dir)
-        except:
-            pass
+        # The toolbox creates missing parents and succeeds if the folder exists
+        await self.sandbox.fs.create_folder(self.docs_dir, "755")
             
     async def _load_metadata(self) -> Dict[str, Any]:
         try:
@@ -441,6 +447,13 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
             except:
                 pass
 
+            cached_html = (doc_info.get("last_pdf_export") or {}).get("html_path")
+            if cached_html:
+                try:
+                    await self.sandbox.fs.delete_file(cached_html)
+                except:
+                    pass
+
             del all_metadata["documents"][doc_id]
             await self._save_metadata(all_metadata)
             
@@ -735,6 +748,131 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
         
         return doc_html
     
+    def _pdf_source(self, doc_info: Dict[str, Any], content_str: str):
+        if doc_info.get("format") in ["tiptap", "html", "doc"] or doc_info.get("is_tiptap_doc") or doc_info.get("doc_type") == "tiptap_document":
+            try:
+                document_wrapper = json.loads(content_str)
+                if document_wrapper.get("type") == "tiptap_document":
+                    content = document_wrapper.get("content", "")
+                    title = document_wrapper.get("title", doc_info["title"])
+                    metadata = document_wrapper.get("metadata", doc_info.get("metadata", {}))
+                    return title, content, metadata
+            except json.JSONDecodeError:
+                pass
+            return doc_info["title"], content_str, doc_info.get("metadata", {})
+        return doc_info["title"], f"<pre>{html.escape(content_str)}</pre>", doc_info.get("metadata", {})
+
+    def _document_revision(self, doc_info: Dict[str, Any], content_raw: bytes) -> str:
+        # The document file is also written by the editor without touching the metadata,
+        # so the revision covers both the metadata timestamp and the stored content
+        digest = hashlib.sha256()
+        digest.update(f"{PDF_RENDER_VERSION}:{doc_info.get('updated_at', '')}:".encode())
+        digest.update(content_raw)
+        return digest.hexdigest()[:16]
+
+    async def _file_exists(self, path: str) -> bool:
+        try:
+            await self.sandbox.fs.get_file_info(path)
+            return True
+        except Exception:
+            return False
+
+    def _pdf_render_script(self, html_path: str, pdf_path: str) -> str:
+        return f"""
+import asyncio
+import math
+import os
+import sys
+from playwright.async_api import async_playwright
+
+try:
+    from PyPDF2 import PdfWriter
+except ImportError:
+    PdfWriter = None
+
+HTML_URL = {('file://' + html_path)!r}
+PDF_PATH = {pdf_path!r}
+PAGES_PER_RANGE = {PDF_PAGES_PER_RANGE}
+MAX_PARALLEL_PAGES = {PDF_MAX_PARALLEL_PAGES}
+PDF_OPTIONS = dict(
+    format='A4',
+    print_background=True,
+    margin={{'top': '0.5in', 'right': '0.5in', 'bottom': '0.5in', 'left': '0.5in'}},
+)
+# A4 content box in CSS pixels, used to estimate the page count from the print layout
+PAGE_WIDTH_PX = int((8.27 - 1.0) * 96)
+PAGE_HEIGHT_PX = int((11.69 - 1.0) * 96)
+
+
+async def render_range(browser, semaphore, index, first_page, open_ended):
+    async with semaphore:
+        page = await browser.new_page(viewport={{'width': PAGE_WIDTH_PX, 'height': PAGE_HEIGHT_PX}})
+        try:
+            await page.goto(HTML_URL, wait_until='networkidle')
+            part_path = f'{{PDF_PATH}}.part{{index}}'
+            last_page = first_page + PAGES_PER_RANGE - 1
+            if open_ended:
+                # Last range is open-ended so an underestimated page count loses nothing
+                last_page = first_page + 100000
+            try:
+                await page.pdf(path=part_path, page_ranges=f'{{first_page}}-{{last_page}}', **PDF_OPTIONS)
+            except Exception:
+                # The estimate overshot: this range starts past the last page
+                if first_page > 1:
+                    return None
+                raise
+            return part_path
+        finally:
+            await page.close()
+
+
+async def html_to_pdf():
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(
+            headless=True,
+            args=['--no-sandbox', '--disable-setuid-sandbox']
+        )
+        try:
+            page = await browser.new_page(viewport={{'width': PAGE_WIDTH_PX, 'height': PAGE_HEIGHT_PX}})
+            await page.goto(HTML_URL, wait_until='networkidle')
+            await page.emulate_media(media='print')
+            height = await page.evaluate('document.documentElement.scrollHeight')
+            estimated_pages = max(1, math.ceil(height / PAGE_HEIGHT_PX))
+
+            if PdfWriter is None or estimated_pages <= PAGES_PER_RANGE:
+                await page.pdf(path=PDF_PATH, **PDF_OPTIONS)
+                return PDF_PATH
+            await page.close()
+
+            starts = list(range(1, estimated_pages + 1, PAGES_PER_RANGE))
+            semaphore = asyncio.Semaphore(MAX_PARALLEL_PAGES)
+            parts = await asyncio.gather(*(
+                render_range(browser, semaphore, i, first_page, i == len(starts) - 1)
+                for i, first_page in enumerate(starts)
+            ))
+        finally:
+            await browser.close()
+
+    writer = PdfWriter()
+    for part in parts:
+        if part:
+            writer.append(part)
+    with open(PDF_PATH, 'wb') as f:
+        writer.write(f)
+    for part in parts:
+        if part:
+            os.remove(part)
+    return PDF_PATH
+
+
+if __name__ == "__main__":
+    try:
+        print(asyncio.run(html_to_pdf()))
+    except Exception as e:
+        print(f"ERROR: {{str(e)}}", file=sys.stderr)
+        sys.exit(1)
+"""
+
     @openapi_schema({
         "type": "function",
         "function": {
@@ -769,97 +907,46 @@ IMPORTANT: All content must be wrapped in proper HTML tags. Do not use unsupport
             doc_info = all_metadata["documents"][doc_id]
             
             content_raw = await self.sandbox.fs.download_file(doc_info["path"])
-            content_str = content_raw.decode()
+            title, content, metadata = self._pdf_source(doc_info, content_raw.decode())
             
-            if doc_info.get("format") in ["tiptap", "html", "doc"] or doc_info.get("is_tiptap_doc") or doc_info.get("doc_type") == "tiptap_document":
-                try:
-                    document_wrapper = json.loads(content_str)
-                    if document_wrapper.get("type") == "tiptap_document":
-                        content = document_wrapper.get("content", "")
-                        title = document_wrapper.get("title", doc_info["title"])
-                        metadata = document_wrapper.get("metadata", doc_info.get("metadata", {}))
-                    else:
-                        content = content_str
-                        title = doc_info["title"]
-                        metadata = doc_info.get("metadata", {})
-                except json.JSONDecodeError:
-                    content = content_str
-                    title = doc_info["title"]
-                    metadata = doc_info.get("metadata", {})
-            else:
-                content = f"<pre>{html.escape(content_str)}</pre>"
-                title = doc_info["title"]
-                metadata = doc_info.get("metadata", {})
-            
-            complete_html = self._generate_pdf_html(title, content, metadata)
-            
-            temp_html_filename = f"temp_pdf_{doc_id}.html"
-            temp_html_path = f"/workspace/{temp_html_filename}"
-            await self.sandbox.fs.upload_file(complete_html.encode(), temp_html_path)
-            
-            logger.info(f"Creating PDF from document: {title}")
-            
-            pdf_generation_script = f"""
-import asyncio
-from playwright.async_api import async_playwright
-import sys
-
-async def html_to_pdf():
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=True,
-                args=['--no-sandbox', '--disable-setuid-sandbox']
-            )
-            
-            page = await browser.new_page()
-            
-            await page.goto('file://{temp_html_path}', wait_until='networkidle')
-            
-            pdf_filename = '{self._sanitize_filename(title)}_{doc_id}.pdf'
-            pdf_path = f'/workspace/docs/{{pdf_filename}}'
-            
-            await page.pdf(
-                path=pdf_path,
-                format='A4',
-                print_background=True,
-                margin={{
-                    'top': '0.5in',
-                    'right': '0.5in',
-                    'bottom': '0.5in',
-                    'left': '0.5in'
-                }}
-            )
+            revision = self._document_revision(doc_info, content_raw)
+            pdf_path = f"{self.docs_dir}/{self._sanitize_filename(title)}_{doc_id}.pdf"
+            html_path = f"{self.docs_dir}/.cache/{doc_id}_{revision}.html"
+            last_export = doc_info.get("last_pdf_export") or {}
             
-            await browser.close()
-            
-            print(pdf_path)
-            return pdf_path
-            
-    except Exception as e:
-        print(f"ERROR: {{str(e)}}", file=sys.stderr)
-        sys.exit(1)
-
-if __name__ == "__main__":
-    pdf_path = asyncio.run(html_to_pdf())
-"""
-            
-            script_path = f"/workspace/temp_pdf_script_{doc_id}.py"
-            await self.sandbox.fs.upload_file(pdf_generation_script.encode(), script_path)
-            
-            response = await self.sandbox.process.exec(
-                f"cd /workspace && python {script_path}",
-                timeout=30
-            )
-            
-            await self.sandbox.fs.delete_file(temp_html_path)
-            await self.sandbox.fs.delete_file(script_path)
-            
-            if response.exit_code != 0:
-                logger.error(f"PDF generation failed: {response.result}")
-                return self.fail_response(f"Failed to generate PDF: {response.result}")
+            if last_export.get("revision") == revision and last_export.get("path") == pdf_path and await self._file_exists(pdf_path):
+                logger.info(f"Reusing PDF for unchanged document: {title} ({revision})")
+                exported_at = last_export.get("exported_at")
+            else:
+                if not await self._file_exists(html_path):
+                    await self.sandbox.fs.create_folder(f"{self.docs_dir}/.cache", "755")
+                    complete_html = self._generate_pdf_html(title, content, metadata)
+                    await self.sandbox.fs.upload_file(complete_html.encode(), html_path)
+                
+                logger.info(f"Creating PDF from document: {title}")
+                
+                script_path = f"/workspace/temp_pdf_script_{doc_id}.py"
+                await self.sandbox.fs.upload_file(self._pdf_render_script(html_path, pdf_path).encode(), script_path)
+                
+                response = await self.sandbox.process.exec(
+                    f"cd /workspace && python {script_path}",
+                    timeout=PDF_RENDER_TIMEOUT
+                )
+                
+                await self.sandbox.fs.delete_file(script_path)
+                
+                if response.exit_code != 0:
+                    logger.error(f"PDF generation failed: {response.result}")
+                    return self.fail_response(f"Failed to generate PDF: {response.result}")
+                
+                previous_html = last_export.get("html_path")
+                if previous_html and previous_html != html_path:
+                    try:
+                        await self.sandbox.fs.delete_file(previous_html)
+                    except Exception:
+                        pass
+                exported_at = datetime.now().isoformat()
             
-            pdf_path = response.result.strip()
             pdf_filename = pdf_path.split('/')[-1]
             
             pdf_info = {
@@ -874,7 +961,9 @@ if __name__ == "__main__":
             all_metadata["documents"][doc_id]["last_pdf_export"] = {
                 "filename": pdf_filename,
                 "path": pdf_path,
-                "exported_at": datetime.now().isoformat()
+                "html_path": html_path,
+                "revision": revision,
+                "exported_at": exported_at
             }
             await self._save_metadata(all_metadata)
             
@@ -4,6 +4,7 @@ from core.utils.files_utils import should_exclude_file, clean_path
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
 from core.utils.config import config
+from core.sandbox import workspace_index
 import os
 import json
 import litellm
@@ -26,6 +27,8 @@ class SandboxFilesTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self.SNIPPET_LINES = 4  # Number of context lines to show around edits
+        self.MAX_LISTED_CHANGES = 200  # Paths listed per change type before summarizing
+        self._last_manifest_id: Optional[str] = None
 
     def clean_path(self, path: str) -> str:
         """Clean and normalize a path to be relative to /workspace"""
@@ -43,42 +46,6 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception:
             return False
 
-    async def get_workspace_state(self) -> dict:
-        """Get the current workspace state by reading all files"""
-        files_state = {}
-        try:
-            # Ensure sandbox is initialized
-            await self._ensure_sandbox()
-            
-            files = await self.sandbox.fs.list_files(self.workspace_path)
-            for file_info in files:
-                rel_path = file_info.name
-                
-                # Skip excluded files and directories
-                if self._should_exclude_file(rel_path) or file_info.is_dir:
-                    continue
-
-                try:
-                    full_path = f"{self.workspace_path}/{rel_path}"
-                    content = (await self.sandbox.fs.download_file(full_path)).decode()
-                    files_state[rel_path] = {
-                        "content": content,
-                        "is_dir": file_info.is_dir,
-                        "size": file_info.size,
-                        "modified": file_info.mod_time
-                    }
-                except Exception as e:
-                    print(f"Error reading file {rel_path}: {e}")
-                except UnicodeDecodeError:
-                    print(f"Skipping binary file: {rel_path}")
-
-            return files_state
-        
-        except Exception as e:
-            print(f"Error getting workspace state: {str(e)}")
-            return {}
-
-
     # def _get_preview_url(self, file_path: str) -> Optional[str]:
     #     """Get the preview URL for a file if it's an HTML file."""
     #     if file_path.lower().endswith('.html') and self._sandbox_url:
@@ -304,6 +271,46 @@ class SandboxFilesTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error deleting file: {str(e)}")
 
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "get_workspace_changes",
+            "description": "List files added, modified or deleted in /workspace since a previous snapshot, without reading file contents. By default compares against the previous call in this run; the first call lists every file. Use it to see what a command, build or earlier turn changed instead of listing directories.",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "since": {
+                        "type": "string",
+                        "description": "manifest_id returned by an earlier call to compare against. Defaults to the previous call's manifest_id."
+                    }
+                },
+                "required": []
+            }
+        }
+    })
+    async def get_workspace_changes(self, since: Optional[str] = None) -> ToolResult:
+        try:
+            # Ensure sandbox is initialized
+            await self._ensure_sandbox()
+
+            since = since or self._last_manifest_id
+            changes = await workspace_index.changes_since(self.sandbox, since, self.workspace_path)
+            self._last_manifest_id = changes['manifest_id']
+
+            result = {
+                "manifest_id": changes['manifest_id'],
+                "since": since,
+                "full_listing": changes['full'],
+            }
+            for change_type in ('added', 'modified', 'deleted'):
+                paths = changes[change_type]
+                result[change_type] = paths[:self.MAX_LISTED_CHANGES]
+                if len(paths) > self.MAX_LISTED_CHANGES:
+                    result[f"{change_type}_not_listed"] = len(paths) - self.MAX_LISTED_CHANGES
+            return self.success_response(result)
+        except Exception as e:
+            return self.fail_response(f"Error getting workspace changes: {str(e)}")
+
     async def _call_morph_api(self, file_content: str, code_edit: str, instructions: str, file_path: str) -> tuple[Optional[str], Optional[str]]:
         """
         Call Morph API to apply edits to file content.
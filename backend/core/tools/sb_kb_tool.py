@@ -1,4 +1,7 @@
 import asyncio
+import json
+import shlex
+import time
 from typing import Optional, List
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
@@ -7,6 +10,14 @@ from core.utils.config import config
 from core.knowledge_base.validation import FileNameValidator, ValidationError
 from core.utils.logger import logger
 
+# Caching search front end started by supervisord in the sandbox image (see docker/kb_server.py)
+KB_SERVER_URL = "http://127.0.0.1:8010"
+KB_SEARCH_TOP_K = 18
+# After kb_server fails to answer, use the kb CLI for this long before trying it again
+# (doubling on each consecutive failure up to the max)
+KB_SERVER_RETRY_SECONDS = 30
+KB_SERVER_MAX_RETRY_SECONDS = 600
+
 @tool_metadata(
     display_name="Knowledge Base",
     description="Store and retrieve information from your personal knowledge library",
@@ -23,6 +34,8 @@ class SandboxKbTool(SandboxToolsBase):
         super().__init__(project_id, thread_manager)
         self.kb_version = "0.1.1"
         self.kb_download_url = f"https://github.com/kortix-ai/kb-fusion/releases/download/v{self.kb_version}/kb"
+        self._daemon_failures = 0
+        self._daemon_retry_at = 0.0
 
     async def _execute_kb_command(self, command: str) -> dict:
         await self._ensure_sandbox()
@@ -152,9 +165,19 @@ class SandboxKbTool(SandboxToolsBase):
             if not queries:
                 return self.fail_response("At least one query is required for search.")
             
+            # Prefer the caching search service; fall back to the CLI when it isn't running
+            output = await self._search_via_daemon(path, queries)
+            if output is not None:
+                return self.success_response({
+                    "search_results": output,
+                    "path": path,
+                    "queries": queries,
+                    "command": "kb_server /search"
+                })
+            
             # Build search command
-            query_args = " ".join([f'"{query}"' for query in queries])
-            search_command = f'kb search "{path}" {query_args} -k 18 --json'
+            query_args = " ".join(shlex.quote(query) for query in queries)
+            search_command = f'kb search {shlex.quote(path)} {query_args} -k {KB_SEARCH_TOP_K} --json'
             
             result = await self._execute_kb_command(search_command)
             
@@ -171,6 +194,36 @@ class SandboxKbTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error performing search: {str(e)}")
 
+    async def _search_via_daemon(self, path: str, queries: List[str]) -> Optional[str]:
+        """Search through kb_server in the sandbox; None if the service is unavailable."""
+        if time.monotonic() < self._daemon_retry_at:
+            return None
+        
+        payload = json.dumps({"path": path, "queries": queries, "k": KB_SEARCH_TOP_K})
+        # The API key comes from the exec env so it never appears in the command line
+        command = (
+            f"curl -s --max-time 300 -X POST {KB_SERVER_URL}/search "
+            f"-H 'Content-Type: application/json' -H \"X-OpenAI-Key: $OPENAI_API_KEY\" "
+            f"--data-binary {shlex.quote(payload)} -w '\\n%{{http_code}}'"
+        )
+        result = await self._execute_kb_command(f"bash -c {shlex.quote(command)}")
+        body, _, status = (result["output"] or "").rpartition("\n")
+        
+        if result["exit_code"] != 0 or status.strip() == "000":
+            # Connection refused (the image predates kb_server, or it isn't up yet) or a
+            # timeout: back off instead of giving up on the service for the whole run
+            delay = min(KB_SERVER_RETRY_SECONDS * 2 ** self._daemon_failures, KB_SERVER_MAX_RETRY_SECONDS)
+            self._daemon_failures += 1
+            self._daemon_retry_at = time.monotonic() + delay
+            logger.debug(f"kb_server unavailable in sandbox for project {self.project_id} (curl exit {result['exit_code']}), using kb CLI for {delay}s")
+            return None
+        self._daemon_failures = 0
+        
+        if status.strip() != "200":
+            logger.warning(f"kb_server search failed ({status.strip()}), using kb CLI: {body[:200]}")
+            return None
+        return json.loads(body)["output"]
+
     @openapi_schema({
         "type": "function",
         "function": {
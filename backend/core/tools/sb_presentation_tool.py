@@ -1,13 +1,51 @@
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
-from typing import List, Dict, Optional, Union
+from core.sandbox import bulk_fs
+from typing import Any, Callable, List, Dict, Optional, Union
+import base64
+import copy
 import json
 import os
+import shlex
 from datetime import datetime
 import re
 import asyncio
 
+# Compare-and-swap of metadata.json, run inside the sandbox. The read, check
+# and replace happen under an exclusive flock so two writers cannot both pass
+# the check. Writers other than this tool (file edits, shell) don't bump
+# "version", so the file's mtime after our last write is checked as well; it
+# is 0 (unchecked) right after a fresh load. Prints the new mtime on success.
+_WRITE_METADATA_SCRIPT = r'''
+import base64, fcntl, hashlib, json, os, sys
+path, expected, expected_mtime, payload = sys.argv[1], int(sys.argv[2]), int(sys.argv[3]), sys.argv[4]
+lock_path = "/tmp/presentation-metadata-" + hashlib.sha1(path.encode()).hexdigest() + ".lock"
+with open(lock_path, "w") as lock:
+    fcntl.flock(lock, fcntl.LOCK_EX)
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with open(path) as f:
+            current = json.load(f).get("version", 0)
+    except (OSError, ValueError):
+        mtime, current = 0, 0
+    if current != expected or (expected_mtime and mtime != expected_mtime):
+        print(current)
+        sys.exit(3)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(base64.b64decode(payload))
+    os.replace(tmp, path)
+    print(os.stat(path).st_mtime_ns)
+'''
+
+METADATA_CONFLICT_EXIT_CODE = 3
+METADATA_WRITE_ATTEMPTS = 3
+
+
+class PresentationMetadataConflict(Exception):
+    """metadata.json was changed by another writer since it was loaded."""
+
 @tool_metadata(
     display_name="Presentations",
     description="Create and manage stunning presentation slides",
@@ -26,24 +64,34 @@ class SandboxPresentationTool(SandboxToolsBase):
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self.presentations_dir = "presentations"
+        # Write-through cache of metadata.json per presentation path, for this run
+        self._metadata_cache: Dict[str, Dict] = {}
+        # mtime_ns of metadata.json after this tool's last write, to detect other writers
+        self._metadata_mtimes: Dict[str, int] = {}
+        self._ensured_dirs: set = set()
 
 
     async def _ensure_presentations_dir(self):
         """Ensure the presentations directory exists"""
         full_path = f"{self.workspace_path}/{self.presentations_dir}"
+        if full_path in self._ensured_dirs:
+            return
         try:
             await self.sandbox.fs.create_folder(full_path, "755")
         except:
             pass
+        self._ensured_dirs.add(full_path)
 
     async def _ensure_presentation_dir(self, presentation_name: str):
         """Ensure a specific presentation directory exists"""
         safe_name = self._sanitize_filename(presentation_name)
         presentation_path = f"{self.workspace_path}/{self.presentations_dir}/{safe_name}"
-        try:
-            await self.sandbox.fs.create_folder(presentation_path, "755")
-        except:
-            pass
+        if presentation_path not in self._ensured_dirs:
+            try:
+                await self.sandbox.fs.create_folder(presentation_path, "755")
+            except:
+                pass
+            self._ensured_dirs.add(presentation_path)
         return safe_name, presentation_path
 
     def _sanitize_filename(self, name: str) -> str:
@@ -78,15 +126,18 @@ class SandboxPresentationTool(SandboxToolsBase):
 </html>"""
         return html_template
 
-    async def _load_presentation_metadata(self, presentation_path: str):
-        """Load presentation metadata, create if doesn't exist"""
+    async def _load_presentation_metadata(self, presentation_path: str, fresh: bool = False):
+        """Load presentation metadata (from the run cache unless fresh), create if doesn't exist"""
+        if not fresh and presentation_path in self._metadata_cache:
+            return copy.deepcopy(self._metadata_cache[presentation_path])
+        
         metadata_path = f"{presentation_path}/metadata.json"
         try:
             metadata_content = await self.sandbox.fs.download_file(metadata_path)
-            return json.loads(metadata_content.decode())
+            metadata = json.loads(metadata_content.decode())
         except:
             # Create default metadata
-            return {
+            metadata = {
                 "presentation_name": "",
                 "title": "Presentation", 
                 "description": "",
@@ -94,15 +145,71 @@ class SandboxPresentationTool(SandboxToolsBase):
                 "created_at": datetime.now().isoformat(),
                 "updated_at": datetime.now().isoformat()
             }
+        metadata.setdefault("version", 0)
+        self._metadata_cache[presentation_path] = copy.deepcopy(metadata)
+        self._metadata_mtimes.pop(presentation_path, None)
+        return metadata
 
     async def _save_presentation_metadata(self, presentation_path: str, metadata: Dict):
-        """Save presentation metadata"""
+        """Save presentation metadata, failing with PresentationMetadataConflict if it changed on disk since it was loaded"""
+        expected_version = metadata.get("version", 0)
+        metadata["version"] = expected_version + 1
         metadata["updated_at"] = datetime.now().isoformat()
         metadata_path = f"{presentation_path}/metadata.json"
-        await self.sandbox.fs.upload_file(json.dumps(metadata, indent=2).encode(), metadata_path)
-
-
+        
+        payload = base64.b64encode(json.dumps(metadata, indent=2).encode()).decode()
+        response = await self.sandbox.process.exec(
+            f"python3 -c {shlex.quote(_WRITE_METADATA_SCRIPT)} {shlex.quote(metadata_path)} {expected_version} "
+            f"{self._metadata_mtimes.get(presentation_path, 0)} {payload}",
+            timeout=30
+        )
+        if response.exit_code == METADATA_CONFLICT_EXIT_CODE:
+            metadata["version"] = expected_version
+            self._metadata_cache.pop(presentation_path, None)
+            self._metadata_mtimes.pop(presentation_path, None)
+            raise PresentationMetadataConflict(
+                f"metadata.json for {presentation_path} is at version {(response.result or '').strip()} "
+                f"or was modified outside this tool, expected version {expected_version}"
+            )
+        if response.exit_code != 0:
+            metadata["version"] = expected_version
+            raise Exception(f"Failed to write presentation metadata: {response.result}")
+        
+        self._metadata_cache[presentation_path] = copy.deepcopy(metadata)
+        mtime = (response.result or '').strip()
+        if mtime.isdigit():
+            self._metadata_mtimes[presentation_path] = int(mtime)
+        else:
+            self._metadata_mtimes.pop(presentation_path, None)
+
+    async def _update_presentation_metadata(self, presentation_path: str, mutate: Callable[[Dict], Any]) -> Dict:
+        """Apply mutate() to the metadata and save it, re-reading and re-applying on a version conflict"""
+        for attempt in range(METADATA_WRITE_ATTEMPTS):
+            metadata = await self._load_presentation_metadata(presentation_path, fresh=attempt > 0)
+            mutate(metadata)
+            try:
+                await self._save_presentation_metadata(presentation_path, metadata)
+                return metadata
+            except PresentationMetadataConflict:
+                if attempt == METADATA_WRITE_ATTEMPTS - 1:
+                    raise
+
+    def _slide_entry(self, safe_name: str, slide_number: int, slide_title: str) -> Dict:
+        slide_filename = f"slide_{slide_number:02d}.html"
+        return {
+            "title": slide_title,
+            "filename": slide_filename,
+            "file_path": f"{self.presentations_dir}/{safe_name}/{slide_filename}",
+            "preview_url": f"/workspace/{self.presentations_dir}/{safe_name}/{slide_filename}",
+            "created_at": datetime.now().isoformat()
+        }
 
+    def _apply_presentation_fields(self, metadata: Dict, presentation_name: str, presentation_title: str):
+        metadata["presentation_name"] = presentation_name
+        if presentation_title != "Presentation":  # Only update if explicitly provided
+            metadata["title"] = presentation_title
+        if "slides" not in metadata:
+            metadata["slides"] = {}
 
     @openapi_schema({
         "type": "function",
@@ -200,12 +307,6 @@ class SandboxPresentationTool(SandboxToolsBase):
             # Ensure presentation directory exists
             safe_name, presentation_path = await self._ensure_presentation_dir(presentation_name)
             
-            # Load or create metadata
-            metadata = await self._load_presentation_metadata(presentation_path)
-            metadata["presentation_name"] = presentation_name
-            if presentation_title != "Presentation":  # Only update if explicitly provided
-                metadata["title"] = presentation_title
-            
             # Create slide HTML
             slide_html = self._create_slide_html(
                 slide_content=content,
@@ -215,24 +316,16 @@ class SandboxPresentationTool(SandboxToolsBase):
             )
             
             # Save slide file
-            slide_filename = f"slide_{slide_number:02d}.html"
-            slide_path = f"{presentation_path}/{slide_filename}"
-            await self.sandbox.fs.upload_file(slide_html.encode(), slide_path)
+            slide_entry = self._slide_entry(safe_name, slide_number, slide_title)
+            slide_filename = slide_entry["filename"]
+            await self.sandbox.fs.upload_file(slide_html.encode(), f"{presentation_path}/{slide_filename}")
             
             # Update metadata
-            if "slides" not in metadata:
-                metadata["slides"] = {}
-            
-            metadata["slides"][str(slide_number)] = {
-                "title": slide_title,
-                "filename": slide_filename,
-                "file_path": f"{self.presentations_dir}/{safe_name}/{slide_filename}",
-                "preview_url": f"/workspace/{self.presentations_dir}/{safe_name}/{slide_filename}",
-                "created_at": datetime.now().isoformat()
-            }
+            def add_slide(metadata: Dict):
+                self._apply_presentation_fields(metadata, presentation_name, presentation_title)
+                metadata["slides"][str(slide_number)] = slide_entry
             
-            # Save updated metadata
-            await self._save_presentation_metadata(presentation_path, metadata)
+            metadata = await self._update_presentation_metadata(presentation_path, add_slide)
             
             return self.success_response({
                 "message": f"Slide {slide_number} '{slide_title}' created/updated successfully",
@@ -249,6 +342,112 @@ class SandboxPresentationTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Failed to create slide: {str(e)}")
 
+    @openapi_schema({
+        "type": "function",
+        "function": {
+            "name": "create_slides",
+            "description": "Create or update several slides of a presentation in one operation. Much faster than calling create_slide repeatedly when generating a deck; each slide follows the same content rules as create_slide (HTML body content only, designed for 1920x1080).",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "presentation_name": {
+                        "type": "string",
+                        "description": "Name of the presentation (creates folder if doesn't exist)"
+                    },
+                    "slides": {
+                        "type": "array",
+                        "description": "Slides to create or update",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "slide_number": {
+                                    "type": "integer",
+                                    "description": "Slide number (1-based). If slide exists, it will be updated."
+                                },
+                                "slide_title": {
+                                    "type": "string",
+                                    "description": "Title of this specific slide"
+                                },
+                                "content": {
+                                    "type": "string",
+                                    "description": "HTML body content only, same rules as create_slide"
+                                }
+                            },
+                            "required": ["slide_number", "slide_title", "content"]
+                        }
+                    },
+                    "presentation_title": {
+                        "type": "string",
+                        "description": "Main title of the presentation (used in HTML title and navigation)",
+                        "default": "Presentation"
+                    }
+                },
+                "required": ["presentation_name", "slides"]
+            }
+        }
+    })
+    async def create_slides(
+        self,
+        presentation_name: str,
+        slides: List[Dict[str, Any]],
+        presentation_title: str = "Presentation"
+    ) -> ToolResult:
+        """Create or update many slides with one archive upload and one metadata write"""
+        try:
+            await self._ensure_sandbox()
+            await self._ensure_presentations_dir()
+            
+            # Validation
+            if not presentation_name:
+                return self.fail_response("Presentation name is required.")
+            
+            if not slides:
+                return self.fail_response("At least one slide is required.")
+            
+            for slide in slides:
+                if not isinstance(slide.get("slide_number"), int) or slide["slide_number"] < 1:
+                    return self.fail_response("Each slide needs a slide_number of 1 or greater.")
+                if not slide.get("slide_title"):
+                    return self.fail_response(f"Slide {slide['slide_number']} is missing a title.")
+                if not slide.get("content"):
+                    return self.fail_response(f"Slide {slide['slide_number']} is missing content.")
+            
+            safe_name, presentation_path = await self._ensure_presentation_dir(presentation_name)
+            
+            # Write every slide file in a single archive transfer
+            entries = {}
+            files = {}
+            for slide in slides:
+                entry = self._slide_entry(safe_name, slide["slide_number"], slide["slide_title"])
+                entries[str(slide["slide_number"])] = entry
+                files[entry["filename"]] = self._create_slide_html(
+                    slide_content=slide["content"],
+                    slide_number=slide["slide_number"],
+                    total_slides=0,
+                    presentation_title=presentation_title
+                )
+            await bulk_fs.import_tree(self.sandbox, bulk_fs.build_archive(files), presentation_path)
+            
+            def add_slides(metadata: Dict):
+                self._apply_presentation_fields(metadata, presentation_name, presentation_title)
+                metadata["slides"].update(entries)
+            
+            metadata = await self._update_presentation_metadata(presentation_path, add_slides)
+            
+            return self.success_response({
+                "message": f"{len(entries)} slides created/updated successfully",
+                "presentation_name": presentation_name,
+                "presentation_path": f"{self.presentations_dir}/{safe_name}",
+                "slides": [
+                    {"slide_number": int(number), "slide_title": entry["title"], "slide_file": entry["file_path"], "preview_url": entry["preview_url"]}
+                    for number, entry in sorted(entries.items(), key=lambda item: int(item[0]))
+                ],
+                "total_slides": len(metadata["slides"])
+            })
+            
+        except Exception as e:
+            return self.fail_response(f"Failed to create slides: {str(e)}")
+
     @openapi_schema({
         "type": "function",
         "function": {
@@ -366,10 +565,10 @@ class SandboxPresentationTool(SandboxToolsBase):
                 pass  # File might not exist
             
             # Remove from metadata
-            del metadata["slides"][str(slide_number)]
-            
-            # Save updated metadata
-            await self._save_presentation_metadata(presentation_path, metadata)
+            metadata = await self._update_presentation_metadata(
+                presentation_path,
+                lambda metadata: metadata.get("slides", {}).pop(str(slide_number), None)
+            )
             
             return self.success_response({
                 "message": f"Slide {slide_number} '{slide_info['title']}' deleted successfully",
@@ -466,6 +665,8 @@ class SandboxPresentationTool(SandboxToolsBase):
             
             try:
                 await self.sandbox.fs.delete_folder(presentation_path)
+                self._metadata_cache.pop(presentation_path, None)
+                self._ensured_dirs.discard(presentation_path)
                 return self.success_response({
                     "message": f"Presentation '{presentation_name}' deleted successfully",
                     "deleted_path": f"{self.presentations_dir}/{safe_name}"
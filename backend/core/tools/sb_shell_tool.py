@@ -1,12 +1,16 @@
 import asyncio
-from typing import Optional, Dict, Any
+import re
+import shlex
+from typing import Optional, Dict, Any, Tuple
 import time
-import asyncio
 from uuid import uuid4
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 
+# CSI/OSC escape sequences emitted by programs writing to the tmux pty
+ANSI_ESCAPE_PATTERN = re.compile(r'\x1b\[[0-?]*[ -/]*[@-~]|\x1b\][^\x07\x1b]*(?:\x07|\x1b\\)|\x1b[()][A-Za-z0-9]|\x1b[=>]')
+
 @tool_metadata(
     display_name="Terminal & Commands",
     description="Run commands, install packages, and execute scripts in your workspace",
@@ -20,9 +24,17 @@ class SandboxShellTool(SandboxToolsBase):
     """Tool for executing tasks in a Daytona sandbox with browser-use capabilities. 
     Uses sessions for maintaining state between commands and provides comprehensive process management."""
 
+    # Session logs and blocking-command capture files live here inside the sandbox
+    SHELL_DIR = "/tmp/.sb_shell"
+    # Upper bound for a single long-poll wait on a blocking command
+    WAIT_SLICE_SECONDS = 20
+    # check_command_output returns at most this many bytes (head + tail) per call
+    MAX_OUTPUT_BYTES = 20000
+
     def __init__(self, project_id: str, thread_manager: ThreadManager):
         super().__init__(project_id, thread_manager)
         self._sessions: Dict[str, str] = {}  # Maps session names to session IDs
+        self._output_offsets: Dict[str, int] = {}  # Maps tmux session names to log read cursors
 
     async def _ensure_session(self, session_name: str = "default") -> str:
         """Ensure a session exists and return its ID."""
@@ -108,57 +120,19 @@ class SandboxShellTool(SandboxToolsBase):
             session_exists = "not_exists" not in check_session.get("output", "")
             
             if not session_exists:
-                # Create a new tmux session with the specified working directory
-                await self._execute_raw_command(f"tmux new-session -d -s {session_name} -c {cwd}")
-            
-            # Escape double quotes for the command
-            wrapped_command = command.replace('"', '\\"')
+                # Create a new tmux session with the specified working directory and
+                # mirror everything it prints into a log for incremental reads
+                await self._execute_raw_command(
+                    f"mkdir -p {self.SHELL_DIR} && tmux new-session -d -s {session_name} -c {cwd} && "
+                    f"tmux pipe-pane -t {session_name} -o {shlex.quote(f'cat >> {self._log_path(session_name)}')}"
+                )
             
             if blocking:
-                # For blocking execution, use a more reliable approach
-                # Add a unique marker to detect command completion
-                marker = f"COMMAND_DONE_{str(uuid4())[:8]}"
-                completion_command = self._format_completion_command(command, marker)
-                wrapped_completion_command = completion_command.replace('"', '\\"')
-                
-                # Send the command with completion marker
-                await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_completion_command}" Enter')
-                
-                start_time = time.time()
-                final_output = ""
-                
-                while (time.time() - start_time) < timeout:
-                    # Wait a shorter interval for more responsive checking
-                    await asyncio.sleep(0.5)
-                    
-                    # Check if session still exists (command might have exited)
-                    check_result = await self._execute_raw_command(f"tmux has-session -t {session_name} 2>/dev/null || echo 'ended'")
-                    if "ended" in check_result.get("output", ""):
-                        break
-                        
-                    # Get current output and check for our completion marker
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    current_output = output_result.get("output", "")
-
-                    if self._is_command_completed(current_output, marker):
-                        final_output = current_output
-                        break
-                
-                # If we didn't get the marker, capture whatever output we have
-                if not final_output:
-                    output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-                    final_output = output_result.get("output", "")
-                
-                # Kill the session after capture
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
-                
-                return self.success_response({
-                    "output": final_output,
-                    "session_name": session_name,
-                    "cwd": cwd,
-                    "completed": True
-                })
+                return await self._execute_blocking(command, session_name, cwd, timeout)
             else:
+                # Escape double quotes for the command
+                wrapped_command = command.replace('"', '\\"')
+
                 # Send command to tmux session for non-blocking execution
                 await self._execute_raw_command(f'tmux send-keys -t {session_name} "{wrapped_command}" Enter')
                 
@@ -174,12 +148,12 @@ class SandboxShellTool(SandboxToolsBase):
             # Attempt to clean up session in case of error
             if session_name:
                 try:
-                    await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                    await self._kill_session(session_name)
                 except:
                     pass
             return self.fail_response(f"Error executing command: {str(e)}")
 
-    async def _execute_raw_command(self, command: str) -> Dict[str, Any]:
+    async def _execute_raw_command(self, command: str, timeout: int = 30) -> Dict[str, Any]:
         """Execute a raw command directly in the sandbox."""
         # Ensure session exists for raw commands
         session_id = await self._ensure_session("raw_commands")
@@ -195,7 +169,7 @@ class SandboxShellTool(SandboxToolsBase):
         response = await self.sandbox.process.execute_session_command(
             session_id=session_id,
             req=req,
-            timeout=30  # Short timeout for utility commands
+            timeout=timeout  # Short by default; long-poll waits pass their own
         )
         
         logs = await self.sandbox.process.get_session_command_logs(
@@ -212,7 +186,7 @@ class SandboxShellTool(SandboxToolsBase):
         "type": "function",
         "function": {
             "name": "check_command_output",
-            "description": "Check the output of a previously executed command in a tmux session. Use this to monitor the progress or results of non-blocking commands.",
+            "description": "Check the output of a previously executed command in a tmux session. Use this to monitor the progress or results of non-blocking commands. Only output produced since the previous check is returned; very long output is truncated to its beginning and end.",
             "parameters": {
                 "type": "object",
                 "properties": {
@@ -224,6 +198,10 @@ class SandboxShellTool(SandboxToolsBase):
                         "type": "boolean",
                         "description": "Whether to terminate the tmux session after checking. Set to true when you're done with the command.",
                         "default": False
+                    },
+                    "offset": {
+                        "type": "integer",
+                        "description": "Optional byte offset to read the session output from. Defaults to where the previous check left off; use 0 to read the output from the beginning."
                     }
                 },
                 "required": ["session_name"]
@@ -233,7 +211,8 @@ class SandboxShellTool(SandboxToolsBase):
     async def check_command_output(
         self,
         session_name: str,
-        kill_session: bool = False
+        kill_session: bool = False,
+        offset: Optional[int] = None
     ) -> ToolResult:
         try:
             # Ensure sandbox is initialized
@@ -244,13 +223,14 @@ class SandboxShellTool(SandboxToolsBase):
             if "not_exists" in check_result.get("output", ""):
                 return self.fail_response(f"Tmux session '{session_name}' does not exist.")
             
-            # Get output from tmux pane
-            output_result = await self._execute_raw_command(f"tmux capture-pane -t {session_name} -p -S - -E -")
-            output = output_result.get("output", "")
+            if offset is None:
+                offset = self._output_offsets.get(session_name, 0)
+            output, next_offset, truncated = await self._read_session_output(session_name, max(0, offset))
+            self._output_offsets[session_name] = next_offset
             
             # Kill session if requested
             if kill_session:
-                await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+                await self._kill_session(session_name)
                 termination_status = "Session terminated."
             else:
                 termination_status = "Session still running."
@@ -258,12 +238,68 @@ class SandboxShellTool(SandboxToolsBase):
             return self.success_response({
                 "output": output,
                 "session_name": session_name,
+                "offset": next_offset,
+                "truncated": truncated,
                 "status": termination_status
             })
                 
         except Exception as e:
             return self.fail_response(f"Error checking command output: {str(e)}")
 
+    def _log_path(self, session_name: str) -> str:
+        return f"{self.SHELL_DIR}/{session_name}.log"
+
+    async def _read_session_output(self, session_name: str, offset: int) -> Tuple[str, int, bool]:
+        """
+        Read a session's log from a byte offset, returning (output, next_offset, truncated).
+
+        Truncation happens in the sandbox: when more than MAX_OUTPUT_BYTES are new,
+        only the first and last halves are transferred. Sessions without a log
+        (created before logging existed) fall back to the tail of the pane.
+        """
+        log_file = self._log_path(session_name)
+        script = (
+            f"size=$(stat -c %s {log_file} 2>/dev/null || echo -1); "
+            f"off={offset}; [ $off -gt $size ] && off=0; "
+            f"echo \"$size $off\"; "
+            f"if [ $size -lt 0 ]; then tmux capture-pane -t {session_name} -p -S - -E - | tail -c {self.MAX_OUTPUT_BYTES}; "
+            f"else {self._head_tail_script(log_file)}; fi"
+        )
+        result = await self._execute_raw_command(f"bash -c {shlex.quote(script)}")
+        header, _, output = (result.get("output") or "").partition("\n")
+        size_str, _, start_str = header.strip().partition(" ")
+        size = int(size_str) if size_str.lstrip('-').isdigit() else -1
+        start = int(start_str) if start_str.isdigit() else 0
+        if size < 0:
+            return output, 0, False
+        return self._clean_terminal_output(output), size, size - start > self.MAX_OUTPUT_BYTES
+
+    def _head_tail_script(self, path: str) -> str:
+        """
+        Shell that prints bytes $off..$size of `path` (both set by the caller).
+
+        When that is more than MAX_OUTPUT_BYTES, only the first and last halves
+        are printed, with a marker counting the bytes left out.
+        """
+        half = self.MAX_OUTPUT_BYTES // 2
+        return (
+            f"if [ $((size-off)) -gt {self.MAX_OUTPUT_BYTES} ]; then "
+            f"tail -c +$((off+1)) {path} | head -c {half}; "
+            f"printf '\\n\\n... [%d bytes truncated] ...\\n\\n' $((size-off-{self.MAX_OUTPUT_BYTES})); "
+            f"tail -c +$((size-{half}+1)) {path} | head -c {half}; "
+            f"elif [ $size -gt $off ]; then tail -c +$((off+1)) {path} | head -c $((size-off)); fi"
+        )
+
+    def _clean_terminal_output(self, output: str) -> str:
+        """Strip the escape sequences and carriage returns a raw pty stream carries."""
+        return ANSI_ESCAPE_PATTERN.sub('', output).replace('\r\n', '\n').replace('\r', '\n')
+
+    async def _kill_session(self, session_name: str, extra_files: Optional[list] = None):
+        """Kill a tmux session and remove its log (plus any other capture files)."""
+        files = " ".join([self._log_path(session_name)] + (extra_files or []))
+        await self._execute_raw_command(f"tmux kill-session -t {session_name} 2>/dev/null; rm -f {files}")
+        self._output_offsets.pop(session_name, None)
+
     @openapi_schema({
         "type": "function",
         "function": {
@@ -295,7 +331,7 @@ class SandboxShellTool(SandboxToolsBase):
                 return self.fail_response(f"Tmux session '{session_name}' does not exist.")
             
             # Kill the session
-            await self._execute_raw_command(f"tmux kill-session -t {session_name}")
+            await self._kill_session(session_name)
             
             return self.success_response({
                 "message": f"Tmux session '{session_name}' terminated successfully."
@@ -347,97 +383,109 @@ class SandboxShellTool(SandboxToolsBase):
         except Exception as e:
             return self.fail_response(f"Error listing commands: {str(e)}")
 
-    def _format_completion_command(self, command: str, marker: str) -> str:
-        """Format command with completion marker, handling heredocs properly."""
-        import re
-        
-        # Check if command contains heredoc syntax
-        # Look for patterns like: << EOF, << 'EOF', << "EOF", <<EOF
-        heredoc_pattern = r'<<\s*[\'"]?\w+[\'"]?'
-        
-        if re.search(heredoc_pattern, command):
-            # For heredoc commands, add the completion marker on a new line
-            # This ensures it executes after the heredoc completes
-            return f"{command}\necho {marker}"
-        else:
-            # For regular commands, use semicolon separator
-            return f"{command} ; echo {marker}"
-
-    def _is_command_completed(self, current_output: str, marker: str) -> bool:
+    async def _execute_blocking(self, command: str, session_name: str, cwd: str, timeout: int) -> ToolResult:
         """
-        Check if command execution is completed by comparing marker from end to start.
-        
-        Args:
-            current_output: Current output content
-            marker: Completion marker
-            
-        Returns:
-            bool: True if command completed, False otherwise
+        Run a command in the tmux session and wait for it without polling the pane.
+
+        The command's output is redirected to a file and its exit code written to
+        a second file when it finishes. Each wait is a single remote call that
+        blocks inside the sandbox until the exit file appears (or the slice runs
+        out). The output is read once, by the call that sees the command end or
+        the deadline pass, and is cut to MAX_OUTPUT_BYTES (head + tail) in the
+        sandbox like check_command_output.
         """
-        if not current_output or not marker:
-            return False
+        run_id = str(uuid4())[:8]
+        out_file = f"{self.SHELL_DIR}/{run_id}.out"
+        exit_file = f"{self.SHELL_DIR}/{run_id}.exit"
+        exit_tmp_file = f"{exit_file}.tmp"
 
-        # Find the last complete marker match position to start comparison
-        # Avoid terminal prompt output at the end
-        marker_end_pos = -1
-        for i in range(len(current_output) - len(marker), -1, -1):
-            if current_output[i:i+len(marker)] == marker:
-                marker_end_pos = i + len(marker) - 1
-                break
-        
-        # Start comparison from found marker position or end of output
-        if marker_end_pos != -1:
-            output_idx = marker_end_pos
-            marker_idx = len(marker) - 1
-        else:
-            output_idx = len(current_output) - 1
-            marker_idx = len(marker) - 1
-        
-        # Compare characters from end to start
-        while marker_idx >= 0 and output_idx >= 0:
-            # Skip newlines in current_output
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
-                continue
-                
-            # Compare characters
-            if current_output[output_idx] != marker[marker_idx]:
-                return False
-                
-            # Continue comparison
-            output_idx -= 1
-            marker_idx -= 1
-        
-        # If marker not fully matched
-        if marker_idx >= 0:
-            return False
-            
-        # Check if preceded by "echo " (command just started)
-        check_count = 0
-        echo_chars = "echo "
-        echo_idx = len(echo_chars) - 1
-        
-        while output_idx >= 0 and check_count < 5:
-            # Skip newlines
-            if current_output[output_idx] == '\n':
-                output_idx -= 1
+        wrapped = self._format_blocking_command(command, out_file, exit_file)
+        await self._execute_raw_command(f"tmux send-keys -t {session_name} {shlex.quote(wrapped)} Enter")
+
+        deadline = time.time() + timeout
+        output = ""
+        truncated = False
+        exit_code = None
+        session_ended = False
+        retry_delay = 0.5
+        while True:
+            remaining = deadline - time.time()
+            wait = max(0, min(self.WAIT_SLICE_SECONDS, int(remaining)))
+            result = await self._wait_for_exit(
+                session_name, out_file, exit_file, wait, final=remaining <= self.WAIT_SLICE_SECONDS
+            )
+            if result is None:
+                # The wait script didn't run (e.g. the exec call failed); back off instead of spinning
+                if time.time() + retry_delay >= deadline:
+                    break
+                await asyncio.sleep(retry_delay)
+                retry_delay = min(retry_delay * 2, 5)
                 continue
-                
-            check_count += 1
-            
-            # Check for "echo " pattern
-            if echo_idx >= 0 and current_output[output_idx] == echo_chars[echo_idx]:
-                echo_idx -= 1
-            else:
-                echo_idx = len(echo_chars) - 1
-                
-            output_idx -= 1
-            
-        # If "echo " found, command just started
-        if echo_idx < 0:
-            return False
-            
-        return True
+            exit_code, new_output, truncated_now, session_ended = result
+            if new_output is not None:
+                output, truncated = new_output, truncated_now
+            if exit_code is not None or session_ended or time.time() >= deadline:
+                break
+
+        # Kill the session and drop the capture files
+        await self._kill_session(session_name, extra_files=[out_file, exit_file, exit_tmp_file])
+
+        # No exit code and a live session means the deadline ran out; a session
+        # that ended without writing one was killed from outside
+        completed = exit_code is not None
+        return self.success_response({
+            "output": output,
+            "truncated": truncated,
+            "exit_code": exit_code,
+            "timed_out": not completed and not session_ended,
+            "session_name": session_name,
+            "cwd": cwd,
+            "completed": completed
+        })
+
+    async def _wait_for_exit(
+        self,
+        session_name: str,
+        out_file: str,
+        exit_file: str,
+        wait_seconds: int,
+        final: bool
+    ) -> Optional[Tuple[Optional[int], Optional[str], bool, bool]]:
+        """
+        Block up to wait_seconds in the sandbox, then return (exit_code, output, truncated, session_ended).
+
+        Output is only read when the command has finished, the session is gone
+        or `final` is set, and is None otherwise. Returns None when the script's
+        header can't be parsed.
+        """
+        script = (
+            f"end=$((SECONDS+{wait_seconds})); "
+            f"while [ ! -f {exit_file} ] && [ $SECONDS -lt $end ] && tmux has-session -t {session_name} 2>/dev/null; do sleep 0.1; done; "
+            f"tmux has-session -t {session_name} 2>/dev/null && alive=1 || alive=0; "
+            # Read the exit code before sizing the output so a finished command is never cut short
+            f"status=$(cat {exit_file} 2>/dev/null || echo -); "
+            f"size=$(stat -c %s {out_file} 2>/dev/null || echo 0); off=0; "
+            f"echo \"$status $alive $size\"; "
+            f"if [ \"$status\" != - ] || [ $alive = 0 ] || [ {int(final)} = 1 ]; then {self._head_tail_script(out_file)}; fi"
+        )
+        result = await self._execute_raw_command(f"bash -c {shlex.quote(script)}", timeout=wait_seconds + 30)
+        header, _, output = (result.get("output") or "").partition("\n")
+        # The header is exactly "<status> <alive> <size>"; anything else means the script didn't run
+        fields = header.split(" ")
+        if len(fields) != 3 or not fields[2].isdigit():
+            return None
+        status, alive, size = fields
+        exit_code = int(status) if status.lstrip('-').isdigit() else None
+        session_ended = alive == "0"
+        if exit_code is None and not session_ended and not final:
+            return None, None, False, False
+        return exit_code, output, int(size) > self.MAX_OUTPUT_BYTES, session_ended
+
+    def _format_blocking_command(self, command: str, out_file: str, exit_file: str) -> str:
+        """Redirect a command's output to out_file and record its exit code."""
+        # Close the group on its own line so heredocs, trailing '&' and comments keep working
+        # Write the exit code under a temporary name and rename it, so the waiter never reads a created-but-empty file
+        return f"{{ {command}\n}} > {out_file} 2>&1; echo $? > {exit_file}.tmp && mv {exit_file}.tmp {exit_file}"
 
     async def cleanup(self):
         """Clean up all sessions."""
@@ -447,6 +495,6 @@ class SandboxShellTool(SandboxToolsBase):
         # Also clean up any tmux sessions
         try:
             await self._ensure_sandbox()
-            await self._execute_raw_command("tmux kill-server 2>/dev/null || true")
+            await self._execute_raw_command(f"tmux kill-server 2>/dev/null; rm -rf {self.SHELL_DIR}")
         except:
             pass
\ No newline at end of file
@@ -7,6 +7,7 @@ from typing import Optional, Dict, Any
 from pathlib import Path
 
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.sandbox import file_transfer
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.logger import logger
@@ -71,77 +72,96 @@ class SandboxUploadFileTool(SandboxToolsBase):
             except Exception:
                 return self.fail_response(f"File '{file_path}' not found in workspace.")
             
+            # Stream the file to a local temp file instead of holding it in memory
+            local_path = file_transfer.temp_path(Path(file_path).suffix)
             try:
-                file_content = await self.sandbox.fs.download_file(full_path)
+                await file_transfer.download_to_path(self.sandbox, full_path, local_path)
             except Exception as e:
+                file_transfer.remove_quietly(local_path)
                 return self.fail_response(f"Failed to read file '{file_path}': {str(e)}")
 
-            account_id = await self._get_current_account_id()
-            
-            original_filename = os.path.basename(file_path)
-            file_extension = Path(original_filename).suffix.lower()
-            content_type, _ = mimetypes.guess_type(original_filename)
-            if not content_type:
-                content_type = "application/octet-stream"
-            
-            if custom_filename:
-                storage_filename = custom_filename
-            else:
-                timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-                unique_id = str(uuid.uuid4())[:8]
-                name_base = Path(original_filename).stem
-                storage_filename = f"{name_base}_{timestamp}_{unique_id}{file_extension}"
-            
-            storage_path = f"{account_id}/{storage_filename}"
-
             try:
-                client = await self.db.client
+                return await self._upload_to_storage(local_path, file_path, file_info.size, bucket_name, custom_filename)
+            finally:
+                file_transfer.remove_quietly(local_path)
+                
+        except Exception as e:
+            logger.error(f"Unexpected error in upload_file: {str(e)}")
+            return self.fail_response(f"Unexpected error during secure file upload: {str(e)}")
+
+    async def _upload_to_storage(
+        self,
+        local_path: str,
+        file_path: str,
+        file_size: int,
+        bucket_name: str,
+        custom_filename: Optional[str]
+    ) -> ToolResult:
+        account_id = await self._get_current_account_id()
+        
+        original_filename = os.path.basename(file_path)
+        file_extension = Path(original_filename).suffix.lower()
+        content_type, _ = mimetypes.guess_type(original_filename)
+        if not content_type:
+            content_type = "application/octet-stream"
+        
+        if custom_filename:
+            storage_filename = custom_filename
+        else:
+            timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+            unique_id = str(uuid.uuid4())[:8]
+            name_base = Path(original_filename).stem
+            storage_filename = f"{name_base}_{timestamp}_{unique_id}{file_extension}"
+        
+        storage_path = f"{account_id}/{storage_filename}"
+
+        try:
+            client = await self.db.client
+            # Storage streams the upload from the open file; given a path it
+            # would open the file itself and never close it
+            with open(local_path, "rb") as local_file:
                 storage_response = await client.storage.from_(bucket_name).upload(
                     storage_path,
-                    file_content,
+                    local_file,
                     {"content-type": content_type}
                 )
 
-                expires_in = 24 * 60 * 60
-                signed_url_response = await client.storage.from_(bucket_name).create_signed_url(
-                    storage_path,
-                    expires_in
-                )
-                
-                signed_url = signed_url_response.get('signedURL')
-                if not signed_url:
-                    return self.fail_response("Failed to generate secure access URL.")
-                
-                url_expires_at = datetime.now() + timedelta(seconds=expires_in)
-                
-                await self._track_upload(
-                    client,
-                    account_id,
-                    storage_path,
-                    bucket_name,
-                    original_filename,
-                    file_info.size,
-                    content_type,
-                    signed_url,
-                    url_expires_at
-                )
-                
-                message = f"🔒 File '{original_filename}' uploaded securely!\n"
-                message += f"📁 Storage: {bucket_name}/{storage_path}\n"
-                message += f"📏 Size: {self._format_file_size(file_info.size)}\n"
-                message += f"🔗 Secure Access URL: {signed_url}\n"
-                message += f"⏰ URL expires: {url_expires_at.strftime('%Y-%m-%d %H:%M:%S UTC')}\n"
-                message += f"\n🔐 This file is stored in private, secure storage with account isolation."
-                
-                return self.success_response(message)
-                
-            except Exception as e:
-                logger.error(f"Failed to upload file to Supabase: {str(e)}")
-                return self.fail_response(f"Failed to upload file to secure storage: {str(e)}")
-                
+            expires_in = 24 * 60 * 60
+            signed_url_response = await client.storage.from_(bucket_name).create_signed_url(
+                storage_path,
+                expires_in
+            )
+            
+            signed_url = signed_url_response.get('signedURL')
+            if not signed_url:
+                return self.fail_response("Failed to generate secure access URL.")
+            
+            url_expires_at = datetime.now() + timedelta(seconds=expires_in)
+            
+            await self._track_upload(
+                client,
+                account_id,
+                storage_path,
+                bucket_name,
+                original_filename,
+                file_size,
+                content_type,
+                signed_url,
+                url_expires_at
+            )
+            
+            message = f"🔒 File '{original_filename}' uploaded securely!\n"
+            message += f"📁 Storage: {bucket_name}/{storage_path}\n"
+            message += f"📏 Size: {self._format_file_size(file_size)}\n"
+            message += f"🔗 Secure Access URL: {signed_url}\n"
+            message += f"⏰ URL expires: {url_expires_at.strftime('%Y-%m-%d %H:%M:%S UTC')}\n"
+            message += f"\n🔐 This file is stored in private, secure storage with account isolation."
+            
+            return self.success_response(message)
+            
         except Exception as e:
-            logger.error(f"Unexpected error in upload_file: {str(e)}")
-            return self.fail_response(f"Unexpected error during secure file upload: {str(e)}")
+            logger.error(f"Failed to upload file to Supabase: {str(e)}")
+            return self.fail_response(f"Failed to upload file to secure storage: {str(e)}")
     
     async def _get_current_account_id(self) -> str:
         """Get account_id from current thread context."""
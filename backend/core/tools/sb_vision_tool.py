@@ -4,19 +4,14 @@ import mimetypes
 import uuid
 from datetime import datetime
 from typing import Optional, Tuple
-from io import BytesIO
-from PIL import Image
 from urllib.parse import urlparse
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.services.supabase import DBConnection
 import json
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPM
-import tempfile
-import requests
 from core.utils.config import config
+from core.utils import image_processing
 
 # Add common image MIME types if mimetypes module is limited
 mimetypes.add_type("image/webp", ".webp")
@@ -29,11 +24,14 @@ mimetypes.add_type("image/gif", ".gif")
 MAX_IMAGE_SIZE = 10 * 1024 * 1024
 MAX_COMPRESSED_SIZE = 5 * 1024 * 1024
 
-# Compression settings
-DEFAULT_MAX_WIDTH = 1920
-DEFAULT_MAX_HEIGHT = 1080
-DEFAULT_JPEG_QUALITY = 85
-DEFAULT_PNG_COMPRESS_LEVEL = 6
+# Formats the model providers accept for image input (Anthropic only accepts these 4)
+SUPPORTED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
+IMAGE_EXTENSIONS = {
+    'image/jpeg': 'jpg',
+    'image/png': 'png',
+    'image/gif': 'gif',
+    'image/webp': 'webp'
+}
 
 @tool_metadata(
     display_name="Image Vision",
@@ -137,6 +135,14 @@ class SandboxVisionTool(SandboxToolsBase):
         Returns:
             Tuple of (compressed_bytes, new_mime_type)
         """
+        # Identical source bytes always produce the same output, so reuse it
+        cache_key = image_processing.content_key(image_bytes, mime_type, SUPPORTED_MIME_TYPES, MAX_COMPRESSED_SIZE)
+        cached = image_processing.get_cached(cache_key)
+        if cached is not None:
+            print(f"[SeeImage] Reusing processed image for '{file_path}'")
+            return cached
+
+        original_size = len(image_bytes)
         try:
             # Handle SVG conversion first (before PIL processing)
             if mime_type == 'image/svg+xml' or file_path.lower().endswith('.svg'):
@@ -152,84 +158,34 @@ class SandboxVisionTool(SandboxToolsBase):
                     
                     # Fallback to svglib approach
                     try:
-                        
-                        # Create temporary SVG file for svglib
-                        with tempfile.NamedTemporaryFile(suffix='.svg', delete=False) as temp_svg:
-                            temp_svg.write(image_bytes)
-                            temp_svg_path = temp_svg.name
-                        
-                        try:
-                            # Convert SVG to PNG using svglib + reportlab
-                            drawing = svg2rlg(temp_svg_path)
-                            png_buffer = BytesIO()
-                            renderPM.drawToFile(drawing, png_buffer, fmt='PNG')
-                            png_bytes = png_buffer.getvalue()
-                            
-                            print(f"[SeeImage] Converted SVG '{file_path}' to PNG using fallback method (svglib)")
-                            # Update for PIL processing
-                            image_bytes = png_bytes
-                            mime_type = 'image/png'
-                        finally:
-                            # Clean up temporary file
-                            os.unlink(temp_svg_path)
-                            
+                        image_bytes = await image_processing.svg_to_png(image_bytes)
+                        mime_type = 'image/png'
+                        print(f"[SeeImage] Converted SVG '{file_path}' to PNG using fallback method (svglib)")
                     except ImportError:
                         raise Exception(f"SVG conversion libraries not available. Cannot display SVG file '{file_path}'. Please convert to PNG manually.")
                     except Exception as e:
                         raise Exception(f"SVG conversion failed for '{file_path}': {str(e)}. Please convert to PNG manually.")
             
-            # Open image from bytes
-            img = Image.open(BytesIO(image_bytes))
-            
-            # Convert RGBA to RGB if necessary (for JPEG)
-            if img.mode in ('RGBA', 'LA', 'P'):
-                # Create a white background
-                background = Image.new('RGB', img.size, (255, 255, 255))
-                if img.mode == 'P':
-                    img = img.convert('RGBA')
-                background.paste(img, mask=img.split()[-1] if img.mode == 'RGBA' else None)
-                img = background
-            
-            # Calculate new dimensions while maintaining aspect ratio
-            width, height = img.size
-            if width > DEFAULT_MAX_WIDTH or height > DEFAULT_MAX_HEIGHT:
-                ratio = min(DEFAULT_MAX_WIDTH / width, DEFAULT_MAX_HEIGHT / height)
-                new_width = int(width * ratio)
-                new_height = int(height * ratio)
-                img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-                print(f"[SeeImage] Resized image from {width}x{height} to {new_width}x{new_height}")
-            
-            # Save to bytes with compression
-            output = BytesIO()
-            
-            # Determine output format based on original mime type
-            if mime_type == 'image/gif':
-                # Keep GIFs as GIFs to preserve animation
-                img.save(output, format='GIF', optimize=True)
-                output_mime = 'image/gif'
-            elif mime_type == 'image/png':
-                # Compress PNG
-                img.save(output, format='PNG', optimize=True, compress_level=DEFAULT_PNG_COMPRESS_LEVEL)
-                output_mime = 'image/png'
-            else:
-                # Convert everything else to JPEG for better compression (converted SVGs stay PNG above)
-                img.save(output, format='JPEG', quality=DEFAULT_JPEG_QUALITY, optimize=True)
-                output_mime = 'image/jpeg'
-            
-            compressed_bytes = output.getvalue()
+            # Resize and encode in the image process pool; GIFs stay GIFs, screenshots stay lossless
+            compressed_bytes, output_mime = await image_processing.process_image(
+                image_bytes,
+                mime_type,
+                accepted_mime_types=SUPPORTED_MIME_TYPES,
+                max_bytes=MAX_COMPRESSED_SIZE
+            )
             
             # Log compression results
-            original_size = len(image_bytes)
             compressed_size = len(compressed_bytes)
             compression_ratio = (1 - compressed_size / original_size) * 100
             print(f"[SeeImage] Compressed '{file_path}' from {original_size / 1024:.1f}KB to {compressed_size / 1024:.1f}KB ({compression_ratio:.1f}% reduction)")
             
+            image_processing.store_cached(cache_key, (compressed_bytes, output_mime))
             return compressed_bytes, output_mime
             
         except Exception as e:
             # CRITICAL: Never return unsupported formats
             # If compression fails, we need to ensure we still return a supported format
-            if mime_type in ['image/jpeg', 'image/png', 'image/gif', 'image/webp']:
+            if mime_type in SUPPORTED_MIME_TYPES:
                 print(f"[SeeImage] Failed to compress image: {str(e)}. Using original (format is supported).")
                 return image_bytes, mime_type
             else:
@@ -241,38 +197,9 @@ class SandboxVisionTool(SandboxToolsBase):
         parsed_url = urlparse(file_path)
         return parsed_url.scheme in ('http', 'https')
     
-    def download_image_from_url(self, url: str) -> Tuple[bytes, str]:
+    async def download_image_from_url(self, url: str) -> Tuple[bytes, str]:
         """Download image from a URL"""
-        try:
-            headers = {
-                "User-Agent": "Mozilla/5.0"  # Some servers block default Python
-            }
-
-            # HEAD request to get the image size
-            head_response = requests.head(url, timeout=10, headers=headers, stream=True)
-            head_response.raise_for_status()
-            
-            # Check content length
-            content_length = int(head_response.headers.get('Content-Length'))
-            if content_length and content_length > MAX_IMAGE_SIZE:
-                raise Exception(f"Image is too large ({(content_length)/(1024*1024):.2f}MB) for the maximum allowed size of {MAX_IMAGE_SIZE/(1024*1024):.2f}MB")
-            
-            # Download the image
-            response = requests.get(url, timeout=10, headers=headers, stream=True)
-            response.raise_for_status()
-
-            image_bytes = response.content
-            if len(image_bytes) > MAX_IMAGE_SIZE:
-                raise Exception(f"Downloaded image is too large ({(len(image_bytes))/(1024*1024):.2f}MB). Maximum allowed size of {MAX_IMAGE_SIZE/(1024*1024):.2f}MB")
-
-            # Get MIME type
-            mime_type = response.headers.get('Content-Type')
-            if not mime_type or not mime_type.startswith('image/'):
-                raise Exception(f"URL does not point to an image (Content-Type: {mime_type}): {url}")
-            
-            return image_bytes, mime_type
-        except Exception as e:
-            return self.fail_response(f"Failed to download image from URL: {str(e)}")
+        return await image_processing.download_image(url, MAX_IMAGE_SIZE)
     
     @openapi_schema({
         "type": "function",
@@ -301,7 +228,7 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
             is_url = self.is_url(file_path)
             if is_url:
                 try:
-                    image_bytes, mime_type = self.download_image_from_url(file_path)
+                    image_bytes, mime_type = await self.download_image_from_url(file_path)
                     original_size = len(image_bytes)
                     cleaned_path = file_path
                 except Exception as e:
@@ -355,10 +282,10 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
             if len(compressed_bytes) > MAX_COMPRESSED_SIZE:
                 return self.fail_response(f"Image file '{cleaned_path}' is still too large after compression ({len(compressed_bytes) / (1024*1024):.2f}MB). Maximum compressed size is {MAX_COMPRESSED_SIZE / (1024*1024)}MB.")
 
-            # For SVG files that were converted to PNG, save the converted PNG to sandbox
-            if (mime_type == 'image/svg+xml' or cleaned_path.lower().endswith('.svg')) and compressed_mime_type == 'image/png':
-                # Create PNG filename by replacing .svg extension
-                png_filename = cleaned_path.rsplit('.', 1)[0] + '_converted.png'
+            # For SVG files that were converted to a raster image, save the converted image to sandbox
+            if (mime_type == 'image/svg+xml' or cleaned_path.lower().endswith('.svg')) and compressed_mime_type in IMAGE_EXTENSIONS:
+                # Create raster filename by replacing .svg extension
+                png_filename = cleaned_path.rsplit('.', 1)[0] + f"_converted.{IMAGE_EXTENSIONS[compressed_mime_type]}"
                 png_full_path = f"{self.workspace_path}/{png_filename}"
                 
                 try:
@@ -371,7 +298,6 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
                     # Continue with original path if save fails
 
             # CRITICAL: Validate MIME type before upload - Anthropic only accepts 4 formats
-            SUPPORTED_MIME_TYPES = ['image/jpeg', 'image/png', 'image/gif', 'image/webp']
             if compressed_mime_type not in SUPPORTED_MIME_TYPES:
                 return self.fail_response(
                     f"Invalid image format '{compressed_mime_type}' after compression. "
@@ -386,13 +312,7 @@ Images remain in the sandbox and can be loaded again anytime. SVG files are auto
                 unique_id = str(uuid.uuid4())[:8]
                 
                 # Determine file extension from mime type
-                ext_map = {
-                    'image/jpeg': 'jpg',
-                    'image/png': 'png',
-                    'image/gif': 'gif',
-                    'image/webp': 'webp'
-                }
-                ext = ext_map.get(compressed_mime_type, 'jpg')
+                ext = IMAGE_EXTENSIONS.get(compressed_mime_type, 'jpg')
                 
                 # Create filename from original path
                 base_filename = os.path.splitext(os.path.basename(cleaned_path))[0]
@@ -45,17 +45,16 @@ class TaskListTool(SandboxToolsBase):
         self.thread_id = thread_id
         self.task_list_message_type = "task_list"
     
+    def _task_list_filters(self) -> Dict[str, Any]:
+        return {'thread_id': self.thread_id, 'type': self.task_list_message_type}
+    
     async def _load_data(self) -> tuple[List[Section], List[Task]]:
         """Load sections and tasks from storage"""
         try:
-            client = await self.thread_manager.db.client
-            result = await client.table('messages').select('*')\
-                .eq('thread_id', self.thread_id)\
-                .eq('type', self.task_list_message_type)\
-                .order('created_at', desc=True).limit(1).execute()
+            latest = await self.thread_manager.loader.load_latest('messages', self._task_list_filters())
             
-            if result.data and result.data[0].get('content'):
-                content = result.data[0]['content']
+            if latest and latest.get('content'):
+                content = latest['content']
                 if isinstance(content, str):
                     content = json.loads(content)
                 
@@ -100,18 +99,15 @@ class TaskListTool(SandboxToolsBase):
             }
             
             # Find existing message
-            result = await client.table('messages').select('message_id')\
-                .eq('thread_id', self.thread_id)\
-                .eq('type', self.task_list_message_type)\
-                .order('created_at', desc=True).limit(1).execute()
+            latest = await self.thread_manager.loader.load_latest('messages', self._task_list_filters())
             
-            if result.data:
+            if latest:
                 # Update existing
-                await client.table('messages').update({'content': content})\
-                    .eq('message_id', result.data[0]['message_id']).execute()
+                result = await client.table('messages').update({'content': content})\
+                    .eq('message_id', latest['message_id']).execute()
             else:
                 # Create new
-                await client.table('messages').insert({
+                result = await client.table('messages').insert({
                     'thread_id': self.thread_id,
                     'type': self.task_list_message_type,
                     'content': content,
@@ -119,6 +115,12 @@ class TaskListTool(SandboxToolsBase):
                     'metadata': {}
                 }).execute()
             
+            # Keep the run-scoped cache in step with what we just wrote
+            if result.data:
+                self.thread_manager.loader.prime_latest('messages', self._task_list_filters(), result.data[0])
+            else:
+                self.thread_manager.loader.clear('messages')
+            
         except Exception as e:
             logger.error(f"Error saving data: {e}")
             raise
@@ -11,6 +11,7 @@ import hashlib
 import hmac
 from core.services.supabase import DBConnection
 from core.services import redis
+from core.utils.dataloader import load_row
 
 async def verify_admin_api_key(x_admin_api_key: Optional[str] = Header(None)):
     if not config.KORTIX_ADMIN_API_KEY:
@@ -288,17 +289,15 @@ async def verify_and_authorize_thread_access(client, thread_id: str, user_id: st
             if role in ('admin', 'super_admin'):
                 structlog.get_logger().debug(f"Admin access granted for thread {thread_id}", user_role=role)
                 # Just verify thread exists
-                thread_check = await client.table('threads').select('thread_id').eq('thread_id', thread_id).execute()
-                if not thread_check.data:
+                thread_check = await load_row(client, 'threads', 'thread_id', thread_id)
+                if not thread_check:
                     raise HTTPException(status_code=404, detail="Thread not found")
                 return True
         
-        thread_result = await client.table('threads').select('*').eq('thread_id', thread_id).execute()
+        thread_data = await load_row(client, 'threads', 'thread_id', thread_id)
 
-        if not thread_result.data or len(thread_result.data) == 0:
+        if not thread_data:
             raise HTTPException(status_code=404, detail="Thread not found")
-        
-        thread_data = thread_result.data[0]
 
         if thread_data['account_id'] == user_id:
             return True
@@ -1,5 +1,6 @@
 import json
-from typing import Any
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
 from core.services.redis import get_client
 
 
@@ -24,3 +25,72 @@ class _cache:
 
 
 Cache = _cache()
+
+
+class LRUCache:
+    """
+    Small in-process LRU cache.
+
+    Intended for values that are expensive to fetch and effectively immutable
+    (e.g. agent version configs). Not shared between worker processes.
+
+    With `max_bytes` and `sizeof`, the cache is also bounded by the total size
+    of its values: least recently used entries are evicted until it fits, and
+    a value larger than `max_bytes` on its own is not cached.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        max_bytes: Optional[int] = None,
+        sizeof: Optional[Callable[[Any], int]] = None,
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be greater than zero")
+        if max_bytes is not None and (max_bytes <= 0 or sizeof is None):
+            raise ValueError("max_bytes must be greater than zero and requires sizeof")
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._sizeof = sizeof
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._sizes: "dict[Hashable, int]" = {}
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            value = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        size = self._sizeof(value) if self._sizeof else 0
+        self.invalidate(key)
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        self._data[key] = value
+        self._sizes[key] = size
+        self.total_bytes += size
+        while len(self._data) > self.maxsize or (self.max_bytes is not None and self.total_bytes > self.max_bytes):
+            evicted, _ = self._data.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(evicted)
+
+    def invalidate(self, key: Hashable) -> None:
+        self._data.pop(key, None)
+        self.total_bytes -= self._sizes.pop(key, 0)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._sizes.clear()
+        self.total_bytes = 0
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
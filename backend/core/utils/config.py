@@ -317,6 +317,17 @@ class Configuration:
     SUPABASE_SERVICE_ROLE_KEY: str
     SUPABASE_JWT_SECRET: str
     
+    # Supabase/PostgREST HTTP client pool
+    SUPABASE_POOL_SIZE: int = 1
+    SUPABASE_HTTP2: bool = True
+    SUPABASE_MAX_CONNECTIONS: int = 100
+    SUPABASE_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_KEEPALIVE_EXPIRY_SECONDS: int = 30
+    SUPABASE_MAX_IN_FLIGHT: int = 64
+    SUPABASE_READ_TIMEOUT_SECONDS: int = 10
+    SUPABASE_WRITE_TIMEOUT_SECONDS: int = 30
+    SUPABASE_RPC_TIMEOUT_SECONDS: int = 60
+    
     # Redis configuration
     REDIS_HOST: Optional[str] = "localhost"
     REDIS_PORT: Optional[int] = 6379
@@ -359,6 +370,11 @@ class Configuration:
     SANDBOX_IMAGE_NAME: str = "kortix/suna:0.1.3.23"
     SANDBOX_SNAPSHOT_NAME: str = "kortix/suna:0.1.3.23"
     SANDBOX_ENTRYPOINT: str = "/usr/bin/supervisord -n -c /etc/supervisor/conf.d/supervisord.conf"
+    
+    # Warm sandbox pool (disabled when size is 0)
+    SANDBOX_POOL_SIZE: int = 0
+    SANDBOX_POOL_REFILL_PER_MINUTE: int = 4
+    SANDBOX_POOL_MAX_AGE_SECONDS: int = 600
 
     # LangFuse configuration
     LANGFUSE_PUBLIC_KEY: Optional[str] = None
@@ -0,0 +1,233 @@
+"""
+Request/run-scoped query coalescing.
+
+A DataLoader lives for one HTTP request or one agent run. Within that scope:
+- identical lookups that are in flight at the same time share one query
+- key lookups against the same table/column issued in the same event-loop
+  tick are batched into a single `in_()` query
+- completed lookups are memoized until explicitly cleared or primed, so
+  callers that write a row should call `prime()` or `invalidate()` afterwards
+  (`invalidate_row()` for the current request's loader)
+
+Agent runs get a loader through `ThreadManager.loader`; HTTP requests get one
+from the API middleware via `dataloader_scope()` and read it with
+`get_current_loader()`. Tasks spawned from a request inherit its context, so
+fire-and-forget work should be started with `context=detached_context()`; a
+request's loader also stops being visible once the request has finished.
+"""
+import asyncio
+from contextlib import contextmanager
+from contextvars import Context, ContextVar, copy_context
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from core.utils.logger import logger
+
+
+_current_loader: ContextVar[Optional["DataLoader"]] = ContextVar("dataloader", default=None)
+
+
+class DataLoader:
+    def __init__(self, db):
+        self.db = db
+        # (table, column) -> {str(key): future}
+        self._rows: Dict[Tuple[str, str], Dict[str, asyncio.Future]] = {}
+        # (table, column) -> keys queued for the next dispatch
+        self._pending: Dict[Tuple[str, str], List[str]] = {}
+        # dedupe key -> future, for non-key queries (latest-of-type etc.)
+        self._queries: Dict[Tuple, asyncio.Future] = {}
+        # Scheduled batch dispatches, kept referenced until they finish
+        self._dispatch_tasks: Set[asyncio.Task] = set()
+        self.closed = False
+        self.queries_issued = 0
+        self.lookups = 0
+
+    async def load(self, table: str, column: str, key: Any) -> Optional[Dict[str, Any]]:
+        """Fetch the row where `column` == key (select *), batched per tick."""
+        self.lookups += 1
+        batch_key = (table, column)
+        key = str(key)
+        futures = self._rows.setdefault(batch_key, {})
+
+        future = futures.get(key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            futures[key] = future
+            pending = self._pending.setdefault(batch_key, [])
+            pending.append(key)
+            if len(pending) == 1:
+                asyncio.get_running_loop().call_soon(self._schedule_dispatch, batch_key)
+
+        return await asyncio.shield(future)
+
+    def _schedule_dispatch(self, batch_key: Tuple[str, str]):
+        task = asyncio.ensure_future(self._dispatch(batch_key))
+        self._dispatch_tasks.add(task)
+        task.add_done_callback(self._dispatch_tasks.discard)
+
+    async def load_many(self, table: str, column: str, keys: List[Any]) -> List[Optional[Dict[str, Any]]]:
+        return list(await asyncio.gather(*(self.load(table, column, k) for k in keys)))
+
+    async def _dispatch(self, batch_key: Tuple[str, str]):
+        keys = self._pending.pop(batch_key, [])
+        if not keys:
+            return
+        table, column = batch_key
+        futures = self._rows.get(batch_key, {})
+
+        try:
+            client = await self.db.client
+            self.queries_issued += 1
+            if len(keys) == 1:
+                result = await client.table(table).select('*').eq(column, keys[0]).execute()
+            else:
+                result = await client.table(table).select('*').in_(column, keys).execute()
+            rows = {str(row.get(column)): row for row in (result.data or [])}
+            for key in keys:
+                future = futures.get(key)
+                if future is not None and not future.done():
+                    future.set_result(rows.get(key))
+        except Exception as e:
+            for key in keys:
+                future = futures.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+                    # Mark retrieved so an unawaited failure doesn't log noise
+                    future.exception()
+        finally:
+            # Dispatch cancelled mid-query (e.g. loop shutdown): release the waiters
+            # and forget the keys so the next lookup queries again
+            for key in keys:
+                future = futures.get(key)
+                if future is not None and not future.done():
+                    futures.pop(key, None)
+                    future.cancel()
+
+    async def load_latest(
+        self,
+        table: str,
+        filters: Dict[str, Any],
+        order_by: str = 'created_at',
+    ) -> Optional[Dict[str, Any]]:
+        """Fetch the newest row (select *) matching equality filters, deduped."""
+        self.lookups += 1
+        query_key = ('latest', table, tuple(sorted((k, str(v)) for k, v in filters.items())), order_by)
+
+        future = self._queries.get(query_key)
+        if future is None:
+            future = asyncio.get_running_loop().create_future()
+            self._queries[query_key] = future
+            # The query runs in its own task, so cancelling the caller that started
+            # it does not leave the other callers waiting on a future nobody resolves
+            task = asyncio.ensure_future(self._query_latest(query_key, future, table, filters, order_by))
+            self._dispatch_tasks.add(task)
+            task.add_done_callback(self._dispatch_tasks.discard)
+
+        return await asyncio.shield(future)
+
+    async def _query_latest(
+        self,
+        query_key: Tuple,
+        future: asyncio.Future,
+        table: str,
+        filters: Dict[str, Any],
+        order_by: str,
+    ):
+        try:
+            client = await self.db.client
+            self.queries_issued += 1
+            query = client.table(table).select('*')
+            for column, value in filters.items():
+                query = query.eq(column, value)
+            result = await query.order(order_by, desc=True).limit(1).execute()
+            future.set_result(result.data[0] if result.data else None)
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited failure doesn't log noise
+            future.exception()
+        finally:
+            if not future.done():
+                future.cancel()
+            # Only successful results are memoized; the next caller retries a failed query
+            if (future.cancelled() or future.exception() is not None) and self._queries.get(query_key) is future:
+                del self._queries[query_key]
+
+    def prime(self, table: str, column: str, key: Any, row: Optional[Dict[str, Any]]):
+        """Seed or overwrite the memoized row for a key after a write."""
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(row)
+        self._rows.setdefault((table, column), {})[str(key)] = future
+
+    def prime_latest(self, table: str, filters: Dict[str, Any], row: Optional[Dict[str, Any]], order_by: str = 'created_at'):
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(row)
+        query_key = ('latest', table, tuple(sorted((k, str(v)) for k, v in filters.items())), order_by)
+        self._queries[query_key] = future
+
+    def invalidate(self, table: str, column: str, key: Any):
+        """Forget the memoized row for one key after a write, so the next load refetches it."""
+        futures = self._rows.get((table, column))
+        if not futures:
+            return
+        future = futures.get(str(key))
+        # A lookup still in flight is left alone; it is queued or already querying
+        if future is not None and future.done():
+            del futures[str(key)]
+
+    def clear(self, table: Optional[str] = None):
+        """Forget memoized results for one table, or everything."""
+        if table is None:
+            self._rows.clear()
+            self._queries.clear()
+            return
+        for batch_key in [k for k in self._rows if k[0] == table]:
+            del self._rows[batch_key]
+        for query_key in [k for k in self._queries if k[1] == table]:
+            del self._queries[query_key]
+
+    def stats(self) -> Dict[str, int]:
+        return {'lookups': self.lookups, 'queries': self.queries_issued}
+
+
+def get_current_loader() -> Optional[DataLoader]:
+    loader = _current_loader.get()
+    if loader is not None and loader.closed:
+        # Inherited by a task that outlived the request that created the loader
+        return None
+    return loader
+
+
+def detached_context() -> Context:
+    """A copy of the current context without the request's loader, for create_task(context=...)."""
+    context = copy_context()
+    context.run(_current_loader.set, None)
+    return context
+
+
+def invalidate_row(table: str, column: str, key: Any):
+    """Drop a row from the current request's loader after writing it."""
+    loader = get_current_loader()
+    if loader is not None:
+        loader.invalidate(table, column, key)
+
+
+@contextmanager
+def dataloader_scope(db):
+    """Bind a fresh DataLoader to the current context (one HTTP request)."""
+    loader = DataLoader(db)
+    token = _current_loader.set(loader)
+    try:
+        yield loader
+    finally:
+        _current_loader.reset(token)
+        loader.closed = True
+        if loader.lookups:
+            logger.debug(f"Dataloader: {loader.lookups} lookups served by {loader.queries_issued} queries")
+
+
+async def load_row(client, table: str, column: str, key: Any) -> Optional[Dict[str, Any]]:
+    """Fetch one row (select *) through the current loader when there is one."""
+    loader = get_current_loader()
+    if loader is not None:
+        return await loader.load(table, column, key)
+    result = await client.table(table).select('*').eq(column, key).execute()
+    return result.data[0] if result.data else None
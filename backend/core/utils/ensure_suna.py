@@ -1,6 +1,7 @@
 import asyncio
 from typing import Optional
 from core.utils.logger import logger
+from core.utils.dataloader import detached_context
 from core.services.supabase import DBConnection
 from core.utils.suna_default_agent_service import SunaDefaultAgentService
 
@@ -48,7 +49,7 @@ async def ensure_suna_installed(account_id: str) -> None:
 
 def trigger_suna_installation(account_id: str) -> None:
     try:
-        asyncio.create_task(ensure_suna_installed(account_id))
+        asyncio.create_task(ensure_suna_installed(account_id), context=detached_context())
     except RuntimeError:
         pass
 
@@ -0,0 +1,260 @@
+"""
+Image preparation for model context.
+
+Decoding, resizing and encoding are CPU-bound and run in a small process
+pool, so a large screenshot or SVG no longer blocks the event loop of the
+agent worker. Remote images are fetched with a shared async HTTP client.
+
+Callers cache processed results in-process by a hash of the source bytes
+and the processing settings (content_key / get_cached / store_cached), so
+loading the same image again reuses the encoded output instead of decoding
+and re-encoding it. The cache is bounded by the total size of the encoded
+images (IMAGE_CACHE_MAX_BYTES), since a single entry can be up to 5MB.
+
+Pool workers are started with the forkserver method: forking the API worker
+directly would copy its event loop, open connections and locks held by
+other threads into every child.
+"""
+
+import asyncio
+import hashlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Iterable, Optional, Tuple
+
+import httpx
+
+from core.utils.cache import LRUCache
+from core.utils.logger import logger
+
+IMAGE_PROCESS_WORKERS = int(os.getenv("IMAGE_PROCESS_WORKERS", "2"))
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "256"))
+IMAGE_CACHE_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# Downscale target and encoder settings
+DEFAULT_MAX_WIDTH = 1920
+DEFAULT_MAX_HEIGHT = 1080
+DEFAULT_JPEG_QUALITY = 85
+DEFAULT_WEBP_QUALITY = 80
+DEFAULT_AVIF_QUALITY = 60
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+# Each retry when the encoded image is over budget shrinks both sides by this factor
+DOWNSCALE_STEP = 0.75
+MIN_DIMENSION = 256
+
+DOWNLOAD_TIMEOUT = 10.0
+DOWNLOAD_HEADERS = {"User-Agent": "Mozilla/5.0"}  # Some servers block default Python
+
+_executor: Optional[ProcessPoolExecutor] = None
+_http_client: Optional[httpx.AsyncClient] = None
+_cache = LRUCache(maxsize=IMAGE_CACHE_SIZE, max_bytes=IMAGE_CACHE_MAX_BYTES, sizeof=lambda result: len(result[0]))
+
+
+class ImageTooLargeError(Exception):
+    pass
+
+
+def _encoders():
+    from PIL import features
+
+    encoders = {"image/webp": features.check("webp")}
+    try:
+        encoders["image/avif"] = features.check("avif")
+    except ValueError:
+        # Pillow < 11.2 does not know the feature at all
+        encoders["image/avif"] = False
+    return encoders
+
+
+def _encode(img, mime_type: str, lossless: bool) -> bytes:
+    output = BytesIO()
+    if mime_type == "image/gif":
+        img.save(output, format="GIF", optimize=True)
+    elif mime_type == "image/png":
+        img.save(output, format="PNG", optimize=True, compress_level=DEFAULT_PNG_COMPRESS_LEVEL)
+    elif mime_type == "image/webp":
+        if lossless:
+            img.save(output, format="WEBP", lossless=True, method=4)
+        else:
+            img.save(output, format="WEBP", quality=DEFAULT_WEBP_QUALITY, method=4)
+    elif mime_type == "image/avif":
+        img.save(output, format="AVIF", quality=DEFAULT_AVIF_QUALITY)
+    else:
+        img.save(output, format="JPEG", quality=DEFAULT_JPEG_QUALITY, optimize=True)
+    return output.getvalue()
+
+
+def _output_format(source_mime: str, accepted_mime_types: Tuple[str, ...]) -> Tuple[str, bool]:
+    """Pick the output MIME type and whether it must be lossless."""
+    if source_mime == "image/gif":
+        # Keep GIFs as GIFs to preserve animation
+        return "image/gif", True
+    # PNG sources are mostly screenshots and diagrams: keep them lossless so text stays sharp
+    lossless = source_mime == "image/png"
+    encoders = _encoders()
+    preferred = ("image/webp",) if lossless else ("image/avif", "image/webp")
+    for mime_type in preferred:
+        if mime_type in accepted_mime_types and encoders.get(mime_type):
+            return mime_type, lossless
+    return ("image/png", True) if lossless else ("image/jpeg", False)
+
+
+def _process_image(
+    image_bytes: bytes,
+    mime_type: str,
+    accepted_mime_types: Tuple[str, ...],
+    max_size: Tuple[int, int],
+    max_bytes: int,
+) -> Tuple[bytes, str, Tuple[int, int], Tuple[int, int]]:
+    """Resize and encode in a worker process; returns (bytes, mime, original size, final size)."""
+    from PIL import Image
+
+    img = Image.open(BytesIO(image_bytes))
+    original_size = img.size
+    # Let the JPEG decoder skip resolution we are about to throw away
+    img.draft("RGB", (max_size[0] * 2, max_size[1] * 2))
+
+    output_mime, lossless = _output_format(mime_type, accepted_mime_types)
+
+    if output_mime == "image/jpeg" and img.mode in ("RGBA", "LA", "P"):
+        # JPEG has no alpha: flatten onto a white background
+        if img.mode != "RGBA":
+            img = img.convert("RGBA")
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[-1])
+        img = background
+    elif output_mime != "image/gif" and img.mode not in ("RGB", "RGBA", "L"):
+        img = img.convert("RGBA" if "A" in img.getbands() or img.mode == "P" else "RGB")
+
+    # thumbnail() reduces by integer factors before the final LANCZOS pass
+    if img.width > max_size[0] or img.height > max_size[1]:
+        img.thumbnail(max_size, Image.Resampling.LANCZOS, reducing_gap=2.0)
+
+    encoded = _encode(img, output_mime, lossless)
+    # Progressive downscale until the encoded image fits the byte budget
+    while len(encoded) > max_bytes and min(img.size) * DOWNSCALE_STEP >= MIN_DIMENSION:
+        size = (int(img.width * DOWNSCALE_STEP), int(img.height * DOWNSCALE_STEP))
+        img = img.resize(size, Image.Resampling.LANCZOS)
+        encoded = _encode(img, output_mime, lossless)
+
+    return encoded, output_mime, original_size, img.size
+
+
+def _svg_to_png(svg_bytes: bytes) -> bytes:
+    """Render an SVG with svglib + reportlab in a worker process."""
+    import tempfile
+
+    from reportlab.graphics import renderPM
+    from svglib.svglib import svg2rlg
+
+    # svglib only reads from a path
+    with tempfile.NamedTemporaryFile(suffix=".svg", delete=False) as temp_svg:
+        temp_svg.write(svg_bytes)
+        temp_svg_path = temp_svg.name
+    try:
+        drawing = svg2rlg(temp_svg_path)
+        png_buffer = BytesIO()
+        renderPM.drawToFile(drawing, png_buffer, fmt="PNG")
+        return png_buffer.getvalue()
+    finally:
+        os.unlink(temp_svg_path)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=IMAGE_PROCESS_WORKERS,
+            mp_context=multiprocessing.get_context("forkserver"),
+        )
+    return _executor
+
+
+async def _run_in_pool(fn, *args):
+    global _executor
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM on a huge image); start a fresh pool and retry once
+        logger.warning("Image process pool broke, restarting it")
+        _executor = None
+        return await loop.run_in_executor(_get_executor(), fn, *args)
+
+
+def content_key(image_bytes: bytes, *settings) -> str:
+    """Cache key for a processed image: the source bytes plus everything that affects the output."""
+    digest = hashlib.sha256(image_bytes)
+    digest.update(repr(settings).encode())
+    return digest.hexdigest()
+
+
+def get_cached(key: str) -> Optional[Tuple[bytes, str]]:
+    return _cache.get(key)
+
+
+def store_cached(key: str, result: Tuple[bytes, str]) -> None:
+    _cache.set(key, result)
+
+
+async def svg_to_png(svg_bytes: bytes) -> bytes:
+    return await _run_in_pool(_svg_to_png, svg_bytes)
+
+
+async def process_image(
+    image_bytes: bytes,
+    mime_type: str,
+    accepted_mime_types: Iterable[str] = ("image/jpeg", "image/png", "image/gif", "image/webp"),
+    max_size: Tuple[int, int] = (DEFAULT_MAX_WIDTH, DEFAULT_MAX_HEIGHT),
+    max_bytes: int = 5 * 1024 * 1024,
+) -> Tuple[bytes, str]:
+    """Downscale and re-encode an image off the event loop."""
+    accepted = tuple(sorted(accepted_mime_types))
+    encoded, output_mime, original_size, final_size = await _run_in_pool(
+        _process_image, image_bytes, mime_type, accepted, max_size, max_bytes
+    )
+    if original_size != final_size:
+        logger.debug(f"Resized image from {original_size[0]}x{original_size[1]} to {final_size[0]}x{final_size[1]}")
+    return encoded, output_mime
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=DOWNLOAD_TIMEOUT,
+            headers=DOWNLOAD_HEADERS,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+    return _http_client
+
+
+async def download_image(url: str, max_bytes: int) -> Tuple[bytes, str]:
+    """Stream an image from `url`, aborting as soon as it exceeds `max_bytes`."""
+    async with _get_http_client().stream("GET", url) as response:
+        response.raise_for_status()
+
+        mime_type = response.headers.get("Content-Type", "").split(";")[0].strip()
+        if not mime_type.startswith("image/"):
+            raise ValueError(f"URL does not point to an image (Content-Type: {mime_type or None}): {url}")
+
+        content_length = response.headers.get("Content-Length")
+        if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+            raise ImageTooLargeError(
+                f"Image is too large ({int(content_length) / (1024 * 1024):.2f}MB) for the maximum allowed size of {max_bytes / (1024 * 1024):.2f}MB"
+            )
+
+        chunks = []
+        received = 0
+        async for chunk in response.aiter_bytes():
+            received += len(chunk)
+            if received > max_bytes:
+                raise ImageTooLargeError(
+                    f"Downloaded image is too large (over {max_bytes / (1024 * 1024):.2f}MB)"
+                )
+            chunks.append(chunk)
+    return b"".join(chunks), mime_type
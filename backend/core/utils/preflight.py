@@ -0,0 +1,120 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.utils.logger import logger
+
+
+StepFn = Callable[[Dict[str, Any]], Awaitable[Any]]
+
+
+@dataclass
+class PreflightStep:
+    name: str
+    fn: StepFn
+    depends_on: List[str] = field(default_factory=list)
+
+
+class PreflightExecutor:
+    """
+    Dependency-aware executor for request pre-flight checks.
+
+    Each step is an async callable receiving a dict of results from the steps
+    it depends on (keyed by step name). Steps whose dependencies are satisfied
+    run concurrently; the first step to raise cancels everything still in
+    flight and its exception is re-raised to the caller unchanged, so
+    HTTPExceptions surface exactly as if the checks had run sequentially.
+
+    Example:
+    ```python
+    preflight = PreflightExecutor("start_agent")
+    preflight.add("thread", fetch_thread)
+    preflight.add("access", check_access, depends_on=["thread"])
+    results = await preflight.run()
+    logger.debug(preflight.timings)
+    ```
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._steps: Dict[str, PreflightStep] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, fn: StepFn, depends_on: Optional[List[str]] = None) -> "PreflightExecutor":
+        if name in self._steps:
+            raise ValueError(f"Duplicate preflight step: {name}")
+        self._steps[name] = PreflightStep(name=name, fn=fn, depends_on=list(depends_on or []))
+        return self
+
+    def _validate(self) -> None:
+        for step in self._steps.values():
+            for dep in step.depends_on:
+                if dep not in self._steps:
+                    raise ValueError(f"Preflight step '{step.name}' depends on unknown step '{dep}'")
+
+        visiting, done = set(), set()
+
+        def visit(name: str):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Preflight dependency cycle detected at step '{name}'")
+            visiting.add(name)
+            for dep in self._steps[name].depends_on:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self._steps:
+            visit(name)
+
+    async def _run_step(self, step: PreflightStep, results: Dict[str, Any]) -> Any:
+        deps = {dep: results[dep] for dep in step.depends_on}
+        started = time.monotonic()
+        try:
+            return await step.fn(deps)
+        finally:
+            self.timings[step.name] = round((time.monotonic() - started) * 1000, 2)
+
+    async def run(self) -> Dict[str, Any]:
+        self._validate()
+        self.timings = {}
+
+        results: Dict[str, Any] = {}
+        pending = dict(self._steps)
+        running: Dict[asyncio.Task, str] = {}
+        started = time.monotonic()
+
+        try:
+            while pending or running:
+                ready = [
+                    step for step in pending.values()
+                    if all(dep in results for dep in step.depends_on)
+                ]
+                for step in ready:
+                    del pending[step.name]
+                    task = asyncio.create_task(self._run_step(step, results))
+                    running[task] = step.name
+
+                done, _ = await asyncio.wait(running.keys(), return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    step_name = running.pop(task)
+                    # Raises the step's exception, short-circuiting the remaining steps
+                    results[step_name] = task.result()
+        finally:
+            for task in running:
+                task.cancel()
+            if running:
+                await asyncio.gather(*running.keys(), return_exceptions=True)
+
+            total_ms = round((time.monotonic() - started) * 1000, 2)
+            slowest = max(self.timings, key=self.timings.get) if self.timings else None
+            logger.debug(
+                f"[PREFLIGHT] {self.name} finished in {total_ms}ms (slowest: {slowest})",
+                preflight=self.name,
+                preflight_total_ms=total_ms,
+                preflight_timings_ms=dict(self.timings),
+            )
+
+        return results
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark the pooled PostgREST client against a local PostgREST-compatible mock.
+
+The mock keeps tables in memory and understands the subset of PostgREST used by
+the backend (select/eq/in/limit/order, insert, update, delete, count=exact),
+with an optional artificial latency per request. No live Supabase is needed.
+
+Usage:
+    python -m core.utils.scripts.benchmark_db_pool serve [--port 54321] [--latency-ms 5]
+    python -m core.utils.scripts.benchmark_db_pool run [--concurrency 64] [--requests 5000] [--pool-size 2]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from typing import Any, Dict, List
+
+from aiohttp import web
+
+
+# A syntactically valid (unsigned) JWT; supabase-py only checks the shape
+FAKE_KEY = "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoic2VydmljZV9yb2xlIn0.bWFjaw"
+
+
+def _coerce(value: str) -> Any:
+    if value in ('true', 'false'):
+        return value == 'true'
+    if value == 'null':
+        return None
+    return value
+
+
+def _matches(row: Dict[str, Any], filters: List[tuple]) -> bool:
+    for column, op, value in filters:
+        current = row.get(column)
+        current_str = None if current is None else (str(current).lower() if isinstance(current, bool) else str(current))
+        if op == 'eq' and current_str != value:
+            return False
+        if op == 'neq' and current_str == value:
+            return False
+        if op == 'is' and current is not _coerce(value):
+            return False
+        if op == 'in' and current_str not in [v.strip('"') for v in value.strip('()').split(',')]:
+            return False
+    return True
+
+
+class MockPostgREST:
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.requests = 0
+
+    def _parse(self, request: web.Request):
+        filters, limit, order = [], None, None
+        for key, value in request.query.items():
+            if key in ('select', 'columns', 'on_conflict'):
+                continue
+            if key == 'limit':
+                limit = int(value)
+            elif key == 'order':
+                order = value
+            elif '.' in value:
+                op, operand = value.split('.', 1)
+                filters.append((key, op, operand))
+        return filters, limit, order
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        table = request.match_info['table']
+        rows = self.tables.setdefault(table, [])
+        filters, limit, order = self._parse(request)
+        prefer = request.headers.get('Prefer', '')
+
+        if request.method == 'GET' or request.method == 'HEAD':
+            result = [r for r in rows if _matches(r, filters)]
+            if order:
+                column, _, direction = order.partition('.')
+                result.sort(key=lambda r: str(r.get(column) or ''), reverse=direction.startswith('desc'))
+            total = len(result)
+            if limit is not None:
+                result = result[:limit]
+            headers = {}
+            if 'count=exact' in prefer:
+                headers['Content-Range'] = f"0-{max(len(result) - 1, 0)}/{total}"
+            if 'vnd.pgrst.object' in request.headers.get('Accept', ''):
+                if len(result) != 1:
+                    return web.json_response({'message': 'JSON object requested, multiple (or no) rows returned'}, status=406)
+                return web.json_response(result[0], headers=headers)
+            return web.json_response(result, headers=headers)
+
+        if request.method == 'POST':
+            payload = await request.json()
+            new_rows = payload if isinstance(payload, list) else [payload]
+            for row in new_rows:
+                row.setdefault('id', str(uuid.uuid4()))
+                rows.append(row)
+            return web.json_response(new_rows, status=201)
+
+        if request.method == 'PATCH':
+            changes = await request.json()
+            updated = [r for r in rows if _matches(r, filters)]
+            for row in updated:
+                row.update(changes)
+            return web.json_response(updated)
+
+        if request.method == 'DELETE':
+            deleted = [r for r in rows if _matches(r, filters)]
+            self.tables[table] = [r for r in rows if not _matches(r, filters)]
+            return web.json_response(deleted)
+
+        return web.json_response({'message': 'method not allowed'}, status=405)
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route('*', '/rest/v1/{table}', self.handle)
+        return app
+
+
+async def start_mock(port: int, latency_ms: float) -> web.AppRunner:
+    mock = MockPostgREST(latency_ms)
+    runner = web.AppRunner(mock.app())
+    await runner.setup()
+    await web.TCPSite(runner, '127.0.0.1', port).start()
+    return runner
+
+
+async def serve(args):
+    runner = await start_mock(args.port, args.latency_ms)
+    print(f"Mock PostgREST listening on http://127.0.0.1:{args.port}/rest/v1 (latency {args.latency_ms}ms)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+
+async def run(args):
+    os.environ.setdefault('SUPABASE_URL', f"http://127.0.0.1:{args.port}")
+    os.environ.setdefault('SUPABASE_SERVICE_ROLE_KEY', FAKE_KEY)
+    os.environ.setdefault('SUPABASE_ANON_KEY', FAKE_KEY)
+    os.environ.setdefault('SUPABASE_JWT_SECRET', 'benchmark')
+    os.environ['SUPABASE_POOL_SIZE'] = str(args.pool_size)
+    os.environ['SUPABASE_HTTP2'] = 'true' if args.http2 else 'false'
+
+    from core.services.supabase import DBConnection
+
+    runner = await start_mock(args.port, args.latency_ms) if not args.external else None
+    db = DBConnection()
+    await db.initialize()
+
+    thread_ids = [str(uuid.uuid4()) for _ in range(100)]
+    client = await db.client
+    await client.table('threads').insert([{'thread_id': t, 'account_id': 'bench'} for t in thread_ids]).execute()
+
+    remaining = args.requests
+    latencies: List[float] = []
+
+    async def worker(n: int):
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            client = await db.client
+            started = time.monotonic()
+            if remaining % 5 == 0:
+                await client.table('messages').insert({'thread_id': thread_ids[remaining % 100], 'type': 'status', 'content': '{}'}).execute()
+            else:
+                await client.table('threads').select('*').eq('thread_id', thread_ids[remaining % 100]).execute()
+            latencies.append((time.monotonic() - started) * 1000)
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+    elapsed = time.monotonic() - started
+
+    latencies.sort()
+    print(f"requests={len(latencies)} concurrency={args.concurrency} pool_size={args.pool_size} http2={args.http2}")
+    print(f"throughput={len(latencies) / elapsed:.1f} req/s")
+    print(f"p50={latencies[len(latencies) // 2]:.1f}ms p99={latencies[int(len(latencies) * 0.99)]:.1f}ms")
+    print(json.dumps(db.pool_metrics(), indent=2))
+
+    await DBConnection.disconnect()
+    if runner:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PostgREST client pool benchmark')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = sub.add_parser('serve', help='Run the mock PostgREST server')
+    serve_parser.add_argument('--port', type=int, default=54321)
+    serve_parser.add_argument('--latency-ms', type=float, default=5.0)
+
+    run_parser = sub.add_parser('run', help='Benchmark DBConnection against the mock')
+    run_parser.add_argument('--port', type=int, default=54321)
+    run_parser.add_argument('--latency-ms', type=float, default=5.0)
+    run_parser.add_argument('--concurrency', type=int, default=64)
+    run_parser.add_argument('--requests', type=int, default=5000)
+    run_parser.add_argument('--pool-size', type=int, default=1)
+    run_parser.add_argument('--http2', action='store_true', help='Only effective against an HTTP/2 (TLS) endpoint')
+    run_parser.add_argument('--external', action='store_true', help='Use an already running mock/PostgREST at SUPABASE_URL')
+
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args) if args.command == 'serve' else run(args))
+    except KeyboardInterrupt:
+        sys.exit(0)
+
+
+if __name__ == "__main__":
+    main()
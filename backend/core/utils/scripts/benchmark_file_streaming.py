@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Compare worker memory and time to first byte for buffered vs streamed sandbox
+file transfers.
+
+Daytona is replaced by a local HTTP stand-in for the sandbox toolbox API
+(file download and bulk upload), and the sandbox filesystem is the SDK's real
+AsyncFileSystem pointed at it, so requests are built and sent exactly as in
+production while the numbers isolate what the backend itself holds in memory.
+Peak allocations are measured with tracemalloc, and the time until the first
+chunk is ready to send to the client, for:
+- download: bytes from download_file() vs a temp file (download_to_path() +
+            iter_file(), used for Range requests) vs open_download_stream()
+            (what read_file sends)
+- upload:   UploadFile.read() + upload_file(bytes) vs upload_stream()
+
+Usage:
+    python -m core.utils.scripts.benchmark_file_streaming [--size-mb 200]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from daytona_api_client_async import ApiClient, Configuration, ToolboxApi
+from daytona_sdk._async.filesystem import AsyncFileSystem
+from fastapi import UploadFile
+
+from core.sandbox import file_transfer
+
+
+class ToolboxHandler(BaseHTTPRequestHandler):
+    """Serves /toolbox/{id}/toolbox/files/download from local disk and drains bulk uploads."""
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if not url.path.endswith("/toolbox/files/download"):
+            self.send_error(404)
+            return
+        path = parse_qs(url.query).get("path", [""])[0]
+        if not os.path.isfile(path):
+            self.send_error(404, "file not found")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(os.path.getsize(path)))
+        self.end_headers()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, self.wfile, file_transfer.CHUNK_SIZE)
+
+    def do_POST(self):
+        if not urlparse(self.path).path.endswith("/toolbox/files/bulk-upload"):
+            self.send_error(404)
+            return
+        remaining = int(self.headers.get("Content-Length", 0))
+        while remaining:
+            remaining -= len(self.rfile.read(min(remaining, file_transfer.CHUNK_SIZE)))
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def local_sandbox(api_client: ApiClient, root_dir: str):
+    toolbox_api = ToolboxApi(api_client)
+
+    async def get_root_dir():
+        return root_dir
+
+    return SimpleNamespace(id="benchmark", fs=AsyncFileSystem("benchmark", toolbox_api, get_root_dir))
+
+
+async def measure(label: str, coro_fn):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    first_byte = await coro_fn(started)
+    total = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    first_byte_text = f"first byte {first_byte:6.2f}s" if first_byte is not None else ""
+    print(f"{label:<22} peak {peak / (1024 * 1024):8.1f} MB   total {total:6.2f}s   {first_byte_text}")
+
+
+async def run(size_mb: int):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ToolboxHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    workdir = tempfile.mkdtemp(prefix="streaming-bench-")
+    api_client = ApiClient(Configuration(host=f"http://127.0.0.1:{server.server_port}"))
+    sandbox = local_sandbox(api_client, workdir)
+    source = os.path.join(workdir, "source.bin")
+    with open(source, "wb") as f:
+        for _ in range(size_mb):
+            f.write(os.urandom(1024 * 1024))
+    expected = size_mb * 1024 * 1024
+
+    async def buffered_download(started):
+        content = await sandbox.fs.download_file(source)
+        assert len(content) == expected
+        return time.perf_counter() - started
+
+    async def temp_file_download(started):
+        first_byte, total = None, 0
+        async with file_transfer.downloaded(sandbox, source) as local_path:
+            async for chunk in file_transfer.iter_file(local_path):
+                first_byte = first_byte or time.perf_counter() - started
+                total += len(chunk)
+        assert total == expected
+        return first_byte
+
+    async def streamed_download(started):
+        first_byte, total = None, 0
+        _, chunks = await file_transfer.open_download_stream(sandbox, source)
+        async for chunk in chunks:
+            first_byte = first_byte or time.perf_counter() - started
+            total += len(chunk)
+        assert total == expected
+        return first_byte
+
+    def upload_file_obj():
+        spooled = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        with open(source, "rb") as f:
+            shutil.copyfileobj(f, spooled)
+        spooled.seek(0)
+        return UploadFile(file=spooled, filename="source.bin")
+
+    async def buffered_upload(started):
+        upload = upload_file_obj()
+        content = await upload.read()
+        await sandbox.fs.upload_file(content, "buffered.bin")
+
+    async def streamed_upload(started):
+        upload = upload_file_obj()
+        await file_transfer.upload_stream(sandbox, upload, "streamed.bin")
+
+    print(f"file size {size_mb} MB, chunk {file_transfer.CHUNK_SIZE // 1024} KB")
+    try:
+        await measure("download (buffered)", buffered_download)
+        await measure("download (temp file)", temp_file_download)
+        await measure("download (streamed)", streamed_download)
+        await measure("upload (buffered)", buffered_upload)
+        await measure("upload (streamed)", streamed_upload)
+    finally:
+        await api_client.close()
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Buffered vs streamed sandbox file transfer benchmark")
+    parser.add_argument("--size-mb", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(run(args.size_mb))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Measure event-loop latency while knowledge base uploads are being extracted.
+
+A probe task stands in for the other requests served by the same API worker:
+it wakes every 10ms and records how late it was. Concurrent extractions of a
+generated text-heavy PDF run alongside it, once inline in the event loop (how
+FileProcessor used to call PyPDF2) and once through the extraction process
+pool. With the pool, probe p99 should stay close to the idle baseline.
+
+Usage:
+    python -m core.utils.scripts.benchmark_kb_extraction [--pages 400] [--uploads 4]
+"""
+
+import argparse
+import asyncio
+import io
+import statistics
+import time
+
+from core.knowledge_base import extraction
+
+PROBE_INTERVAL = 0.01
+
+
+def build_pdf(pages: int) -> bytes:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=A4)
+    line = "The quick brown fox jumps over the lazy dog while the knowledge base indexes it. " * 2
+    for page in range(pages):
+        text = pdf.beginText(40, 800)
+        for row in range(60):
+            text.textLine(f"{page}:{row} {line}")
+        pdf.drawText(text)
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+async def probe(lateness: list, stop: asyncio.Event):
+    while not stop.is_set():
+        expected = time.perf_counter() + PROBE_INTERVAL
+        await asyncio.sleep(PROBE_INTERVAL)
+        lateness.append(max(time.perf_counter() - expected, 0.0) * 1000)
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def measure(label: str, work) -> None:
+    lateness = []
+    stop = asyncio.Event()
+    probe_task = asyncio.create_task(probe(lateness, stop))
+    started = time.perf_counter()
+    await work()
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await probe_task
+    print(
+        f"{label:<16} wall {elapsed:6.2f}s   probe lateness p50 {statistics.median(lateness):7.1f} ms"
+        f"   p99 {percentile(lateness, 99):7.1f} ms   max {max(lateness):7.1f} ms"
+    )
+
+
+async def run(pages: int, uploads: int):
+    pdf_bytes = build_pdf(pages)
+    print(f"{uploads} concurrent uploads of a {pages}-page PDF ({len(pdf_bytes) / (1024 * 1024):.1f} MB), "
+          f"{extraction.EXTRACTION_WORKERS} extraction workers")
+
+    async def idle():
+        await asyncio.sleep(2)
+
+    async def inline():
+        async def one():
+            # What process_file used to do: extract synchronously in the coroutine
+            await asyncio.sleep(0)
+            extraction._extract_text(pdf_bytes, "upload.pdf", "application/pdf", extraction.EXTRACTION_TIMEOUT)
+        await asyncio.gather(*(one() for _ in range(uploads)))
+
+    async def pooled():
+        await asyncio.gather(*(
+            extraction.extract_text(pdf_bytes, "upload.pdf", "application/pdf") for _ in range(uploads)
+        ))
+
+    # Start the worker processes so pool start-up is not counted
+    await extraction.extract_text(b"warm up", "warmup.txt", "text/plain")
+
+    await measure("idle", idle)
+    await measure("inline", inline)
+    await measure("process pool", pooled)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Event-loop latency during knowledge base text extraction")
+    parser.add_argument("--pages", type=int, default=400)
+    parser.add_argument("--uploads", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.uploads))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Two-tier cache for agent version rows.
+
+L1 is an in-process LRU, L2 is Redis; both are keyed by version_id. Version
+configs are written once, so entries are only dropped when a version's
+metadata or trigger snapshot is rewritten. Invalidations are broadcast on a
+Redis pub/sub channel so every API/worker process evicts its own L1 copy.
+
+Rows are deep-copied into L1 and on every read: callers build AgentData
+straight from the row's lists and dicts, and a mutation there must not
+leak into the entry other requests read.
+
+The agent -> current_version_id pointer is cached the same way and
+invalidated whenever the pointer moves (create, activate, rollback).
+"""
+import asyncio
+import copy
+import json
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.services import redis
+from core.utils.cache import LRUCache
+from core.utils.logger import logger
+
+
+VERSION_KEY_PREFIX = "agent_version:"
+POINTER_KEY_PREFIX = "agent_current_version:"
+INVALIDATION_CHANNEL = "agent_version_invalidation"
+
+VERSION_ROW_TTL = redis.REDIS_KEY_TTL
+POINTER_TTL = 3600
+
+L1_VERSION_SIZE = 2048
+L1_POINTER_SIZE = 4096
+
+
+class VersionCache:
+    def __init__(self):
+        self._rows = LRUCache(maxsize=L1_VERSION_SIZE)
+        self._pointers = LRUCache(maxsize=L1_POINTER_SIZE)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    # ---- pub/sub ---------------------------------------------------------
+
+    def _ensure_listener(self):
+        if self._listener_task is not None and not self._listener_task.done():
+            return
+        try:
+            self._listener_task = asyncio.create_task(self._listen())
+        except RuntimeError:
+            # No running loop (e.g. called from sync context); L1 stays node-local
+            self._listener_task = None
+
+    async def _listen(self):
+        pubsub = None
+        try:
+            pubsub = await redis.create_pubsub()
+            await pubsub.subscribe(INVALIDATION_CHANNEL)
+            logger.debug(f"Subscribed to {INVALIDATION_CHANNEL}")
+            async for message in pubsub.listen():
+                if message.get('type') != 'message':
+                    continue
+                try:
+                    payload = json.loads(message['data'])
+                except (TypeError, ValueError):
+                    continue
+                self._evict_local(payload.get('version_ids', []), payload.get('agent_ids', []))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning(f"Agent version invalidation listener stopped: {e}")
+            # Without invalidations we can't trust L1 for long
+            self._rows.clear()
+            self._pointers.clear()
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.unsubscribe(INVALIDATION_CHANNEL)
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def _evict_local(self, version_ids: Iterable[str], agent_ids: Iterable[str]):
+        for version_id in version_ids:
+            self._rows.invalidate(version_id)
+        for agent_id in agent_ids:
+            self._pointers.invalidate(agent_id)
+
+    async def invalidate(self, version_ids: Iterable[str] = (), agent_ids: Iterable[str] = ()):
+        version_ids = [v for v in version_ids if v]
+        agent_ids = [a for a in agent_ids if a]
+        if not version_ids and not agent_ids:
+            return
+
+        self._evict_local(version_ids, agent_ids)
+
+        try:
+            keys = [f"{VERSION_KEY_PREFIX}{v}" for v in version_ids] + [f"{POINTER_KEY_PREFIX}{a}" for a in agent_ids]
+            redis_client = await redis.get_client()
+            await redis_client.delete(*keys)
+            await redis.publish(INVALIDATION_CHANNEL, json.dumps({
+                'version_ids': version_ids,
+                'agent_ids': agent_ids,
+            }))
+        except Exception as e:
+            logger.warning(f"Failed to broadcast agent version invalidation: {e}")
+
+    # ---- version rows ----------------------------------------------------
+
+    async def get_row(self, version_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self.get_rows([version_id])
+        return rows.get(version_id)
+
+    async def get_rows(self, version_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        self._ensure_listener()
+
+        rows: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for version_id in dict.fromkeys(version_ids):
+            row = self._rows.get(version_id)
+            if row is not None:
+                rows[version_id] = copy.deepcopy(row)
+            else:
+                missing.append(version_id)
+
+        if not missing:
+            return rows
+
+        try:
+            redis_client = await redis.get_client()
+            values = await redis_client.mget([f"{VERSION_KEY_PREFIX}{v}" for v in missing])
+        except Exception as e:
+            logger.warning(f"Agent version cache read failed: {e}")
+            return rows
+
+        for version_id, value in zip(missing, values):
+            if value:
+                row = json.loads(value)
+                self._rows.set(version_id, copy.deepcopy(row))
+                rows[version_id] = row
+
+        return rows
+
+    async def set_rows(self, rows: List[Dict[str, Any]]):
+        if not rows:
+            return
+        for row in rows:
+            self._rows.set(row['version_id'], copy.deepcopy(row))
+        try:
+            redis_client = await redis.get_client()
+            async with redis_client.pipeline(transaction=False) as pipe:
+                for row in rows:
+                    pipe.set(f"{VERSION_KEY_PREFIX}{row['version_id']}", json.dumps(row, default=str), ex=VERSION_ROW_TTL)
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Agent version cache write failed: {e}")
+
+    # ---- current version pointers ---------------------------------------
+
+    async def get_pointer(self, agent_id: str) -> Optional[str]:
+        self._ensure_listener()
+
+        version_id = self._pointers.get(agent_id)
+        if version_id is not None:
+            return version_id
+
+        try:
+            version_id = await redis.get(f"{POINTER_KEY_PREFIX}{agent_id}")
+        except Exception as e:
+            logger.warning(f"Agent version pointer cache read failed: {e}")
+            return None
+
+        if version_id:
+            self._pointers.set(agent_id, version_id)
+        return version_id
+
+    async def set_pointer(self, agent_id: str, version_id: str):
+        if not version_id:
+            return
+        self._pointers.set(agent_id, version_id)
+        try:
+            await redis.set(f"{POINTER_KEY_PREFIX}{agent_id}", version_id, ex=POINTER_TTL)
+        except Exception as e:
+            logger.warning(f"Agent version pointer cache write failed: {e}")
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'rows': len(self._rows),
+            'row_hits': self._rows.hits,
+            'row_misses': self._rows.misses,
+            'pointers': len(self._pointers),
+            'pointer_hits': self._pointers.hits,
+            'pointer_misses': self._pointers.misses,
+        }
+
+
+version_cache = VersionCache()
+
+
+async def invalidate_version(version_id: str):
+    """Evict a version row everywhere after its row was rewritten in place."""
+    await version_cache.invalidate(version_ids=[version_id])
@@ -7,6 +7,7 @@ from enum import Enum
 
 from core.services.supabase import DBConnection
 from core.utils.logger import logger
+from core.versioning.version_cache import version_cache
 
 
 class VersionStatus(Enum):
@@ -100,6 +101,70 @@ class VersionService:
         
         return is_owner, is_public
     
+    async def _authorize_agents_bulk(self, agent_ids: List[str], user_id: str) -> set[str]:
+        """Return the subset of agent_ids the user owns or that are public, in one query."""
+        if not agent_ids:
+            return set()
+        if user_id == "system":
+            return set(agent_ids)
+        
+        client = await self._get_client()
+        
+        result = await client.table('agents').select('agent_id, account_id, is_public').in_(
+            'agent_id', list(set(agent_ids))
+        ).execute()
+        
+        return {
+            row['agent_id'] for row in (result.data or [])
+            if row.get('account_id') == user_id or row.get('is_public', False)
+        }
+    
+    async def _get_version_row(self, agent_id: str, version_id: str) -> Optional[Dict[str, Any]]:
+        row = await version_cache.get_row(version_id)
+        if row is not None:
+            return row if row.get('agent_id') == agent_id else None
+        
+        client = await self._get_client()
+        
+        result = await client.table('agent_versions').select('*').eq(
+            'version_id', version_id
+        ).eq('agent_id', agent_id).execute()
+        
+        if not result.data:
+            return None
+        
+        row = result.data[0]
+        await version_cache.set_rows([row])
+        return row
+    
+    async def _get_version_rows(self, version_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        rows = await version_cache.get_rows(version_ids)
+        missing = [vid for vid in dict.fromkeys(version_ids) if vid not in rows]
+        
+        if missing:
+            client = await self._get_client()
+            result = await client.table('agent_versions').select('*').in_('version_id', missing).execute()
+            fetched = result.data or []
+            await version_cache.set_rows(fetched)
+            rows.update({row['version_id']: row for row in fetched})
+        
+        return rows
+    
+    async def _get_current_version_id(self, agent_id: str) -> Optional[str]:
+        current_version_id = await version_cache.get_pointer(agent_id)
+        if current_version_id:
+            return current_version_id
+        
+        client = await self._get_client()
+        
+        agent_result = await client.table('agents').select('current_version_id').eq('agent_id', agent_id).execute()
+        if not agent_result.data or not agent_result.data[0].get('current_version_id'):
+            return None
+        
+        current_version_id = agent_result.data[0]['current_version_id']
+        await version_cache.set_pointer(agent_id, current_version_id)
+        return current_version_id
+    
     async def _get_next_version_number(self, agent_id: str) -> int:
         client = await self._get_client()
         
@@ -137,6 +202,8 @@ class VersionService:
         
         if not result.data:
             raise Exception("Failed to update agent current version")
+        
+        await version_cache.invalidate(agent_ids=[agent_id])
     
     def _version_from_db_row(self, row: Dict[str, Any]) -> AgentVersion:
         config = row.get('config', {})
@@ -291,41 +358,67 @@ class VersionService:
         if not is_owner and not is_public:
             raise UnauthorizedError("You don't have permission to view this version")
         
-        client = await self._get_client()
+        row = await self._get_version_row(agent_id, version_id)
+        if not row:
+            raise VersionNotFoundError(f"Version {version_id} not found")
         
-        result = await client.table('agent_versions').select('*').eq(
-            'version_id', version_id
-        ).eq('agent_id', agent_id).execute()
+        return self._version_from_db_row(row)
+    
+    async def get_authorized_version_row(self, agent_id: str, version_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a raw version row through the version cache without re-checking access.
+        
+        Only for callers that have already authorized the user against the agent
+        row (e.g. AgentLoader.load_agent); avoids the two authorization queries
+        that get_version runs on every call.
+        """
+        return await self._get_version_row(agent_id, version_id)
+    
+    async def get_version_rows(self, version_refs: Dict[str, str], user_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk-fetch raw agent_versions rows.
         
-        if not result.data:
-            raise VersionNotFoundError(f"Version {version_id} not found")
+        Args:
+            version_refs: Mapping of version_id -> agent_id
+            user_id: User ID for authorization, checked once for all agents
+            
+        Returns:
+            Mapping of version_id -> row for every version the user may view.
+            Versions that don't exist or aren't accessible are omitted.
+        """
+        if not version_refs:
+            return {}
         
-        return self._version_from_db_row(result.data[0])
+        allowed_agents = await self._authorize_agents_bulk(list(version_refs.values()), user_id)
+        requested = [vid for vid, aid in version_refs.items() if aid in allowed_agents]
+        if not requested:
+            return {}
+        
+        rows = await self._get_version_rows(requested)
+        
+        return {
+            vid: row for vid, row in rows.items()
+            if row.get('agent_id') == version_refs.get(vid)
+        }
     
     async def get_active_version(self, agent_id: str, user_id: str = "system") -> Optional[AgentVersion]:
         is_owner, is_public = await self._verify_and_authorize_agent_access(agent_id, user_id)
         if not is_owner and not is_public:
             raise UnauthorizedError("You don't have permission to view this agent")
         
-        client = await self._get_client()
-        
-        agent_result = await client.table('agents').select('current_version_id').eq('agent_id', agent_id).execute()
-        if not agent_result.data or not agent_result.data[0].get('current_version_id'):
+        current_version_id = await self._get_current_version_id(agent_id)
+        if not current_version_id:
             logger.warning(f"No current_version_id found for agent {agent_id}")
             return None
         
-        current_version_id = agent_result.data[0]['current_version_id']
         logger.debug(f"Agent {agent_id} current_version_id: {current_version_id}")
         
-        result = await client.table('agent_versions').select('*').eq(
-            'version_id', current_version_id
-        ).eq('agent_id', agent_id).execute()
-        
-        if not result.data:
+        row = await self._get_version_row(agent_id, current_version_id)
+        if not row:
             logger.warning(f"Current version {current_version_id} not found for agent {agent_id}")
             return None
         
-        version = self._version_from_db_row(result.data[0])
+        version = self._version_from_db_row(row)
         logger.debug(f"Retrieved active version for agent {agent_id}: model='{version.model}', version_name='{version.version_name}'")
         return version
     
@@ -359,7 +452,7 @@ class VersionService:
         
         version = version_result.data[0]
         
-        await client.table('agent_versions').update({
+        deactivated = await client.table('agent_versions').update({
             'is_active': False,
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('agent_id', agent_id).eq('is_active', True).execute()
@@ -369,6 +462,10 @@ class VersionService:
             'updated_at': datetime.now(timezone.utc).isoformat()
         }).eq('version_id', version_id).execute()
         
+        await version_cache.invalidate(
+            version_ids=[row['version_id'] for row in (deactivated.data or [])] + [version_id]
+        )
+        
         version_count = await self._count_versions(agent_id)
         await self._update_agent_current_version(agent_id, version_id, version_count)
         
@@ -501,6 +598,8 @@ class VersionService:
         if not result.data:
             raise Exception("Failed to update version")
         
+        await version_cache.invalidate(version_ids=[version_id])
+        
         return self._version_from_db_row(result.data[0])
 
 
@@ -58,6 +58,17 @@ async def check_health(key: str):
     structlog.contextvars.clear_contextvars()
     await redis.set(key, "healthy", ex=redis.REDIS_KEY_TTL)
 
+@dramatiq.actor
+async def summarize_knowledge_base_entry(entry_id: str):
+    """Extract and summarize an uploaded knowledge base file, storing the summary on its entry."""
+    structlog.contextvars.clear_contextvars()
+    structlog.contextvars.bind_contextvars(kb_entry_id=entry_id)
+
+    await initialize()
+    # file_processor imports this module to enqueue the actor
+    from core.knowledge_base.file_processor import FileProcessor
+    await FileProcessor().summarize_entry(entry_id)
+
 @dramatiq.actor
 async def run_agent_background(
     agent_run_id: str,
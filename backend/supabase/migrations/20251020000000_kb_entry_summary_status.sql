@@ -0,0 +1,10 @@
+-- Knowledge base summaries are generated in the background after upload
+ALTER TABLE knowledge_base_entries
+    ADD COLUMN IF NOT EXISTS summary_status VARCHAR(20) DEFAULT 'completed'
+        CHECK (summary_status IN ('pending', 'completed', 'failed'));
+
+COMMENT ON COLUMN knowledge_base_entries.summary_status IS 'Background summary generation state; summary holds a placeholder while pending';
+
+CREATE INDEX IF NOT EXISTS idx_kb_entries_summary_status
+    ON knowledge_base_entries(summary_status)
+    WHERE summary_status = 'pending';
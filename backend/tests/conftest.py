@@ -0,0 +1,9 @@
+import os
+
+# Modules such as core.sandbox.sandbox build their API clients at import time
+for name, value in {
+    "DAYTONA_API_KEY": "test",
+    "DAYTONA_SERVER_URL": "http://localhost:3000/api",
+    "DAYTONA_TARGET": "us",
+}.items():
+    os.environ.setdefault(name, value)
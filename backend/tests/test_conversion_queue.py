@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from core.sandbox.docker.conversion_queue import ConversionJob, ConversionJobManager
+
+
+def test_run_returns_result_and_forgets_job():
+    async def scenario():
+        manager = ConversionJobManager(workers=1, queue_limit=2)
+
+        async def convert(job):
+            job.report_progress(1, 2)
+            await asyncio.sleep(0)
+            job.report_progress(2, 2)
+            return {"path": "/tmp/deck.pdf", "total_slides": 2}
+
+        try:
+            result = await manager.run("pdf", convert)
+        finally:
+            await manager.stop()
+        return result, manager.jobs
+
+    result, jobs = asyncio.run(scenario())
+    assert result == {"path": "/tmp/deck.pdf", "total_slides": 2}
+    assert jobs == {}
+
+
+def test_run_reraises_converter_exception():
+    async def scenario():
+        manager = ConversionJobManager(workers=1, queue_limit=2)
+
+        async def convert(job):
+            raise FileNotFoundError("metadata.json not found")
+
+        try:
+            await manager.run("pptx", convert)
+        finally:
+            await manager.stop()
+
+    with pytest.raises(FileNotFoundError):
+        asyncio.run(scenario())
+
+
+def test_changes_while_watcher_is_busy_are_not_missed():
+    async def scenario():
+        job = ConversionJob("pdf", None)
+        seen = job.version
+        # The watcher is suspended elsewhere (e.g. at an SSE yield) while progress is reported
+        job.report_progress(1, 3)
+        started = asyncio.get_running_loop().time()
+        version = await job.wait_for_change(seen, timeout=5)
+        return version, seen, asyncio.get_running_loop().time() - started
+
+    version, seen, waited = asyncio.run(scenario())
+    assert version == seen + 1
+    assert waited < 1
+
+
+def test_wait_for_change_wakes_on_next_change():
+    async def scenario():
+        job = ConversionJob("pdf", None)
+        seen = job.version
+        waiter = asyncio.create_task(job.wait_for_change(seen, timeout=5))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+        job.set_status("running")
+        return await asyncio.wait_for(waiter, 1), seen
+
+    version, seen = asyncio.run(scenario())
+    assert version == seen + 1
@@ -0,0 +1,167 @@
+import asyncio
+import os
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from daytona_api_client_async import ApiClient, Configuration, ToolboxApi
+from daytona_sdk._async.filesystem import AsyncFileSystem
+
+from core.sandbox import file_transfer
+
+
+API_URL = "http://daytona.test/api"
+
+
+def sandbox_with_toolbox(sandbox_id="sb-1"):
+    """A sandbox whose fs is the SDK's real AsyncFileSystem, so requests are built exactly as in production."""
+    toolbox_api = ToolboxApi(ApiClient(Configuration(host=API_URL)))
+
+    async def get_root_dir():
+        return "/home/daytona"
+
+    return SimpleNamespace(id=sandbox_id, fs=AsyncFileSystem(sandbox_id, toolbox_api, get_root_dir))
+
+
+@pytest.fixture
+def toolbox(monkeypatch):
+    """Serve toolbox downloads from memory by routing every httpx client through a MockTransport."""
+    files = {}
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if not request.url.path.endswith("/toolbox/files/download"):
+            return httpx.Response(404)
+        content = files.get(request.url.params.get("path"))
+        if content is None:
+            return httpx.Response(404, json={"message": "file not found"})
+        return httpx.Response(200, content=content)
+
+    real_client = httpx.AsyncClient
+
+    def client_factory(*args, **kwargs):
+        kwargs["transport"] = httpx.MockTransport(handler)
+        return real_client(*args, **kwargs)
+
+    monkeypatch.setattr(file_transfer.httpx, "AsyncClient", client_factory)
+    return SimpleNamespace(files=files, requests=requests)
+
+
+def test_download_to_path_streams_through_toolbox(toolbox, tmp_path):
+    payload = os.urandom(3 * file_transfer.CHUNK_SIZE + 17)
+    toolbox.files["/workspace/data.bin"] = payload
+    local_path = tmp_path / "data.bin"
+
+    asyncio.run(file_transfer.download_to_path(sandbox_with_toolbox(), "/workspace/data.bin", str(local_path)))
+
+    assert local_path.read_bytes() == payload
+    request = toolbox.requests[-1]
+    assert request.method == "GET"
+    assert request.url.path == "/api/toolbox/sb-1/toolbox/files/download"
+
+
+def test_download_to_path_resolves_relative_paths_against_root(toolbox, tmp_path):
+    toolbox.files["/home/daytona/notes.txt"] = b"hello"
+    local_path = tmp_path / "notes.txt"
+
+    asyncio.run(file_transfer.download_to_path(sandbox_with_toolbox(), "notes.txt", str(local_path)))
+
+    assert local_path.read_bytes() == b"hello"
+
+
+def test_download_to_path_raises_on_missing_file(toolbox, tmp_path):
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        asyncio.run(file_transfer.download_to_path(sandbox_with_toolbox(), "/workspace/missing", str(tmp_path / "x")))
+
+
+def test_downloaded_removes_temp_file(toolbox):
+    toolbox.files["/workspace/report.pdf"] = b"%PDF-1.7"
+
+    async def read():
+        async with file_transfer.downloaded(sandbox_with_toolbox(), "/workspace/report.pdf") as local_path:
+            with open(local_path, "rb") as f:
+                return local_path, f.read()
+
+    local_path, content = asyncio.run(read())
+
+    assert content == b"%PDF-1.7"
+    assert not os.path.exists(local_path)
+
+
+def test_open_download_stream_passes_bytes_through(toolbox):
+    payload = os.urandom(2 * file_transfer.CHUNK_SIZE + 5)
+    toolbox.files["/workspace/video.mp4"] = payload
+
+    async def read():
+        length, chunks = await file_transfer.open_download_stream(sandbox_with_toolbox(), "/workspace/video.mp4")
+        return length, b"".join([chunk async for chunk in chunks])
+
+    length, content = asyncio.run(read())
+
+    assert length == len(payload)
+    assert content == payload
+
+
+def test_open_download_stream_raises_before_streaming(toolbox):
+    with pytest.raises(RuntimeError, match="HTTP 404"):
+        asyncio.run(file_transfer.open_download_stream(sandbox_with_toolbox(), "/workspace/missing"))
+
+
+class PublicOnlyFileSystem:
+    """An fs exposing only the SDK's public download overload."""
+
+    def __init__(self, files):
+        self.files = files
+        self.calls = []
+
+    async def download_file(self, remote_path, local_path, timeout):
+        self.calls.append((remote_path, timeout))
+        with open(local_path, "wb") as f:
+            f.write(self.files[remote_path])
+
+
+def test_download_to_path_falls_back_without_sdk_internals(tmp_path):
+    fs = PublicOnlyFileSystem({"/workspace/a.txt": b"public"})
+    sandbox = SimpleNamespace(id="sb-1", fs=fs)
+
+    asyncio.run(file_transfer.download_to_path(sandbox, "/workspace/a.txt", str(tmp_path / "a.txt")))
+
+    assert not file_transfer.can_stream_downloads(sandbox)
+    assert (tmp_path / "a.txt").read_bytes() == b"public"
+    assert fs.calls == [("/workspace/a.txt", file_transfer.TRANSFER_TIMEOUT_SECONDS)]
+
+
+def test_download_to_path_uses_public_api_on_other_sdk_releases(toolbox, tmp_path, monkeypatch):
+    monkeypatch.setattr(file_transfer, "_USE_TOOLBOX_WORKAROUND", False)
+    sandbox = sandbox_with_toolbox()
+    calls = []
+
+    async def download_file(remote_path, local_path, timeout):
+        calls.append(remote_path)
+        with open(local_path, "wb") as f:
+            f.write(b"public")
+
+    monkeypatch.setattr(sandbox.fs, "download_file", download_file)
+
+    asyncio.run(file_transfer.download_to_path(sandbox, "/workspace/a.txt", str(tmp_path / "a.txt")))
+
+    assert calls == ["/workspace/a.txt"]
+    assert toolbox.requests == []
+
+
+@pytest.mark.parametrize("header,size,expected", [
+    (None, 100, None),
+    ("bytes=0-9", 100, (0, 9)),
+    ("bytes=90-", 100, (90, 99)),
+    ("bytes=-10", 100, (90, 99)),
+    ("bytes=50-500", 100, (50, 99)),
+    ("bytes=0-1,5-6", 100, None),
+])
+def test_parse_range(header, size, expected):
+    assert file_transfer.parse_range(header, size) == expected
+
+
+def test_parse_range_outside_file():
+    with pytest.raises(file_transfer.RangeNotSatisfiable):
+        file_transfer.parse_range("bytes=100-", 100)
@@ -0,0 +1,80 @@
+import asyncio
+
+import pytest
+
+kb_server = pytest.importorskip("core.sandbox.docker.kb_server")
+
+
+class ScriptedKb:
+    """Replaces the kb subprocess: each call waits until released, then returns its result."""
+
+    def __init__(self):
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, args):
+        self.calls += 1
+        await self.release.wait()
+        return f"result {self.calls}"
+
+
+def make_service(tmp_path):
+    service = kb_server.KbService()
+    kb = ScriptedKb()
+    service._run_kb = kb
+    request = kb_server.SearchRequest(path=str(tmp_path), queries=["revenue"], k=5)
+    return service, kb, request
+
+
+def test_identical_searches_share_one_kb_invocation(tmp_path):
+    async def scenario():
+        service, kb, request = make_service(tmp_path)
+        searches = [asyncio.create_task(service.search(request)) for _ in range(3)]
+        await asyncio.sleep(0)
+        kb.release.set()
+        return await asyncio.gather(*searches), kb.calls, service.in_flight
+
+    results, calls, in_flight = asyncio.run(scenario())
+
+    assert results == ["result 1"] * 3
+    assert calls == 1
+    assert in_flight == {}
+
+
+def test_waiting_search_takes_over_when_the_leader_is_cancelled(tmp_path):
+    async def scenario():
+        service, kb, request = make_service(tmp_path)
+        leader = asyncio.create_task(service.search(request))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(service.search(request))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        await asyncio.sleep(0)
+        kb.release.set()
+        result = await asyncio.wait_for(follower, 1)
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return result, kb.calls, service.in_flight
+
+    result, calls, in_flight = asyncio.run(scenario())
+
+    assert result == "result 2"
+    assert calls == 2
+    assert in_flight == {}
+
+
+def test_kb_failure_reaches_every_waiting_search(tmp_path):
+    async def scenario():
+        service, _, request = make_service(tmp_path)
+
+        async def failing_kb(args):
+            await asyncio.sleep(0)
+            raise RuntimeError("index is corrupt")
+
+        service._run_kb = failing_kb
+        return await asyncio.gather(*(service.search(request) for _ in range(2)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+
+    assert [str(r) for r in results] == ["index is corrupt", "index is corrupt"]
@@ -0,0 +1,199 @@
+import asyncio
+import io
+import json
+import os
+import sys
+from contextlib import asynccontextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from core.sandbox.docker.render_cache import referenced_assets
+
+
+DOCKER_DIR = Path(__file__).resolve().parents[1] / "core" / "sandbox" / "docker"
+
+
+@pytest.fixture(scope="module")
+def pptx_router(tmp_path_factory):
+    """The sandbox's PPTX router, imported the way the sandbox server imports it (flat, from its directory)."""
+    sys.path.insert(0, str(DOCKER_DIR))
+    cwd = os.getcwd()
+    try:
+        # The router creates its output directory in the working directory on import
+        os.chdir(tmp_path_factory.mktemp("server"))
+        try:
+            module = pytest.importorskip("html_to_pptx_router")
+        finally:
+            os.chdir(cwd)
+        yield module
+    finally:
+        sys.path.remove(str(DOCKER_DIR))
+
+
+class StubBrowserPool:
+    """Hands out pages that accept the converter's page setup calls; rendering is left to StubRenderer."""
+
+    def __init__(self):
+        self.pages = 0
+
+    @asynccontextmanager
+    async def page(self, viewport=None, **context_options):
+        self.pages += 1
+
+        async def noop(*args, **kwargs):
+            return None
+
+        yield SimpleNamespace(emulate_media=noop, add_init_script=noop)
+
+
+class StubRenderer:
+    """Stands in for Chromium in analyze_slide: one text run per slide, a tiny background, and counts the calls."""
+
+    def __init__(self, pptx_router, converter, degraded=()):
+        self.pptx_router = pptx_router
+        self.converter = converter
+        self.degraded = set(degraded)
+        self.rendered = []
+        converter.analyze_slide = self.analyze_slide
+
+    async def analyze_slide(self, page, html_path, temp_dir):
+        self.rendered.append(html_path.name)
+        if html_path.name in self.degraded:
+            self.converter.degraded_slides.add(html_path)
+        background_path = temp_dir / f"clean_background_{html_path.stem}.png"
+        self.pptx_router.Image.new("RGB", (16, 9), "white").save(background_path)
+        text = self.pptx_router.TextElement(
+            text=html_path.read_text(), x=0, y=0, width=1920, height=100, font_family="Arial",
+            font_size=24, font_weight="normal", color="#000000", text_align="left", line_height=1.2, tag="h1",
+        )
+        return {"visual_elements": [], "background_path": background_path, "text_elements": [text]}
+
+
+def make_deck(deck_dir: Path, count: int):
+    deck_dir.mkdir(parents=True)
+    (deck_dir / "theme.css").write_text("body { background: url('bg.png'); }")
+    (deck_dir / "bg.png").write_bytes(b"background-v1")
+    slides = []
+    metadata = {"presentation_name": "deck", "slides": {}}
+    for number in range(1, count + 1):
+        slide = deck_dir / f"slide_{number:02d}.html"
+        slide.write_text(f'<link rel="stylesheet" href="theme.css"><h1>Slide {number}</h1>')
+        slides.append(slide)
+        metadata["slides"][str(number)] = {"filename": slide.name, "file_path": str(slide)}
+    (deck_dir / "metadata.json").write_text(json.dumps(metadata))
+    return slides
+
+
+def export_deck(pptx_router, deck_dir: Path, cache_root: Path, degraded=()):
+    """Run the real converter over the deck; returns the renderer, the converter and each slide's text."""
+    converter = pptx_router.OptimizedHTMLToPPTXConverter(str(deck_dir))
+    converter.render_cache = pptx_router.RenderCache("pptx", root=cache_root)
+    renderer = StubRenderer(pptx_router, converter, degraded)
+    pptx_bytes, total_slides, _ = asyncio.run(converter.convert_to_pptx(store_locally=False))
+    deck = pptx_router.Presentation(io.BytesIO(pptx_bytes))
+    texts = [
+        " ".join(shape.text_frame.text for shape in slide.shapes if shape.has_text_frame)
+        for slide in deck.slides
+    ]
+    assert total_slides == len(texts)
+    return renderer, converter, texts
+
+
+@pytest.fixture
+def browser_pool(pptx_router, monkeypatch):
+    pool = StubBrowserPool()
+    monkeypatch.setattr(pptx_router, "browser_pool", pool)
+    return pool
+
+
+def test_one_slide_edit_rerenders_one_slide(pptx_router, browser_pool, tmp_path):
+    slides = make_deck(tmp_path / "deck", 30)
+
+    renderer, _, _ = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+    assert len(renderer.rendered) == 30
+
+    slides[11].write_text('<link rel="stylesheet" href="theme.css"><h1>Slide 12, edited</h1>')
+    browser_pool.pages = 0
+    renderer, converter, texts = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert renderer.rendered == ["slide_12.html"]
+    assert browser_pool.pages == 1
+    assert "edited" in texts[11] and "Slide 13" in texts[12]
+    assert converter.render_cache.stats() == {"rendered": 1, "cached": 29}
+
+
+def test_unchanged_deck_is_served_from_cache(pptx_router, browser_pool, tmp_path):
+    make_deck(tmp_path / "deck", 5)
+
+    _, _, first = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+    renderer, _, second = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert renderer.rendered == []
+    assert second == first
+
+
+def test_degraded_slides_are_not_cached(pptx_router, browser_pool, tmp_path):
+    make_deck(tmp_path / "deck", 3)
+
+    export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache", degraded={"slide_02.html"})
+    renderer, _, _ = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert renderer.rendered == ["slide_02.html"]
+
+
+def test_render_settings_are_part_of_the_key(pptx_router, browser_pool, tmp_path, monkeypatch):
+    make_deck(tmp_path / "deck", 3)
+    keyed = []
+    real_slide_key = pptx_router.slide_key
+
+    def recording_slide_key(html_path, kind, settings):
+        keyed.append((html_path.name, kind, settings))
+        return real_slide_key(html_path, kind, settings)
+
+    monkeypatch.setattr(pptx_router, "slide_key", recording_slide_key)
+    export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert sorted(keyed) == [
+        (f"slide_{number:02d}.html", "pptx", pptx_router.PPTX_RENDER_SETTINGS) for number in (1, 2, 3)
+    ]
+
+    monkeypatch.setattr(pptx_router, "PPTX_RENDER_SETTINGS", {**pptx_router.PPTX_RENDER_SETTINGS, "device_scale_factor": 2})
+    renderer, _, _ = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert len(renderer.rendered) == 3
+
+
+def test_asset_referenced_from_linked_stylesheet_invalidates_slides(pptx_router, browser_pool, tmp_path):
+    make_deck(tmp_path / "deck", 3)
+
+    export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+    (tmp_path / "deck" / "bg.png").write_bytes(b"background-v2")
+    renderer, _, _ = export_deck(pptx_router, tmp_path / "deck", tmp_path / "cache")
+
+    assert len(renderer.rendered) == 3
+
+
+def test_stylesheet_assets_are_followed_one_level(tmp_path):
+    deck = tmp_path / "deck"
+    (deck / "css").mkdir(parents=True)
+    (deck / "fonts").mkdir()
+    (deck / "fonts" / "inter.woff2").write_bytes(b"font")
+    (deck / "css" / "base.css").write_text("h1 { color: red; background: url(../missing.png); }")
+    (deck / "css" / "theme.css").write_text(
+        '@import "base.css";\n'
+        "@font-face { src: url('../fonts/inter.woff2') format('woff2'); }\n"
+        "body { background: url(https://cdn.example.com/bg.png); }"
+    )
+    slide = deck / "slide_01.html"
+    html = '<link href="css/theme.css" rel="stylesheet"><p>Hi</p>'
+    slide.write_text(html)
+
+    assets = referenced_assets(slide, html)
+
+    assert assets == sorted([
+        (deck / "css" / "theme.css").resolve(),
+        (deck / "css" / "base.css").resolve(),
+        (deck / "fonts" / "inter.woff2").resolve(),
+    ])
@@ -0,0 +1,282 @@
+import asyncio
+import json
+import time
+from dataclasses import asdict
+from types import SimpleNamespace
+
+import pytest
+
+from core.sandbox import pool as pool_module
+from core.sandbox.pool import POOL_KEY, PooledSandbox, SandboxPool
+
+
+class FakeRedis:
+    """The list and key operations SandboxPool uses, backed by a dict."""
+
+    def __init__(self):
+        self.lists = {}
+        self.keys = {}
+
+    async def lpop(self, key):
+        items = self.lists.get(key) or []
+        return items.pop(0) if items else None
+
+    async def rpush(self, key, *values):
+        self.lists.setdefault(key, []).extend(values)
+        return len(self.lists[key])
+
+    async def lrange(self, key, start, end):
+        items = self.lists.get(key) or []
+        return list(items[start:] if end == -1 else items[start:end + 1])
+
+    async def lrem(self, key, count, value):
+        items = self.lists.get(key) or []
+        if value in items:
+            items.remove(value)
+            return 1
+        return 0
+
+    async def llen(self, key):
+        return len(self.lists.get(key) or [])
+
+    async def set(self, key, value, ex=None, nx=False):
+        if nx and key in self.keys:
+            return None
+        self.keys[key] = value
+        return True
+
+    async def get(self, key):
+        return self.keys.get(key)
+
+    async def expire(self, key, seconds):
+        return key in self.keys
+
+
+class FakeDaytona:
+    def __init__(self):
+        self.created = []
+        self.deleted = []
+
+    async def create_sandbox(self, password, project_id=None):
+        sandbox = SimpleNamespace(id=f"sb-{len(self.created) + 1}")
+        self.created.append(sandbox.id)
+        return sandbox
+
+    async def wait_for_sandbox_ready(self, sandbox, *args, **kwargs):
+        return 1.0
+
+    async def get_sandbox_preview_links(self, sandbox):
+        return f"https://vnc/{sandbox.id}", f"https://web/{sandbox.id}", "token"
+
+    async def delete_sandbox(self, sandbox_id):
+        self.deleted.append(sandbox_id)
+        return True
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(pool_module, "redis", fake)
+    return fake
+
+
+@pytest.fixture
+def fake_daytona(monkeypatch):
+    fake = FakeDaytona()
+    for name in ("create_sandbox", "wait_for_sandbox_ready", "get_sandbox_preview_links", "delete_sandbox"):
+        monkeypatch.setattr(pool_module, name, getattr(fake, name))
+    return fake
+
+
+@pytest.fixture
+def pool_config(monkeypatch):
+    monkeypatch.setattr(pool_module.config, "SANDBOX_POOL_SIZE", 3, raising=False)
+    monkeypatch.setattr(pool_module.config, "SANDBOX_POOL_REFILL_PER_MINUTE", 4, raising=False)
+    monkeypatch.setattr(pool_module.config, "SANDBOX_POOL_MAX_AGE_SECONDS", 600, raising=False)
+    return pool_module.config
+
+
+def pooled_entry(sandbox_id, age=0.0):
+    entry = PooledSandbox(
+        sandbox_id=sandbox_id,
+        password="pw",
+        vnc_preview=None,
+        sandbox_url=None,
+        token=None,
+        created_at=time.time() - age,
+    )
+    return json.dumps(asdict(entry))
+
+
+def test_claim_takes_oldest_idle_sandbox(fake_redis, fake_daytona, pool_config):
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-a"), pooled_entry("sb-b")]
+    pool = SandboxPool()
+
+    entry = asyncio.run(pool.claim("project-1"))
+
+    assert entry.sandbox_id == "sb-a"
+    assert entry.to_project_sandbox()["id"] == "sb-a"
+    assert [json.loads(raw)["sandbox_id"] for raw in fake_redis.lists[POOL_KEY]] == ["sb-b"]
+    assert pool.claims == 1 and pool.misses == 0
+
+
+def test_claim_retires_entries_past_max_age(fake_redis, fake_daytona, pool_config):
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-old", age=601), pooled_entry("sb-fresh")]
+    pool = SandboxPool()
+
+    async def claim():
+        entry = await pool.claim("project-1")
+        # Wait for the retire tasks started by claim() to finish
+        await asyncio.gather(*pool._retiring)
+        return entry
+
+    entry = asyncio.run(claim())
+
+    assert entry.sandbox_id == "sb-fresh"
+    assert fake_daytona.deleted == ["sb-old"]
+    assert not pool._retiring
+
+
+def test_evict_expired_only_removes_old_entries(fake_redis, fake_daytona, pool_config):
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-old", age=601), pooled_entry("sb-fresh", age=10)]
+
+    asyncio.run(SandboxPool()._evict_expired())
+
+    assert [json.loads(raw)["sandbox_id"] for raw in fake_redis.lists[POOL_KEY]] == ["sb-fresh"]
+    assert fake_daytona.deleted == ["sb-old"]
+
+
+def test_refill_is_rate_limited_per_interval(fake_redis, fake_daytona, pool_config, monkeypatch):
+    monkeypatch.setattr(pool_config, "SANDBOX_POOL_SIZE", 10, raising=False)
+    monkeypatch.setattr(pool_config, "SANDBOX_POOL_REFILL_PER_MINUTE", 8, raising=False)
+    pool = SandboxPool()
+
+    asyncio.run(pool._refill())
+
+    # 8 per minute at a 15s refill interval allows 2 creations per pass
+    assert len(fake_daytona.created) == 2
+    assert asyncio.run(fake_redis.llen(POOL_KEY)) == 2
+
+
+def test_refill_stops_at_target_size(fake_redis, fake_daytona, pool_config, monkeypatch):
+    monkeypatch.setattr(pool_config, "SANDBOX_POOL_REFILL_PER_MINUTE", 60, raising=False)
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-a")]
+    pool = SandboxPool()
+
+    asyncio.run(pool._refill())
+    asyncio.run(pool._refill())
+
+    assert len(fake_daytona.created) == 2
+    assert asyncio.run(fake_redis.llen(POOL_KEY)) == 3
+
+
+def test_empty_pool_falls_back_to_lazy_creation(fake_redis, fake_daytona, pool_config):
+    pool = SandboxPool()
+
+    assert asyncio.run(pool.claim("project-1")) is None
+    assert pool.misses == 1
+    assert fake_daytona.created == []
+
+
+def test_claim_is_disabled_without_pool_size(fake_redis, fake_daytona, pool_config, monkeypatch):
+    monkeypatch.setattr(pool_config, "SANDBOX_POOL_SIZE", 0, raising=False)
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-a")]
+    pool = SandboxPool()
+
+    assert asyncio.run(pool.claim("project-1")) is None
+    assert asyncio.run(fake_redis.llen(POOL_KEY)) == 1
+
+
+def test_redis_errors_fall_back_to_lazy_creation(fake_redis, fake_daytona, pool_config, monkeypatch):
+    async def broken_lpop(key):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(fake_redis, "lpop", broken_lpop)
+    pool = SandboxPool()
+
+    assert asyncio.run(pool.claim("project-1")) is None
+    assert pool.misses == 1
+
+
+class FakeProjectsTable:
+    def __init__(self, db):
+        self.db = db
+        self.values = None
+
+    def update(self, values):
+        self.values = values
+        return self
+
+    def eq(self, column, value):
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(self.db.update_delay)
+        self.db.calls.append("update")
+        return SimpleNamespace(data=[{"project_id": "project-1", **self.values}])
+
+
+class FakeThreadManager:
+    """The db client and loader SandboxToolsBase._resolve_sandbox uses."""
+
+    def __init__(self, update_delay):
+        self.calls = []
+        self.update_delay = update_delay
+        self.primed = {}
+        self.db = SimpleNamespace(client=self._client())
+        self.loader = SimpleNamespace(load=self._load, prime=self._prime)
+
+    async def _client(self):
+        return SimpleNamespace(table=lambda name: FakeProjectsTable(self))
+
+    async def _load(self, table, column, key):
+        self.calls.append("load")
+        return {"project_id": key, "sandbox": {}}
+
+    def _prime(self, table, column, key, row):
+        self.primed[key] = row
+
+
+def test_first_tool_call_with_warm_pool_only_waits_for_db_update(fake_redis, fake_daytona, pool_config, monkeypatch):
+    tool_base = pytest.importorskip("core.sandbox.tool_base")
+    from core.sandbox.registry import SandboxRegistry
+
+    fake_redis.lists[POOL_KEY] = [pooled_entry("sb-warm")]
+    thread_manager = FakeThreadManager(update_delay=0.01)
+    labels = {}
+
+    async def get_or_start_sandbox(sandbox_id, ready_timeout=None):
+        thread_manager.calls.append("get_or_start")
+
+        async def set_labels(value):
+            labels[sandbox_id] = value
+
+        return SimpleNamespace(id=sandbox_id, set_labels=set_labels)
+
+    async def slow_create_sandbox(password, project_id=None):
+        await asyncio.sleep(1)
+        return await fake_daytona.create_sandbox(password, project_id)
+
+    monkeypatch.setattr(tool_base, "sandbox_pool", SandboxPool())
+    monkeypatch.setattr(tool_base, "sandbox_registry", SandboxRegistry())
+    monkeypatch.setattr(tool_base, "get_or_start_sandbox", get_or_start_sandbox)
+    monkeypatch.setattr(tool_base, "create_sandbox", slow_create_sandbox)
+
+    async def first_tool_call():
+        tool = tool_base.SandboxToolsBase("project-1", thread_manager)
+        started = time.monotonic()
+        sandbox = await tool._ensure_sandbox()
+        elapsed = time.monotonic() - started
+        await asyncio.gather(*tool_base.SandboxToolsBase._label_tasks)
+        return tool, sandbox, elapsed
+
+    tool, sandbox, elapsed = asyncio.run(first_tool_call())
+
+    assert sandbox.id == "sb-warm" and tool.sandbox_id == "sb-warm" and tool._sandbox_pass == "pw"
+    # Nothing was created or waited on: the only slow step left is the project update
+    assert fake_daytona.created == []
+    assert thread_manager.calls == ["load", "update", "get_or_start"]
+    assert elapsed < 0.5
+    assert thread_manager.primed["project-1"]["sandbox"]["id"] == "sb-warm"
+    assert labels == {"sb-warm": {"id": "project-1"}}
+    assert fake_redis.lists[POOL_KEY] == []